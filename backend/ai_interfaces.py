@@ -5,7 +5,7 @@ This module defines abstract interfaces for AI services to reduce tight coupling
 and enable easier testing, mocking, and service provider switching.
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Optional, Protocol
+from typing import AsyncIterator, Dict, Optional, Protocol
 import asyncio
 
 
@@ -48,6 +48,19 @@ class ChatService(Protocol):
         """
         ...
 
+    def chat_stream(self, query: str, language: str = 'en') -> AsyncIterator[str]:
+        """
+        Stream a response to a user query chunk by chunk.
+
+        Args:
+            query: User's question or message
+            language: Language code of the query
+
+        Returns:
+            Async iterator of response text chunks; closing it stops generation
+        """
+        ...
+
 
 class MLASummaryService(Protocol):
     """Protocol for generating MLA information summaries."""
@@ -1,11 +1,10 @@
 import json
 import os
 import warnings
-from typing import Optional, Callable, Any
+from typing import Optional, Callable, Any, AsyncIterator, List, Union
 from functools import lru_cache
 import logging
 import asyncio
-from async_lru import alru_cache
 
 # Suppress deprecation warnings from google.generativeai
 # We use a context manager to ensure we only suppress warnings for this specific import
@@ -14,6 +13,7 @@ with warnings.catch_warnings():
     import google.generativeai as genai
 
 from backend.exceptions import AIServiceException
+from backend.semantic_cache import SemanticCache, SEMANTIC_CACHE_CHAT_THRESHOLD
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -30,6 +30,27 @@ genai.configure(api_key=api_key)
 
 RESPONSIBILITY_MAP_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "responsibility_map.json")
 
+# Max pending issues packed into one action plan prompt (1 disables batching)
+ACTION_PLAN_BATCH_SIZE = int(os.environ.get("ACTION_PLAN_BATCH_SIZE", "8"))
+ACTION_PLAN_KEYS = ("whatsapp", "email_subject", "email_body", "x_post")
+
+_action_plan_stats = {"batches": 0, "batched_plans": 0, "element_fallbacks": 0}
+
+# Gemini answers reused for reworded chat queries and repeated reports
+chat_cache = SemanticCache("chat", threshold=SEMANTIC_CACHE_CHAT_THRESHOLD)
+# Plans name the reported location, so only exact (normalized) repeats share one
+action_plan_cache = SemanticCache("action_plan", threshold=None)
+
+
+def _plan_partition(category: str, language: str) -> tuple:
+    return (language or "en", str(category).strip().lower())
+
+
+@lru_cache(maxsize=None)
+def _get_gemini_model(model_name: str = 'gemini-1.5-flash'):
+    """GenerativeModel holds no per-request state; build it once per model name."""
+    return genai.GenerativeModel(model_name)
+
 async def retry_with_exponential_backoff(
     func: Callable,
     max_retries: int = 3,
@@ -108,10 +129,26 @@ def build_x_post(issue_description: str, category: str) -> str:
     return f"{base_message} #CivicIssue #VishwaGuru"
 
 
-async def generate_action_plan(issue_description: str, category: str, language: str = 'en', image_path: Optional[str] = None) -> dict:
+def _strip_code_fences(text: str) -> str:
+    """Remove markdown code blocks Gemini sometimes wraps JSON in."""
+    text = text.strip()
+    if "```json" in text:
+         text = text.split("```json")[1].split("```")[0]
+    elif "```" in text:
+         text = text.split("```")[1].split("```")[0]
+    return text.strip()
+
+
+async def generate_action_plan(issue_description: str, category: str, language: str = 'en', image_path: Optional[str] = None, max_retries: int = 3) -> dict:
     """
     Generates an action plan (WhatsApp message, Email draft) using Gemini with retry logic.
+    Plans for repeated reports (same normalized text, category and language) come from action_plan_cache.
     """
+    partition = _plan_partition(category, language)
+    cached = action_plan_cache.get(issue_description, partition)
+    if cached is not None:
+        return dict(cached)
+
     # Generate X post content first using the logic
     x_post_text = build_x_post(issue_description, category)
 
@@ -125,7 +162,7 @@ async def generate_action_plan(issue_description: str, category: str, language:
 
     async def _generate_with_gemini() -> dict:
         """Inner function to generate action plan with Gemini"""
-        model = genai.GenerativeModel('gemini-1.5-flash')
+        model = _get_gemini_model()
 
         prompt = f"""
         You are a civic action assistant. A user has reported a civic issue.
@@ -143,15 +180,7 @@ async def generate_action_plan(issue_description: str, category: str, language:
         """
 
         response = await model.generate_content_async(prompt)
-        text_response = response.text.strip()
-
-        # Cleanup if markdown code blocks are returned
-        if "```json" in text_response:
-             text_response = text_response.split("```json")[1].split("```")[0]
-        elif "```" in text_response:
-             text_response = text_response.split("```")[1].split("```")[0]
-
-        text_response = text_response.strip()
+        text_response = _strip_code_fences(response.text)
 
         try:
             plan = json.loads(text_response)
@@ -165,7 +194,9 @@ async def generate_action_plan(issue_description: str, category: str, language:
         return plan
 
     try:
-        return await retry_with_exponential_backoff(_generate_with_gemini, max_retries=3)
+        plan = await retry_with_exponential_backoff(_generate_with_gemini, max_retries=max_retries)
+        action_plan_cache.set(issue_description, dict(plan), partition)
+        return plan
     except AIServiceException:
         # Already properly wrapped, re-raise
         raise
@@ -177,16 +208,140 @@ async def generate_action_plan(issue_description: str, category: str, language:
             details={"error": str(e)}
         ) from e
 
-@alru_cache(maxsize=100)
-async def chat_with_civic_assistant(query: str) -> str:
+def _validate_action_plan(element: Any, x_post_text: str) -> Optional[dict]:
+    """A plan from a batch response, or None if the element is unusable."""
+    if not isinstance(element, dict):
+        return None
+    plan = {key: element.get(key) for key in ACTION_PLAN_KEYS}
+    if not all(isinstance(plan[key], str) and plan[key].strip() for key in ("whatsapp", "email_subject", "email_body")):
+        return None
+    if not isinstance(plan["x_post"], str) or not plan["x_post"].strip():
+        plan["x_post"] = x_post_text
+    return plan
+
+
+async def generate_action_plans_batch(issues: List[dict], max_retries: int = 0) -> List[Union[dict, Exception]]:
     """
-    Chat with the civic assistant using Gemini with retry logic.
+    Generates action plans for several issues with a single Gemini call.
+
+    `issues` are dicts with "description", "category" and optionally
+    "language" and "image_path". The model answers with a JSON array; each
+    element is validated separately, and issues whose element is missing or
+    malformed are regenerated with a per-issue generate_action_plan call.
+    Issues with a plan in action_plan_cache are left out of the prompt.
+
+    Returns one plan per issue, in order, or the exception of a failed
+    per-issue fallback.
+
+    Raises:
+        AIServiceException: If the batch request itself fails
     """
-    async def _chat_with_gemini() -> str:
-        """Inner function to chat with Gemini"""
-        model = genai.GenerativeModel('gemini-1.5-flash')
+    plans: List[Union[dict, Exception, None]] = []
+    for issue in issues:
+        cached = action_plan_cache.get(issue["description"], _plan_partition(issue["category"], issue.get("language", "en")))
+        plans.append(dict(cached) if cached is not None else None)
+
+    uncached = [index for index, plan in enumerate(plans) if plan is None]
+    if uncached:
+        generated = await _generate_action_plans_batch([issues[index] for index in uncached], max_retries)
+        for index, plan in zip(uncached, generated):
+            plans[index] = plan
+    return plans
+
+
+async def _generate_action_plans_batch(issues: List[dict], max_retries: int) -> List[Union[dict, Exception]]:
+    """One Gemini prompt for uncached issues, with per-element validation and fallback."""
+    x_posts = [build_x_post(issue["description"], issue["category"]) for issue in issues]
+    issue_lines = "\n".join(
+        f"""
+        Issue {number}:
+        Category: {issue["category"]}
+        Language: {issue.get("language", "en")}
+        Description: {issue["description"]}
+        Preferred X.com authority tagging: {x_post}"""
+        for number, (issue, x_post) in enumerate(zip(issues, x_posts), start=1)
+    )
+
+    async def _generate_batch_with_gemini() -> str:
+        """Inner function to generate all plans with one Gemini request"""
+        model = _get_gemini_model()
 
         prompt = f"""
+        You are a civic action assistant. Users have reported the civic issues listed below.
+
+        For each issue, generate the following messages in that issue's language:
+        1. A concise WhatsApp message (max 200 chars) that can be sent to authorities.
+        2. A formal but firm email subject.
+        3. A formal email body (max 150 words) addressed to the relevant authority (e.g., Municipal Commissioner, Police, etc. based on category).
+        4. A concise X.com post text (max 240 chars), tagging the preferred authority handle if one is given.
+        {issue_lines}
+
+        Return strictly valid JSON: an array with one object per issue, in the same order, each with keys
+        "id" (the issue number), "whatsapp", "email_subject", "email_body", "x_post".
+        Do not use markdown code blocks. Just the raw JSON string.
+        """
+
+        response = await model.generate_content_async(prompt)
+        return _strip_code_fences(response.text)
+
+    try:
+        text_response = await retry_with_exponential_backoff(_generate_batch_with_gemini, max_retries=max_retries)
+    except AIServiceException:
+        raise
+    except Exception as e:
+        raise AIServiceException("Failed to generate action plans", service="Gemini", details={"error": str(e)}) from e
+
+    try:
+        elements = json.loads(text_response)
+    except json.JSONDecodeError:
+        logger.error(f"Gemini returned invalid JSON for a batch of {len(issues)} action plans")
+        elements = []
+    if not isinstance(elements, list):
+        elements = []
+
+    plans: List[Optional[dict]] = [None] * len(issues)
+    for position, element in enumerate(elements):
+        # Prefer the echoed issue number, fall back to the array position
+        number = element.get("id") if isinstance(element, dict) else None
+        index = number - 1 if isinstance(number, int) else position
+        if 0 <= index < len(issues) and plans[index] is None:
+            plans[index] = _validate_action_plan(element, x_posts[index])
+            if plans[index] is not None:
+                issue = issues[index]
+                action_plan_cache.set(
+                    issue["description"], dict(plans[index]), _plan_partition(issue["category"], issue.get("language", "en"))
+                )
+
+    missing = [index for index, plan in enumerate(plans) if plan is None]
+    _action_plan_stats["batches"] += 1
+    _action_plan_stats["batched_plans"] += len(issues) - len(missing)
+    _action_plan_stats["element_fallbacks"] += len(missing)
+
+    if missing:
+        logger.warning(f"{len(missing)} of {len(issues)} batched action plans were unusable, generating them individually")
+        fallbacks = await asyncio.gather(*(
+            generate_action_plan(
+                issues[index]["description"], issues[index]["category"], issues[index].get("language", "en"),
+                issues[index].get("image_path"), max_retries=max_retries
+            )
+            for index in missing
+        ), return_exceptions=True)
+        for index, plan in zip(missing, fallbacks):
+            plans[index] = plan
+
+    return plans
+
+
+def get_action_plan_stats() -> dict:
+    return {**_action_plan_stats, "batch_size": ACTION_PLAN_BATCH_SIZE}
+
+
+def get_semantic_cache_stats() -> dict:
+    return {"chat": chat_cache.get_stats(), "action_plans": action_plan_cache.get_stats()}
+
+
+def _chat_prompt(query: str) -> str:
+    return f"""
         You are VishwaGuru, a helpful civic assistant for Indian citizens.
         User Query: {query}
 
@@ -195,11 +350,26 @@ async def chat_with_civic_assistant(query: str) -> str:
         Keep answers concise and helpful.
         """
 
-        response = await model.generate_content_async(prompt)
+
+async def chat_with_civic_assistant(query: str, language: str = 'en') -> str:
+    """
+    Chat with the civic assistant using Gemini with retry logic.
+    Answers are reused for reworded queries in the same language via chat_cache.
+    """
+    cached = chat_cache.get(query, language)
+    if cached is not None:
+        return cached
+
+    async def _chat_with_gemini() -> str:
+        """Inner function to chat with Gemini"""
+        model = _get_gemini_model()
+        response = await model.generate_content_async(_chat_prompt(query))
         return response.text.strip()
 
     try:
-        return await retry_with_exponential_backoff(_chat_with_gemini, max_retries=2)
+        answer = await retry_with_exponential_backoff(_chat_with_gemini, max_retries=2)
+        chat_cache.set(query, answer, language)
+        return answer
     except AIServiceException:
         # Already properly wrapped, re-raise
         raise
@@ -210,3 +380,68 @@ async def chat_with_civic_assistant(query: str) -> str:
             service="Gemini",
             details={"error": str(e)}
         ) from e
+
+
+async def stream_chat_with_civic_assistant(query: str, language: str = 'en') -> AsyncIterator[str]:
+    """
+    Stream the civic assistant's answer as Gemini generates it.
+
+    A cached answer is yielded as a single chunk. Otherwise chunks are yielded
+    as they arrive and the joined answer is added to chat_cache once the
+    stream completes. If the consumer stops early (client disconnect, task
+    cancellation) the upstream Gemini stream is cancelled and nothing is cached.
+
+    Raises:
+        AIServiceException: If the stream cannot be started or breaks midway
+    """
+    cached = chat_cache.get(query, language)
+    if cached is not None:
+        yield cached
+        return
+
+    async def _start_stream():
+        """Inner function to open the Gemini stream; only this part is retried"""
+        model = _get_gemini_model()
+        return await model.generate_content_async(_chat_prompt(query), stream=True)
+
+    try:
+        response = await retry_with_exponential_backoff(_start_stream, max_retries=2)
+    except AIServiceException:
+        raise
+    except Exception as e:
+        raise AIServiceException("Failed to start chat stream", service="Gemini", details={"error": str(e)}) from e
+
+    chunks = response.__aiter__()
+    parts: List[str] = []
+    completed = False
+    try:
+        async for chunk in chunks:
+            text = chunk.text
+            if text:
+                parts.append(text)
+                yield text
+        completed = True
+    except Exception as e:
+        logger.error(f"Gemini chat stream failed after {len(parts)} chunks: {e}")
+        raise AIServiceException("Chat stream interrupted", service="Gemini", details={"error": str(e)}) from e
+    finally:
+        if not completed:
+            await _cancel_stream(response, chunks)
+
+    answer = "".join(parts).strip()
+    if answer:
+        chat_cache.set(query, answer, language)
+
+
+async def _cancel_stream(response: Any, chunks: Any) -> None:
+    """Stop an unfinished Gemini stream so the upstream RPC stops generating."""
+    aclose = getattr(chunks, "aclose", None)
+    if aclose is not None:
+        try:
+            await aclose()
+        except Exception as e:
+            logger.debug(f"Closing chat stream failed: {e}")
+    # The gRPC call behind an AsyncGenerateContentResponse
+    call = getattr(response, "_iterator", None)
+    if callable(getattr(call, "cancel", None)):
+        call.cancel()
@@ -7,6 +7,8 @@ from telegram.ext import ApplicationBuilder, ContextTypes, CommandHandler, Messa
 from backend.database import engine, SessionLocal
 
 from backend.models import Base, Issue
+from backend.issue_indexes import index_new_issue
+from backend.tasks import assign_issue_cluster_background
 
 
 # Enable logging
@@ -80,6 +82,7 @@ def save_issue_to_db(description, category, photo_path):
         db.add(new_issue)
         db.commit()
         db.refresh(new_issue)
+        index_new_issue(new_issue)
         return new_issue.id
     except Exception as e:
         logging.error(f"Error saving to DB: {e}")
@@ -103,6 +106,9 @@ async def receive_category(update: Update, context: ContextTypes.DEFAULT_TYPE):
             f"We will generate an action plan for you soon.",
             reply_markup=ReplyKeyboardRemove()
         )
+
+        # Same incremental cluster placement as issues reported through the API
+        await asyncio.to_thread(assign_issue_cluster_background, issue_id)
     except Exception:
         await update.message.reply_text("Sorry, something went wrong while saving your issue.")
         return ConversationHandler.END
@@ -1,72 +1,255 @@
 import time
 import logging
 import threading
-from typing import Any, Optional
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+EVICTION_POLICIES = ("lru", "lfu", "tinylfu")
+
+
+class _DecayingLFU:
+    """
+    O(1) LFU bookkeeping using frequency buckets (each an insertion-ordered dict,
+    so ties are broken by age). Every `decay_interval` accesses all frequencies
+    are halved, so entries that were popular long ago eventually become evictable.
+    """
+
+    def __init__(self, decay_interval: int):
+        self._decay_interval = max(1, decay_interval)
+        self._freq: Dict[str, int] = {}
+        self._buckets: Dict[int, OrderedDict] = {}
+        self._min_freq = 0
+        self._accesses = 0
+
+    def add(self, key: str) -> None:
+        self._freq[key] = 1
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min_freq = 1
+        self._tick()
+
+    def touch(self, key: str) -> None:
+        freq = self._freq[key]
+        self._unlink(key, freq)
+        self._freq[key] = freq + 1
+        self._buckets.setdefault(freq + 1, OrderedDict())[key] = None
+        self._tick()
+
+    def remove(self, key: str) -> None:
+        freq = self._freq.pop(key, None)
+        if freq is not None:
+            self._unlink(key, freq)
+
+    def victim(self) -> Optional[str]:
+        if not self._buckets:
+            return None
+        if self._min_freq not in self._buckets:
+            self._min_freq = min(self._buckets)
+        return next(iter(self._buckets[self._min_freq]))
+
+    def clear(self) -> None:
+        self._freq.clear()
+        self._buckets.clear()
+        self._min_freq = 0
+
+    def _unlink(self, key: str, freq: int) -> None:
+        bucket = self._buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[freq]
+
+    def _tick(self) -> None:
+        self._accesses += 1
+        if self._accesses < self._decay_interval:
+            return
+        # Amortized O(1): one O(n) rebuild every decay_interval accesses
+        self._accesses = 0
+        buckets: Dict[int, OrderedDict] = {}
+        for freq in sorted(self._buckets):
+            decayed = max(1, freq // 2)
+            target = buckets.setdefault(decayed, OrderedDict())
+            for key in self._buckets[freq]:
+                target[key] = None
+                self._freq[key] = decayed
+        self._buckets = buckets
+        self._min_freq = min(buckets) if buckets else 0
+
+
+class _FrequencySketch:
+    """
+    Count-min sketch of recent access frequencies for TinyLFU admission.
+    4-bit saturating counters; all counters are halved after `10 * capacity`
+    increments so the estimate tracks recent popularity.
+    """
+
+    # Odd 64-bit multipliers; multiply-shift hashing gives one independent index per row
+    _SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+    _MAX_COUNT = 15
+
+    def __init__(self, capacity: int):
+        self._bits = max(4, (max(1, capacity) * 4 - 1).bit_length())
+        self._table = [[0] * (1 << self._bits) for _ in self._SEEDS]
+        self._sample_size = max(1, capacity) * 10
+        self._additions = 0
+
+    def _indexes(self, key: Hashable):
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        shift = 64 - self._bits
+        return [((h * seed) & 0xFFFFFFFFFFFFFFFF) >> shift for seed in self._SEEDS]
+
+    def increment(self, key: Hashable) -> None:
+        for row, index in zip(self._table, self._indexes(key)):
+            if row[index] < self._MAX_COUNT:
+                row[index] += 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self._additions //= 2
+            for row in self._table:
+                for i, count in enumerate(row):
+                    row[i] = count >> 1
+
+    def estimate(self, key: Hashable) -> int:
+        return min(row[index] for row, index in zip(self._table, self._indexes(key)))
+
 class ThreadSafeCache:
     """
     Thread-safe cache implementation with TTL and memory management.
     Fixes race conditions and implements proper cache expiration.
+
+    Every operation is O(1) amortized:
+    - entries live in an OrderedDict kept in recency order (LRU at the front)
+    - a second OrderedDict keeps write order; since the TTL is uniform, expired
+      entries are always at its front and are dropped lazily
+    - eviction_policy picks the victim when the cache is full:
+        "lru"     least recently used
+        "lfu"     least frequently used, with periodic frequency halving
+        "tinylfu" LRU victim, but a new key is only admitted if a frequency
+                  sketch says it is more popular than the victim
     """
     
-    def __init__(self, ttl: int = 300, max_size: int = 100):
-        self._data = {}
-        self._timestamps = {}
+    def __init__(self, ttl: int = 300, max_size: int = 100, eviction_policy: str = "lru"):
+        if eviction_policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy '{eviction_policy}', expected one of {EVICTION_POLICIES}")
+        self._data: OrderedDict = OrderedDict()  # key -> value, least recently used first
+        self._timestamps: OrderedDict = OrderedDict()  # key -> write time, oldest write first
         self._ttl = ttl  # Time to live in seconds
         self._max_size = max_size  # Maximum number of cache entries
         self._lock = threading.RLock()  # Reentrant lock for thread safety
-        self._access_count = {}  # Track access frequency for LRU eviction
+        self._policy = eviction_policy
+        self._lfu = _DecayingLFU(decay_interval=max_size * 10) if eviction_policy == "lfu" else None
+        self._sketch = _FrequencySketch(max_size) if eviction_policy == "tinylfu" else None
+        self._key_tags: Dict[str, Set[str]] = {}  # Tags of each cached key
+        self._tag_keys: Dict[str, Set[str]] = {}  # Cached keys for each tag
+        # Tags last used for a key, kept after removal so misses can be attributed
+        self._known_tags: Dict[str, Set[str]] = {}
+        self._tag_stats: Dict[str, Dict[str, int]] = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._rejections = 0
         
     def get(self, key: str = "default") -> Optional[Any]:
         """
         Thread-safe get operation with automatic cleanup.
         """
         with self._lock:
-            current_time = time.time()
-            
-            # Check if key exists and is not expired
-            if key in self._data and key in self._timestamps:
-                if current_time - self._timestamps[key] < self._ttl:
-                    # Update access count for LRU
-                    self._access_count[key] = self._access_count.get(key, 0) + 1
+            timestamp = self._timestamps.get(key)
+            if timestamp is not None:
+                if time.time() - timestamp < self._ttl:
+                    self._touch(key)
+                    self._hits += 1
+                    self._record(self._key_tags.get(key), "hits")
                     return self._data[key]
-                else:
-                    # Expired entry - remove it
-                    self._remove_key(key)
-            
+                # Expired entry - remove it
+                self._expire(key)
+
+            if self._sketch is not None:
+                self._sketch.increment(key)
+            self._misses += 1
+            self._record(self._known_tags.get(key), "misses")
             return None
     
-    def set(self, data: Any, key: str = "default") -> None:
+    def set(self, data: Any, key: str = "default", tags: Iterable[str] = ()) -> None:
         """
         Thread-safe set operation with memory management.
+        Tags group related keys so they can be invalidated together.
         """
         with self._lock:
             current_time = time.time()
             
-            # Clean up expired entries before adding new one
-            self._cleanup_expired()
+            # Drop expired entries from the front of the write order
+            self._cleanup_expired(current_time)
             
-            # If cache is full, evict least recently used entry
-            if len(self._data) >= self._max_size and key not in self._data:
-                self._evict_lru()
-            
-            # Set new data atomically
-            self._data[key] = data
+            if key in self._data:
+                self._untag(key)
+                self._data[key] = data
+                self._touch(key)
+                self._timestamps.move_to_end(key)
+            else:
+                if self._sketch is not None:
+                    self._sketch.increment(key)
+                # If cache is full, make room according to the eviction policy
+                if len(self._data) >= self._max_size and not self._make_room(key):
+                    self._rejections += 1
+                    logger.debug(f"Cache admission rejected: key={key}")
+                    return
+                self._data[key] = data
+                if self._lfu is not None:
+                    self._lfu.add(key)
             self._timestamps[key] = current_time
-            self._access_count[key] = 1
+
+            tag_set = set(tags)
+            if tag_set:
+                self._key_tags[key] = tag_set
+                for tag in tag_set:
+                    self._tag_keys.setdefault(tag, set()).add(key)
+                self._remember_tags(key, tag_set)
             
             logger.debug(f"Cache set: key={key}, size={len(self._data)}")
+
+    def update(self, key: str, fn: Callable[[Any], Any]) -> bool:
+        """
+        Thread-safe in-place patch of a cached value, keeping its original timestamp.
+
+        Returns:
+            True if the key was cached and patched, False otherwise
+        """
+        with self._lock:
+            if key not in self._data:
+                return False
+            if time.time() - self._timestamps[key] >= self._ttl:
+                self._expire(key)
+                return False
+            self._data[key] = fn(self._data[key])
+            logger.debug(f"Cache updated in place: key={key}")
+            return True
     
     def invalidate(self, key: str = "default") -> None:
         """
         Thread-safe invalidation of specific key.
         """
         with self._lock:
-            self._remove_key(key)
+            self._remove_key(key, reason="invalidations")
             logger.debug(f"Cache invalidated: key={key}")
+
+    def invalidate_tags(self, *tags: str) -> int:
+        """
+        Thread-safe invalidation of every key carrying any of the given tags.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys.update(self._tag_keys.get(tag, ()))
+            for key in keys:
+                self._remove_key(key, reason="invalidations")
+            logger.debug(f"Cache invalidated {len(keys)} entries for tags={tags}")
+            return len(keys)
     
     def clear(self) -> None:
         """
@@ -75,7 +258,10 @@ class ThreadSafeCache:
         with self._lock:
             self._data.clear()
             self._timestamps.clear()
-            self._access_count.clear()
+            if self._lfu is not None:
+                self._lfu.clear()
+            self._key_tags.clear()
+            self._tag_keys.clear()
             logger.debug("Cache cleared")
     
     def get_stats(self) -> dict:
@@ -84,56 +270,135 @@ class ThreadSafeCache:
         """
         with self._lock:
             current_time = time.time()
-            expired_count = sum(
-                1 for ts in self._timestamps.values() 
-                if current_time - ts >= self._ttl
-            )
+            expired_count = 0
+            for ts in self._timestamps.values():
+                if current_time - ts < self._ttl:
+                    break
+                expired_count += 1
             
             return {
                 "total_entries": len(self._data),
                 "expired_entries": expired_count,
                 "max_size": self._max_size,
-                "ttl_seconds": self._ttl
+                "ttl_seconds": self._ttl,
+                "eviction_policy": self._policy,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "admission_rejections": self._rejections,
+                "tags": {
+                    tag: {**counts, "entries": len(self._tag_keys.get(tag, ()))}
+                    for tag, counts in self._tag_stats.items()
+                }
             }
     
-    def _remove_key(self, key: str) -> None:
+    def _touch(self, key: str) -> None:
+        """
+        Internal method to record an access for the eviction policy.
+        Must be called within lock context.
+        """
+        if self._lfu is not None:
+            self._lfu.touch(key)
+        else:
+            self._data.move_to_end(key)
+            if self._sketch is not None:
+                self._sketch.increment(key)
+
+    def _make_room(self, key: str) -> bool:
+        """
+        Internal method to evict one entry for a new key.
+        Must be called within lock context.
+
+        Returns:
+            False if TinyLFU admission rejected the new key
+        """
+        if self._lfu is not None:
+            victim = self._lfu.victim()
+        else:
+            victim = next(iter(self._data), None)
+        if victim is None:
+            return True
+
+        if self._sketch is not None and self._sketch.estimate(key) <= self._sketch.estimate(victim):
+            return False
+
+        self._remove_key(victim, reason="evictions")
+        self._evictions += 1
+        logger.debug(f"Evicted cache entry ({self._policy}): {victim}")
+        return True
+
+    def _remove_key(self, key: str, reason: Optional[str] = None) -> None:
         """
         Internal method to remove a key from all tracking dictionaries.
         Must be called within lock context.
         """
-        self._data.pop(key, None)
+        if key not in self._data:
+            return
+        if reason is not None:
+            self._record(self._key_tags.get(key), reason)
+        del self._data[key]
         self._timestamps.pop(key, None)
-        self._access_count.pop(key, None)
-    
-    def _cleanup_expired(self) -> None:
+        if self._lfu is not None:
+            self._lfu.remove(key)
+        self._untag(key)
+
+    def _expire(self, key: str) -> None:
         """
-        Internal method to clean up expired entries.
+        Internal method to drop an entry past its TTL, whether found on read, patch or cleanup.
         Must be called within lock context.
         """
-        current_time = time.time()
-        expired_keys = [
-            key for key, timestamp in self._timestamps.items()
-            if current_time - timestamp >= self._ttl
-        ]
-        
-        for key in expired_keys:
-            self._remove_key(key)
-        
-        if expired_keys:
-            logger.debug(f"Cleaned up {len(expired_keys)} expired cache entries")
+        self._remove_key(key, reason="evictions")
+        self._expirations += 1
+
+    def _untag(self, key: str) -> None:
+        """
+        Internal method to drop a key from the tag index.
+        Must be called within lock context.
+        """
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+
+    def _remember_tags(self, key: str, tags: Set[str]) -> None:
+        """
+        Internal method to remember a key's tags for miss attribution (bounded).
+        Must be called within lock context.
+        """
+        self._known_tags.pop(key, None)
+        self._known_tags[key] = tags
+        while len(self._known_tags) > self._max_size * 10:
+            del self._known_tags[next(iter(self._known_tags))]
+
+    def _record(self, tags: Optional[Set[str]], counter: str) -> None:
+        """
+        Internal method to bump a per-tag counter.
+        Must be called within lock context.
+        """
+        for tag in tags or ():
+            counts = self._tag_stats.setdefault(
+                tag, {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+            )
+            counts[counter] += 1
     
-    def _evict_lru(self) -> None:
+    def _cleanup_expired(self, current_time: float) -> None:
         """
-        Internal method to evict least recently used entry.
+        Internal method to clean up expired entries.
         Must be called within lock context.
         """
-        if not self._access_count:
-            return
+        expired = 0
+        while self._timestamps:
+            key, timestamp = next(iter(self._timestamps.items()))
+            if current_time - timestamp < self._ttl:
+                break
+            self._expire(key)
+            expired += 1
         
-        # Find key with lowest access count
-        lru_key = min(self._access_count.keys(), key=lambda k: self._access_count[k])
-        self._remove_key(lru_key)
-        logger.debug(f"Evicted LRU cache entry: {lru_key}")
+        if expired:
+            logger.debug(f"Cleaned up {expired} expired cache entries")
 
 class SimpleCache:
     """
@@ -152,6 +417,14 @@ class SimpleCache:
     def invalidate(self):
         self._cache.invalidate("default")
 
+# Tags for entries in recent_issues_cache
+RECENT_ISSUES_TAG = "recent_issues"  # Paginated /api/issues/recent responses
+STATS_TAG = "stats"
+LEADERBOARD_TAG = "leaderboard"
+
+def issue_tag(issue_id: int) -> str:
+    """Tag for cached responses that include a given issue."""
+    return f"issue:{issue_id}"
+
 # Global instances with improved configuration
 recent_issues_cache = ThreadSafeCache(ttl=300, max_size=20)  # 5 minutes TTL, max 20 entries
-user_upload_cache = ThreadSafeCache(ttl=3600, max_size=1000)  # 1 hour TTL for upload limits
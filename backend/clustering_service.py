@@ -0,0 +1,268 @@
+"""
+Incremental Clustering Service for spatially related issues.
+
+Maintains a persistent cluster assignment (Issue.cluster_id) for active issues
+with coordinates. New issues are assigned in O(neighbors) time using an
+in-memory grid index instead of re-running DBSCAN over the whole city:
+
+- no active issue within eps: the issue starts a new cluster
+- neighbors in a single cluster: the issue joins it
+- neighbors in several clusters: the issue bridges them and the clusters are
+  merged into the oldest (lowest) cluster id
+
+With min_samples=1 this yields the same connected components as DBSCAN over
+the same points. Clusters only ever grow or merge; resolving an issue removes
+it from future neighbor lookups but does not split its cluster.
+"""
+import os
+import logging
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from backend.models import Issue
+from backend.spatial_index import SpatialIndex, INDEXED_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Maximum distance (meters) between two issues in the same cluster
+CLUSTER_EPS_METERS = float(os.environ.get("CLUSTER_EPS_METERS", "30"))
+
+
+class IncrementalClusterService:
+    """
+    Thread-safe incremental single-linkage clusterer backed by Issue.cluster_id.
+    """
+
+    def __init__(self, eps_meters: float = CLUSTER_EPS_METERS):
+        self.eps_meters = eps_meters
+        self._index = SpatialIndex()
+        self._cluster_of: Dict[int, int] = {}
+        self._members: Dict[int, Set[int]] = {}
+        self._next_cluster_id = 1
+        self._lock = threading.RLock()
+        self._warm = False
+
+    @property
+    def is_warm(self) -> bool:
+        return self._warm
+
+    def cluster_of(self, issue_id: int) -> Optional[int]:
+        with self._lock:
+            return self._cluster_of.get(issue_id)
+
+    def _neighbor_clusters(self, lat: float, lon: float, exclude_id: int) -> Set[int]:
+        """Must be called within lock context."""
+        clusters = set()
+        for status in INDEXED_STATUSES:
+            for entry, _ in self._index.query_radius(lat, lon, self.eps_meters, status=status):
+                if entry.id != exclude_id and entry.id in self._cluster_of:
+                    clusters.add(self._cluster_of[entry.id])
+        return clusters
+
+    def _place(self, row, cluster_id: int) -> None:
+        """Must be called within lock context."""
+        self._index.upsert(row)
+        self._cluster_of[row.id] = cluster_id
+        self._members.setdefault(cluster_id, set()).add(row.id)
+        self._next_cluster_id = max(self._next_cluster_id, cluster_id + 1)
+
+    def _assign(self, row) -> Tuple[int, Dict[int, int]]:
+        """
+        Assign one issue in memory. Must be called within lock context.
+
+        Returns:
+            Tuple (cluster_id, merges) where merges maps every absorbed cluster
+            id to the cluster it was merged into
+        """
+        neighbors = self._neighbor_clusters(row.latitude, row.longitude, row.id)
+
+        if not neighbors:
+            target = self._next_cluster_id
+            self._place(row, target)
+            return target, {}
+
+        target = min(neighbors)
+        merges = {}
+        for cluster_id in neighbors - {target}:
+            members = self._members.pop(cluster_id, set())
+            for member_id in members:
+                self._cluster_of[member_id] = target
+            self._members.setdefault(target, set()).update(members)
+            merges[cluster_id] = target
+            logger.info(f"Merged cluster {cluster_id} into {target} via issue {row.id}")
+
+        self._place(row, target)
+        return target, merges
+
+    def warm(self, db: Session) -> None:
+        """
+        Load persisted assignments and assign any active issue that has none yet.
+        """
+        with self._lock:
+            self._cluster_of = {}
+            self._members = {}
+
+            max_cluster = db.query(func.max(Issue.cluster_id)).scalar()
+            self._next_cluster_id = (max_cluster or 0) + 1
+
+            rows = db.query(
+                Issue.id,
+                Issue.description,
+                Issue.category,
+                Issue.latitude,
+                Issue.longitude,
+                Issue.upvotes,
+                Issue.created_at,
+                Issue.status,
+                Issue.cluster_id
+            ).filter(
+                Issue.status.in_(INDEXED_STATUSES),
+                Issue.latitude.isnot(None),
+                Issue.longitude.isnot(None)
+            ).order_by(Issue.id).all()
+
+            self._index.load([])
+            unassigned = []
+            for row in rows:
+                if row.cluster_id is None:
+                    unassigned.append(row)
+                else:
+                    self._place(row, row.cluster_id)
+
+            # Persisted clusters may have been bridged by issues that were never
+            # assigned, so replay those through the incremental path.
+            own_assignments = []
+            merges: Dict[int, int] = {}
+            for row in unassigned:
+                cluster_id, row_merges = self._assign(row)
+                own_assignments.append({"id": row.id, "cluster_id": cluster_id})
+                merges.update(row_merges)
+
+            if own_assignments:
+                db.bulk_update_mappings(Issue, own_assignments)
+            self._persist_merges(db, merges)
+            db.commit()
+
+            self._warm = True
+            logger.info(
+                f"Cluster service warmed: {len(rows)} issues, {len(self._members)} clusters, "
+                f"{len(unassigned)} newly assigned"
+            )
+
+    def assign_issue(self, db: Session, issue) -> Optional[int]:
+        """
+        Assign a newly created issue to a cluster and persist the result.
+
+        Returns:
+            The cluster id, or None if the issue has no coordinates or the
+            service has not been warmed yet (warm-up will pick it up).
+        """
+        if issue.latitude is None or issue.longitude is None:
+            return None
+
+        with self._lock:
+            if not self._warm:
+                return None
+            if issue.id in self._cluster_of:
+                return self._cluster_of[issue.id]
+
+            cluster_id, merges = self._assign(issue)
+
+            db.query(Issue).filter(Issue.id == issue.id).update(
+                {Issue.cluster_id: cluster_id}, synchronize_session=False
+            )
+            self._persist_merges(db, merges)
+            db.commit()
+
+        return cluster_id
+
+    def _persist_merges(self, db: Session, merges: Dict[int, int]) -> None:
+        """Relabel merged clusters in the database. Must be called within lock context."""
+        # Resolve chains (a -> b, b -> c) so every old id points at its final cluster
+        for old_id in list(merges):
+            target = merges[old_id]
+            while target in merges:
+                target = merges[target]
+            merges[old_id] = target
+
+        for old_id, target in merges.items():
+            db.query(Issue).filter(Issue.cluster_id == old_id).update(
+                {Issue.cluster_id: target}, synchronize_session=False
+            )
+
+    def update_status(self, issue_id: int, status: str) -> None:
+        """
+        Keep the neighbor grid in sync with status changes. Inactive issues stop
+        attracting new members but keep their persisted cluster id.
+        """
+        with self._lock:
+            if issue_id not in self._cluster_of:
+                return
+            if status in INDEXED_STATUSES:
+                self._index.update_status(issue_id, status)
+                return
+            self._index.remove(issue_id)
+            cluster_id = self._cluster_of.pop(issue_id)
+            members = self._members.get(cluster_id)
+            if members is not None:
+                members.discard(issue_id)
+                if not members:
+                    del self._members[cluster_id]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._cluster_of = {}
+            self._members = {}
+            self._warm = False
+
+
+def load_clusters(db: Session, min_size: int = 1, limit: Optional[int] = None) -> List[List]:
+    """
+    Fetch active clustered issues grouped by their persisted cluster id.
+
+    Returns:
+        List of clusters (each a list of projected issue rows), largest first
+    """
+    rows = db.query(
+        Issue.id,
+        Issue.description,
+        Issue.category,
+        Issue.latitude,
+        Issue.longitude,
+        Issue.upvotes,
+        Issue.created_at,
+        Issue.status,
+        Issue.cluster_id
+    ).filter(
+        Issue.status.in_(INDEXED_STATUSES),
+        Issue.cluster_id.isnot(None)
+    ).all()
+
+    grouped: Dict[int, List] = {}
+    for row in rows:
+        grouped.setdefault(row.cluster_id, []).append(row)
+
+    clusters = [members for members in grouped.values() if len(members) >= min_size]
+    clusters.sort(key=lambda members: (-len(members), members[0].cluster_id))
+    if limit is not None:
+        clusters = clusters[:limit]
+    return clusters
+
+
+def warm_cluster_service(service: Optional[IncrementalClusterService] = None) -> None:
+    """Blocking warm-up; run in a threadpool from async code."""
+    from backend.database import SessionLocal
+
+    service = service or cluster_service
+    db = SessionLocal()
+    try:
+        service.warm(db)
+    finally:
+        db.close()
+
+
+# Global process-wide instance
+cluster_service = IncrementalClusterService()
@@ -0,0 +1,324 @@
+"""
+Content-addressed cache of detection results, shared by every detector endpoint.
+
+Results are keyed by (detector, model version, hash of the normalized image),
+so the same photo submitted again - a Telegram forward, a retry, a second
+user - is answered without running inference, whichever backend (local
+model or Hugging Face API) produced the first result. Concurrent requests
+for the same key wait for one inference instead of each running their own.
+
+The in-memory tier is an LRU bounded by the serialized size of the results
+(DETECTION_CACHE_MAX_BYTES) rather than by entry count, and entries expire
+after DETECTION_CACHE_TTL. Empty results, and the placeholder payloads the
+HF detectors return on API errors or an open circuit (see is_empty_result),
+expire after DETECTION_CACHE_EMPTY_TTL and never reach the disk tier, so an
+outage is not cached for long.
+
+Set DETECTION_CACHE_DISK_PATH to add a SQLite tier that survives restarts
+and is shared by workers on the same host.
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+from fastapi.concurrency import run_in_threadpool
+
+from backend.image_envelope import ImageEnvelope
+from backend.model_export import MODEL_RUNTIME, MODEL_EXPORT_INT8
+from backend.local_clip_service import USE_LOCAL_CLIP, LOCAL_CLIP_MODEL
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+DETECTION_CACHE_ENABLED = os.environ.get("DETECTION_CACHE_ENABLED", "true").lower() == "true"
+DETECTION_CACHE_TTL = int(os.environ.get("DETECTION_CACHE_TTL", "86400"))
+DETECTION_CACHE_EMPTY_TTL = int(os.environ.get("DETECTION_CACHE_EMPTY_TTL", "300"))
+DETECTION_CACHE_MAX_BYTES = int(os.environ.get("DETECTION_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+DETECTION_CACHE_DISK_PATH = os.environ.get("DETECTION_CACHE_DISK_PATH", "")
+DETECTION_CACHE_DISK_MAX_BYTES = int(os.environ.get("DETECTION_CACHE_DISK_MAX_BYTES", str(256 * 1024 * 1024)))
+# Bump to drop cached results after a model or label change
+DETECTION_MODEL_VERSION = os.environ.get("DETECTION_MODEL_VERSION", "1")
+
+# Disk tier size is enforced every this many writes
+_DISK_PRUNE_EVERY = 100
+
+
+def default_model_version() -> str:
+    """Model version part of the cache key: the configured version plus the local runtimes."""
+    runtime = f"{MODEL_RUNTIME}-int8" if MODEL_RUNTIME == "onnx" and MODEL_EXPORT_INT8 else MODEL_RUNTIME
+    if USE_LOCAL_CLIP:
+        runtime += f"+{LOCAL_CLIP_MODEL}"
+    return f"{DETECTION_MODEL_VERSION}/{runtime}"
+
+
+def image_key(image: Union[ImageEnvelope, bytes]) -> str:
+    """Content hash of an upload: normalized pixels for envelopes, raw bytes otherwise."""
+    if isinstance(image, ImageEnvelope):
+        return image.content_hash
+    return hashlib.sha256(image).hexdigest()
+
+
+def is_empty_result(result: Any) -> bool:
+    """
+    True for results that may stand for a failed call rather than a real answer:
+    nothing detected, an {"error": ...} payload, a per-detector dict without any
+    detections (scan-all), or the zero-confidence "unknown" of the classifiers
+    (smart scan, severity, waste).
+    """
+    if not result:
+        return True
+    if isinstance(result, dict):
+        if "error" in result or result.get("confidence") == 0:
+            return True
+        return all(not value for value in result.values())
+    return False
+
+
+class _DiskTier:
+    """SQLite key/value store of serialized results with expiry times."""
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS detection_results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_detection_results_created ON detection_results (created_at)")
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM detection_results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= time.time():
+                self._conn.execute("DELETE FROM detection_results WHERE key = ?", (key,))
+                return None
+            return row[0], row[1]
+
+    def set(self, key: str, value: str, expires_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO detection_results (key, value, size, created_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), time.time(), expires_at)
+            )
+            self._writes += 1
+            if self._writes % _DISK_PRUNE_EVERY == 0:
+                self._prune()
+
+    def _prune(self) -> None:
+        self._conn.execute("DELETE FROM detection_results WHERE expires_at <= ?", (time.time(),))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM detection_results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop the oldest entries until the tier is back at 90% of its budget
+        excess = total - int(self.max_bytes * 0.9)
+        rows = self._conn.execute("SELECT key, size FROM detection_results ORDER BY created_at")
+        doomed = []
+        for key, size in rows:
+            if excess <= 0:
+                break
+            doomed.append((key,))
+            excess -= size
+        self._conn.executemany("DELETE FROM detection_results WHERE key = ?", doomed)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM detection_results"
+            ).fetchone()
+        return {"path": self.path, "entries": entries, "bytes": size, "max_bytes": self.max_bytes}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM detection_results")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class DetectionResultCache:
+    """
+    Two-tier (memory, optional disk) cache of JSON-serializable detection results.
+    """
+
+    def __init__(self, max_bytes: int = DETECTION_CACHE_MAX_BYTES, ttl: int = DETECTION_CACHE_TTL,
+                 empty_ttl: int = DETECTION_CACHE_EMPTY_TTL, disk_path: str = DETECTION_CACHE_DISK_PATH,
+                 disk_max_bytes: int = DETECTION_CACHE_DISK_MAX_BYTES, enabled: bool = DETECTION_CACHE_ENABLED):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.empty_ttl = empty_ttl
+        self.enabled = enabled
+        self._entries: OrderedDict = OrderedDict()  # key -> (serialized value, expires_at), LRU first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._disk = _DiskTier(disk_path, disk_max_bytes) if disk_path and enabled else None
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "oversized": 0
+        }
+
+    @staticmethod
+    def make_key(detector: str, image: Union[ImageEnvelope, bytes], model_version: Optional[str] = None) -> str:
+        return f"{detector}:{model_version or default_model_version()}:{image_key(image)}"
+
+    async def get_or_compute(self, detector: str, image: Union[ImageEnvelope, bytes],
+                             compute: Callable[[], Awaitable[Any]], model_version: Optional[str] = None,
+                             is_empty: Callable[[Any], bool] = is_empty_result) -> Any:
+        """
+        Return the cached result for this image and detector, or run `compute()`
+        once and cache its result. Exceptions are not cached; results for which
+        `is_empty` is true only get the short empty TTL.
+        """
+        if not self.enabled:
+            return await compute()
+
+        key = self.make_key(detector, image, model_version)
+        cached = self._get_memory(key)
+        if cached is not None:
+            return cached
+
+        # Another request for the same photo is already running inference
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            with self._lock:
+                self._stats["coalesced"] += 1
+            try:
+                return json.loads(await asyncio.shield(pending))
+            except asyncio.CancelledError:
+                if pending.cancelled() and not asyncio.current_task().cancelling():
+                    # The request running inference was cancelled (client went away); take over
+                    return await self.get_or_compute(detector, image, compute, model_version, is_empty)
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            serialized = await self._get_disk(key)
+            if serialized is None:
+                with self._lock:
+                    self._stats["misses"] += 1
+                result = await compute()
+                serialized = json.dumps(result)
+                await self._store(key, serialized, empty=is_empty(result))
+            future.set_result(serialized)
+            return json.loads(serialized)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters see the exception; don't warn about it going unretrieved
+            future.exception()
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+    def _get_memory(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            serialized, expires_at = entry
+            if expires_at <= time.time():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            self._stats["memory_hits"] += 1
+        # Deserialize per hit so callers can't mutate the cached value
+        return json.loads(serialized)
+
+    async def _get_disk(self, key: str) -> Optional[str]:
+        if self._disk is None:
+            return None
+        try:
+            row = await run_in_threadpool(self._disk.get, key)
+        except sqlite3.Error as e:
+            logger.warning(f"Detection cache disk read failed: {e}")
+            return None
+        if row is None:
+            return None
+        serialized, expires_at = row
+        self._set_memory(key, serialized, expires_at)
+        with self._lock:
+            self._stats["disk_hits"] += 1
+        return serialized
+
+    async def _store(self, key: str, serialized: str, empty: bool) -> None:
+        expires_at = time.time() + (self.empty_ttl if empty else self.ttl)
+        self._set_memory(key, serialized, expires_at)
+        if self._disk is not None and not empty:
+            try:
+                await run_in_threadpool(self._disk.set, key, serialized, expires_at)
+            except sqlite3.Error as e:
+                logger.warning(f"Detection cache disk write failed: {e}")
+
+    def _set_memory(self, key: str, serialized: str, expires_at: float) -> None:
+        size = len(serialized)
+        with self._lock:
+            self._drop(key)
+            # A single result should never flush a large part of the cache
+            if size > self.max_bytes // 8:
+                self._stats["oversized"] += 1
+                return
+            self._entries[key] = (serialized, expires_at)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                victim = next(iter(self._entries))
+                self._drop(victim)
+                self._stats["evictions"] += 1
+
+    def _drop(self, key: str) -> None:
+        """Must be called within lock context."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[0])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self._disk is not None:
+            self._disk.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = {
+                **self._stats,
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "model_version": default_model_version()
+            }
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["coalesced"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 3) if lookups else 0.0
+        stats["disk"] = self._disk.stats() if self._disk is not None else None
+        return stats
+
+
+detection_cache = DetectionResultCache()
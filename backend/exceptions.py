@@ -68,6 +68,20 @@ class ServiceUnavailableException(VishwaGuruException):
             details=details or {"service": service}
         )
 
+class InferencePoolBusyException(ServiceUnavailableException):
+    """Exception for a full inference worker queue (back-pressure)"""
+
+    def __init__(self, details: Optional[Dict[str, Any]] = None):
+        super().__init__("Inference", details=details)
+        self.error_code = "INFERENCE_POOL_BUSY"
+
+class CircuitOpenException(ServiceUnavailableException):
+    """Exception for calls short-circuited by an open circuit breaker"""
+
+    def __init__(self, service: str, details: Optional[Dict[str, Any]] = None):
+        super().__init__(service, details=details)
+        self.error_code = "CIRCUIT_OPEN"
+
 class FileUploadException(VishwaGuruException):
     """Exception for file upload errors"""
 
@@ -163,7 +177,8 @@ async def http_exception_handler(request: Request, exc: HTTPException) -> JSONRe
             error=exc.detail,
             error_code=f"HTTP_{exc.status_code}",
             details={"status_code": exc.status_code}
-        ).model_dump(mode='json')
+        ).model_dump(mode='json'),
+        headers=getattr(exc, "headers", None)
     )
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError) -> JSONResponse:
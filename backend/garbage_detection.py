@@ -1,6 +1,9 @@
 import logging
 import threading
 
+from backend.image_envelope import as_pil_image
+from backend.model_export import load_yolo_model
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -8,16 +11,23 @@ logger = logging.getLogger(__name__)
 _model = None
 _model_lock = threading.Lock()
 
+# Using keremberke/yolov8n-garbage-segmentation as it follows the naming convention
+# of the existing pothole model (keremberke/yolov8n-pothole-segmentation).
+MODEL_NAME = "yolov8n-garbage-segmentation"
+
+def load_torch_model():
+    """Load the garbage model's PyTorch weights from the Hugging Face Hub."""
+    from ultralyticsplus import YOLO
+    return YOLO(f'keremberke/{MODEL_NAME}')
+
 def load_model():
     """
     Loads the YOLO model lazily.
+    Served through ONNX Runtime / OpenVINO when MODEL_RUNTIME selects it.
     """
     logger.info("Loading Garbage Detection Model...")
     try:
-        from ultralyticsplus import YOLO
-        # Using keremberke/yolov8n-garbage-segmentation as it follows the naming convention
-        # of the existing pothole model (keremberke/yolov8n-pothole-segmentation).
-        model = YOLO('keremberke/yolov8n-garbage-segmentation')
+        model = load_yolo_model(MODEL_NAME, load_torch_model, task="segment")
 
         model.overrides['conf'] = 0.25
         model.overrides['iou'] = 0.45
@@ -43,7 +53,8 @@ def detect_garbage(image_source):
     Detects garbage in an image.
 
     Args:
-        image_source: Path to image file, URL, or numpy array (from cv2)
+        image_source: Path to image file, URL, numpy array (from cv2), PIL Image
+            or ImageEnvelope (its already decoded pixels are used)
 
     Returns:
         List of detections. Each detection is a dict with 'box', 'confidence', 'label'.
@@ -55,7 +66,7 @@ def detect_garbage(image_source):
 
     # perform inference
     try:
-        results = model.predict(image_source, stream=False)
+        results = model.predict(as_pil_image(image_source), stream=False)
         result = results[0] # Single image
 
         detections = []
@@ -1,12 +1,13 @@
 """
 Concrete implementations of AI service interfaces using Gemini AI.
 """
-from typing import Dict, Optional
+from typing import AsyncIterator, Dict, Optional
 import asyncio
 from backend.ai_interfaces import ActionPlanService, ChatService, MLASummaryService
 from backend.ai_service import (
     generate_action_plan as _generate_action_plan,
-    chat_with_civic_assistant as _chat_with_civic_assistant
+    chat_with_civic_assistant as _chat_with_civic_assistant,
+    stream_chat_with_civic_assistant as _stream_chat_with_civic_assistant
 )
 from backend.gemini_summary import generate_mla_summary as _generate_mla_summary
 from backend.exceptions import AIServiceException
@@ -43,6 +44,15 @@ class GeminiChatService(ChatService):
         """
         return await _chat_with_civic_assistant(query)
 
+    def chat_stream(self, query: str, language: str = 'en') -> AsyncIterator[str]:
+        """
+        Stream chat response chunks from Gemini AI.
+
+        Raises:
+            AIServiceException: If AI service fails
+        """
+        return _stream_chat_with_civic_assistant(query, language)
+
 
 class GeminiMLASummaryService(MLASummaryService):
     """Gemini-based implementation of MLA summary generation."""
@@ -14,6 +14,7 @@ from backend.database import SessionLocal
 from backend.routing_service import RoutingService
 from backend.sla_config_service import SLAConfigService
 from backend.escalation_engine import EscalationEngine
+from backend.issue_indexes import sync_issue_status
 
 class GrievanceService:
     """
@@ -179,6 +180,7 @@ class GrievanceService:
                 grievance.resolved_at = datetime.now(timezone.utc)
 
             # Sync with Issue if linked
+            synced_issue = None
             if grievance.issue_id:
                 issue = db.query(Issue).filter(Issue.id == grievance.issue_id).first()
                 if issue:
@@ -193,6 +195,7 @@ class GrievanceService:
 
                     if new_issue_status:
                         issue.status = new_issue_status
+                        synced_issue = (issue.id, new_issue_status)
                         if new_issue_status == "resolved":
                             issue.resolved_at = datetime.now(timezone.utc)
                         elif new_issue_status == "in_progress":
@@ -202,6 +205,8 @@ class GrievanceService:
                                 issue.assigned_to = grievance.assigned_authority
 
             db.commit()
+            if synced_issue:
+                sync_issue_status(*synced_issue)
             return True
 
         except Exception as e:
@@ -1,11 +1,14 @@
 import os
-import io
 import httpx
 import base64
-from typing import Union, List, Dict, Any
+from typing import Union, List, Dict, Any, Optional, Iterable
 from PIL import Image
 import logging
 
+from backend.hf_client import hf_client
+from backend.image_envelope import ImageEnvelope, as_image_bytes
+from backend.local_clip_service import local_clip_engine
+
 logger = logging.getLogger(__name__)
 
 # HF_TOKEN should be set in environment variables
@@ -35,7 +38,7 @@ WHISPER_API_URL = "https://router.huggingface.co/models/openai/whisper-large-v3-
 
 async def _make_request(client, url, payload):
     try:
-        response = await client.post(url, headers=headers, json=payload, timeout=20.0)
+        response = await hf_client.post(client, url, headers=headers, json=payload, timeout=20.0)
         if response.status_code != 200:
             logger.error(f"HF API Error ({url}): {response.status_code} - {response.text}")
             return []
@@ -44,13 +47,9 @@ async def _make_request(client, url, payload):
         logger.error(f"HF API Request Exception: {e}")
         return []
 
-def _prepare_image_bytes(image: Union[Image.Image, bytes]) -> bytes:
-    if isinstance(image, bytes):
-        return image
-    img_byte_arr = io.BytesIO()
-    fmt = image.format if image.format else 'JPEG'
-    image.save(img_byte_arr, format=fmt)
-    return img_byte_arr.getvalue()
+def _prepare_image_bytes(image: Union[Image.Image, ImageEnvelope, bytes]) -> bytes:
+    # Envelopes carry their JPEG encoding, so an upload is never encoded twice
+    return as_image_bytes(image)
 
 async def query_hf_api(image_bytes, labels, client=None):
     """
@@ -68,78 +67,216 @@ async def query_hf_api(image_bytes, labels, client=None):
     async with httpx.AsyncClient() as new_client:
         return await _make_request(new_client, CLIP_API_URL, payload)
 
-async def _detect_clip_generic(image: Union[Image.Image, bytes], labels: List[str], target_labels: List[str], client: httpx.AsyncClient = None):
+async def classify_zero_shot(image: Union[Image.Image, ImageEnvelope, bytes], labels: List[str], client: httpx.AsyncClient = None):
+    """
+    Zero-shot scores for `labels` in the HF API response format. Served by the
+    local CLIP engine once it is loaded, otherwise by the HF API.
+    """
+    if local_clip_engine.is_loaded:
+        try:
+            return await local_clip_engine.classify_async(image, labels)
+        except Exception as e:
+            logger.error(f"Local CLIP classification failed, using HF API: {e}")
+    img_bytes = _prepare_image_bytes(image)
+    return await query_hf_api(img_bytes, labels, client=client)
+
+def _clip_detections(results, target_labels: List[str]) -> List[Dict[str, Any]]:
+    if not isinstance(results, list):
+         return []
+
+    detected = []
+    for res in results:
+        if isinstance(res, dict) and res.get('label') in target_labels and res.get('score', 0) > 0.4:
+             detected.append({
+                 "label": res['label'],
+                 "confidence": res['score'],
+                 "box": [] # CLIP doesn't provide boxes, but frontend expects this structure
+             })
+    return detected
+
+async def _detect_clip_generic(image: Union[Image.Image, ImageEnvelope, bytes], labels: List[str], target_labels: List[str], client: httpx.AsyncClient = None):
     try:
-        img_bytes = _prepare_image_bytes(image)
-        results = await query_hf_api(img_bytes, labels, client=client)
-
-        if not isinstance(results, list):
-             return []
-
-        detected = []
-        for res in results:
-            if isinstance(res, dict) and res.get('label') in target_labels and res.get('score', 0) > 0.4:
-                 detected.append({
-                     "label": res['label'],
-                     "confidence": res['score'],
-                     "box": [] # CLIP doesn't provide boxes, but frontend expects this structure
-                 })
-        return detected
+        results = await classify_zero_shot(image, labels, client=client)
+        return _clip_detections(results, target_labels)
     except Exception as e:
         logger.error(f"HF Detection Error: {e}")
         return []
 
+def _split_label_scores(results: List[Dict[str, Any]], groups: Dict[str, List[str]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Split a CLIP result over the union of several label sets back into one
+    result per set. CLIP scores each label independently and softmaxes over
+    the candidates, so renormalizing a set's scores to sum to 1 gives the
+    same result as querying that set on its own.
+    """
+    scores = {}
+    for res in results:
+        if isinstance(res, dict) and 'label' in res:
+            scores[res['label']] = res.get('score', 0)
+
+    split = {}
+    for name, labels in groups.items():
+        present = [(label, scores[label]) for label in labels if label in scores]
+        total = sum(score for _, score in present)
+        present.sort(key=lambda item: item[1], reverse=True)
+        split[name] = [{"label": label, "score": score / total if total else 0.0} for label, score in present]
+    return split
+
+async def query_clip_label_groups(image: Union[Image.Image, ImageEnvelope, bytes], groups: Dict[str, List[str]], client: httpx.AsyncClient = None) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """
+    Classifies the image against several label sets with a single CLIP
+    request. Returns each set's results, ranked and renormalized as if it
+    had been queried alone, or None if the API response is not a list.
+    """
+    union = list(dict.fromkeys(label for labels in groups.values() for label in labels))
+    results = await classify_zero_shot(image, union, client=client)
+
+    if not isinstance(results, list):
+        return None
+    return _split_label_scores(results, groups)
+
 # --- Specific Detectors ---
 
-async def detect_illegal_parking_clip(image: Union[Image.Image, bytes], client: httpx.AsyncClient = None):
-    labels = ["illegal parking", "car blocking driveway", "double parked", "car on sidewalk", "legal parking", "empty street"]
-    targets = ["illegal parking", "car blocking driveway", "double parked", "car on sidewalk"]
+# Label sets of the zero-shot CLIP detectors: detector -> (candidate labels, labels reported as detections)
+CLIP_DETECTORS = {
+    "illegal-parking": (
+        ["illegal parking", "car blocking driveway", "double parked", "car on sidewalk", "legal parking", "empty street"],
+        ["illegal parking", "car blocking driveway", "double parked", "car on sidewalk"]
+    ),
+    "street-light": (
+        ["broken streetlight", "dark street", "street light off", "working streetlight", "daytime"],
+        ["broken streetlight", "dark street", "street light off"]
+    ),
+    "fire": (
+        ["fire", "smoke", "flames", "burning", "normal scene", "safe"],
+        ["fire", "smoke", "flames", "burning"]
+    ),
+    "stray-animal": (
+        ["stray dog", "stray cow", "cattle on road", "animal", "empty road"],
+        ["stray dog", "stray cow", "cattle on road", "animal"]
+    ),
+    "blocked-road": (
+        ["blocked road", "road debris", "construction block", "traffic jam", "clear road"],
+        ["blocked road", "road debris", "construction block"]
+    ),
+    "tree-hazard": (
+        ["fallen tree", "broken branch", "hanging branch", "healthy tree", "no tree"],
+        ["fallen tree", "broken branch", "hanging branch"]
+    ),
+    "pest": (
+        ["rat", "cockroach", "mosquito swarm", "pest infestation", "clean", "no pests"],
+        ["rat", "cockroach", "mosquito swarm", "pest infestation"]
+    ),
+    "water-leak": (
+        ["water leak", "burst pipe", "flooded floor", "puddle", "dry floor", "no water"],
+        ["water leak", "burst pipe", "flooded floor", "puddle"]
+    ),
+    "accessibility": (
+        ["blocked wheelchair ramp", "stairs without ramp", "broken ramp", "accessible path", "wheelchair accessible", "clear path"],
+        ["blocked wheelchair ramp", "stairs without ramp", "broken ramp"]
+    ),
+    "crowd-density": (
+        ["dense crowd", "dangerous overcrowding", "sparse crowd", "empty space", "safe crowd level"],
+        # We want to detect high density
+        ["dense crowd", "dangerous overcrowding"]
+    ),
+    "graffiti": (
+        ["artistic mural", "street art", "graffiti tag", "vandalism", "clean wall"],
+        ["artistic mural", "street art", "graffiti tag", "vandalism"]
+    ),
+    "traffic-sign": (
+        ["damaged traffic sign", "graffiti on sign", "bent sign", "faded sign", "clear traffic sign"],
+        ["damaged traffic sign", "graffiti on sign", "bent sign", "faded sign"]
+    ),
+    "abandoned-vehicle": (
+        ["abandoned car", "rusted vehicle", "car with flat tires", "wrecked car", "normal parked car"],
+        ["abandoned car", "rusted vehicle", "car with flat tires", "wrecked car"]
+    ),
+}
+
+SEVERITY_LABELS = ["critical emergency", "high urgency", "medium urgency", "low urgency", "safe situation"]
+
+SMART_SCAN_LABELS = [
+    "pothole", "garbage", "flooded street", "fire accident",
+    "fallen tree", "stray animal", "blocked road", "broken streetlight",
+    "illegal parking", "graffiti vandalism", "normal street"
+]
+
+WASTE_LABELS = ["plastic bottle", "glass bottle", "metal can", "paper cardboard", "organic food waste", "electronic waste", "general trash"]
+
+CIVIC_EYE_LABELS = {
+    # 1. Safety
+    "safety": ["safe area", "unsafe area", "dangerous situation", "secure environment"],
+    # 2. Cleanliness
+    "cleanliness": ["clean street", "dirty street", "garbage piled up", "spotless area"],
+    # 3. Infrastructure
+    "infrastructure": ["good infrastructure", "broken infrastructure", "potholes", "well maintained road"],
+}
+
+def all_clip_label_sets() -> List[List[str]]:
+    """Every label set the CLIP classifiers in this module use."""
+    return [labels for labels, _ in CLIP_DETECTORS.values()] + [
+        SEVERITY_LABELS, SMART_SCAN_LABELS, WASTE_LABELS, *CIVIC_EYE_LABELS.values()
+    ]
+
+async def scan_all_clip(image: Union[Image.Image, ImageEnvelope, bytes], client: httpx.AsyncClient = None, detectors: Optional[Iterable[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Runs every CLIP detector (or the named subset) with one API request over
+    the union of their labels. Returns detections per detector, the same as
+    calling each detector separately.
+    """
+    names = list(CLIP_DETECTORS) if detectors is None else list(detectors)
+    unknown = [name for name in names if name not in CLIP_DETECTORS]
+    if unknown:
+        raise ValueError(f"Unknown CLIP detectors: {unknown}")
+
+    try:
+        split = await query_clip_label_groups(image, {name: CLIP_DETECTORS[name][0] for name in names}, client=client)
+    except Exception as e:
+        logger.error(f"HF Scan-All Error: {e}")
+        split = None
+    if split is None:
+        return {name: [] for name in names}
+    return {name: _clip_detections(split[name], CLIP_DETECTORS[name][1]) for name in names}
+
+async def detect_illegal_parking_clip(image: Union[Image.Image, ImageEnvelope, bytes], client: httpx.AsyncClient = None):
+    labels, targets = CLIP_DETECTORS["illegal-parking"]
     return await _detect_clip_generic(image, labels, targets, client)
 
-async def detect_street_light_clip(image: Union[Image.Image, bytes], client: httpx.AsyncClient = None):
-    labels = ["broken streetlight", "dark street", "street light off", "working streetlight", "daytime"]
-    targets = ["broken streetlight", "dark street", "street light off"]
+async def detect_street_light_clip(image: Union[Image.Image, ImageEnvelope, bytes], client: httpx.AsyncClient = None):
+    labels, targets = CLIP_DETECTORS["street-light"]
     return await _detect_clip_generic(image, labels, targets, client)
 
-async def detect_fire_clip(image: Union[Image.Image, bytes], client: httpx.AsyncClient = None):
-    labels = ["fire", "smoke", "flames", "burning", "normal scene", "safe"]
-    targets = ["fire", "smoke", "flames", "burning"]
+async def detect_fire_clip(image: Union[Image.Image, ImageEnvelope, bytes], client: httpx.AsyncClient = None):
+    labels, targets = CLIP_DETECTORS["fire"]
     return await _detect_clip_generic(image, labels, targets, client)
 
-async def detect_stray_animal_clip(image: Union[Image.Image, bytes], client: httpx.AsyncClient = None):
-    labels = ["stray dog", "stray cow", "cattle on road", "animal", "empty road"]
-    targets = ["stray dog", "stray cow", "cattle on road", "animal"]
+async def detect_stray_animal_clip(image: Union[Image.Image, ImageEnvelope, bytes], client: httpx.AsyncClient = None):
+    labels, targets = CLIP_DETECTORS["stray-animal"]
     return await _detect_clip_generic(image, labels, targets, client)
 
-async def detect_blocked_road_clip(image: Union[Image.Image, bytes], client: httpx.AsyncClient = None):
-    labels = ["blocked road", "road debris", "construction block", "traffic jam", "clear road"]
-    targets = ["blocked road", "road debris", "construction block"]
+async def detect_blocked_road_clip(image: Union[Image.Image, ImageEnvelope, bytes], client: httpx.AsyncClient = None):
+    labels, targets = CLIP_DETECTORS["blocked-road"]
     return await _detect_clip_generic(image, labels, targets, client)
 
-async def detect_tree_hazard_clip(image: Union[Image.Image, bytes], client: httpx.AsyncClient = None):
-    labels = ["fallen tree", "broken branch", "hanging branch", "healthy tree", "no tree"]
-    targets = ["fallen tree", "broken branch", "hanging branch"]
+async def detect_tree_hazard_clip(image: Union[Image.Image, ImageEnvelope, bytes], client: httpx.AsyncClient = None):
+    labels, targets = CLIP_DETECTORS["tree-hazard"]
     return await _detect_clip_generic(image, labels, targets, client)
 
-async def detect_pest_clip(image: Union[Image.Image, bytes], client: httpx.AsyncClient = None):
-    labels = ["rat", "cockroach", "mosquito swarm", "pest infestation", "clean", "no pests"]
-    targets = ["rat", "cockroach", "mosquito swarm", "pest infestation"]
+async def detect_pest_clip(image: Union[Image.Image, ImageEnvelope, bytes], client: httpx.AsyncClient = None):
+    labels, targets = CLIP_DETECTORS["pest"]
     return await _detect_clip_generic(image, labels, targets, client)
 
-async def detect_water_leak_clip(image: Union[Image.Image, bytes], client: httpx.AsyncClient = None):
-    labels = ["water leak", "burst pipe", "flooded floor", "puddle", "dry floor", "no water"]
-    targets = ["water leak", "burst pipe", "flooded floor", "puddle"]
+async def detect_water_leak_clip(image: Union[Image.Image, ImageEnvelope, bytes], client: httpx.AsyncClient = None):
+    labels, targets = CLIP_DETECTORS["water-leak"]
     return await _detect_clip_generic(image, labels, targets, client)
 
-async def detect_accessibility_issue_clip(image: Union[Image.Image, bytes], client: httpx.AsyncClient = None):
-    labels = ["blocked wheelchair ramp", "stairs without ramp", "broken ramp", "accessible path", "wheelchair accessible", "clear path"]
-    targets = ["blocked wheelchair ramp", "stairs without ramp", "broken ramp"]
+async def detect_accessibility_issue_clip(image: Union[Image.Image, ImageEnvelope, bytes], client: httpx.AsyncClient = None):
+    labels, targets = CLIP_DETECTORS["accessibility"]
     return await _detect_clip_generic(image, labels, targets, client)
 
-async def detect_crowd_density_clip(image: Union[Image.Image, bytes], client: httpx.AsyncClient = None):
-    labels = ["dense crowd", "dangerous overcrowding", "sparse crowd", "empty space", "safe crowd level"]
-    # We want to detect high density
-    targets = ["dense crowd", "dangerous overcrowding"]
+async def detect_crowd_density_clip(image: Union[Image.Image, ImageEnvelope, bytes], client: httpx.AsyncClient = None):
+    labels, targets = CLIP_DETECTORS["crowd-density"]
     return await _detect_clip_generic(image, labels, targets, client)
 
 async def detect_audio_event(audio_bytes: bytes, client: httpx.AsyncClient = None):
@@ -150,7 +287,7 @@ async def detect_audio_event(audio_bytes: bytes, client: httpx.AsyncClient = Non
     try:
         headers_bin = {"Authorization": f"Bearer {token}"} if token else {}
         async def do_post(c):
-             return await c.post(AUDIO_CLASS_API_URL, headers=headers_bin, content=audio_bytes, timeout=30.0)
+             return await hf_client.post(c, AUDIO_CLASS_API_URL, headers=headers_bin, content=audio_bytes, timeout=30.0)
 
         if client:
             response = await do_post(client)
@@ -169,13 +306,11 @@ async def detect_audio_event(audio_bytes: bytes, client: httpx.AsyncClient = Non
         logger.error(f"Audio Detection Error: {e}")
         return []
 
-async def detect_severity_clip(image: Union[Image.Image, bytes], client: httpx.AsyncClient = None):
+async def detect_severity_clip(image: Union[Image.Image, ImageEnvelope, bytes], client: httpx.AsyncClient = None):
     """
     Returns a severity object: {level: 'High', confidence: 0.9, raw_label: 'critical...'}
     """
-    labels = ["critical emergency", "high urgency", "medium urgency", "low urgency", "safe situation"]
-    img_bytes = _prepare_image_bytes(image)
-    results = await query_hf_api(img_bytes, labels, client=client)
+    results = await classify_zero_shot(image, SEVERITY_LABELS, client=client)
 
     if isinstance(results, list) and len(results) > 0:
         top = results[0]
@@ -191,29 +326,33 @@ async def detect_severity_clip(image: Union[Image.Image, bytes], client: httpx.A
 
     return {"level": "Unknown", "confidence": 0, "raw_label": "unknown"}
 
-async def detect_smart_scan_clip(image: Union[Image.Image, bytes], client: httpx.AsyncClient = None):
+async def detect_smart_scan_clip(image: Union[Image.Image, ImageEnvelope, bytes], client: httpx.AsyncClient = None):
     """
-    Auto-detects category from image.
+    Auto-detects category from image. The CLIP detectors run in the same
+    request, so their hits come back under "detections" at no extra cost.
     """
-    labels = [
-        "pothole", "garbage", "flooded street", "fire accident",
-        "fallen tree", "stray animal", "blocked road", "broken streetlight",
-        "illegal parking", "graffiti vandalism", "normal street"
-    ]
-    img_bytes = _prepare_image_bytes(image)
-    results = await query_hf_api(img_bytes, labels, client=client)
+    groups = {name: labels for name, (labels, _) in CLIP_DETECTORS.items()}
+    groups["category"] = SMART_SCAN_LABELS
+    split = await query_clip_label_groups(image, groups, client=client)
 
-    if isinstance(results, list) and len(results) > 0:
+    if split and split["category"]:
+        results = split["category"]
         top = results[0]
+        detections = {}
+        for name, (_, targets) in CLIP_DETECTORS.items():
+            found = _clip_detections(split[name], targets)
+            if found:
+                detections[name] = found
         # Map label to internal category ID if needed, or return raw
         return {
             "category": top.get('label'),
             "confidence": top.get('score'),
-            "all_scores": results[:3]
+            "all_scores": results[:3],
+            "detections": detections
         }
     return {"category": "unknown", "confidence": 0}
 
-async def generate_image_caption(image: Union[Image.Image, bytes], client: httpx.AsyncClient = None):
+async def generate_image_caption(image: Union[Image.Image, ImageEnvelope, bytes], client: httpx.AsyncClient = None):
     """
     Generates a description using BLIP model.
     """
@@ -228,7 +367,7 @@ async def generate_image_caption(image: Union[Image.Image, bytes], client: httpx
     try:
         headers_bin = {"Authorization": f"Bearer {token}"} if token else {}
         async def do_post(c):
-             return await c.post(CAPTION_API_URL, headers=headers_bin, content=img_bytes, timeout=20.0)
+             return await hf_client.post(c, CAPTION_API_URL, headers=headers_bin, content=img_bytes, timeout=20.0)
 
         if client:
             response = await do_post(client)
@@ -286,7 +425,7 @@ async def analyze_urgency_text(text: str, client: httpx.AsyncClient = None):
     return {"urgency": "Low", "score": 0, "sentiment": "unknown"}
 
 
-async def verify_resolution_vqa(image: Union[Image.Image, bytes], question: str, client: httpx.AsyncClient = None):
+async def verify_resolution_vqa(image: Union[Image.Image, ImageEnvelope, bytes], question: str, client: httpx.AsyncClient = None):
     """
     Uses VQA to verify if an issue is resolved based on a question.
     """
@@ -317,7 +456,7 @@ async def verify_resolution_vqa(image: Union[Image.Image, bytes], question: str,
 
     return {"answer": "unknown", "confidence": 0}
 
-async def detect_depth_map(image: Union[Image.Image, bytes], client: httpx.AsyncClient = None):
+async def detect_depth_map(image: Union[Image.Image, ImageEnvelope, bytes], client: httpx.AsyncClient = None):
     """
     Generates a depth map for the given image using Intel/dpt-hybrid-midas.
     Returns a Base64 encoded string of the depth map image.
@@ -328,7 +467,7 @@ async def detect_depth_map(image: Union[Image.Image, bytes], client: httpx.Async
     try:
         headers_bin = {"Authorization": f"Bearer {token}"} if token else {}
         async def do_post(c):
-             return await c.post(DEPTH_API_URL, headers=headers_bin, content=img_bytes, timeout=30.0)
+             return await hf_client.post(c, DEPTH_API_URL, headers=headers_bin, content=img_bytes, timeout=30.0)
 
         if client:
             response = await do_post(client)
@@ -357,7 +496,7 @@ async def transcribe_audio(audio_bytes: bytes, client: httpx.AsyncClient = None)
     try:
         headers_bin = {"Authorization": f"Bearer {token}"} if token else {}
         async def do_post(c):
-             return await c.post(WHISPER_API_URL, headers=headers_bin, content=audio_bytes, timeout=60.0)
+             return await hf_client.post(c, WHISPER_API_URL, headers=headers_bin, content=audio_bytes, timeout=60.0)
 
         if client:
             response = await do_post(client)
@@ -376,14 +515,11 @@ async def transcribe_audio(audio_bytes: bytes, client: httpx.AsyncClient = None)
         logger.error(f"Audio Transcription Error: {e}")
         return ""
 
-async def detect_waste_clip(image: Union[Image.Image, bytes], client: httpx.AsyncClient = None):
+async def detect_waste_clip(image: Union[Image.Image, ImageEnvelope, bytes], client: httpx.AsyncClient = None):
     """
     Classifies waste type for sorting.
     """
-    labels = ["plastic bottle", "glass bottle", "metal can", "paper cardboard", "organic food waste", "electronic waste", "general trash"]
-
-    img_bytes = _prepare_image_bytes(image)
-    results = await query_hf_api(img_bytes, labels, client=client)
+    results = await classify_zero_shot(image, WASTE_LABELS, client=client)
 
     if isinstance(results, list) and len(results) > 0:
         top = results[0]
@@ -394,65 +530,57 @@ async def detect_waste_clip(image: Union[Image.Image, bytes], client: httpx.Asyn
         }
     return {"waste_type": "unknown", "confidence": 0}
 
-async def detect_civic_eye_clip(image: Union[Image.Image, bytes], client: httpx.AsyncClient = None):
+async def detect_civic_eye_clip(image: Union[Image.Image, ImageEnvelope, bytes], client: httpx.AsyncClient = None):
     """
-    Performs a comprehensive assessment of the scene.
+    Performs a comprehensive assessment of the scene: the three scene
+    assessments and every CLIP detector in a single API request.
     """
-    # 1. Safety
-    safety_labels = ["safe area", "unsafe area", "dangerous situation", "secure environment"]
+    groups = {name: labels for name, (labels, _) in CLIP_DETECTORS.items()}
+    groups.update(CIVIC_EYE_LABELS)
+    split = await query_clip_label_groups(image, groups, client=client)
 
-    # 2. Cleanliness
-    clean_labels = ["clean street", "dirty street", "garbage piled up", "spotless area"]
-
-    # 3. Infrastructure
-    infra_labels = ["good infrastructure", "broken infrastructure", "potholes", "well maintained road"]
-
-    img_bytes = _prepare_image_bytes(image)
-
-    # We can do 3 separate calls or 1 big call. CLIP handles many labels well.
-    all_labels = safety_labels + clean_labels + infra_labels
-
-    results = await query_hf_api(img_bytes, all_labels, client=client)
-
-    if not isinstance(results, list):
+    if split is None:
         return {"error": "Analysis failed"}
 
-    def get_top_category(res_list, category_labels):
-        relevant = [r for r in res_list if r.get('label') in category_labels]
-        if relevant:
-            return relevant[0]
+    def get_top_category(name):
+        if split[name]:
+            return split[name][0]
         return {"label": "unknown", "score": 0}
 
-    safety = get_top_category(results, safety_labels)
-    cleanliness = get_top_category(results, clean_labels)
-    infra = get_top_category(results, infra_labels)
+    safety = get_top_category("safety")
+    cleanliness = get_top_category("cleanliness")
+    infra = get_top_category("infrastructure")
+
+    issues = {}
+    for name, (_, targets) in CLIP_DETECTORS.items():
+        found = _clip_detections(split[name], targets)
+        if found:
+            issues[name] = found
 
     return {
         "safety": {"status": safety['label'], "score": safety['score']},
         "cleanliness": {"status": cleanliness['label'], "score": cleanliness['score']},
-        "infrastructure": {"status": infra['label'], "score": infra['score']}
+        "infrastructure": {"status": infra['label'], "score": infra['score']},
+        "issues": issues
     }
 
-async def detect_graffiti_art_clip(image: Union[Image.Image, bytes], client: httpx.AsyncClient = None):
+async def detect_graffiti_art_clip(image: Union[Image.Image, ImageEnvelope, bytes], client: httpx.AsyncClient = None):
     """
     Distinguish between artistic mural (legal) and graffiti vandalism (illegal).
     """
-    labels = ["artistic mural", "street art", "graffiti tag", "vandalism", "clean wall"]
-    targets = ["artistic mural", "street art", "graffiti tag", "vandalism"]
+    labels, targets = CLIP_DETECTORS["graffiti"]
     return await _detect_clip_generic(image, labels, targets, client)
 
-async def detect_traffic_sign_clip(image: Union[Image.Image, bytes], client: httpx.AsyncClient = None):
+async def detect_traffic_sign_clip(image: Union[Image.Image, ImageEnvelope, bytes], client: httpx.AsyncClient = None):
     """
     Detects damaged or vandalized traffic signs.
     """
-    labels = ["damaged traffic sign", "graffiti on sign", "bent sign", "faded sign", "clear traffic sign"]
-    targets = ["damaged traffic sign", "graffiti on sign", "bent sign", "faded sign"]
+    labels, targets = CLIP_DETECTORS["traffic-sign"]
     return await _detect_clip_generic(image, labels, targets, client)
 
-async def detect_abandoned_vehicle_clip(image: Union[Image.Image, bytes], client: httpx.AsyncClient = None):
+async def detect_abandoned_vehicle_clip(image: Union[Image.Image, ImageEnvelope, bytes], client: httpx.AsyncClient = None):
     """
     Detects abandoned or wrecked vehicles.
     """
-    labels = ["abandoned car", "rusted vehicle", "car with flat tires", "wrecked car", "normal parked car"]
-    targets = ["abandoned car", "rusted vehicle", "car with flat tires", "wrecked car"]
+    labels, targets = CLIP_DETECTORS["abandoned-vehicle"]
     return await _detect_clip_generic(image, labels, targets, client)
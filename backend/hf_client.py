@@ -0,0 +1,300 @@
+"""
+Resilient outbound client for Hugging Face inference calls.
+
+Every HF call used to post with a fixed timeout (20-60 s) and no limit, so a
+slow HF router tied up connections and event-loop slots for the full timeout
+on every detection request. All HF posts now go through `hf_client.post`,
+which wraps the shared httpx.AsyncClient with, per endpoint (model URL):
+
+- a semaphore capping concurrent requests; callers wait at most
+  HF_QUEUE_TIMEOUT seconds for a slot,
+- an adaptive timeout of HF_TIMEOUT_P95_MULTIPLIER x the observed p95
+  latency, clamped to [HF_TIMEOUT_MIN, the call site's timeout],
+- a circuit breaker that opens after HF_BREAKER_FAILURES consecutive
+  failures (timeouts, connection errors, 5xx, 429) and rejects calls with
+  CircuitOpenException for HF_BREAKER_COOLDOWN seconds, then lets a single
+  probe through (half-open). UnifiedDetectionService switches to a local
+  backend while the breaker is open,
+- optional hedging (HF_HEDGE_ENABLED): when a request has not answered
+  after the observed p95, a second identical request is sent and the first
+  response wins.
+"""
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from enum import Enum
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from backend.exceptions import CircuitOpenException, ServiceUnavailableException
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+HF_MAX_CONCURRENCY = int(os.environ.get("HF_MAX_CONCURRENCY", "8"))
+HF_QUEUE_TIMEOUT = float(os.environ.get("HF_QUEUE_TIMEOUT", "2.0"))
+HF_TIMEOUT_MIN = float(os.environ.get("HF_TIMEOUT_MIN", "2.0"))
+HF_TIMEOUT_P95_MULTIPLIER = float(os.environ.get("HF_TIMEOUT_P95_MULTIPLIER", "3.0"))
+# Latency samples kept per endpoint, and how many are needed before adapting
+HF_LATENCY_WINDOW = int(os.environ.get("HF_LATENCY_WINDOW", "200"))
+HF_LATENCY_MIN_SAMPLES = int(os.environ.get("HF_LATENCY_MIN_SAMPLES", "20"))
+HF_BREAKER_FAILURES = int(os.environ.get("HF_BREAKER_FAILURES", "5"))
+HF_BREAKER_COOLDOWN = float(os.environ.get("HF_BREAKER_COOLDOWN", "30"))
+HF_HEDGE_ENABLED = os.environ.get("HF_HEDGE_ENABLED", "false").lower() == "true"
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker. Not thread-safe; used from the event loop only.
+    """
+
+    def __init__(self, failure_threshold: int = HF_BREAKER_FAILURES, cooldown: float = HF_BREAKER_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probe_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being rejected (open and still cooling down)."""
+        return self.state == BreakerState.OPEN and time.monotonic() - self.opened_at < self.cooldown
+
+    def allow(self) -> bool:
+        """Whether a call may go out now. In half-open state only one probe is let through."""
+        if self.state == BreakerState.OPEN:
+            if self.is_open:
+                return False
+            self.state = BreakerState.HALF_OPEN
+        if self.state == BreakerState.HALF_OPEN:
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def release(self) -> None:
+        """The allowed call never went out (e.g. no concurrency slot)."""
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        if self.state != BreakerState.CLOSED:
+            logger.info("HF circuit breaker closed")
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == BreakerState.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != BreakerState.OPEN:
+                self.times_opened += 1
+                logger.warning(f"HF circuit breaker opened after {self.failures} consecutive failures")
+            self.state = BreakerState.OPEN
+            self.opened_at = time.monotonic()
+
+    def get_status(self) -> Dict[str, Any]:
+        retry_in = self.cooldown - (time.monotonic() - self.opened_at) if self.is_open else 0.0
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "retry_in_seconds": round(retry_in, 1)
+        }
+
+
+def _percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class _Endpoint:
+    """Limits, latency window and breaker of one HF model URL."""
+
+    def __init__(self, name: str, max_concurrency: int, breaker: CircuitBreaker):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.breaker = breaker
+        self.latencies = deque(maxlen=HF_LATENCY_WINDOW)
+        self.in_flight = 0
+        self.stats = {
+            "requests": 0, "successes": 0, "failures": 0, "timeouts": 0,
+            "short_circuited": 0, "rejected": 0, "hedged": 0, "hedge_wins": 0
+        }
+
+    def p95(self) -> Optional[float]:
+        """Observed p95 latency in seconds, once there are enough samples."""
+        if len(self.latencies) < HF_LATENCY_MIN_SAMPLES:
+            return None
+        return _percentile(self.latencies, 0.95)
+
+    def timeout(self, max_timeout: float) -> float:
+        p95 = self.p95()
+        if p95 is None:
+            return max_timeout
+        return min(max_timeout, max(HF_TIMEOUT_MIN, p95 * HF_TIMEOUT_P95_MULTIPLIER))
+
+    def get_status(self, max_timeout: float) -> Dict[str, Any]:
+        latencies = list(self.latencies)
+        return {
+            **self.stats,
+            "breaker": self.breaker.get_status(),
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "p50_ms": round(_percentile(latencies, 0.5) * 1000, 1) if latencies else None,
+            "p95_ms": round(_percentile(latencies, 0.95) * 1000, 1) if latencies else None,
+            "timeout_seconds": round(self.timeout(max_timeout), 2)
+        }
+
+
+class ResilientClient:
+    """
+    Per-endpoint concurrency limits, adaptive timeouts, circuit breaking and
+    hedging around an httpx.AsyncClient.
+    """
+
+    def __init__(self, max_concurrency: int = HF_MAX_CONCURRENCY, queue_timeout: float = HF_QUEUE_TIMEOUT,
+                 hedge: bool = HF_HEDGE_ENABLED, failure_threshold: int = HF_BREAKER_FAILURES,
+                 cooldown: float = HF_BREAKER_COOLDOWN, default_timeout: float = 20.0):
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.hedge = hedge
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.default_timeout = default_timeout
+        self._endpoints: Dict[str, _Endpoint] = {}
+
+    @staticmethod
+    def endpoint_name(url: str) -> str:
+        path = urlparse(url).path.strip("/").split("/")
+        # ".../models/<org>/<model>" -> "<org>/<model>"
+        return "/".join(path[-2:]) if len(path) >= 2 else url
+
+    def _endpoint(self, url: str) -> _Endpoint:
+        name = self.endpoint_name(url)
+        endpoint = self._endpoints.get(name)
+        if endpoint is None:
+            endpoint = _Endpoint(name, self.max_concurrency, CircuitBreaker(self.failure_threshold, self.cooldown))
+            self._endpoints[name] = endpoint
+        return endpoint
+
+    def is_open(self, url: str) -> bool:
+        """Whether calls to this endpoint are currently being rejected."""
+        endpoint = self._endpoints.get(self.endpoint_name(url))
+        return endpoint is not None and endpoint.breaker.is_open
+
+    async def post(self, client: httpx.AsyncClient, url: str, timeout: Optional[float] = None,
+                   **kwargs) -> httpx.Response:
+        """
+        POST through the endpoint's limits. `timeout` is the upper bound of the
+        adaptive timeout.
+
+        Raises:
+            CircuitOpenException: The endpoint's breaker is open
+            ServiceUnavailableException: No concurrency slot within the queue timeout
+            httpx.HTTPError: Timeout or transport error
+        """
+        endpoint = self._endpoint(url)
+        endpoint.stats["requests"] += 1
+
+        if not endpoint.breaker.allow():
+            endpoint.stats["short_circuited"] += 1
+            raise CircuitOpenException("Hugging Face API", details={
+                "endpoint": endpoint.name, **endpoint.breaker.get_status()
+            })
+
+        try:
+            await asyncio.wait_for(endpoint.semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            endpoint.breaker.release()
+            endpoint.stats["rejected"] += 1
+            raise ServiceUnavailableException("Hugging Face API", details={
+                "endpoint": endpoint.name, "reason": "concurrency limit reached"
+            })
+
+        endpoint.in_flight += 1
+        start = time.perf_counter()
+        try:
+            response = await self._send(client, url, endpoint, endpoint.timeout(timeout or self.default_timeout), kwargs)
+        except httpx.HTTPError as e:
+            endpoint.stats["failures"] += 1
+            if isinstance(e, httpx.TimeoutException):
+                endpoint.stats["timeouts"] += 1
+            endpoint.breaker.record_failure()
+            raise
+        except BaseException:
+            endpoint.breaker.release()
+            raise
+        finally:
+            endpoint.in_flight -= 1
+            endpoint.semaphore.release()
+
+        if response.status_code >= 500 or response.status_code == 429:
+            endpoint.stats["failures"] += 1
+            endpoint.breaker.record_failure()
+        else:
+            endpoint.stats["successes"] += 1
+            endpoint.latencies.append(time.perf_counter() - start)
+            endpoint.breaker.record_success()
+        return response
+
+    async def _send(self, client: httpx.AsyncClient, url: str, endpoint: _Endpoint, timeout: float,
+                    kwargs: Dict[str, Any]) -> httpx.Response:
+        hedge_after = endpoint.p95() if self.hedge else None
+        if hedge_after is None or hedge_after >= timeout:
+            return await client.post(url, timeout=timeout, **kwargs)
+
+        primary = asyncio.ensure_future(client.post(url, timeout=timeout, **kwargs))
+        hedge = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+            # Only hedge with a spare slot; a hedge must not queue behind other callers
+            if done or endpoint.semaphore.locked():
+                return await primary
+
+            await endpoint.semaphore.acquire()
+            try:
+                endpoint.stats["hedged"] += 1
+                hedge = asyncio.ensure_future(client.post(url, timeout=timeout - hedge_after, **kwargs))
+                pending = {primary, hedge}
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is None:
+                            if task is hedge:
+                                endpoint.stats["hedge_wins"] += 1
+                            return task.result()
+                # Both failed; report the original request's error
+                return primary.result()
+            finally:
+                endpoint.semaphore.release()
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "hedging": self.hedge,
+            "endpoints": {name: endpoint.get_status(self.default_timeout) for name, endpoint in self._endpoints.items()}
+        }
+
+    def reset(self) -> None:
+        self._endpoints = {}
+
+
+# Global client used by all HF API calls
+hf_client = ResilientClient()
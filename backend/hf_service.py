@@ -5,7 +5,6 @@ Please use local_ml_service.py for local ML model-based detection instead of Hug
 This file is kept for reference purposes only.
 """
 import os
-import io
 import httpx
 import base64
 from typing import Union, List, Dict, Any
@@ -13,7 +12,9 @@ from PIL import Image
 import asyncio
 import logging
 
-from backend.exceptions import ExternalAPIException
+from backend.exceptions import ExternalAPIException, ServiceUnavailableException
+from backend.hf_client import hf_client
+from backend.image_envelope import ImageEnvelope, as_image_bytes
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +24,23 @@ headers = {"Authorization": f"Bearer {token}"} if token else {}
 API_URL = "https://api-inference.huggingface.co/models/openai/clip-vit-base-patch32"
 CAPTION_API_URL = "https://api-inference.huggingface.co/models/Salesforce/blip-image-captioning-large"
 
+# Zero-shot label sets of the detection categories, shared with local_clip_service:
+# category -> (candidate labels, labels reported as detections)
+CLIP_CATEGORY_LABELS = {
+    "vandalism": (
+        ["graffiti", "vandalism", "spray paint", "street art", "clean wall", "public property", "normal street"],
+        ["graffiti", "vandalism", "spray paint"]
+    ),
+    "infrastructure": (
+        ["broken streetlight", "damaged traffic sign", "fallen tree", "damaged fence", "pothole", "clean street", "normal infrastructure"],
+        ["broken streetlight", "damaged traffic sign", "fallen tree", "damaged fence"]
+    ),
+    "flooding": (
+        ["flooded street", "waterlogging", "blocked drain", "heavy rain", "dry street", "normal road"],
+        ["flooded street", "waterlogging", "blocked drain", "heavy rain"]
+    ),
+}
+
 async def query_hf_api(image_bytes, labels, client=None):
     """
     Queries Hugging Face API using a shared or new HTTP client.
@@ -44,11 +62,14 @@ async def _make_request(client, image_bytes, labels):
     }
 
     try:
-        response = await client.post(API_URL, headers=headers, json=payload, timeout=20.0)
+        response = await hf_client.post(client, API_URL, headers=headers, json=payload, timeout=20.0)
         if response.status_code != 200:
             logger.error(f"HF API Error: {response.status_code} - {response.text}")
             raise ExternalAPIException("Hugging Face API", f"HTTP {response.status_code}: {response.text}")
         return response.json()
+    except ServiceUnavailableException:
+        # Circuit open or no free slot: fail fast with a 503
+        raise
     except httpx.HTTPError as e:
         logger.error(f"HF API HTTP Error: {e}")
         raise ExternalAPIException("Hugging Face API", str(e)) from e
@@ -56,26 +77,19 @@ async def _make_request(client, image_bytes, labels):
         logger.error(f"HF API Request Exception: {e}")
         raise ExternalAPIException("Hugging Face API", str(e)) from e
 
-def _prepare_image_bytes(image: Union[Image.Image, bytes]) -> bytes:
+def _prepare_image_bytes(image: Union[Image.Image, ImageEnvelope, bytes]) -> bytes:
     """
-    Helper to get bytes from PIL Image or return bytes as is.
+    Helper to get bytes from an ImageEnvelope or PIL Image, or return bytes as is.
     Avoids unnecessary re-encoding if bytes are already available.
     """
-    if isinstance(image, bytes):
-        return image
-
-    img_byte_arr = io.BytesIO()
-    # If image.format is not available (e.g. newly created image), default to JPEG
-    fmt = image.format if image.format else 'JPEG'
-    image.save(img_byte_arr, format=fmt)
-    return img_byte_arr.getvalue()
+    return as_image_bytes(image)
 
-async def generate_image_caption(image: Union[Image.Image, bytes], client: httpx.AsyncClient = None):
+async def generate_image_caption(image: Union[Image.Image, ImageEnvelope, bytes], client: httpx.AsyncClient = None):
     """
     Generates a description for the image using Salesforce BLIP model.
     """
     try:
-        labels = ["graffiti", "vandalism", "spray paint", "street art", "clean wall", "public property", "normal street"]
+        labels, vandalism_labels = CLIP_CATEGORY_LABELS["vandalism"]
 
         img_bytes = _prepare_image_bytes(image)
 
@@ -85,7 +99,6 @@ async def generate_image_caption(image: Union[Image.Image, bytes], client: httpx
         if not isinstance(results, list):
              return []
 
-        vandalism_labels = ["graffiti", "vandalism", "spray paint"]
         detected = []
 
         for res in results:
@@ -96,13 +109,15 @@ async def generate_image_caption(image: Union[Image.Image, bytes], client: httpx
                      "box": []
                  })
         return detected
+    except ServiceUnavailableException:
+        raise
     except Exception as e:
         logger.error(f"HF Detection Error: {e}")
         raise ExternalAPIException("Hugging Face API", str(e)) from e
 
-async def detect_infrastructure_clip(image: Union[Image.Image, bytes], client: httpx.AsyncClient = None):
+async def detect_infrastructure_clip(image: Union[Image.Image, ImageEnvelope, bytes], client: httpx.AsyncClient = None):
     try:
-        labels = ["broken streetlight", "damaged traffic sign", "fallen tree", "damaged fence", "pothole", "clean street", "normal infrastructure"]
+        labels, damage_labels = CLIP_CATEGORY_LABELS["infrastructure"]
 
         img_bytes = _prepare_image_bytes(image)
 
@@ -111,7 +126,6 @@ async def detect_infrastructure_clip(image: Union[Image.Image, bytes], client: h
         if not isinstance(results, list):
              return []
 
-        damage_labels = ["broken streetlight", "damaged traffic sign", "fallen tree", "damaged fence"]
         detected = []
 
         for res in results:
@@ -122,13 +136,15 @@ async def detect_infrastructure_clip(image: Union[Image.Image, bytes], client: h
                      "box": []
                  })
         return detected
+    except ServiceUnavailableException:
+        raise
     except Exception as e:
         logger.error(f"HF Detection Error: {e}")
         raise ExternalAPIException("Hugging Face API", str(e)) from e
 
-async def detect_flooding_clip(image: Union[Image.Image, bytes], client: httpx.AsyncClient = None):
+async def detect_flooding_clip(image: Union[Image.Image, ImageEnvelope, bytes], client: httpx.AsyncClient = None):
     try:
-        labels = ["flooded street", "waterlogging", "blocked drain", "heavy rain", "dry street", "normal road"]
+        labels, flooding_labels = CLIP_CATEGORY_LABELS["flooding"]
 
         img_bytes = _prepare_image_bytes(image)
 
@@ -137,7 +153,6 @@ async def detect_flooding_clip(image: Union[Image.Image, bytes], client: httpx.A
         if not isinstance(results, list):
              return []
 
-        flooding_labels = ["flooded street", "waterlogging", "blocked drain", "heavy rain"]
         detected = []
 
         for res in results:
@@ -148,6 +163,8 @@ async def detect_flooding_clip(image: Union[Image.Image, bytes], client: httpx.A
                      "box": []
                  })
         return detected
+    except ServiceUnavailableException:
+        raise
     except Exception as e:
         logger.error(f"HF Detection Error: {e}")
         raise ExternalAPIException("Hugging Face API", str(e)) from e
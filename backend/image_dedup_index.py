@@ -0,0 +1,286 @@
+"""
+Perceptual-hash index of issue photos for near-duplicate detection.
+
+Spatial deduplication only compares coordinates, so the same pothole
+photographed from a little further away, or reported without GPS, becomes a
+new issue. Every issue photo gets a 64-bit perceptual hash (pHash: the signs
+of the low-frequency DCT coefficients of a 32x32 grayscale thumbnail), which
+survives resizing, recompression, small crops and lighting changes. New
+reports are compared against the photos of nearby issues, or against all
+photos when the report has no location.
+
+Hashes are kept in flat NumPy arrays and compared with XOR + popcount, so a
+global lookup over 1M photos is a few milliseconds of vectorized work. The
+hash is stored on the issue row; a snapshot of the index is also written to
+IMAGE_DEDUP_INDEX_PATH so startup only reads issues created since.
+"""
+import os
+import time
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from backend.image_envelope import ImageEnvelope
+from backend.spatial_index import INDEXED_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+IMAGE_DEDUP_ENABLED = os.environ.get("IMAGE_DEDUP_ENABLED", "true").lower() == "true"
+IMAGE_DEDUP_INDEX_PATH = os.environ.get("IMAGE_DEDUP_INDEX_PATH", "data/image_hash_index.npz")
+# Hamming distance (of 64 bits) at or below which two photos count as the same scene
+IMAGE_DEDUP_MAX_DISTANCE = int(os.environ.get("IMAGE_DEDUP_MAX_DISTANCE", "10"))
+# Photos of issues within this radius are compared when the report has a location
+IMAGE_DEDUP_RADIUS_METERS = float(os.environ.get("IMAGE_DEDUP_RADIUS_METERS", "250"))
+# A report is compared against photos of issues that are not resolved yet
+IMAGE_DEDUP_STATUSES = INDEXED_STATUSES
+# Matches reported back with a new issue
+IMAGE_DEDUP_MAX_MATCHES = 3
+# Write a snapshot after this many new hashes (and on shutdown)
+IMAGE_DEDUP_SNAPSHOT_EVERY = int(os.environ.get("IMAGE_DEDUP_SNAPSHOT_EVERY", "500"))
+
+HASH_BITS = 64
+_HASH_SIZE = 8
+_DCT_SIZE = 32
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.sqrt(2.0 / n) * np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+    matrix[0, :] = np.sqrt(1.0 / n)
+    return matrix
+
+
+_DCT = _dct_matrix(_DCT_SIZE)
+
+
+def compute_phash(image: Union[Image.Image, ImageEnvelope]) -> int:
+    """64-bit perceptual hash of an image."""
+    if isinstance(image, ImageEnvelope):
+        image = image.image
+    pixels = np.asarray(
+        image.convert("L").resize((_DCT_SIZE, _DCT_SIZE), Image.Resampling.LANCZOS), dtype=np.float64
+    )
+    low = (_DCT @ pixels @ _DCT.T)[:_HASH_SIZE, :_HASH_SIZE].flatten()
+    # The DC term only reflects overall brightness
+    bits = low > np.median(low[1:])
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def hash_to_hex(phash: int) -> str:
+    return f"{phash:016x}"
+
+
+def hex_to_hash(value: str) -> int:
+    return int(value, 16)
+
+
+def similarity(distance: int) -> float:
+    """Hamming distance to a 0-1 similarity score."""
+    return round(1.0 - distance / HASH_BITS, 4)
+
+
+if hasattr(np, "bitwise_count"):
+    def _popcount(values: np.ndarray) -> np.ndarray:
+        return np.bitwise_count(values)
+else:
+    _BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(values: np.ndarray) -> np.ndarray:
+        return _BYTE_POPCOUNT[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+class ImageHashIndex:
+    """
+    Thread-safe flat index of (issue id, perceptual hash) pairs.
+    """
+
+    def __init__(self, path: str = IMAGE_DEDUP_INDEX_PATH, max_distance: int = IMAGE_DEDUP_MAX_DISTANCE,
+                 snapshot_every: int = IMAGE_DEDUP_SNAPSHOT_EVERY):
+        self.path = path
+        self.max_distance = max_distance
+        self.snapshot_every = snapshot_every
+        self._ids = np.empty(1024, dtype=np.int64)
+        self._hashes = np.empty(1024, dtype=np.uint64)
+        self._size = 0
+        self._rows: Dict[int, int] = {}
+        self._lock = threading.RLock()
+        self._warm = False
+        self._unsaved = 0
+        self._stats = {"queries": 0, "matches": 0, "last_query_ms": 0.0}
+
+    @property
+    def is_warm(self) -> bool:
+        return self._warm
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self._ids)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        self._ids = np.resize(self._ids, capacity)
+        self._hashes = np.resize(self._hashes, capacity)
+
+    def add(self, issue_id: int, phash: int) -> None:
+        with self._lock:
+            row = self._rows.get(issue_id)
+            if row is None:
+                self._grow(self._size + 1)
+                row = self._size
+                self._size += 1
+                self._rows[issue_id] = row
+                self._ids[row] = issue_id
+            self._hashes[row] = phash
+            self._unsaved += 1
+
+    def add_many(self, items: Iterable[Tuple[int, int]]) -> None:
+        with self._lock:
+            for issue_id, phash in items:
+                self.add(issue_id, phash)
+
+    def remove(self, issue_id: int) -> None:
+        with self._lock:
+            row = self._rows.pop(issue_id, None)
+            if row is None:
+                return
+            # Move the last entry into the hole
+            last = self._size - 1
+            if row != last:
+                moved_id = int(self._ids[last])
+                self._ids[row] = moved_id
+                self._hashes[row] = self._hashes[last]
+                self._rows[moved_id] = row
+            self._size -= 1
+            self._unsaved += 1
+
+    def query(self, phash: int, candidate_ids: Optional[Iterable[int]] = None,
+              limit: Optional[int] = IMAGE_DEDUP_MAX_MATCHES, max_distance: Optional[int] = None,
+              exclude_id: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        Issues whose photo is within `max_distance` bits of `phash`, closest first.
+        Searches only `candidate_ids` when given, otherwise every indexed photo.
+        `limit=None` returns every match.
+
+        Returns:
+            List of tuples (issue_id, hamming_distance)
+        """
+        max_distance = self.max_distance if max_distance is None else max_distance
+        start = time.perf_counter()
+        with self._lock:
+            if candidate_ids is None:
+                ids = self._ids[:self._size]
+                hashes = self._hashes[:self._size]
+            else:
+                rows = [self._rows[issue_id] for issue_id in candidate_ids if issue_id in self._rows]
+                ids = self._ids[rows]
+                hashes = self._hashes[rows]
+            distances = _popcount(hashes ^ np.uint64(phash))
+            matches = np.flatnonzero(distances <= max_distance)
+            matches = matches[np.argsort(distances[matches], kind="stable")]
+            results = [
+                (int(ids[i]), int(distances[i])) for i in matches
+                if exclude_id is None or int(ids[i]) != exclude_id
+            ][:limit]
+
+        elapsed = (time.perf_counter() - start) * 1000
+        self._stats["queries"] += 1
+        self._stats["matches"] += bool(results)
+        self._stats["last_query_ms"] = round(elapsed, 3)
+        return results
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Write a snapshot atomically (blocking)."""
+        path = path or self.path
+        with self._lock:
+            ids = self._ids[:self._size].copy()
+            hashes = self._hashes[:self._size].copy()
+            self._unsaved = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, ids=ids, hashes=hashes)
+        os.replace(tmp_path, path)
+
+    def maybe_save(self) -> None:
+        if self.snapshot_every and self._unsaved >= self.snapshot_every:
+            self.save()
+
+    def load_snapshot(self, path: Optional[str] = None) -> int:
+        """Replace the index contents with a snapshot. Returns the highest issue id in it."""
+        with np.load(path or self.path) as data:
+            ids = data["ids"].astype(np.int64)
+            hashes = data["hashes"].astype(np.uint64)
+        with self._lock:
+            self._ids = ids.copy() if len(ids) else np.empty(1024, dtype=np.int64)
+            self._hashes = hashes.copy() if len(hashes) else np.empty(1024, dtype=np.uint64)
+            self._size = len(ids)
+            self._rows = {int(issue_id): row for row, issue_id in enumerate(ids.tolist())}
+            self._unsaved = 0
+        return int(ids.max()) if len(ids) else 0
+
+    def mark_warm(self) -> None:
+        self._warm = True
+
+    def reset(self) -> None:
+        with self._lock:
+            self._ids = np.empty(1024, dtype=np.int64)
+            self._hashes = np.empty(1024, dtype=np.uint64)
+            self._size = 0
+            self._rows = {}
+            self._unsaved = 0
+            self._warm = False
+
+    def get_stats(self) -> dict:
+        return {
+            **self._stats,
+            "enabled": IMAGE_DEDUP_ENABLED,
+            "warm": self._warm,
+            "size": self._size,
+            "max_distance": self.max_distance,
+            "unsaved": self._unsaved
+        }
+
+
+def warm_image_dedup_index(index: Optional["ImageHashIndex"] = None) -> None:
+    """
+    Load the snapshot (if any), then add hashes of issues created after it.
+    Blocking; run in a threadpool from async code.
+    """
+    from backend.database import SessionLocal
+    from backend.models import Issue
+
+    index = index or image_dedup_index
+    after_id = 0
+    if os.path.exists(index.path):
+        try:
+            after_id = index.load_snapshot()
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable image hash snapshot {index.path}: {e}")
+            index.reset()
+
+    db = SessionLocal()
+    try:
+        rows = db.query(Issue.id, Issue.image_phash).filter(
+            Issue.id > after_id,
+            Issue.image_phash.isnot(None)
+        ).yield_per(5000)
+        index.add_many((row.id, hex_to_hash(row.image_phash)) for row in rows)
+    finally:
+        db.close()
+
+    index.mark_warm()
+    index.maybe_save()
+    logger.info(f"Image hash index warmed with {len(index)} photos")
+
+
+# Global process-wide index
+image_dedup_index = ImageHashIndex()
@@ -0,0 +1,200 @@
+"""
+Single-decode image pipeline.
+
+An uploaded image is decoded exactly once into an ImageEnvelope, which is then
+passed to validation, storage and every detector. The envelope carries the
+decoded pixels (resized and stripped of metadata), a content hash and the
+dimensions. The normalized JPEG encoding is produced at most once, on first
+use, and shared by everything that needs bytes (HF API calls, saving to disk).
+
+Uploads that are already small, metadata-free RGB/greyscale JPEGs are passed
+through as-is, so they are never re-encoded at all.
+
+Large uploads are decoded at reduced scale: JPEGs via draft() (the decoder
+skips DCT detail it would throw away anyway), other formats via reduce()
+before the final resize. The upload is read from its (spooled) file in
+chunks, so the compressed bytes are never held in memory as a whole and the
+full-resolution bitmap is never materialized for JPEGs.
+"""
+import io
+import os
+import hashlib
+import threading
+from typing import BinaryIO, Optional, Union
+
+from PIL import Image
+
+# Configuration
+MAX_IMAGE_DIMENSION = int(os.environ.get("MAX_IMAGE_DIMENSION", "1024"))
+IMAGE_JPEG_QUALITY = int(os.environ.get("IMAGE_JPEG_QUALITY", "85"))
+# Longest side of the thumbnail generated for list views
+THUMBNAIL_SIZE = int(os.environ.get("THUMBNAIL_SIZE", "256"))
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+# Image.info keys that carry metadata (location, device, comments) rather than pixels
+_METADATA_KEYS = ("exif", "xmp", "XML:com.adobe.xmp", "icc_profile", "comment", "photoshop")
+_JPEG_MODES = ("RGB", "L")
+
+
+class ImageEnvelope:
+    """
+    One decoded upload, shared by every stage of a request.
+
+    Attributes:
+        image: Decoded PIL image, at most MAX_IMAGE_DIMENSION on each side, without metadata
+        sha256: Hex digest of the uploaded bytes
+        width, height: Dimensions of `image`
+        source_format: Format of the upload as detected by PIL (e.g. "JPEG", "PNG")
+        source_size: Dimensions of the upload before reduction
+    """
+
+    __slots__ = ("image", "sha256", "width", "height", "source_format", "source_size",
+                 "_jpeg_bytes", "_thumbnail_bytes", "_content_hash", "_lock")
+
+    def __init__(self, image: Image.Image, sha256: str, source_format: Optional[str] = None,
+                 jpeg_bytes: Optional[bytes] = None, source_size=None):
+        self.image = image
+        self.sha256 = sha256
+        self.width, self.height = image.size
+        self.source_format = source_format
+        self.source_size = source_size or image.size
+        self._jpeg_bytes = jpeg_bytes
+        self._thumbnail_bytes = None
+        self._content_hash = None
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+    @property
+    def jpeg_bytes(self) -> bytes:
+        """Normalized JPEG encoding, computed on first access and reused afterwards."""
+        if self._jpeg_bytes is None:
+            with self._lock:
+                if self._jpeg_bytes is None:
+                    self._jpeg_bytes = encode_jpeg(self.image)
+        return self._jpeg_bytes
+
+    @property
+    def thumbnail_bytes(self) -> bytes:
+        """JPEG thumbnail (at most THUMBNAIL_SIZE per side) made from the already reduced pixels."""
+        if self._thumbnail_bytes is None:
+            with self._lock:
+                if self._thumbnail_bytes is None:
+                    thumb = self.image.copy()
+                    thumb.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.Resampling.BILINEAR)
+                    self._thumbnail_bytes = encode_jpeg(thumb)
+        return self._thumbnail_bytes
+
+    @property
+    def content_hash(self) -> str:
+        """
+        Hex digest of the normalized pixels: the same for uploads that differ only
+        in metadata (e.g. a forwarded photo with EXIF stripped).
+        """
+        if self._content_hash is None:
+            digest = hashlib.sha256(f"{self.image.mode}:{self.width}x{self.height}:".encode())
+            digest.update(self.image.tobytes())
+            self._content_hash = digest.hexdigest()
+        return self._content_hash
+
+    @property
+    def is_encoded(self) -> bool:
+        return self._jpeg_bytes is not None
+
+    def __repr__(self) -> str:
+        return f"ImageEnvelope({self.width}x{self.height}, {self.source_format}, sha256={self.sha256[:12]}...)"
+
+
+def encode_jpeg(image: Image.Image, quality: int = IMAGE_JPEG_QUALITY) -> bytes:
+    if image.mode not in _JPEG_MODES:
+        image = image.convert("RGB")
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=quality)
+    return output.getvalue()
+
+
+def _sha256_of(source: BinaryIO) -> str:
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: source.read(_HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    source.seek(0)
+    return digest.hexdigest()
+
+
+def _target_size(width: int, height: int, max_dimension: int):
+    ratio = min(max_dimension / width, max_dimension / height)
+    return max(1, int(width * ratio)), max(1, int(height * ratio))
+
+
+def decode_image_envelope(source: Union[bytes, BinaryIO], max_dimension: int = MAX_IMAGE_DIMENSION) -> ImageEnvelope:
+    """
+    Decode an upload (bytes or a seekable file) into an envelope. Blocking; run in a threadpool.
+
+    Raises:
+        PIL.UnidentifiedImageError / OSError: If the data is not a decodable image
+    """
+    if isinstance(source, bytes):
+        digest = hashlib.sha256(source).hexdigest()
+        stream = io.BytesIO(source)
+    else:
+        source.seek(0)
+        digest = _sha256_of(source)
+        stream = source
+
+    img = Image.open(stream)
+    source_format = img.format
+    source_size = img.size
+    has_metadata = any(key in img.info for key in _METADATA_KEYS)
+
+    resized = img.width > max_dimension or img.height > max_dimension
+    if resized:
+        target = _target_size(img.width, img.height, max_dimension)
+        # JPEG: let the decoder scale by 1/2, 1/4 or 1/8 (never below target)
+        img.draft(img.mode, target)
+        # reducing_gap box-reduces by an integer factor first, then resamples the rest
+        img = img.resize(target, Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+    converted = img.mode not in _JPEG_MODES
+    if converted:
+        img = img.convert("RGB")
+    elif not resized:
+        img.load()
+
+    # Only pixels are kept; EXIF (GPS, device) and other metadata are dropped
+    img.info = {}
+
+    passthrough = source_format == "JPEG" and not (resized or converted or has_metadata)
+    jpeg_bytes = None
+    if passthrough:
+        # Already at most max_dimension per side, so small enough to hold
+        if isinstance(source, bytes):
+            jpeg_bytes = source
+        else:
+            stream.seek(0)
+            jpeg_bytes = stream.read()
+    if stream is source:
+        source.seek(0)
+
+    return ImageEnvelope(img, digest, source_format=source_format, jpeg_bytes=jpeg_bytes, source_size=source_size)
+
+
+def as_pil_image(image: Union[Image.Image, ImageEnvelope]) -> Image.Image:
+    """Decoded pixels of an envelope, or the image itself if it is already a PIL image."""
+    return image.image if isinstance(image, ImageEnvelope) else image
+
+
+def as_image_bytes(image: Union[Image.Image, ImageEnvelope, bytes]) -> bytes:
+    """
+    Encoded bytes for an image, reusing an envelope's JPEG and raw bytes as-is.
+    PIL images are encoded in their own format (JPEG if unknown).
+    """
+    if isinstance(image, bytes):
+        return image
+    if isinstance(image, ImageEnvelope):
+        return image.jpeg_bytes
+    output = io.BytesIO()
+    image.save(output, format=image.format or "JPEG")
+    return output.getvalue()
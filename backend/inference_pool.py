@@ -0,0 +1,327 @@
+"""
+Dedicated process pool for CPU-bound local model inference.
+
+By default local models run in Starlette's threadpool, where they compete
+with sync DB endpoints and hold the GIL during Python-side post-processing.
+With INFERENCE_POOL_WORKERS > 0 that work moves to N worker processes
+instead:
+
+- Each worker preloads and warms up the models in INFERENCE_POOL_PRELOAD
+  when it starts.
+- Decoded pixels are handed over in shared memory blocks rather than being
+  pickled through the task pipe; workers return plain detection dicts.
+- A worker is replaced after INFERENCE_POOL_MAX_TASKS_PER_WORKER tasks to
+  contain memory growth in the model runtimes.
+- When all workers are busy and INFERENCE_POOL_MAX_QUEUE tasks are waiting,
+  new requests fail fast with InferencePoolBusyException (HTTP 503).
+- A periodic health check pings the pool and rebuilds it if a worker died
+  or stopped responding.
+
+Each task processes one request; micro-batching (backend.inference_scheduler)
+applies to in-process inference only.
+"""
+import os
+import time
+import asyncio
+import logging
+import importlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+from backend.exceptions import InferencePoolBusyException
+from backend.image_envelope import as_pil_image
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+INFERENCE_POOL_WORKERS = int(os.environ.get("INFERENCE_POOL_WORKERS", "0"))
+INFERENCE_POOL_MAX_QUEUE = int(os.environ.get("INFERENCE_POOL_MAX_QUEUE", "16"))
+INFERENCE_POOL_MAX_TASKS_PER_WORKER = int(os.environ.get("INFERENCE_POOL_MAX_TASKS_PER_WORKER", "500"))
+INFERENCE_POOL_TASK_TIMEOUT = float(os.environ.get("INFERENCE_POOL_TASK_TIMEOUT", "60"))
+INFERENCE_POOL_HEALTH_INTERVAL = float(os.environ.get("INFERENCE_POOL_HEALTH_INTERVAL", "30"))
+INFERENCE_POOL_PRELOAD = [
+    name.strip() for name in os.environ.get("INFERENCE_POOL_PRELOAD", "general,pothole").split(",") if name.strip()
+]
+
+# Task name -> "module:function" taking a list of PIL images and returning one result per image
+INFERENCE_TASKS = {
+    "general": "backend.local_ml_service:detect_raw_boxes_batch",
+    "pothole": "backend.pothole_detection:detect_potholes_batch",
+}
+
+# Model loaders run by each worker at startup
+MODEL_LOADERS = {
+    "general": "backend.local_ml_service:get_general_model",
+    "pothole": "backend.pothole_detection:get_model",
+}
+
+# (shared memory name, PIL mode, (width, height))
+ImageDescriptor = Tuple[str, str, Tuple[int, int]]
+
+
+def _resolve(spec: str):
+    module_name, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+# ---------------------------------------------------------------------------
+# Worker side (runs in the pool processes)
+# ---------------------------------------------------------------------------
+
+_worker_state = {"tasks": 0, "models": []}
+
+
+def _init_worker(preload: Sequence[str]) -> None:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    for name in preload:
+        try:
+            model = _resolve(MODEL_LOADERS[name])()
+            if model:
+                # Warm-up inference, so the first real task doesn't pay runtime initialization
+                model.predict(Image.new("RGB", (640, 640), color="white"), verbose=False)
+                _worker_state["models"].append(name)
+        except Exception as e:
+            # The task reports the failure when the model is actually needed
+            logger.error(f"Inference worker {os.getpid()} could not preload '{name}': {e}")
+    logger.info(f"Inference worker {os.getpid()} ready (models: {_worker_state['models']})")
+
+
+def _read_image(descriptor: ImageDescriptor) -> Image.Image:
+    name, mode, size = descriptor
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        # frombytes copies the pixels, so the block can be released right away
+        return Image.frombytes(mode, size, bytes(block.buf[:_buffer_size(mode, size)]))
+    finally:
+        block.close()
+
+
+def _run_task(task: str, descriptors: List[ImageDescriptor]) -> List[Any]:
+    _worker_state["tasks"] += 1
+    images = [_read_image(descriptor) for descriptor in descriptors]
+    try:
+        return list(_resolve(INFERENCE_TASKS.get(task, task))(images))
+    except Exception as e:
+        # Re-raise as a plain exception: app exceptions don't always survive pickling
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+
+
+def _ping() -> Dict[str, Any]:
+    return {"pid": os.getpid(), "tasks": _worker_state["tasks"], "models": list(_worker_state["models"])}
+
+
+# ---------------------------------------------------------------------------
+# Parent side
+# ---------------------------------------------------------------------------
+
+def _buffer_size(mode: str, size: Tuple[int, int]) -> int:
+    return size[0] * size[1] * Image.getmodebands(mode)
+
+
+def _write_image(image) -> Tuple[shared_memory.SharedMemory, ImageDescriptor]:
+    pil = as_pil_image(image)
+    if pil.mode not in ("RGB", "L"):
+        pil = pil.convert("RGB")
+    data = pil.tobytes()
+    block = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+    block.buf[:len(data)] = data
+    return block, (block.name, pil.mode, pil.size)
+
+
+class InferencePool:
+    """
+    Process pool for local model inference with bounded queueing.
+    """
+
+    def __init__(self, workers: int = INFERENCE_POOL_WORKERS, max_queue: int = INFERENCE_POOL_MAX_QUEUE,
+                 max_tasks_per_worker: int = INFERENCE_POOL_MAX_TASKS_PER_WORKER,
+                 task_timeout: float = INFERENCE_POOL_TASK_TIMEOUT,
+                 health_interval: float = INFERENCE_POOL_HEALTH_INTERVAL,
+                 preload: Sequence[str] = tuple(INFERENCE_POOL_PRELOAD)):
+        self.workers = max(0, workers)
+        self.max_queue = max(0, max_queue)
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.task_timeout = task_timeout
+        self.health_interval = health_interval
+        self.preload = tuple(preload)
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._health_task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "timeouts": 0,
+            "restarts": 0,
+            "last_task_ms": 0.0,
+            "max_task_ms": 0.0
+        }
+        self._last_health: Dict[str, Any] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    @property
+    def capacity(self) -> int:
+        """Tasks admitted at once: one running per worker plus the queue."""
+        return self.workers + self.max_queue
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    # Fresh interpreters: forking a process with live threads and
+                    # model runtimes is unsafe, and recycling requires it
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.preload,),
+                    max_tasks_per_child=self.max_tasks_per_worker or None
+                )
+                logger.info(f"Inference pool started with {self.workers} workers")
+            return self._executor
+
+    def _restart(self, reason: str) -> None:
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            logger.warning(f"Restarting inference pool: {reason}")
+            # shutdown() alone waits for running tasks; a hung worker has to be killed
+            for process in list((executor._processes or {}).values()):
+                process.terminate()
+            executor.shutdown(wait=False, cancel_futures=True)
+            with self._lock:
+                self._stats["restarts"] += 1
+
+    async def run(self, task: str, images: Sequence[Any]) -> List[Any]:
+        """
+        Run `task` on the images in a worker process.
+
+        Raises:
+            InferencePoolBusyException: If the pool queue is full
+        """
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._stats["rejected"] += 1
+                raise InferencePoolBusyException(details={"in_flight": self._in_flight, "capacity": self.capacity})
+            self._in_flight += 1
+
+        blocks = []
+        start = time.perf_counter()
+        try:
+            descriptors = []
+            for image in images:
+                block, descriptor = _write_image(image)
+                blocks.append(block)
+                descriptors.append(descriptor)
+
+            future = self._get_executor().submit(_run_task, task, descriptors)
+            try:
+                results = await asyncio.wait_for(asyncio.wrap_future(future), self.task_timeout)
+            except asyncio.TimeoutError:
+                with self._lock:
+                    self._stats["timeouts"] += 1
+                # A hung worker keeps its slot forever; replace the pool
+                self._restart(f"task '{task}' exceeded {self.task_timeout}s")
+                raise
+            except BrokenProcessPool:
+                self._restart("a worker process died")
+                raise
+        except Exception:
+            with self._lock:
+                self._stats["failed"] += 1
+            raise
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+            with self._lock:
+                self._in_flight -= 1
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self._stats["completed"] += 1
+            self._stats["last_task_ms"] = round(elapsed_ms, 3)
+            self._stats["max_task_ms"] = round(max(self._stats["max_task_ms"], elapsed_ms), 3)
+        return results
+
+    def worker_models(self, timeout: Optional[float] = None) -> List[str]:
+        """Models preloaded by a worker (blocking; starts the pool if needed)."""
+        return self._get_executor().submit(_ping).result(timeout or self.task_timeout)["models"]
+
+    async def health_check(self, timeout: float = 10.0) -> Dict[str, Any]:
+        """Ping a worker; rebuild the pool if it is broken or unresponsive."""
+        start = time.perf_counter()
+        try:
+            future = self._get_executor().submit(_ping)
+            worker = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+            health = {"healthy": True, "latency_ms": round((time.perf_counter() - start) * 1000, 3), "worker": worker}
+        except Exception as e:
+            # Timeouts can also mean all workers are busy; only rebuild when the pool is idle or broken
+            if isinstance(e, BrokenProcessPool) or self._in_flight == 0:
+                self._restart(f"health check failed: {type(e).__name__}")
+            health = {"healthy": False, "error": f"{type(e).__name__}: {e}"}
+
+        health["checked_at"] = time.time()
+        self._last_health = health
+        return health
+
+    def start(self) -> None:
+        if not self.enabled:
+            return
+        # Spawn workers (and preload models) now rather than on the first request
+        self._get_executor().submit(_ping)
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._run_health_checks())
+
+    async def stop(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.get_running_loop().run_in_executor(None, lambda: executor.shutdown(wait=True, cancel_futures=True))
+            logger.info("Inference pool stopped.")
+
+    async def _run_health_checks(self) -> None:
+        while True:
+            try:
+                await asyncio.sleep(self.health_interval)
+                health = await self.health_check()
+                if not health["healthy"]:
+                    logger.error(f"Inference pool health check failed: {health['error']}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Inference pool health check error: {e}", exc_info=True)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "enabled": self.enabled,
+                "workers": self.workers,
+                "in_flight": self._in_flight,
+                "capacity": self.capacity,
+                "max_tasks_per_worker": self.max_tasks_per_worker,
+                "running": self._executor is not None,
+                "last_health_check": self._last_health
+            }
+
+
+inference_pool = InferencePool()
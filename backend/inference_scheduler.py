@@ -0,0 +1,232 @@
+"""
+Micro-batching scheduler for local model inference.
+
+Concurrent detection requests for the same model are collected into one
+batch, bounded by INFERENCE_MAX_BATCH_SIZE images and INFERENCE_MAX_WAIT_MS
+of waiting, and sent to the model as a single batched predict call in the
+threadpool. Each waiting coroutine gets its own result back. A model runs
+one batch at a time; requests that arrive meanwhile form the next batch and
+are dispatched as soon as it finishes, without waiting again.
+
+Under burst load this amortizes per-call overhead (preprocessing setup,
+framework dispatch, thread hops) across the batch and keeps the threadpool
+free for other work. Set INFERENCE_BATCHING_ENABLED=false to call the model
+once per request instead.
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+INFERENCE_BATCHING_ENABLED = os.environ.get("INFERENCE_BATCHING_ENABLED", "true").lower() == "true"
+INFERENCE_MAX_BATCH_SIZE = int(os.environ.get("INFERENCE_MAX_BATCH_SIZE", "8"))
+INFERENCE_MAX_WAIT_MS = float(os.environ.get("INFERENCE_MAX_WAIT_MS", "10"))
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+QUEUE_DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class Histogram:
+    """
+    Non-cumulative bucket histogram: each observation is counted in the first
+    bucket whose upper bound it does not exceed, or in "+Inf".
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self._bounds = tuple(buckets)
+        self._counts = [0] * (len(self._bounds) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+
+    def observe(self, value: float) -> None:
+        index = len(self._bounds)
+        for i, bound in enumerate(self._bounds):
+            if value <= bound:
+                index = i
+                break
+        self._counts[index] += 1
+        self._count += 1
+        self._sum += value
+        self._max = max(self._max, value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"<={bound}" for bound in self._bounds] + ["+Inf"]
+        return {
+            "buckets": dict(zip(labels, self._counts)),
+            "count": self._count,
+            "mean": round(self._sum / self._count, 3) if self._count else 0.0,
+            "max": self._max
+        }
+
+
+class _Pending:
+    __slots__ = ("item", "future", "enqueued_at")
+
+    def __init__(self, item: Any, future: asyncio.Future, enqueued_at: float):
+        self.item = item
+        self.future = future
+        self.enqueued_at = enqueued_at
+
+
+class BatchScheduler:
+    """
+    Collects concurrent submissions for one model into batched calls of
+    `predict_batch(items) -> results` (one result per item, in order).
+    """
+
+    def __init__(self, name: str, predict_batch: Callable[[List[Any]], Sequence[Any]],
+                 max_batch_size: int = INFERENCE_MAX_BATCH_SIZE, max_wait_ms: float = INFERENCE_MAX_WAIT_MS,
+                 enabled: bool = INFERENCE_BATCHING_ENABLED):
+        self.name = name
+        self.predict_batch = predict_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self.enabled = enabled
+
+        self._pending: deque = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self._queue_depths = Histogram(QUEUE_DEPTH_BUCKETS)
+        self._stats = {
+            "requests": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "last_batch_ms": 0.0,
+            "max_batch_ms": 0.0
+        }
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result from the next batch."""
+        if not self.enabled:
+            results = await self._run_batch([item])
+            return results[0]
+
+        loop = asyncio.get_running_loop()
+        self._ensure_worker(loop)
+
+        with self._stats_lock:
+            self._queue_depths.observe(len(self._pending))
+        future = loop.create_future()
+        self._pending.append(_Pending(item, future, loop.time()))
+        self._wakeup.set()
+        return await future
+
+    def _ensure_worker(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            # First use, or a new event loop (e.g. after an app restart in tests)
+            self._loop = loop
+            self._pending = deque()
+            self._wakeup = asyncio.Event()
+            self._worker = loop.create_task(self._run())
+
+    async def _collect_batch(self) -> List[_Pending]:
+        while not self._pending:
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+        # The wait is measured from the oldest request, so a backlog that built up
+        # during the previous batch is dispatched immediately
+        deadline = self._pending[0].enqueued_at + self.max_wait_ms / 1000
+        while len(self._pending) < self.max_batch_size:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+
+        count = min(len(self._pending), self.max_batch_size)
+        return [self._pending.popleft() for _ in range(count)]
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect_batch()
+            live = [pending for pending in batch if not pending.future.cancelled()]
+            if not live:
+                continue
+
+            try:
+                results = await self._run_batch([pending.item for pending in live])
+            except asyncio.CancelledError:
+                for pending in live:
+                    if not pending.future.done():
+                        pending.future.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"Batched inference for '{self.name}' failed ({len(live)} items): {e}")
+                for pending in live:
+                    if not pending.future.done():
+                        pending.future.set_exception(e)
+                continue
+
+            for pending, result in zip(live, results):
+                if not pending.future.done():
+                    pending.future.set_result(result)
+
+    async def _run_batch(self, items: List[Any]) -> Sequence[Any]:
+        start = time.perf_counter()
+        try:
+            results = await run_in_threadpool(self.predict_batch, items)
+            if len(results) != len(items):
+                raise RuntimeError(f"Model returned {len(results)} results for {len(items)} inputs")
+        except Exception:
+            with self._stats_lock:
+                self._stats["failed_batches"] += 1
+            raise
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._stats_lock:
+            self._stats["requests"] += len(items)
+            self._stats["batches"] += 1
+            self._stats["last_batch_ms"] = round(elapsed_ms, 3)
+            self._stats["max_batch_ms"] = round(max(self._stats["max_batch_ms"], elapsed_ms), 3)
+            self._batch_sizes.observe(len(items))
+        return results
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                **self._stats,
+                "enabled": self.enabled,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "queue_depth": len(self._pending),
+                "batch_size_histogram": self._batch_sizes.snapshot(),
+                "queue_depth_histogram": self._queue_depths.snapshot()
+            }
+
+
+_schedulers: Dict[str, BatchScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(name: str, predict_batch: Callable[[List[Any]], Sequence[Any]]) -> BatchScheduler:
+    """Get the shared scheduler for a model, creating it on first use."""
+    scheduler = _schedulers.get(name)
+    if scheduler is None:
+        with _schedulers_lock:
+            scheduler = _schedulers.get(name)
+            if scheduler is None:
+                scheduler = BatchScheduler(name, predict_batch)
+                _schedulers[name] = scheduler
+    return scheduler
+
+
+def get_inference_stats() -> Dict[str, dict]:
+    """Scheduler statistics per model, for monitoring."""
+    return {name: scheduler.get_stats() for name, scheduler in list(_schedulers.items())}
@@ -104,6 +104,35 @@ def migrate_db():
             except Exception:
                 pass
 
+            # Add cluster_id column for incremental spatial clustering
+            try:
+                conn.execute(text("ALTER TABLE issues ADD COLUMN cluster_id INTEGER"))
+                logger.info("Migrated database: Added cluster_id column.")
+            except Exception:
+                pass
+
+            # Add thumbnail_path column for list-view thumbnails
+            try:
+                conn.execute(text("ALTER TABLE issues ADD COLUMN thumbnail_path VARCHAR"))
+                logger.info("Migrated database: Added thumbnail_path column.")
+            except Exception:
+                pass
+
+            # Add image_phash column for near-duplicate photo detection
+            try:
+                conn.execute(text("ALTER TABLE issues ADD COLUMN image_phash VARCHAR"))
+                logger.info("Migrated database: Added image_phash column.")
+            except Exception:
+                pass
+
+            # Add index on cluster_id for cluster lookups
+            try:
+                conn.execute(text("CREATE INDEX ix_issues_cluster_id ON issues (cluster_id)"))
+                logger.info("Migrated database: Added index on cluster_id column.")
+            except Exception:
+                # Index likely already exists
+                pass
+
             # Add index on user_email
             try:
                 conn.execute(text("CREATE INDEX ix_issues_user_email ON issues (user_email)"))
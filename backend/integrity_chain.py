@@ -0,0 +1,319 @@
+"""
+Integrity Chain - Merkle block sealing for issue reports.
+
+Each issue gets a leaf hash computed from its own content at creation time, so
+report ingest never has to read the previous issue's hash. A single background
+sealer periodically batches unsealed issues (in id order) into a block, stores
+the block's Merkle root, and links it to the previous block's hash. Inclusion
+of any issue can then be proven with O(log n) sibling hashes.
+
+Leaf and node hashes use distinct prefixes so that a leaf can never be
+confused with an internal node. Odd nodes are promoted to the next level
+unchanged rather than duplicated.
+"""
+import os
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.cache import ThreadSafeCache
+from backend.models import Issue, IntegrityBlock
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+INTEGRITY_SEAL_INTERVAL_SECONDS = float(os.environ.get("INTEGRITY_SEAL_INTERVAL_SECONDS", "30"))
+INTEGRITY_BLOCK_MAX_LEAVES = int(os.environ.get("INTEGRITY_BLOCK_MAX_LEAVES", "1024"))
+# Issues younger than this are left for the next block, so that rows whose
+# transactions commit slightly out of id order are not skipped.
+INTEGRITY_SEAL_GRACE_SECONDS = float(os.environ.get("INTEGRITY_SEAL_GRACE_SECONDS", "5"))
+
+GENESIS_HASH = "0" * 64
+
+_LEAF_PREFIX = b"\x00"
+_NODE_PREFIX = b"\x01"
+
+# Built Merkle levels of recently proven blocks (blocks are immutable once sealed)
+_block_tree_cache = ThreadSafeCache(ttl=3600, max_size=64)
+
+
+def compute_issue_hash(description: str, category: str, reference_id: str) -> str:
+    """Content hash stored in Issue.integrity_hash and used as the Merkle leaf."""
+    return hashlib.sha256(f"{description}|{category}|{reference_id}".encode()).hexdigest()
+
+
+def compute_legacy_issue_hash(description: str, category: str, prev_hash: str) -> str:
+    """Hash used before block sealing, chained off the previous issue's hash."""
+    return hashlib.sha256(f"{description}|{category}|{prev_hash}".encode()).hexdigest()
+
+
+def _hash_leaf(leaf_hex: str) -> bytes:
+    return hashlib.sha256(_LEAF_PREFIX + bytes.fromhex(leaf_hex)).digest()
+
+
+def _hash_node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(_NODE_PREFIX + left + right).digest()
+
+
+def build_merkle_levels(leaves: List[str]) -> List[List[bytes]]:
+    """
+    Build all levels of a Merkle tree, from hashed leaves up to the root.
+
+    Args:
+        leaves: Hex-encoded leaf hashes in block order
+
+    Returns:
+        List of levels; levels[0] are the hashed leaves, levels[-1] == [root]
+    """
+    if not leaves:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+
+    levels = [[_hash_leaf(leaf) for leaf in leaves]]
+    while len(levels[-1]) > 1:
+        current = levels[-1]
+        next_level = [
+            _hash_node(current[i], current[i + 1])
+            for i in range(0, len(current) - 1, 2)
+        ]
+        if len(current) % 2 == 1:
+            next_level.append(current[-1])
+        levels.append(next_level)
+    return levels
+
+
+def merkle_root(leaves: List[str]) -> str:
+    return build_merkle_levels(leaves)[-1][0].hex()
+
+
+def build_inclusion_proof(levels: List[List[bytes]], index: int) -> List[Dict[str, str]]:
+    """
+    Collect the sibling hashes needed to recompute the root from one leaf.
+
+    Returns:
+        List of {"hash": hex, "position": "left"|"right"} from the leaf upwards
+    """
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append({
+                "hash": level[sibling].hex(),
+                "position": "left" if sibling < index else "right"
+            })
+        index //= 2
+    return proof
+
+
+def verify_inclusion_proof(leaf_hex: str, proof: List[Dict[str, str]], root_hex: str) -> bool:
+    """Recompute the Merkle root from a leaf and its proof in O(log n)."""
+    node = _hash_leaf(leaf_hex)
+    for step in proof:
+        sibling = bytes.fromhex(step["hash"])
+        if step["position"] == "left":
+            node = _hash_node(sibling, node)
+        else:
+            node = _hash_node(node, sibling)
+    return node.hex() == root_hex
+
+
+def compute_block_hash(prev_block_hash: str, root: str, first_issue_id: int, last_issue_id: int, leaf_count: int) -> str:
+    content = f"{prev_block_hash}|{root}|{first_issue_id}|{last_issue_id}|{leaf_count}"
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def _block_leaves(db: Session, first_issue_id: int, last_issue_id: int) -> List[Tuple[int, str]]:
+    return db.query(Issue.id, Issue.integrity_hash).filter(
+        Issue.id >= first_issue_id,
+        Issue.id <= last_issue_id,
+        Issue.integrity_hash.isnot(None)
+    ).order_by(Issue.id).all()
+
+
+def seal_pending_block(db: Session, max_leaves: int = INTEGRITY_BLOCK_MAX_LEAVES) -> Optional[IntegrityBlock]:
+    """
+    Seal the next batch of unsealed issues into a block.
+
+    Returns:
+        The new block, or None if there was nothing to seal
+    """
+    last_block = db.query(IntegrityBlock).order_by(IntegrityBlock.id.desc()).first()
+    last_sealed_id = last_block.last_issue_id if last_block else 0
+    prev_block_hash = last_block.block_hash if last_block else GENESIS_HASH
+
+    # A block covers every hashed issue in its id range, so it has to end before the
+    # first issue still inside the grace period (ids and created_at can interleave)
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=INTEGRITY_SEAL_GRACE_SECONDS)
+    first_recent_id = db.query(func.min(Issue.id)).filter(
+        Issue.id > last_sealed_id,
+        Issue.integrity_hash.isnot(None),
+        Issue.created_at > cutoff
+    ).scalar()
+
+    query = db.query(Issue.id, Issue.integrity_hash).filter(
+        Issue.id > last_sealed_id,
+        Issue.integrity_hash.isnot(None)
+    )
+    if first_recent_id is not None:
+        query = query.filter(Issue.id < first_recent_id)
+    rows = query.order_by(Issue.id).limit(max_leaves).all()
+
+    if not rows:
+        return None
+
+    leaves = [row.integrity_hash for row in rows]
+    root = merkle_root(leaves)
+    first_issue_id, last_issue_id = rows[0].id, rows[-1].id
+
+    block = IntegrityBlock(
+        first_issue_id=first_issue_id,
+        last_issue_id=last_issue_id,
+        leaf_count=len(leaves),
+        merkle_root=root,
+        prev_block_hash=prev_block_hash,
+        block_hash=compute_block_hash(prev_block_hash, root, first_issue_id, last_issue_id, len(leaves))
+    )
+    db.add(block)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another worker sealed the same range first
+        db.rollback()
+        logger.info(f"Integrity block starting at issue {first_issue_id} was already sealed")
+        return None
+
+    db.refresh(block)
+    logger.info(f"Sealed integrity block {block.id} with {block.leaf_count} issues (root {root[:12]}...)")
+    return block
+
+
+def seal_all_pending(max_blocks: int = 100) -> int:
+    """Seal blocks until the backlog is empty. Blocking; run in a threadpool."""
+    from backend.database import SessionLocal
+
+    db = SessionLocal()
+    sealed = 0
+    try:
+        while sealed < max_blocks and seal_pending_block(db) is not None:
+            sealed += 1
+    finally:
+        db.close()
+    return sealed
+
+
+def get_inclusion_proof(db: Session, issue_id: int) -> Optional[Dict]:
+    """
+    Build the inclusion proof for an issue.
+
+    Returns:
+        None if the issue does not exist, otherwise a dict describing the
+        issue's leaf, its block (if sealed) and the Merkle proof
+    """
+    issue = db.query(
+        Issue.id, Issue.description, Issue.category, Issue.reference_id, Issue.integrity_hash
+    ).filter(Issue.id == issue_id).first()
+    if not issue:
+        return None
+
+    result = {
+        "issue_id": issue.id,
+        "leaf_hash": issue.integrity_hash,
+        "content_verified": _content_matches(db, issue),
+        "sealed": False,
+        "block_id": None,
+        "leaf_index": None,
+        "merkle_root": None,
+        "block_hash": None,
+        "prev_block_hash": None,
+        "proof": [],
+        "proof_verified": False
+    }
+    if not issue.integrity_hash:
+        return result
+
+    block = db.query(IntegrityBlock).filter(
+        IntegrityBlock.first_issue_id <= issue_id,
+        IntegrityBlock.last_issue_id >= issue_id
+    ).first()
+    if not block:
+        return result
+
+    cache_key = f"block_{block.id}_{block.merkle_root}"
+    cached = _block_tree_cache.get(cache_key)
+    if cached is None:
+        rows = _block_leaves(db, block.first_issue_id, block.last_issue_id)
+        cached = ([row.id for row in rows], build_merkle_levels([row.integrity_hash for row in rows]))
+        _block_tree_cache.set(cached, cache_key)
+    leaf_ids, levels = cached
+
+    index = leaf_ids.index(issue_id)
+    proof = build_inclusion_proof(levels, index)
+
+    result.update({
+        "sealed": True,
+        "block_id": block.id,
+        "leaf_index": index,
+        "merkle_root": block.merkle_root,
+        "block_hash": block.block_hash,
+        "prev_block_hash": block.prev_block_hash,
+        "proof": proof,
+        "proof_verified": verify_inclusion_proof(issue.integrity_hash, proof, block.merkle_root)
+    })
+    return result
+
+
+def _content_matches(db: Session, issue) -> bool:
+    """Check the stored leaf hash against the issue's current content."""
+    if not issue.integrity_hash:
+        return False
+    if issue.integrity_hash == compute_issue_hash(issue.description, issue.category, issue.reference_id):
+        return True
+
+    # Issues created before block sealing were chained off the previous issue's hash
+    prev = db.query(Issue.integrity_hash).filter(Issue.id < issue.id).order_by(Issue.id.desc()).first()
+    prev_hash = prev[0] if prev and prev[0] else ""
+    return issue.integrity_hash == compute_legacy_issue_hash(issue.description, issue.category, prev_hash)
+
+
+class IntegritySealer:
+    """
+    Single-writer background task that seals pending issues into blocks.
+    """
+
+    def __init__(self, interval_seconds: float = INTEGRITY_SEAL_INTERVAL_SECONDS):
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Integrity sealer started (interval {self.interval_seconds}s)")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Integrity sealer stopped.")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.sleep(self.interval_seconds)
+                await run_in_threadpool(seal_all_pending)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Integrity sealing failed: {e}", exc_info=True)
+
+
+integrity_sealer = IntegritySealer()
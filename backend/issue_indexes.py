@@ -0,0 +1,19 @@
+"""
+Keeps the in-memory issue structures (spatial index, cluster grid) in step
+with the issues table. Every code path that creates an issue or changes its
+status - the issues router, grievance status sync, the Telegram bot - goes
+through these helpers, so none of them can leave a stale entry behind.
+"""
+from backend.spatial_index import spatial_index
+from backend.clustering_service import cluster_service
+
+
+def index_new_issue(issue) -> None:
+    """Add a freshly committed issue to the spatial index."""
+    spatial_index.upsert(issue)
+
+
+def sync_issue_status(issue_id: int, status: str) -> None:
+    """Propagate a status change to the in-memory spatial structures."""
+    spatial_index.update_status(issue_id, status)
+    cluster_service.update_status(issue_id, status)
@@ -0,0 +1,385 @@
+"""
+Durable background job queue backed by the jobs table.
+
+Action plans used to be generated in a FastAPI BackgroundTask: the coroutine
+ran in the request worker with no concurrency limit, retried Gemini inline
+with backoff sleeps, and was lost on restart. Jobs are now rows in the jobs
+table, processed by a fixed pool of JOB_WORKERS async workers:
+
+- a surge of reports becomes queued rows, never more than JOB_WORKERS
+  concurrent handler coroutines,
+- a failed attempt is rescheduled with exponential backoff
+  (JOB_RETRY_BASE_SECONDS x 2^attempt, capped at JOB_RETRY_MAX_SECONDS); after
+  max_attempts the job is dead-lettered (status 'dead') and can be requeued,
+- jobs survive restarts: queued rows are picked up on the next start, and rows
+  left 'running' by a crashed process are requeued once they have not been
+  touched for JOB_STALE_SECONDS (longer than any attempt may take, so jobs
+  that other processes are still running are left alone),
+- on shutdown the workers finish due jobs for up to JOB_SHUTDOWN_GRACE_SECONDS;
+  whatever is left stays queued.
+
+Handlers are `async def handler(payload: dict)` registered per job kind; an
+exception marks the attempt as failed. Batch handlers (`register_batch`)
+receive up to max_batch due jobs of their kind at once and return one
+outcome per payload (None for success, or the exception of that job).
+"""
+import os
+import time
+import asyncio
+import datetime
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, update
+
+from backend.models import Job
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE_SECONDS = float(os.environ.get("JOB_RETRY_BASE_SECONDS", "5"))
+JOB_RETRY_MAX_SECONDS = float(os.environ.get("JOB_RETRY_MAX_SECONDS", "600"))
+# Per-attempt limit for a handler
+JOB_TIMEOUT_SECONDS = float(os.environ.get("JOB_TIMEOUT_SECONDS", "120"))
+# Idle workers re-check for due retries this often; new jobs wake them immediately
+JOB_POLL_INTERVAL_SECONDS = float(os.environ.get("JOB_POLL_INTERVAL_SECONDS", "1.0"))
+JOB_SHUTDOWN_GRACE_SECONDS = float(os.environ.get("JOB_SHUTDOWN_GRACE_SECONDS", "5"))
+# A 'running' job untouched for this long was left behind by a dead process; keep it above JOB_TIMEOUT_SECONDS
+JOB_STALE_SECONDS = float(os.environ.get("JOB_STALE_SECONDS", str(JOB_TIMEOUT_SECONDS + 60)))
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_DEAD = "dead"
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+BatchJobHandler = Callable[[List[Dict[str, Any]]], Awaitable[List[Optional[BaseException]]]]
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _job_to_dict(job: Job) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "last_error": job.last_error,
+        "run_after": job.run_after,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at
+    }
+
+
+class JobQueue:
+    """
+    SQL-backed job queue with a pool of async workers.
+    Enqueueing and the other database methods are blocking.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, max_attempts: int = JOB_MAX_ATTEMPTS,
+                 retry_base: float = JOB_RETRY_BASE_SECONDS, retry_max: float = JOB_RETRY_MAX_SECONDS,
+                 job_timeout: float = JOB_TIMEOUT_SECONDS, poll_interval: float = JOB_POLL_INTERVAL_SECONDS,
+                 stale_after: float = JOB_STALE_SECONDS, session_factory=None):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.job_timeout = job_timeout
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        # Defaults to backend.database.SessionLocal, resolved lazily
+        self._session_factory = session_factory
+        self._handlers: Dict[str, JobHandler] = {}
+        self._batch_handlers: Dict[str, Tuple[BatchJobHandler, int]] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._draining = False
+        self._busy = 0
+        self._next_recover = 0.0
+        self._stats = {
+            "succeeded": 0, "retried": 0, "dead_lettered": 0, "recovered": 0,
+            "batches": 0, "batched_jobs": 0, "last_job_ms": 0.0
+        }
+
+    def _session(self):
+        if self._session_factory is None:
+            from backend.database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self._handlers[kind] = handler
+
+    def register_batch(self, kind: str, handler: BatchJobHandler, max_batch: int) -> None:
+        """Handle jobs of this kind up to `max_batch` at a time. max_batch <= 1 means one job per call."""
+        self._batch_handlers[kind] = (handler, max(1, max_batch))
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], max_attempts: Optional[int] = None) -> int:
+        """Persist a job and wake a worker. Returns the job id."""
+        db = self._session()
+        try:
+            job = Job(kind=kind, payload=payload, status=JOB_QUEUED,
+                      max_attempts=max_attempts or self.max_attempts, run_after=_utcnow())
+            db.add(job)
+            db.commit()
+            job_id = job.id
+        finally:
+            db.close()
+        self._wake()
+        return job_id
+
+    def _wake(self) -> None:
+        if self._loop is not None and self._wakeup is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def claim(self) -> List[Dict[str, Any]]:
+        """
+        Atomically move the oldest due job to 'running', plus more due jobs of
+        the same kind when it has a batch handler. Returns [] if nothing is due.
+        """
+        db = self._session()
+        try:
+            first = self._claim_one(db, Job.status == JOB_QUEUED)
+            if first is None:
+                return []
+            jobs = [first]
+            max_batch = self._batch_handlers.get(first["kind"], (None, 1))[1]
+            while len(jobs) < max_batch:
+                job = self._claim_one(db, Job.status == JOB_QUEUED, Job.kind == first["kind"])
+                if job is None:
+                    break
+                jobs.append(job)
+            return jobs
+        finally:
+            db.close()
+
+    def _claim_one(self, db, *criteria) -> Optional[Dict[str, Any]]:
+        for _ in range(5):
+            job = db.query(Job.id).filter(*criteria, Job.run_after <= _utcnow()).order_by(Job.run_after, Job.id).first()
+            if job is None:
+                return None
+            # Conditional update: another worker (or process) may have claimed it first
+            claimed = db.execute(
+                update(Job).where(Job.id == job.id, Job.status == JOB_QUEUED).values(
+                    status=JOB_RUNNING, attempts=Job.attempts + 1, updated_at=_utcnow()
+                )
+            ).rowcount
+            db.commit()
+            if claimed:
+                row = db.query(Job).filter(Job.id == job.id).first()
+                return {"id": row.id, "kind": row.kind, "payload": row.payload or {},
+                        "attempts": row.attempts, "max_attempts": row.max_attempts}
+        return None
+
+    def complete(self, job_id: int) -> None:
+        self._finish(job_id, status=JOB_SUCCEEDED, last_error=None, finished_at=_utcnow())
+
+    def fail(self, job: Dict[str, Any], error: str) -> str:
+        """Record a failed attempt: retry later, or dead-letter after max_attempts. Returns the new status."""
+        if job["attempts"] >= job["max_attempts"]:
+            self._finish(job["id"], status=JOB_DEAD, last_error=error, finished_at=_utcnow())
+            return JOB_DEAD
+        delay = min(self.retry_base * (2 ** (job["attempts"] - 1)), self.retry_max)
+        self._finish(job["id"], status=JOB_QUEUED, last_error=error,
+                     run_after=_utcnow() + datetime.timedelta(seconds=delay))
+        return JOB_QUEUED
+
+    def release(self, job: Dict[str, Any]) -> None:
+        """Put an interrupted job back without counting the attempt."""
+        self._finish(job["id"], status=JOB_QUEUED, attempts=job["attempts"] - 1)
+
+    def _finish(self, job_id: int, **values) -> None:
+        db = self._session()
+        try:
+            db.execute(update(Job).where(Job.id == job_id).values(updated_at=_utcnow(), **values))
+            db.commit()
+        finally:
+            db.close()
+
+    def recover(self) -> int:
+        """
+        Requeue jobs left 'running' by a process that died: those not updated
+        for `stale_after` seconds. Jobs claimed more recently may still be
+        running in another process.
+        """
+        cutoff = _utcnow() - datetime.timedelta(seconds=self.stale_after)
+        db = self._session()
+        try:
+            count = db.execute(
+                update(Job).where(Job.status == JOB_RUNNING, Job.updated_at < cutoff).values(
+                    status=JOB_QUEUED, updated_at=_utcnow()
+                )
+            ).rowcount
+            db.commit()
+        finally:
+            db.close()
+        if count:
+            self._stats["recovered"] += count
+            logger.warning(f"Requeued {count} jobs interrupted by a dead process")
+        return count
+
+    def requeue(self, job_id: int) -> bool:
+        """Give a dead-lettered job a fresh set of attempts."""
+        db = self._session()
+        try:
+            count = db.execute(
+                update(Job).where(Job.id == job_id, Job.status == JOB_DEAD).values(
+                    status=JOB_QUEUED, attempts=0, run_after=_utcnow(), finished_at=None, updated_at=_utcnow()
+                )
+            ).rowcount
+            db.commit()
+        finally:
+            db.close()
+        if count:
+            self._wake()
+        return bool(count)
+
+    def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        db = self._session()
+        try:
+            job = db.query(Job).filter(Job.id == job_id).first()
+            return _job_to_dict(job) if job else None
+        finally:
+            db.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        db = self._session()
+        try:
+            counts = dict(db.query(Job.status, func.count(Job.id)).group_by(Job.status).all())
+        finally:
+            db.close()
+        return {
+            **self._stats,
+            "workers": self.workers,
+            "running": self.running,
+            "busy_workers": self._busy,
+            "queued": counts.get(JOB_QUEUED, 0),
+            "in_progress": counts.get(JOB_RUNNING, 0),
+            "completed": counts.get(JOB_SUCCEEDED, 0),
+            "dead": counts.get(JOB_DEAD, 0)
+        }
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._draining = False
+        # Recover before the workers claim, so jobs left over from before the restart run first
+        await self._recover_stale()
+        self._tasks = [asyncio.create_task(self._run_worker(i)) for i in range(self.workers)]
+        logger.info(f"Job queue started with {self.workers} workers")
+
+    async def stop(self, grace: float = JOB_SHUTDOWN_GRACE_SECONDS) -> None:
+        """Let workers finish due jobs for up to `grace` seconds, then cancel them."""
+        if not self._tasks:
+            return
+        self._draining = True
+        self._wakeup.set()
+        done, pending = await asyncio.wait(self._tasks, timeout=grace)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+        logger.info("Job queue stopped.")
+
+    async def _recover_stale(self) -> None:
+        """Run recover() now and then every `stale_after` seconds; a crashed job only becomes stale over time."""
+        self._next_recover = time.monotonic() + self.stale_after
+        try:
+            if await run_in_threadpool(self.recover):
+                self._wake()
+        except Exception as e:
+            logger.error(f"Job recovery failed: {e}", exc_info=True)
+
+    async def _run_worker(self, worker_id: int) -> None:
+        while True:
+            try:
+                if time.monotonic() >= self._next_recover:
+                    await self._recover_stale()
+                self._wakeup.clear()
+                jobs = await run_in_threadpool(self.claim)
+                if not jobs:
+                    if self._draining:
+                        return
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._execute(jobs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker {worker_id} error: {e}", exc_info=True)
+                await asyncio.sleep(self.poll_interval)
+
+    async def _execute(self, jobs: List[Dict[str, Any]]) -> None:
+        kind = jobs[0]["kind"]
+        batch_handler = self._batch_handlers.get(kind)
+        handler = self._handlers.get(kind)
+        if batch_handler is None and handler is None:
+            for job in jobs:
+                await run_in_threadpool(self._finish, job["id"], status=JOB_DEAD,
+                                        last_error=f"No handler for job kind '{kind}'", finished_at=_utcnow())
+                self._stats["dead_lettered"] += 1
+            return
+
+        self._busy += 1
+        start = time.perf_counter()
+        try:
+            if batch_handler is not None:
+                if len(jobs) > 1:
+                    self._stats["batches"] += 1
+                    self._stats["batched_jobs"] += len(jobs)
+                outcomes = await asyncio.wait_for(batch_handler[0]([job["payload"] for job in jobs]), self.job_timeout)
+                if len(outcomes) != len(jobs):
+                    raise RuntimeError(f"Batch handler returned {len(outcomes)} outcomes for {len(jobs)} jobs")
+            else:
+                await asyncio.wait_for(handler(jobs[0]["payload"]), self.job_timeout)
+                outcomes = [None]
+        except asyncio.CancelledError:
+            # Shutdown: the attempt did not finish, hand the jobs to the next start
+            for job in jobs:
+                self.release(job)
+            raise
+        except Exception as e:
+            outcomes = [e] * len(jobs)
+        finally:
+            self._busy -= 1
+            self._stats["last_job_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+        for job, outcome in zip(jobs, outcomes):
+            await self._record(job, outcome)
+
+    async def _record(self, job: Dict[str, Any], error: Optional[BaseException]) -> None:
+        if error is None:
+            await run_in_threadpool(self.complete, job["id"])
+            self._stats["succeeded"] += 1
+            return
+
+        message = f"{type(error).__name__}: {error}"
+        status = await run_in_threadpool(self.fail, job, message)
+        if status == JOB_DEAD:
+            self._stats["dead_lettered"] += 1
+            logger.error(f"Job {job['id']} ({job['kind']}) dead-lettered after {job['attempts']} attempts: {message}")
+        else:
+            self._stats["retried"] += 1
+            logger.warning(f"Job {job['id']} ({job['kind']}) attempt {job['attempts']} failed: {message}")
+
+
+job_queue = JobQueue()
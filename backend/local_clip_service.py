@@ -0,0 +1,205 @@
+"""
+Local zero-shot CLIP engine with a precomputed text-embedding index.
+
+The HF API path sends every image to the remote router with a 20 s timeout
+and returns nothing on errors. This engine runs an open CLIP checkpoint
+(LOCAL_CLIP_MODEL, loaded from the Hugging Face cache or a local directory)
+in-process instead.
+
+Label prompts never change between requests, so all label sets used by the
+CLIP detectors are encoded once when the engine loads and kept as one
+L2-normalized NumPy matrix. A request then costs a single image embedding
+plus a matrix-vector product; labels outside the index are encoded on first
+use and appended to it.
+
+Enable with USE_LOCAL_CLIP=true: the engine is then preloaded at startup,
+hf_api_service classifies with it instead of calling the HF API, and
+UnifiedDetectionService can use it as the "local_clip" backend.
+"""
+import io
+import os
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from PIL import Image
+
+from backend.hf_service import CLIP_CATEGORY_LABELS
+from backend.image_envelope import ImageEnvelope
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+USE_LOCAL_CLIP = os.environ.get("USE_LOCAL_CLIP", "false").lower() == "true"
+LOCAL_CLIP_MODEL = os.environ.get("LOCAL_CLIP_MODEL", "openai/clip-vit-base-patch32")
+LOCAL_ML_DEVICE = os.environ.get("LOCAL_ML_DEVICE", "cpu")
+# Same prompt as the HF zero-shot-image-classification pipeline, so scores match the API
+LOCAL_CLIP_PROMPT_TEMPLATE = os.environ.get("LOCAL_CLIP_PROMPT_TEMPLATE", "This is a photo of {}.")
+
+
+def _to_pil(image: Union[Image.Image, ImageEnvelope, bytes]) -> Image.Image:
+    if isinstance(image, ImageEnvelope):
+        image = image.image
+    elif isinstance(image, (bytes, bytearray)):
+        image = Image.open(io.BytesIO(image))
+    return image if image.mode == "RGB" else image.convert("RGB")
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    exp = np.exp(logits - logits.max())
+    return exp / exp.sum()
+
+
+def _normalize(embeddings: np.ndarray) -> np.ndarray:
+    return embeddings / np.linalg.norm(embeddings, axis=-1, keepdims=True)
+
+
+class LocalClipEngine:
+    """
+    In-process CLIP zero-shot classifier. Thread-safe; inference is blocking,
+    use the *_async methods from request handlers.
+    """
+
+    def __init__(self, model_name: str = LOCAL_CLIP_MODEL, device: str = LOCAL_ML_DEVICE,
+                 prompt_template: str = LOCAL_CLIP_PROMPT_TEMPLATE):
+        self.model_name = model_name
+        self.device = device
+        self.prompt_template = prompt_template
+        self._model = None
+        self._processor = None
+        self._logit_scale = 100.0
+        self._labels: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._text_embeddings: Optional[np.ndarray] = None
+        self._load_lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self._stats = {"requests": 0, "labels_encoded_on_demand": 0}
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._text_embeddings is not None
+
+    def load(self, label_sets: Optional[Iterable[Sequence[str]]] = None) -> "LocalClipEngine":
+        """
+        Load the checkpoint and build the text-embedding index (blocking).
+        Defaults to every label set used by the CLIP detectors.
+        """
+        with self._load_lock:
+            if self.is_loaded:
+                return self
+            self._load_model()
+            if label_sets is None:
+                from backend.hf_api_service import all_clip_label_sets
+                label_sets = [*all_clip_label_sets(), *(labels for labels, _ in CLIP_CATEGORY_LABELS.values())]
+            labels = list(dict.fromkeys(label for labels in label_sets for label in labels))
+            embeddings = self._encode_text(labels)
+            with self._index_lock:
+                self._labels = labels
+                self._index = {label: i for i, label in enumerate(labels)}
+                self._text_embeddings = embeddings
+            logger.info(f"Local CLIP '{self.model_name}' loaded with {len(labels)} precomputed label embeddings")
+            return self
+
+    def _load_model(self) -> None:
+        from transformers import CLIPModel, CLIPProcessor
+
+        self._processor = CLIPProcessor.from_pretrained(self.model_name)
+        self._model = CLIPModel.from_pretrained(self.model_name).to(self.device).eval()
+        self._logit_scale = float(self._model.logit_scale.exp().item())
+
+    def _encode_text(self, labels: Sequence[str]) -> np.ndarray:
+        import torch
+
+        inputs = self._processor(
+            text=[self.prompt_template.format(label) for label in labels], padding=True, return_tensors="pt"
+        ).to(self.device)
+        with torch.no_grad():
+            features = self._model.get_text_features(**inputs)
+        return _normalize(features.cpu().numpy().astype(np.float32))
+
+    def _encode_image(self, image: Image.Image) -> np.ndarray:
+        import torch
+
+        inputs = self._processor(images=image, return_tensors="pt").to(self.device)
+        with torch.no_grad():
+            features = self._model.get_image_features(**inputs)
+        return _normalize(features.cpu().numpy().astype(np.float32))[0]
+
+    def _rows(self, labels: Sequence[str]) -> np.ndarray:
+        missing = [label for label in dict.fromkeys(labels) if label not in self._index]
+        if missing:
+            embeddings = self._encode_text(missing)
+            with self._index_lock:
+                for label, embedding in zip(missing, embeddings):
+                    if label not in self._index:
+                        self._index[label] = len(self._labels)
+                        self._labels.append(label)
+                        self._text_embeddings = np.vstack([self._text_embeddings, embedding])
+                        self._stats["labels_encoded_on_demand"] += 1
+        return np.array([self._index[label] for label in labels])
+
+    def _scores(self, image_embedding: np.ndarray, labels: Sequence[str]) -> List[Dict[str, Any]]:
+        rows = self._rows(labels)
+        logits = self._logit_scale * (self._text_embeddings[rows] @ image_embedding)
+        probs = _softmax(logits)
+        ranked = sorted(zip(labels, probs.tolist()), key=lambda item: item[1], reverse=True)
+        return [{"label": label, "score": score} for label, score in ranked]
+
+    def classify(self, image: Union[Image.Image, ImageEnvelope, bytes], labels: Sequence[str]) -> List[Dict[str, Any]]:
+        """Zero-shot scores for `labels`, ranked, in the HF API response format."""
+        return self.classify_groups(image, {"labels": labels})["labels"]
+
+    def classify_groups(self, image: Union[Image.Image, ImageEnvelope, bytes],
+                        groups: Dict[str, Sequence[str]]) -> Dict[str, List[Dict[str, Any]]]:
+        """Scores for several label sets from one image embedding."""
+        if not self.is_loaded:
+            raise RuntimeError("Local CLIP engine is not loaded")
+        image_embedding = self._encode_image(_to_pil(image))
+        self._stats["requests"] += 1
+        return {name: self._scores(image_embedding, labels) for name, labels in groups.items()}
+
+    async def classify_async(self, image, labels: Sequence[str]) -> List[Dict[str, Any]]:
+        return await run_in_threadpool(self.classify, image, labels)
+
+    async def classify_groups_async(self, image, groups: Dict[str, Sequence[str]]) -> Dict[str, List[Dict[str, Any]]]:
+        return await run_in_threadpool(self.classify_groups, image, groups)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "loaded": self.is_loaded,
+            "model": self.model_name,
+            "device": self.device,
+            "indexed_labels": len(self._labels)
+        }
+
+
+local_clip_engine = LocalClipEngine()
+
+
+def _category_detections(scores: List[Dict[str, Any]], targets: Sequence[str]) -> List[Dict[str, Any]]:
+    return [
+        {"label": res["label"], "confidence": res["score"], "box": []}
+        for res in scores
+        if res["label"] in targets and res["score"] > 0.4
+    ]
+
+
+async def detect_multi_local_clip(image: Union[Image.Image, ImageEnvelope],
+                                  categories: Sequence[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Vandalism / infrastructure / flooding detections from one local CLIP image embedding."""
+    if not local_clip_engine.is_loaded:
+        await run_in_threadpool(local_clip_engine.load)
+    scores = await local_clip_engine.classify_groups_async(
+        image, {category: CLIP_CATEGORY_LABELS[category][0] for category in categories}
+    )
+    return {
+        category: _category_detections(scores[category], CLIP_CATEGORY_LABELS[category][1])
+        for category in categories
+    }
+
+
+async def detect_category_local_clip(image: Union[Image.Image, ImageEnvelope], category: str) -> List[Dict[str, Any]]:
+    return (await detect_multi_local_clip(image, [category]))[category]
@@ -5,12 +5,18 @@ This module provides local ML models for vandalism, infrastructure damage,
 and flooding detection using YOLO models, eliminating the dependency on
 Hugging Face API.
 """
+import os
 import logging
+from typing import Union
 from PIL import Image
 import threading
-from fastapi.concurrency import run_in_threadpool
 
-from backend.exceptions import DetectionException
+from backend.cache import ThreadSafeCache
+from backend.exceptions import DetectionException, InferencePoolBusyException
+from backend.image_envelope import ImageEnvelope, as_pil_image
+from backend.inference_scheduler import get_scheduler
+from backend.inference_pool import inference_pool
+from backend.model_export import load_yolo_model
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -19,47 +25,61 @@ logger = logging.getLogger(__name__)
 _general_model = None
 _model_lock = threading.Lock()
 
+# Raw general-model boxes per image content hash
+RAW_BOX_CACHE_TTL = int(os.environ.get("RAW_BOX_CACHE_TTL", "3600"))
+RAW_BOX_CACHE_SIZE = int(os.environ.get("RAW_BOX_CACHE_SIZE", "256"))
+_raw_box_cache = ThreadSafeCache(ttl=RAW_BOX_CACHE_TTL, max_size=RAW_BOX_CACHE_SIZE)
+
 # Confidence scaling factors
 HEURISTIC_CONFIDENCE_FACTOR = 0.6  # Reduce confidence for heuristic detection
 LOW_CONFIDENCE_FACTOR = 0.5  # Lower confidence for uncertain detections
 
 
+GENERAL_MODEL_NAME = "yolov8n"
+
+
+def load_torch_general_model():
+    """Load the general model's PyTorch weights."""
+    import torch
+    from ultralytics import YOLO
+
+    # Monkey-patch torch.load to use weights_only=False for YOLO model loading
+    # This is safe because YOLO models from ultralytics are from a trusted source
+    original_load = torch.load
+    def patched_load(*args, **kwargs):
+        kwargs['weights_only'] = False
+        return original_load(*args, **kwargs)
+    torch.load = patched_load
+
+    try:
+        # Using YOLOv8 nano model for general object detection (lighter weight)
+        # This model can detect 80+ common objects which we can use for
+        # vandalism, infrastructure, and flooding detection
+        return YOLO(f'{GENERAL_MODEL_NAME}.pt')
+    finally:
+        # Restore original torch.load
+        torch.load = original_load
+
+
 def load_general_model():
     """
     Loads a general-purpose YOLO model for object detection.
     This single model will be used for all detection types.
+    Served through ONNX Runtime / OpenVINO when MODEL_RUNTIME selects it.
     """
     logger.info("Loading General Object Detection Model...")
     try:
-        import torch
-        from ultralytics import YOLO
-        
-        # Monkey-patch torch.load to use weights_only=False for YOLO model loading
-        # This is safe because YOLO models from ultralytics are from a trusted source
-        original_load = torch.load
-        def patched_load(*args, **kwargs):
-            kwargs['weights_only'] = False
-            return original_load(*args, **kwargs)
-        torch.load = patched_load
-        
-        try:
-            # Using YOLOv8 nano model for general object detection (lighter weight)
-            # This model can detect 80+ common objects which we can use for
-            # vandalism, infrastructure, and flooding detection
-            model = YOLO('yolov8n.pt')
-            
-            # Configure model parameters
-            model.overrides['conf'] = 0.25
-            model.overrides['iou'] = 0.45
-            model.overrides['agnostic_nms'] = False
-            model.overrides['max_det'] = 1000
-            
-            logger.info("General Object Detection Model loaded successfully.")
-            return model
-        finally:
-            # Restore original torch.load
-            torch.load = original_load
-            
+        model = load_yolo_model(GENERAL_MODEL_NAME, load_torch_general_model, task="detect")
+
+        # Configure model parameters
+        model.overrides['conf'] = 0.25
+        model.overrides['iou'] = 0.45
+        model.overrides['agnostic_nms'] = False
+        model.overrides['max_det'] = 1000
+
+        logger.info("General Object Detection Model loaded successfully.")
+        return model
+
     except Exception as e:
         logger.error(f"Failed to load general detection model: {e}")
         return None
@@ -75,7 +95,138 @@ def get_general_model():
     return _general_model
 
 
-async def detect_vandalism_local(image: Image.Image, client=None):
+def _predict_general_batch(images):
+    """Run the general model on a batch of PIL images, one result per image."""
+    model = get_general_model()
+    if len(images) == 1:
+        return [model.predict(images[0], stream=False)[0]]
+    return model.predict(images, stream=False)
+
+
+async def _predict_general(image):
+    """Queue an image for the next batched forward pass of the general model."""
+    return await get_scheduler("general", _predict_general_batch).submit(as_pil_image(image))
+
+
+def _general_model_available():
+    # With the process pool the model lives in the workers, which return no boxes if it failed to load
+    return inference_pool.enabled or get_general_model() is not None
+
+
+# Category interpretations of the general model's labels
+VANDALISM_ACTIVITY_LABELS = ['person', 'bottle']
+INFRASTRUCTURE_RELATED = ['car', 'truck', 'traffic light', 'stop sign', 'bench', 'fire hydrant']
+FLOODING_INDICATORS = ['car', 'truck', 'person', 'bicycle', 'motorcycle', 'bench']
+# Categories derived from one forward pass of the general model
+DETECTION_CATEGORIES = ("vandalism", "infrastructure", "flooding")
+
+
+def _extract_boxes(result):
+    """Convert a YOLO result into plain {label, confidence, box} dicts (cacheable, model-independent)."""
+    boxes = []
+    if hasattr(result, 'boxes'):
+        for box in result.boxes:
+            cls_id = int(box.cls[0].cpu().numpy())
+            boxes.append({
+                "label": result.names[cls_id],
+                "confidence": float(box.conf[0].cpu().numpy()),
+                "box": box.xyxy[0].cpu().numpy().tolist()
+            })
+    return boxes
+
+
+async def detect_raw_boxes(image: Union[Image.Image, ImageEnvelope]):
+    """
+    Run the general model once and return its raw boxes.
+
+    Results for envelopes are cached by content hash, so interpreting the same
+    upload for several categories (or re-uploading it) costs one forward pass.
+    """
+    cache_key = f"general_{image.sha256}" if isinstance(image, ImageEnvelope) else None
+    if cache_key:
+        cached = _raw_box_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    if inference_pool.enabled:
+        boxes = (await inference_pool.run("general", [image]))[0]
+    else:
+        # Batched with concurrent requests and run in the threadpool
+        boxes = _extract_boxes(await _predict_general(image))
+
+    if cache_key:
+        _raw_box_cache.set(boxes, cache_key)
+    return boxes
+
+
+def detect_raw_boxes_batch(images):
+    """Raw boxes for a list of PIL images (inference pool task)."""
+    if get_general_model() is None:
+        return [[] for _ in images]
+    return [_extract_boxes(result) for result in _predict_general_batch(images)]
+
+
+def interpret_vandalism(boxes):
+    detections = []
+    for raw in boxes:
+        # For vandalism, we flag detections with reasonable confidence
+        # This is a heuristic approach - in production, you'd want a specialized model
+        if raw["confidence"] > 0.4:
+            # Map generic labels to vandalism context
+            vandalism_label = "potential vandalism"
+            if raw["label"].lower() in VANDALISM_ACTIVITY_LABELS:
+                vandalism_label = "vandalism activity"
+
+            detections.append({
+                "label": vandalism_label,
+                "confidence": raw["confidence"] * HEURISTIC_CONFIDENCE_FACTOR,
+                "box": raw["box"]
+            })
+    return detections
+
+
+def interpret_infrastructure(boxes):
+    detections = []
+    for raw in boxes:
+        label = raw["label"].lower()
+        # Flag infrastructure-related objects
+        if raw["confidence"] > 0.4 and label in INFRASTRUCTURE_RELATED:
+            # Map to infrastructure context
+            infra_label = "infrastructure object"
+            if label in ['traffic light', 'stop sign']:
+                infra_label = "damaged sign"
+            elif label == 'fire hydrant':
+                infra_label = "damaged hydrant"
+
+            detections.append({
+                "label": infra_label,
+                "confidence": raw["confidence"] * HEURISTIC_CONFIDENCE_FACTOR,
+                "box": raw["box"]
+            })
+    return detections
+
+
+def interpret_flooding(boxes, image_height):
+    detections = []
+    for raw in boxes:
+        # Check if objects are in positions that might indicate flooding
+        if raw["confidence"] > 0.4 and raw["label"].lower() in FLOODING_INDICATORS:
+            # Heuristic: if bottom of bounding box is below image center,
+            # it might be partially submerged
+            if raw["box"][3] > image_height * 0.6:
+                detections.append({
+                    "label": "potential flooding",
+                    "confidence": raw["confidence"] * LOW_CONFIDENCE_FACTOR,
+                    "box": raw["box"]
+                })
+    return detections
+
+
+def _image_height(image):
+    return image.height if hasattr(image, 'height') else 480
+
+
+async def detect_vandalism_local(image: Union[Image.Image, ImageEnvelope], client=None):
     """
     Detects vandalism/graffiti using local YOLO model (Async compatible).
     
@@ -83,44 +234,18 @@ async def detect_vandalism_local(image: Image.Image, client=None):
     of vandalism detection. It looks for suspicious objects or scene anomalies.
     
     Args:
-        image: PIL Image object
+        image: PIL Image or ImageEnvelope (its decoded pixels are used)
         client: Unused parameter for compatibility with HF service
         
     Returns:
         List of detections with label, confidence, and box coordinates
     """
     try:
-        model = get_general_model()
-        if not model:
+        if not _general_model_available():
             logger.warning("Detection model not available, returning empty detections.")
             return []
         
-        # Run model prediction in threadpool to avoid blocking event loop
-        results = await run_in_threadpool(model.predict, image, stream=False)
-        result = results[0]
-        
-        detections = []
-        
-        if hasattr(result, 'boxes'):
-            for box in result.boxes:
-                coords = box.xyxy[0].cpu().numpy().tolist()
-                conf = float(box.conf[0].cpu().numpy())
-                cls_id = int(box.cls[0].cpu().numpy())
-                label = result.names[cls_id]
-                
-                # For vandalism, we flag detections with reasonable confidence
-                # This is a heuristic approach - in production, you'd want a specialized model
-                if conf > 0.4:
-                    # Map generic labels to vandalism context
-                    vandalism_label = "potential vandalism"
-                    if label.lower() in ['person', 'bottle']:
-                        vandalism_label = "vandalism activity"
-                    
-                    detections.append({
-                        "label": vandalism_label,
-                        "confidence": conf * HEURISTIC_CONFIDENCE_FACTOR,
-                        "box": coords
-                    })
+        detections = interpret_vandalism(await detect_raw_boxes(image))
         
         # If we detect multiple suspicious objects, mark it as vandalism
         if len(detections) > 0:
@@ -128,12 +253,14 @@ async def detect_vandalism_local(image: Image.Image, client=None):
         
         return detections
         
+    except InferencePoolBusyException:
+        raise
     except Exception as e:
         logger.error(f"Local Vandalism Detection Error: {e}")
         raise DetectionException("Failed to detect vandalism", "vandalism", details={"error": str(e)}) from e
 
 
-async def detect_infrastructure_local(image: Image.Image, client=None):
+async def detect_infrastructure_local(image: Union[Image.Image, ImageEnvelope], client=None):
     """
     Detects infrastructure damage using local YOLO model (Async compatible).
     
@@ -141,58 +268,30 @@ async def detect_infrastructure_local(image: Image.Image, client=None):
     of infrastructure damage. It looks for objects that might indicate damage.
     
     Args:
-        image: PIL Image object
+        image: PIL Image or ImageEnvelope (its decoded pixels are used)
         client: Unused parameter for compatibility with HF service
         
     Returns:
         List of detections with label, confidence, and box coordinates
     """
     try:
-        model = get_general_model()
-        if not model:
+        if not _general_model_available():
             logger.warning("Detection model not available, returning empty detections.")
             return []
         
-        # Run model prediction in threadpool to avoid blocking event loop
-        results = await run_in_threadpool(model.predict, image, stream=False)
-        result = results[0]
-        
-        detections = []
-        
-        # Objects that might indicate infrastructure issues
-        infrastructure_related = ['car', 'truck', 'traffic light', 'stop sign', 'bench', 'fire hydrant']
-        
-        if hasattr(result, 'boxes'):
-            for box in result.boxes:
-                coords = box.xyxy[0].cpu().numpy().tolist()
-                conf = float(box.conf[0].cpu().numpy())
-                cls_id = int(box.cls[0].cpu().numpy())
-                label = result.names[cls_id]
-                
-                # Flag infrastructure-related objects
-                if conf > 0.4 and label.lower() in infrastructure_related:
-                    # Map to infrastructure context
-                    infra_label = "infrastructure object"
-                    if label.lower() in ['traffic light', 'stop sign']:
-                        infra_label = "damaged sign"
-                    elif label.lower() == 'fire hydrant':
-                        infra_label = "damaged hydrant"
-                    
-                    detections.append({
-                        "label": infra_label,
-                        "confidence": conf * HEURISTIC_CONFIDENCE_FACTOR,
-                        "box": coords
-                    })
+        detections = interpret_infrastructure(await detect_raw_boxes(image))
         
         logger.info(f"Infrastructure detection found {len(detections)} objects")
         return detections
         
+    except InferencePoolBusyException:
+        raise
     except Exception as e:
         logger.error(f"Local Infrastructure Detection Error: {e}")
         raise DetectionException("Failed to detect infrastructure damage", "infrastructure", details={"error": str(e)}) from e
 
 
-async def detect_flooding_local(image: Image.Image, client=None):
+async def detect_flooding_local(image: Union[Image.Image, ImageEnvelope], client=None):
     """
     Detects flooding using local YOLO model (Async compatible).
     
@@ -200,57 +299,69 @@ async def detect_flooding_local(image: Image.Image, client=None):
     of flooding. It looks for objects that might be partially submerged or water-related.
     
     Args:
-        image: PIL Image object
+        image: PIL Image or ImageEnvelope (its decoded pixels are used)
         client: Unused parameter for compatibility with HF service
         
     Returns:
         List of detections with label, confidence, and box coordinates
     """
     try:
-        model = get_general_model()
-        if not model:
+        if not _general_model_available():
             logger.warning("Detection model not available, returning empty detections.")
             return []
         
-        # Run model prediction in threadpool to avoid blocking event loop
-        results = await run_in_threadpool(model.predict, image, stream=False)
-        result = results[0]
-        
-        detections = []
-        
-        # Objects that might be affected by flooding
-        flooding_indicators = ['car', 'truck', 'person', 'bicycle', 'motorcycle', 'bench']
-        
-        if hasattr(result, 'boxes'):
-            for box in result.boxes:
-                coords = box.xyxy[0].cpu().numpy().tolist()
-                conf = float(box.conf[0].cpu().numpy())
-                cls_id = int(box.cls[0].cpu().numpy())
-                label = result.names[cls_id]
-                
-                # Check if objects are in positions that might indicate flooding
-                if conf > 0.4 and label.lower() in flooding_indicators:
-                    # Heuristic: if bottom of bounding box is below image center,
-                    # it might be partially submerged
-                    image_height = image.height if hasattr(image, 'height') else 480
-                    box_bottom = coords[3]
-                    
-                    if box_bottom > image_height * 0.6:
-                        detections.append({
-                            "label": "potential flooding",
-                            "confidence": conf * LOW_CONFIDENCE_FACTOR,
-                            "box": coords
-                        })
+        detections = interpret_flooding(await detect_raw_boxes(image), _image_height(image))
         
         logger.info(f"Flooding detection found {len(detections)} indicators")
         return detections
         
+    except InferencePoolBusyException:
+        raise
     except Exception as e:
         logger.error(f"Local Flooding Detection Error: {e}")
         raise DetectionException("Failed to detect flooding", "flooding", details={"error": str(e)}) from e
 
+
+async def detect_multi_local(image: Union[Image.Image, ImageEnvelope], categories=DETECTION_CATEGORIES):
+    """
+    Run the general model once and interpret its boxes for several categories.
+
+    Args:
+        image: PIL Image or ImageEnvelope
+        categories: Subset of DETECTION_CATEGORIES
+
+    Returns:
+        Dict mapping category to its list of detections
+    """
+    try:
+        if not _general_model_available():
+            logger.warning("Detection model not available, returning empty detections.")
+            return {category: [] for category in categories}
+
+        boxes = await detect_raw_boxes(image)
+    except InferencePoolBusyException:
+        raise
+    except Exception as e:
+        logger.error(f"Local Multi Detection Error: {e}")
+        raise DetectionException("Failed to run multi-category detection", "multi", details={"error": str(e)}) from e
+
+    interpreters = {
+        "vandalism": lambda: interpret_vandalism(boxes),
+        "infrastructure": lambda: interpret_infrastructure(boxes),
+        "flooding": lambda: interpret_flooding(boxes, _image_height(image))
+    }
+    return {category: interpreters[category]() for category in categories}
+
 async def get_detection_status():
     """Get status of local detection model."""
+    if inference_pool.enabled:
+        health = await inference_pool.health_check()
+        return {
+            "model_loaded": "general" in health.get("worker", {}).get("models", []),
+            "backend": "local_yolo",
+            "inference_pool": inference_pool.get_stats()
+        }
+
     model = get_general_model()
     return {
         "model_loaded": model is not None,
@@ -9,6 +9,9 @@ import os
 from functools import lru_cache
 from typing import Optional, Dict, Any
 
+PINCODE_DATA_PATH = os.path.join(os.path.dirname(__file__), "data", "mh_pincode_sample.json")
+MLA_DATA_PATH = os.path.join(os.path.dirname(__file__), "data", "mh_mla_sample.json")
+
 # District Pincode Ranges (Fallback data)
 # Format: (start, end, district)
 DISTRICT_RANGES = [
@@ -57,13 +60,7 @@ def load_maharashtra_pincode_data() -> Dict[str, Dict[str, Any]]:
     Returns:
         dict: Dictionary mapping pincode to data
     """
-    file_path = os.path.join(
-        os.path.dirname(__file__),
-        "data",
-        "mh_pincode_sample.json"
-    )
-    
-    with open(file_path, "r", encoding="utf-8") as f:
+    with open(PINCODE_DATA_PATH, "r", encoding="utf-8") as f:
         data_list = json.load(f)
         # Convert list to dictionary for O(1) lookup
         return {item["pincode"]: item for item in data_list}
@@ -77,13 +74,7 @@ def load_maharashtra_mla_data() -> Dict[str, Dict[str, Any]]:
     Returns:
         dict: Dictionary mapping constituency to MLA data
     """
-    file_path = os.path.join(
-        os.path.dirname(__file__),
-        "data",
-        "mh_mla_sample.json"
-    )
-    
-    with open(file_path, "r", encoding="utf-8") as f:
+    with open(MLA_DATA_PATH, "r", encoding="utf-8") as f:
         data_list = json.load(f)
         # Convert list to dictionary for O(1) lookup
         return {item["assembly_constituency"]: item for item in data_list}
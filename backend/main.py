@@ -21,14 +21,26 @@ import logging
 import asyncio
 
 from backend.database import Base, engine
-from backend.ai_factory import create_all_ai_services
+from backend.ai_factory import create_all_ai_services, get_service_type
 from backend.ai_interfaces import initialize_ai_services
 from backend.bot import start_bot_thread, stop_bot_thread
 from backend.init_db import migrate_db
 from backend.maharashtra_locator import load_maharashtra_pincode_data, load_maharashtra_mla_data
+from backend.mla_summary_store import mla_summary_store
 from backend.exceptions import EXCEPTION_HANDLERS
 from backend.routers import issues, detection, grievances, utility
 from backend.grievance_service import GrievanceService
+from backend.spatial_index import spatial_index, warm_spatial_index, SPATIAL_INDEX_ENABLED
+from backend.image_dedup_index import image_dedup_index, warm_image_dedup_index, IMAGE_DEDUP_ENABLED
+from backend.clustering_service import cluster_service, warm_cluster_service
+from backend.integrity_chain import integrity_sealer
+from backend.vote_accumulator import vote_flusher
+from backend.inference_pool import inference_pool
+from backend.hf_client import hf_client
+from backend.job_queue import job_queue
+from backend.tasks import ACTION_PLAN_JOB, generate_action_plans_job
+from backend.ai_service import ACTION_PLAN_BATCH_SIZE
+from backend.model_registry import model_registry
 import backend.dependencies
 
 # Configure structured logging
@@ -40,6 +52,9 @@ logger = logging.getLogger(__name__)
 
 async def background_initialization(app: FastAPI):
     """Perform non-critical startup tasks in background to speed up app availability"""
+    # Load and warm up local models in parallel with the rest of startup (gates /ready)
+    model_preload = asyncio.create_task(model_registry.preload())
+
     try:
         # 1. AI Services initialization
         # These can take a few seconds due to imports and configuration
@@ -57,18 +72,40 @@ async def background_initialization(app: FastAPI):
         await run_in_threadpool(load_maharashtra_mla_data)
         logger.info("Maharashtra data pre-loaded successfully.")
 
-        # 3. Start Telegram Bot in separate thread
+        # Precompute MLA summaries for /api/mh/rep-contacts (regenerated when the data files change)
+        mla_summary_store.start(mla_summary_service.generate_mla_summary, source=get_service_type())
+
+        # 3. Warm the in-memory spatial index for nearby-issue queries
+        if SPATIAL_INDEX_ENABLED:
+            await run_in_threadpool(warm_spatial_index)
+
+        # Load persisted cluster assignments (and assign any new issues)
+        await run_in_threadpool(warm_cluster_service)
+        logger.info("Spatial index and clusters warmed successfully.")
+
+        # Load the photo hash index for near-duplicate detection
+        if IMAGE_DEDUP_ENABLED:
+            await run_in_threadpool(warm_image_dedup_index)
+
+        # 4. Start Telegram Bot in separate thread
         await run_in_threadpool(start_bot_thread)
         logger.info("Telegram bot started in separate thread.")
     except Exception as e:
         logger.error(f"Error during background initialization: {e}", exc_info=True)
 
+    try:
+        await model_preload
+    except Exception as e:
+        logger.error(f"Error preloading models: {e}", exc_info=True)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Initialize Shared HTTP Client for external APIs (Connection Pooling)
     app.state.http_client = httpx.AsyncClient()
     # Set global shared client in dependencies for cached functions
     backend.dependencies.SHARED_HTTP_CLIENT = app.state.http_client
+    # HF calls on it go through hf_client; its semaphores belong to this event loop
+    hf_client.reset()
     logger.info("Shared HTTP Client initialized.")
 
     # Startup: Database setup (Blocking but necessary for app consistency)
@@ -76,6 +113,11 @@ async def lifespan(app: FastAPI):
         await run_in_threadpool(Base.metadata.create_all, bind=engine)
         await run_in_threadpool(migrate_db)
         logger.info("Database initialized successfully.")
+
+        # Spatial queries fall back to SQL until the index is re-warmed from the database
+        spatial_index.reset()
+        cluster_service.reset()
+        image_dedup_index.reset()
     except Exception as e:
         logger.error(f"Database initialization failed: {e}", exc_info=True)
         # We continue to allow health checks even if DB has issues (for debugging)
@@ -90,9 +132,45 @@ async def lifespan(app: FastAPI):
 
     # Launch background tasks that are non-blocking for startup/health-check
     asyncio.create_task(background_initialization(app))
+
+    # Periodically seal new issues into Merkle blocks (single writer per process)
+    integrity_sealer.start()
+
+    # Flush write-behind upvote counts in batches
+    vote_flusher.start()
+
+    # Spawn inference worker processes (no-op unless INFERENCE_POOL_WORKERS > 0)
+    inference_pool.start()
+
+    # Process queued action plans (including those left over from before a restart),
+    # several pending issues per Gemini prompt
+    job_queue.register_batch(ACTION_PLAN_JOB, generate_action_plans_job, ACTION_PLAN_BATCH_SIZE)
+    await job_queue.start()
     
     yield
     
+    # Shutdown: Stop integrity sealer
+    await integrity_sealer.stop()
+
+    # Shutdown: Write any pending upvotes
+    await vote_flusher.stop()
+
+    # Shutdown: Finish due jobs within the grace period; the rest stay queued
+    await job_queue.stop()
+
+    # Shutdown: Stop MLA summary precomputation (finished summaries are already on disk)
+    await mla_summary_store.stop()
+
+    # Shutdown: Stop inference workers
+    await inference_pool.stop()
+
+    # Shutdown: Snapshot the image hash index
+    if image_dedup_index.is_warm:
+        try:
+            await run_in_threadpool(image_dedup_index.save)
+        except OSError as e:
+            logger.error(f"Error saving image hash index: {e}")
+
     # Shutdown: Close Shared HTTP Client
     if app.state.http_client:
         await app.state.http_client.aclose()
@@ -0,0 +1,249 @@
+"""
+Precomputed MLA summaries for the Maharashtra representative lookup.
+
+/api/mh/rep-contacts used to ask Gemini for an MLA summary on every request,
+although its inputs (district, constituency, MLA name) all come from the
+static files mh_pincode_sample.json and mh_mla_sample.json. The store
+generates one summary per (district, constituency) pair found in those files
+in the background and keeps them in a JSON file at MLA_SUMMARY_STORE_PATH,
+so the endpoint answers with a dict lookup.
+
+Entries are keyed by the summary source ("gemini" or "mock"),
+MLA_SUMMARY_PROMPT_VERSION and their inputs. A content hash of the data files
+is checked every MLA_SUMMARY_REFRESH_SECONDS. When the files change, entries
+whose inputs changed are dropped and regenerated; the rest are kept. Until a
+summary exists the endpoint serves _get_fallback_summary. Fallback results
+from a failed Gemini call are never stored, so they are retried on the next
+refresh.
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import tempfile
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from backend.gemini_summary import _get_fallback_summary
+from backend.maharashtra_locator import (
+    MLA_DATA_PATH,
+    PINCODE_DATA_PATH,
+    load_maharashtra_mla_data,
+    load_maharashtra_pincode_data
+)
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+MLA_SUMMARY_STORE_PATH = os.environ.get("MLA_SUMMARY_STORE_PATH", "data/mla_summaries.json")
+MLA_SUMMARY_REFRESH_SECONDS = float(os.environ.get("MLA_SUMMARY_REFRESH_SECONDS", "3600"))
+MLA_SUMMARY_CONCURRENCY = int(os.environ.get("MLA_SUMMARY_CONCURRENCY", "4"))
+# Bump to regenerate every summary after a prompt change
+MLA_SUMMARY_PROMPT_VERSION = os.environ.get("MLA_SUMMARY_PROMPT_VERSION", "1")
+
+SummaryGenerator = Callable[[str, str, str], Awaitable[str]]
+
+
+def summary_key(source: str, district: str, assembly_constituency: str, mla_name: str) -> str:
+    return f"{source}/v{MLA_SUMMARY_PROMPT_VERSION}|{district}|{assembly_constituency}|{mla_name}"
+
+
+class MLASummaryStore:
+    """
+    On-disk MLA summaries with a background refresh task.
+    """
+
+    def __init__(self, path: str = MLA_SUMMARY_STORE_PATH, mla_path: str = MLA_DATA_PATH,
+                 pincode_path: str = PINCODE_DATA_PATH, refresh_seconds: float = MLA_SUMMARY_REFRESH_SECONDS,
+                 concurrency: int = MLA_SUMMARY_CONCURRENCY):
+        self.path = path
+        self.mla_path = mla_path
+        self.pincode_path = pincode_path
+        self.refresh_seconds = refresh_seconds
+        self.concurrency = max(1, concurrency)
+        self.source: Optional[str] = None
+        self._generate: Optional[SummaryGenerator] = None
+        self._summaries: Dict[str, Dict[str, Any]] = {}
+        self._wanted: Dict[str, Tuple[str, str, str]] = {}
+        self._data_version: Optional[str] = None
+        self._loaded = False
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"generated": 0, "failed": 0, "refreshes": 0, "data_changes": 0}
+        self._last_refresh: Optional[float] = None
+
+    def get(self, district: str, assembly_constituency: str, mla_name: str) -> Optional[str]:
+        """Stored summary for these inputs, or None if it has not been generated yet."""
+        if self.source is None:
+            return None
+        entry = self._summaries.get(summary_key(self.source, district, assembly_constituency, mla_name))
+        return entry["summary"] if entry else None
+
+    def get_summary(self, district: str, assembly_constituency: str, mla_name: str) -> str:
+        """Stored summary, or the static fallback while it is missing."""
+        return (
+            self.get(district, assembly_constituency, mla_name)
+            or _get_fallback_summary(mla_name, assembly_constituency, district)
+        )
+
+    def start(self, generate: SummaryGenerator, source: str) -> None:
+        """
+        Start refreshing with `generate(district, assembly_constituency, mla_name)`;
+        `source` names the service so mock and Gemini summaries are never mixed.
+        """
+        self._generate = generate
+        self.source = source
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"MLA summary precomputation started (source {source}, refresh {self.refresh_seconds}s)")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("MLA summary precomputation stopped.")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"MLA summary refresh failed: {e}", exc_info=True)
+            await asyncio.sleep(self.refresh_seconds)
+
+    async def refresh(self) -> int:
+        """
+        Pick up data file changes and generate missing summaries. Returns the
+        number of summaries generated.
+        """
+        if self._generate is None or self.source is None:
+            raise RuntimeError("MLA summary store is not started")
+        if not self._loaded:
+            await run_in_threadpool(self.load)
+
+        data_version, wanted = await run_in_threadpool(self._read_inputs)
+        changed = False
+        if data_version != self._data_version:
+            if self._data_version is not None:
+                self._stats["data_changes"] += 1
+                logger.info("MLA data files changed, refreshing summaries")
+                # The locator caches the files for the endpoint; make it reread them
+                load_maharashtra_mla_data.cache_clear()
+                load_maharashtra_pincode_data.cache_clear()
+            self._wanted = wanted
+            self._data_version = data_version
+            stale = [key for key in self._summaries if key not in wanted]
+            if stale:
+                self._summaries = {key: entry for key, entry in self._summaries.items() if key in wanted}
+            changed = True
+
+        generated = await self._generate_missing()
+        self._stats["refreshes"] += 1
+        self._last_refresh = time.time()
+        if changed or generated:
+            await run_in_threadpool(self.save)
+        return generated
+
+    async def _generate_missing(self) -> int:
+        missing = [key for key in self._wanted if key not in self._summaries]
+        generated = 0
+        # Concurrency-sized rounds; a round of nothing but failures means Gemini is down,
+        # so the rest waits for the next refresh instead of failing one by one
+        for start in range(0, len(missing), self.concurrency):
+            keys = missing[start:start + self.concurrency]
+            results = await asyncio.gather(*(self._generate(*self._wanted[key]) for key in keys), return_exceptions=True)
+            round_generated = 0
+            for key, summary in zip(keys, results):
+                district, constituency, mla_name = self._wanted[key]
+                if isinstance(summary, Exception) or not summary or summary == _get_fallback_summary(mla_name, constituency, district):
+                    self._stats["failed"] += 1
+                    continue
+                self._summaries[key] = {
+                    "district": district,
+                    "assembly_constituency": constituency,
+                    "mla_name": mla_name,
+                    "summary": summary,
+                    "generated_at": time.time()
+                }
+                round_generated += 1
+            generated += round_generated
+            self._stats["generated"] += round_generated
+            if not round_generated:
+                logger.warning(f"MLA summary generation failing, {len(missing) - start} summaries left for the next refresh")
+                break
+        return generated
+
+    def _read_inputs(self) -> Tuple[str, Dict[str, Tuple[str, str, str]]]:
+        """Content hash of the data files and the summary inputs they define, by key."""
+        digest = hashlib.sha256()
+        files = []
+        for path in (self.mla_path, self.pincode_path):
+            with open(path, "rb") as f:
+                content = f.read()
+            digest.update(content)
+            files.append(json.loads(content))
+        mla_rows, pincode_rows = files
+
+        mla_names = {row["assembly_constituency"]: row.get("mla_name") for row in mla_rows}
+        wanted = {}
+        for row in pincode_rows:
+            district, constituency = row.get("district"), row.get("assembly_constituency")
+            mla_name = mla_names.get(constituency)
+            if district and constituency and mla_name:
+                wanted[summary_key(self.source, district, constituency, mla_name)] = (district, constituency, mla_name)
+        return digest.hexdigest(), wanted
+
+    def load(self) -> None:
+        """Read summaries saved by a previous run, if any."""
+        self._loaded = True
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            self._summaries = stored.get("summaries", {})
+            logger.info(f"Loaded {len(self._summaries)} precomputed MLA summaries")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring unreadable MLA summary store {self.path}: {e}")
+
+    def save(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory or ".", prefix=f"{os.path.basename(self.path)}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"data_version": self._data_version, "summaries": self._summaries}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            # Never leave a truncated temp file next to the store.
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def get_stats(self) -> dict:
+        return {
+            **self._stats,
+            "running": self._task is not None and not self._task.done(),
+            "source": self.source,
+            "stored": len(self._summaries),
+            "wanted": len(self._wanted),
+            "missing": sum(1 for key in self._wanted if key not in self._summaries),
+            "data_version": self._data_version,
+            "last_refresh": self._last_refresh
+        }
+
+
+mla_summary_store = MLASummaryStore()
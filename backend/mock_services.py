@@ -1,7 +1,7 @@
 """
 Mock implementations of AI service interfaces for testing and development.
 """
-from typing import Dict, Optional
+from typing import AsyncIterator, Dict, Optional
 import asyncio
 
 from backend.ai_interfaces import ActionPlanService, ChatService, MLASummaryService
@@ -30,11 +30,30 @@ class MockActionPlanService(ActionPlanService):
 class MockChatService(ChatService):
     """Mock implementation that returns predefined chat responses."""
 
+    def __init__(self, chunk_delay: float = 0.01):
+        self.chunk_delay = chunk_delay
+        self.streams_started = 0
+        self.streams_cancelled = 0
+
     async def chat(self, query: str) -> str:
         # Simulate async operation
         await asyncio.sleep(0.1)
         return f"Mock response to: {query[:50]}... (This is a mock response for testing purposes)"
 
+    async def chat_stream(self, query: str, language: str = 'en') -> AsyncIterator[str]:
+        """Yield the mock response word by word; counts streams closed before the end."""
+        self.streams_started += 1
+        completed = False
+        try:
+            words = f"Mock response to: {query[:50]}... (This is a mock response for testing purposes)".split(" ")
+            for i, word in enumerate(words):
+                await asyncio.sleep(self.chunk_delay)
+                yield word if i == 0 else f" {word}"
+            completed = True
+        finally:
+            if not completed:
+                self.streams_cancelled += 1
+
 
 class MockMLASummaryService(MLASummaryService):
     """Mock implementation that returns predefined MLA summaries."""
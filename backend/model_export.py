@@ -0,0 +1,160 @@
+"""
+Optional ONNX Runtime / OpenVINO serving path for the local YOLO models.
+
+With MODEL_RUNTIME=onnx (or openvino) each model is exported from its
+PyTorch weights once, cached under MODEL_EXPORT_DIR, and loaded from the
+export on later starts, so the PyTorch weights are only needed for the
+first export. Ultralytics runs exported models through the same predict()
+API and Results objects, so detection code is unchanged.
+
+Exports use a dynamic input shape, so the inference scheduler can run a
+micro-batch of up to INFERENCE_MAX_BATCH_SIZE images through one call; a
+default (static) export only accepts batches of one.
+
+MODEL_EXPORT_INT8=true additionally applies dynamic INT8 weight
+quantization to the ONNX export (no calibration data needed).
+
+The runtimes are an optional install: pip install -r backend/requirements-onnx.txt
+
+Exports can be built ahead of deployment (e.g. in the image build) with:
+
+    python -m backend.model_export
+
+If an export fails, the PyTorch model is served instead.
+
+ultralytics writes every export next to the source weights, so workers
+that start together take a file lock around the export: one builds it and
+the rest pick up the cached result.
+"""
+import os
+import shutil
+import logging
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; exports are then unserialized
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+MODEL_RUNTIME = os.environ.get("MODEL_RUNTIME", "torch").lower()  # torch | onnx | openvino
+MODEL_EXPORT_DIR = os.environ.get("MODEL_EXPORT_DIR", "data/models")
+MODEL_EXPORT_INT8 = os.environ.get("MODEL_EXPORT_INT8", "false").lower() == "true"
+MODEL_EXPORT_IMGSZ = int(os.environ.get("MODEL_EXPORT_IMGSZ", "640"))
+
+EXPORT_RUNTIMES = ("onnx", "openvino")
+
+
+def exported_model_path(name: str, runtime: str = MODEL_RUNTIME, int8: bool = MODEL_EXPORT_INT8) -> str:
+    """Cache location of a model export (a file for ONNX, a directory for OpenVINO)."""
+    # "dynamic" keeps static batch-1 exports cached by earlier versions from being picked up
+    if runtime == "onnx":
+        return os.path.join(MODEL_EXPORT_DIR, f"{name}.dynamic.int8.onnx" if int8 else f"{name}.dynamic.onnx")
+    if runtime == "openvino":
+        return os.path.join(MODEL_EXPORT_DIR, f"{name}_dynamic_openvino_model")
+    raise ValueError(f"Unsupported export runtime: {runtime}")
+
+
+@contextmanager
+def _export_lock(target: str) -> Iterator[None]:
+    """Hold an exclusive lock on the export of `target` across processes."""
+    with open(f"{target}.lock", "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def export_model(model: Any, name: str, runtime: str = MODEL_RUNTIME, int8: bool = MODEL_EXPORT_INT8) -> str:
+    """
+    Export a loaded ultralytics model, reusing a cached export if present.
+
+    Returns:
+        Path of the export
+    """
+    target = exported_model_path(name, runtime, int8)
+    if os.path.exists(target):
+        return target
+
+    os.makedirs(MODEL_EXPORT_DIR, exist_ok=True)
+    with _export_lock(target):
+        # Another worker may have finished the export while we waited
+        if os.path.exists(target):
+            return target
+
+        logger.info(f"Exporting '{name}' to {runtime}{' (INT8)' if int8 and runtime == 'onnx' else ''}...")
+        # Written next to the source weights; moved into the cache below
+        exported = str(model.export(format=runtime, imgsz=MODEL_EXPORT_IMGSZ, dynamic=True))
+
+        # Build under a temporary name so a loader that skips the lock never sees a partial export
+        partial = f"{target}.partial-{os.getpid()}"
+        if runtime == "onnx" and int8:
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            quantize_dynamic(exported, partial, weight_type=QuantType.QUInt8)
+        else:
+            shutil.move(exported, partial)
+        os.replace(partial, target)
+
+    logger.info(f"Exported '{name}' to {target}")
+    return target
+
+
+def load_yolo_model(name: str, load_torch_model: Callable[[], Any], task: str,
+                    runtime: str = MODEL_RUNTIME, int8: bool = MODEL_EXPORT_INT8) -> Optional[Any]:
+    """
+    Load a YOLO model for the configured runtime.
+
+    Args:
+        name: Cache name of the model's exports
+        load_torch_model: Loads the PyTorch model (used directly, or once to export it)
+        task: Ultralytics task ("detect", "segment"), which exports don't always record
+        runtime: "torch", "onnx" or "openvino"
+        int8: Quantize the ONNX export
+
+    Returns:
+        The model, ready for predict()
+    """
+    if runtime not in EXPORT_RUNTIMES:
+        return load_torch_model()
+
+    torch_model = None
+    try:
+        path = exported_model_path(name, runtime, int8)
+        if not os.path.exists(path):
+            torch_model = load_torch_model()
+            path = export_model(torch_model, name, runtime, int8)
+
+        from ultralytics import YOLO
+        model = YOLO(path, task=task)
+        logger.info(f"Serving '{name}' with {runtime} from {path}")
+        return model
+    except Exception as e:
+        logger.warning(f"{runtime} path for '{name}' unavailable, serving the PyTorch model: {e}")
+        return torch_model if torch_model is not None else load_torch_model()
+
+
+def main():
+    """Export every local model for the configured runtime."""
+    from backend import garbage_detection, local_ml_service, pothole_detection
+
+    logging.basicConfig(level=logging.INFO)
+    runtime = MODEL_RUNTIME if MODEL_RUNTIME in EXPORT_RUNTIMES else "onnx"
+    for name, load_torch_model in (
+        (local_ml_service.GENERAL_MODEL_NAME, local_ml_service.load_torch_general_model),
+        (pothole_detection.MODEL_NAME, pothole_detection.load_torch_model),
+        (garbage_detection.MODEL_NAME, garbage_detection.load_torch_model),
+    ):
+        try:
+            print(export_model(load_torch_model(), name, runtime))
+        except Exception as e:
+            logger.error(f"Failed to export '{name}': {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Registry of the local ML models with background preloading and readiness.
+
+Every local detector registers a loader and a warm-up here. During startup
+the models listed in MODEL_PRELOAD are loaded in parallel and each gets one
+warm-up inference, so the first real request doesn't pay for the model load
+or the runtime's first-call initialization. /ready reports false until each
+of them is warm or has failed, letting a load balancer hold traffic back from
+cold instances. A model that failed to load (e.g. no torch in a slim build)
+does not keep the instance out of rotation - detection falls back to the
+other backends - but /api/ml-status reports the instance as degraded along
+with each model's state, load time and memory.
+
+With the inference process pool enabled, the detection models live in the
+worker processes; their registry entries then track the workers' preload.
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from fastapi.concurrency import run_in_threadpool
+from PIL import Image
+
+from backend.inference_pool import inference_pool
+from backend.local_clip_service import USE_LOCAL_CLIP
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+MODEL_PRELOAD = [
+    name.strip() for name in os.environ.get(
+        "MODEL_PRELOAD", "general,pothole,garbage,grievance" + (",clip" if USE_LOCAL_CLIP else "")
+    ).split(",")
+    if name.strip()
+]
+MODEL_WARMUP_ENABLED = os.environ.get("MODEL_WARMUP_ENABLED", "true").lower() == "true"
+
+
+class ModelState(str, Enum):
+    NOT_LOADED = "not_loaded"
+    LOADING = "loading"
+    WARMING = "warming"
+    READY = "ready"
+    FAILED = "failed"
+
+
+def process_rss_mb() -> Optional[float]:
+    """Current resident set size of this process, where /proc is available."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+class ModelSpec:
+    """
+    How to load and warm up one model. `load` returns the model, or None if
+    it is unavailable; `warm_up` runs a throwaway inference on it.
+    """
+
+    def __init__(self, name: str, load: Callable[[], Any], warm_up: Optional[Callable[[Any], Any]] = None,
+                 description: str = ""):
+        self.name = name
+        self.load = load
+        self.warm_up = warm_up
+        self.description = description
+
+
+class ModelRegistry:
+    """
+    Tracks load state of the registered models and preloads them on request.
+    """
+
+    def __init__(self, preload: Sequence[str] = tuple(MODEL_PRELOAD), warm_up: bool = MODEL_WARMUP_ENABLED):
+        self.preload_names = tuple(preload)
+        self.warm_up_enabled = warm_up
+        self._specs: Dict[str, ModelSpec] = {}
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, spec: ModelSpec) -> None:
+        with self._lock:
+            self._specs[spec.name] = spec
+            self._status.setdefault(spec.name, {"state": ModelState.NOT_LOADED.value})
+
+    def names(self) -> List[str]:
+        return list(self._specs)
+
+    def get_state(self, name: str) -> Optional[ModelState]:
+        status = self._status.get(name)
+        return ModelState(status["state"]) if status else None
+
+    def _update(self, name: str, **fields: Any) -> None:
+        with self._lock:
+            self._status[name] = {**self._status.get(name, {}), **fields}
+
+    def load(self, name: str) -> bool:
+        """
+        Load and warm up one model (blocking). Returns True if it is ready.
+        """
+        spec = self._specs.get(name)
+        if spec is None:
+            raise KeyError(f"Unknown model: {name}")
+
+        self._update(name, state=ModelState.LOADING.value, error=None)
+        rss_before = process_rss_mb()
+        start = time.perf_counter()
+        try:
+            model = spec.load()
+            if model is None:
+                raise RuntimeError("model unavailable")
+            load_ms = (time.perf_counter() - start) * 1000
+
+            warm_up_ms = None
+            if self.warm_up_enabled and spec.warm_up is not None:
+                self._update(name, state=ModelState.WARMING.value, load_ms=round(load_ms, 1))
+                warm_start = time.perf_counter()
+                spec.warm_up(model)
+                warm_up_ms = round((time.perf_counter() - warm_start) * 1000, 1)
+        except Exception as e:
+            logger.error(f"Model '{name}' failed to load: {e}")
+            self._update(name, state=ModelState.FAILED.value, error=str(e),
+                         load_ms=round((time.perf_counter() - start) * 1000, 1))
+            return False
+
+        rss_after = process_rss_mb()
+        self._update(
+            name,
+            state=ModelState.READY.value,
+            load_ms=round(load_ms, 1),
+            warm_up_ms=warm_up_ms,
+            # Process RSS growth while loading; approximate when loads overlap
+            rss_delta_mb=round(rss_after - rss_before, 1) if rss_before is not None and rss_after is not None else None,
+            ready_at=time.time()
+        )
+        logger.info(f"Model '{name}' ready (load {load_ms:.0f} ms, warm-up {warm_up_ms} ms)")
+        return True
+
+    async def preload(self, names: Optional[Sequence[str]] = None) -> Dict[str, bool]:
+        """Load and warm up models in parallel in the threadpool."""
+        names = [name for name in (self.preload_names if names is None else names) if name in self._specs]
+        if not names:
+            return {}
+        start = time.perf_counter()
+        results = await asyncio.gather(*(run_in_threadpool(self.load, name) for name in names))
+        logger.info(f"Preloaded {sum(results)}/{len(names)} models in {(time.perf_counter() - start):.1f}s")
+        return dict(zip(names, results))
+
+    def is_ready(self) -> bool:
+        """True once every preloaded model is warm or has failed to load."""
+        return all(
+            self.get_state(name) in (ModelState.READY, ModelState.FAILED)
+            for name in self.preload_names if name in self._specs
+        )
+
+    def failed(self) -> List[str]:
+        """Preloaded models that failed to load."""
+        return [
+            name for name in self.preload_names
+            if name in self._specs and self.get_state(name) == ModelState.FAILED
+        ]
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                name: {**status, "preload": name in self.preload_names, "description": self._specs[name].description}
+                for name, status in self._status.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._status = {name: {"state": ModelState.NOT_LOADED.value} for name in self._specs}
+
+
+# ---------------------------------------------------------------------------
+# Registered models
+# ---------------------------------------------------------------------------
+
+def _warm_up_yolo(model) -> None:
+    model.predict(Image.new("RGB", (640, 640), color="white"), verbose=False)
+
+
+def _load_in_pool(name: str):
+    models = inference_pool.worker_models()
+    if name not in models:
+        raise RuntimeError(f"not loaded by inference workers (loaded: {models})")
+    return True
+
+
+def _load_general():
+    if inference_pool.enabled:
+        return _load_in_pool("general")
+    from backend.local_ml_service import get_general_model
+    return get_general_model()
+
+
+def _load_pothole():
+    if inference_pool.enabled:
+        return _load_in_pool("pothole")
+    from backend.pothole_detection import get_model
+    return get_model()
+
+
+def _load_garbage():
+    from backend.garbage_detection import get_model
+    return get_model()
+
+
+def _load_grievance():
+    from backend.grievance_classifier import get_grievance_classifier
+    classifier = get_grievance_classifier()
+    if classifier.model is None:
+        classifier.load_model()
+    return classifier if classifier.model is not None else None
+
+
+def _load_clip():
+    from backend.local_clip_service import local_clip_engine
+    # Also encodes the text-embedding index of all detector labels
+    return local_clip_engine.load()
+
+
+def _warm_up_clip(engine) -> None:
+    from backend.hf_api_service import SMART_SCAN_LABELS
+    engine.classify(Image.new("RGB", (224, 224), color="white"), SMART_SCAN_LABELS)
+
+
+def _warm_up_detector(model) -> None:
+    # Pool workers are warmed by their own preload
+    if model is not True:
+        _warm_up_yolo(model)
+
+
+model_registry = ModelRegistry()
+model_registry.register(ModelSpec("general", _load_general, _warm_up_detector,
+                                  "YOLOv8n object detection (vandalism, infrastructure, flooding)"))
+model_registry.register(ModelSpec("pothole", _load_pothole, _warm_up_detector, "YOLOv8n pothole segmentation"))
+model_registry.register(ModelSpec("garbage", _load_garbage, _warm_up_yolo, "YOLOv8n garbage segmentation"))
+model_registry.register(ModelSpec("clip", _load_clip, _warm_up_clip, "CLIP zero-shot classifier (local_clip backend)"))
+model_registry.register(ModelSpec("grievance", _load_grievance, lambda classifier: classifier.predict("Pothole on main road"),
+                                  "Grievance text classifier"))
@@ -131,6 +131,7 @@ class Issue(Base):
     description = Column(String)
     category = Column(String, index=True)
     image_path = Column(String)
+    thumbnail_path = Column(String, nullable=True)  # Small JPEG for list views
     source = Column(String)  # 'telegram', 'web', etc.
     status = Column(String, default="open", index=True)
     created_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc), index=True)
@@ -145,6 +146,39 @@ class Issue(Base):
     location = Column(String, nullable=True)
     action_plan = Column(JSONEncodedDict, nullable=True)
     integrity_hash = Column(String, nullable=True)  # Blockchain integrity seal
+    cluster_id = Column(Integer, nullable=True, index=True)  # Persistent spatial cluster assignment
+    image_phash = Column(String, nullable=True)  # 64-bit perceptual hash of the photo (hex)
+
+class IntegrityBlock(Base):
+    __tablename__ = "integrity_blocks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    first_issue_id = Column(Integer, unique=True, nullable=False)  # Unique so concurrent sealers cannot fork the chain
+    last_issue_id = Column(Integer, nullable=False, index=True)
+    leaf_count = Column(Integer, nullable=False)
+    merkle_root = Column(String, nullable=False)
+    prev_block_hash = Column(String, nullable=False)
+    block_hash = Column(String, unique=True, nullable=False)
+    sealed_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc))
+
+class Job(Base):
+    """Durable background job (see backend/job_queue.py)"""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False, index=True)  # Handler name, e.g. 'action_plan'
+    payload = Column(JSONEncodedDict, nullable=True)
+    status = Column(String, default="queued", nullable=False)  # 'queued', 'running', 'succeeded', 'dead'
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=5, nullable=False)
+    last_error = Column(Text, nullable=True)
+    run_after = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc), nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc))
+    finished_at = Column(DateTime, nullable=True)
 
 class PushSubscription(Base):
     __tablename__ = "push_subscriptions"
@@ -2,7 +2,11 @@ import logging
 import threading
 from typing import Optional, Any
 
-from backend.exceptions import ModelLoadException, DetectionException
+from backend.exceptions import ModelLoadException, DetectionException, InferencePoolBusyException
+from backend.image_envelope import as_pil_image
+from backend.inference_scheduler import get_scheduler
+from backend.inference_pool import inference_pool
+from backend.model_export import load_yolo_model
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -17,11 +21,20 @@ _model_initialized: bool = False
 _model = None
 _model_lock = threading.Lock()
 
+MODEL_NAME = "yolov8n-pothole-segmentation"
+
+def load_torch_model():
+    """Load the pothole model's PyTorch weights from the Hugging Face Hub."""
+    # Move import here to prevent blocking startup with heavy imports/checks
+    from ultralyticsplus import YOLO
+    return YOLO(f'keremberke/{MODEL_NAME}')
+
 def load_model():
     """
     Loads the YOLO model lazily.
     The model file will be downloaded on the first call if not cached.
     This prevents blocking the application startup.
+    Served through ONNX Runtime / OpenVINO when MODEL_RUNTIME selects it.
     
     Returns:
         The loaded YOLO model instance.
@@ -31,10 +44,7 @@ def load_model():
     """
     logger.info("Loading Pothole Detection Model...")
     try:
-        # Move import here to prevent blocking startup with heavy imports/checks
-        from ultralyticsplus import YOLO
-
-        model = YOLO('keremberke/yolov8n-pothole-segmentation')
+        model = load_yolo_model(MODEL_NAME, load_torch_model, task="segment")
 
         # set model parameters
         model.overrides['conf'] = 0.25  # NMS confidence threshold
@@ -138,12 +148,33 @@ def reset_model():
                     pass
     return _model
 
+def _parse_detections(result):
+    detections = []
+
+    if hasattr(result, 'boxes'):
+        for i, box in enumerate(result.boxes):
+            # box.xyxy is [x1, y1, x2, y2] tensor
+            # Convert to list
+            coords = box.xyxy[0].cpu().numpy().tolist()
+            conf = float(box.conf[0].cpu().numpy())
+            cls_id = int(box.cls[0].cpu().numpy())
+            label = result.names[cls_id]
+
+            detections.append({
+                "box": coords, # [x1, y1, x2, y2]
+                "confidence": conf,
+                "label": label
+            })
+
+    return detections
+
 def detect_potholes(image_source):
     """
     Detects potholes in an image.
 
     Args:
-        image_source: Path to image file, URL, or numpy array (from cv2)
+        image_source: Path to image file, URL, numpy array (from cv2), PIL Image
+            or ImageEnvelope (its already decoded pixels are used)
 
     Returns:
         List of detections. Each detection is a dict with 'box', 'confidence', 'label'.
@@ -156,29 +187,42 @@ def detect_potholes(image_source):
 
         # perform inference
         # stream=False ensures we get all results in memory
-        results = model.predict(image_source, stream=False)
+        results = model.predict(as_pil_image(image_source), stream=False)
 
         # observe results
-        result = results[0] # Single image
-
-        detections = []
-
-        if hasattr(result, 'boxes'):
-            for i, box in enumerate(result.boxes):
-                # box.xyxy is [x1, y1, x2, y2] tensor
-                # Convert to list
-                coords = box.xyxy[0].cpu().numpy().tolist()
-                conf = float(box.conf[0].cpu().numpy())
-                cls_id = int(box.cls[0].cpu().numpy())
-                label = result.names[cls_id]
-
-                detections.append({
-                    "box": coords, # [x1, y1, x2, y2]
-                    "confidence": conf,
-                    "label": label
-                })
-
-        return detections
+        return _parse_detections(results[0]) # Single image
+    except Exception as e:
+        logger.error(f"Pothole detection failed: {e}")
+        raise DetectionException("Failed to detect potholes in image", "pothole", details={"error": str(e)}) from e
+
+def _predict_batch(images):
+    """Run the pothole model on a batch of PIL images, one result per image."""
+    model = get_model()
+    if len(images) == 1:
+        return [model.predict(images[0], stream=False)[0]]
+    return model.predict(images, stream=False)
+
+def detect_potholes_batch(images):
+    """Detections for a list of PIL images (inference pool task)."""
+    return [_parse_detections(result) for result in _predict_batch(images)]
+
+async def detect_potholes_batched(image_source):
+    """
+    Async variant of detect_potholes for request handlers: runs in the inference
+    process pool when enabled, otherwise concurrent calls are micro-batched into
+    one forward pass (see backend.inference_scheduler).
+
+    Raises:
+        InferencePoolBusyException: If the inference pool queue is full
+        DetectionException: If pothole detection fails
+    """
+    try:
+        if inference_pool.enabled:
+            return (await inference_pool.run("pothole", [image_source]))[0]
+        result = await get_scheduler("pothole", _predict_batch).submit(as_pil_image(image_source))
+        return _parse_detections(result)
+    except InferencePoolBusyException:
+        raise
     except Exception as e:
         logger.error(f"Pothole detection failed: {e}")
         raise DetectionException("Failed to detect potholes in image", "pothole", details={"error": str(e)}) from e
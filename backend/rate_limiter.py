@@ -0,0 +1,209 @@
+"""
+Rate limiting for uploads and detection endpoints.
+
+Uses a sliding-window counter: each key keeps only the request count of the
+current and the previous fixed window, and the previous window's count is
+weighted by how much of it still overlaps the sliding window. That is O(1)
+time and fixed memory per key, unlike a list of timestamps.
+
+Backends:
+- "memory" (default): process-local, atomic under a lock, bounded number of keys
+- "redis": shared between workers, atomic via a Lua script (needs the `redis`
+  package and RATE_LIMIT_REDIS_URL)
+"""
+import os
+import math
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from fastapi import HTTPException, Request
+
+logger = logging.getLogger(__name__)
+
+# Configuration (same switches as backend.config)
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory").lower()
+RATE_LIMIT_REDIS_URL = os.environ.get("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+RATE_LIMIT_MAX_KEYS = int(os.environ.get("RATE_LIMIT_MAX_KEYS", "100000"))
+DETECTION_RATE_LIMIT_PER_MINUTE = int(
+    os.environ.get("DETECTION_RATE_LIMIT_PER_MINUTE", os.environ.get("MAX_REQUESTS_PER_MINUTE", "60"))
+)
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    remaining: int
+    retry_after: float  # Seconds until the request would be allowed (0 if allowed)
+
+
+def _sliding_window(now: float, window_seconds: float, window_id: int, prev_count: int, curr_count: int,
+                    limit: int, cost: int):
+    """
+    Evaluate one request against a sliding-window counter.
+
+    Returns:
+        Tuple (result, new_curr_count)
+    """
+    elapsed = now - window_id * window_seconds
+    weight = max(0.0, 1.0 - elapsed / window_seconds)
+    estimated = prev_count * weight + curr_count
+
+    if estimated + cost <= limit:
+        curr_count += cost
+        remaining = max(0, int(limit - (prev_count * weight + curr_count)))
+        return RateLimitResult(True, remaining, 0.0), curr_count
+
+    # Time until the previous window's weighted share decays enough for this request
+    headroom = limit - cost - curr_count
+    if headroom >= 0 and prev_count > 0:
+        retry_after = window_seconds * (1.0 - headroom / prev_count) - elapsed
+    else:
+        # The current window alone is over the limit: wait for it to become the previous one
+        retry_after = window_seconds - elapsed
+    return RateLimitResult(False, 0, max(retry_after, 0.001)), curr_count
+
+
+class InMemoryRateLimitBackend:
+    """
+    Thread-safe, process-local sliding-window counters with a bounded key count.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self._max_keys = max_keys
+        # key -> [window_id, prev_count, curr_count], least recently used first
+        self._windows: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window_seconds: float, cost: int = 1,
+            now: Optional[float] = None) -> RateLimitResult:
+        now = time.time() if now is None else now
+        window_id = int(now // window_seconds)
+
+        with self._lock:
+            state = self._windows.get(key)
+            if state is None:
+                state = [window_id, 0, 0]
+                self._windows[key] = state
+                if len(self._windows) > self._max_keys:
+                    self._windows.popitem(last=False)
+            else:
+                self._windows.move_to_end(key)
+
+            if state[0] != window_id:
+                state[1] = state[2] if state[0] == window_id - 1 else 0
+                state[2] = 0
+                state[0] = window_id
+
+            result, state[2] = _sliding_window(now, window_seconds, window_id, state[1], state[2], limit, cost)
+            return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._windows.clear()
+
+
+class RedisRateLimitBackend:
+    """
+    Sliding-window counters in Redis, shared by all workers. The check and the
+    increment run in one Lua script, so concurrent requests cannot overshoot.
+    """
+
+    # KEYS[1] = current window key, KEYS[2] = previous window key
+    # ARGV = limit, cost, weight of previous window, ttl (ms)
+    _SCRIPT = """
+local curr = tonumber(redis.call('GET', KEYS[1]) or '0')
+local prev = tonumber(redis.call('GET', KEYS[2]) or '0')
+local limit = tonumber(ARGV[1])
+local cost = tonumber(ARGV[2])
+local weight = tonumber(ARGV[3])
+if prev * weight + curr + cost > limit then
+    return {0, curr, prev}
+end
+curr = redis.call('INCRBY', KEYS[1], cost)
+redis.call('PEXPIRE', KEYS[1], ARGV[4])
+return {1, curr, prev}
+"""
+
+    def __init__(self, url: str = RATE_LIMIT_REDIS_URL):
+        import redis  # Optional dependency, only needed for shared rate limiting
+
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self._SCRIPT)
+
+    def hit(self, key: str, limit: int, window_seconds: float, cost: int = 1,
+            now: Optional[float] = None) -> RateLimitResult:
+        now = time.time() if now is None else now
+        window_id = int(now // window_seconds)
+        weight = max(0.0, 1.0 - (now - window_id * window_seconds) / window_seconds)
+        ttl_ms = int(window_seconds * 2 * 1000)
+
+        allowed, curr, prev = self._script(
+            keys=[f"ratelimit:{key}:{window_id}", f"ratelimit:{key}:{window_id - 1}"],
+            args=[limit, cost, weight, ttl_ms]
+        )
+        curr, prev = int(curr), int(prev)
+        if allowed:
+            return RateLimitResult(True, max(0, int(limit - (prev * weight + curr))), 0.0)
+        result, _ = _sliding_window(now, window_seconds, window_id, prev, curr, limit, cost)
+        return result
+
+    def reset(self) -> None:
+        for key in self._client.scan_iter("ratelimit:*"):
+            self._client.delete(key)
+
+
+def create_backend(name: str = RATE_LIMIT_BACKEND):
+    """Create the configured backend, falling back to in-memory if Redis is unavailable."""
+    if name == "redis":
+        try:
+            return RedisRateLimitBackend()
+        except Exception as e:
+            logger.error(f"Redis rate limit backend unavailable, using in-memory limits: {e}")
+    return InMemoryRateLimitBackend()
+
+
+class RateLimiter:
+    """
+    Named limit (e.g. "upload", "detect") applied per identifier on a shared backend.
+    """
+
+    def __init__(self, name: str, limit: int, window_seconds: float, backend=None):
+        self.name = name
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.backend = backend if backend is not None else rate_limit_backend
+
+    def hit(self, identifier: str, limit: Optional[int] = None) -> RateLimitResult:
+        return self.backend.hit(f"{self.name}:{identifier}", limit or self.limit, self.window_seconds)
+
+    def check(self, identifier: str, limit: Optional[int] = None, detail: Optional[str] = None) -> RateLimitResult:
+        """
+        Count a request and raise HTTP 429 (with Retry-After) if it is over the limit.
+        """
+        result = self.hit(identifier, limit)
+        if not result.allowed:
+            logger.warning(f"Rate limit '{self.name}' exceeded for {identifier}")
+            raise HTTPException(
+                status_code=429,
+                detail=detail or "Too many requests. Please try again later.",
+                headers={"Retry-After": str(math.ceil(result.retry_after))}
+            )
+        return result
+
+
+def client_identifier(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+rate_limit_backend = create_backend()
+upload_rate_limiter = RateLimiter("upload", limit=10, window_seconds=3600)
+detection_rate_limiter = RateLimiter("detect", limit=DETECTION_RATE_LIMIT_PER_MINUTE, window_seconds=60)
+
+
+async def limit_detection_requests(request: Request) -> None:
+    """Router dependency that rate limits detection endpoints per client IP."""
+    if RATE_LIMIT_ENABLED:
+        detection_rate_limiter.check(client_identifier(request))
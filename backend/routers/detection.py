@@ -1,19 +1,22 @@
-from fastapi import APIRouter, UploadFile, File, Request, HTTPException
+from fastapi import APIRouter, UploadFile, File, Request, HTTPException, Depends, Query
 from fastapi.concurrency import run_in_threadpool
-from PIL import Image
-from async_lru import alru_cache
 import logging
+from typing import Optional
 
 from backend.utils import process_and_detect, validate_uploaded_file, process_uploaded_image
-from backend.schemas import DetectionResponse, UrgencyAnalysisRequest, UrgencyAnalysisResponse
-from backend.pothole_detection import detect_potholes, validate_image_for_processing
+from backend.schemas import DetectionResponse, MultiDetectionResponse, UrgencyAnalysisRequest, UrgencyAnalysisResponse
+from backend.pothole_detection import detect_potholes_batched, validate_image_for_processing
 from backend.unified_detection_service import (
     detect_vandalism as detect_vandalism_unified,
     detect_infrastructure as detect_infrastructure_unified,
     detect_flooding as detect_flooding_unified,
-    detect_garbage as detect_garbage_unified
+    detect_garbage as detect_garbage_unified,
+    detect_multi as detect_multi_unified,
+    DETECTION_CATEGORIES
 )
 from backend.hf_api_service import (
+    CLIP_DETECTORS,
+    scan_all_clip,
     detect_illegal_parking_clip,
     detect_street_light_clip,
     detect_fire_clip,
@@ -38,90 +41,132 @@ from backend.hf_api_service import (
     detect_abandoned_vehicle_clip
 )
 from backend.dependencies import get_http_client
+from backend.detection_cache import detection_cache
+from backend.exceptions import InferencePoolBusyException
+from backend.rate_limiter import limit_detection_requests
 import backend.dependencies
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
-
-# Cached Functions
-
-@alru_cache(maxsize=100)
-async def _cached_detect_severity(image_bytes: bytes):
-    return await detect_severity_clip(image_bytes, client=backend.dependencies.SHARED_HTTP_CLIENT)
-
-@alru_cache(maxsize=100)
-async def _cached_detect_smart_scan(image_bytes: bytes):
-    return await detect_smart_scan_clip(image_bytes, client=backend.dependencies.SHARED_HTTP_CLIENT)
-
-@alru_cache(maxsize=100)
-async def _cached_generate_caption(image_bytes: bytes):
-    return await generate_image_caption(image_bytes, client=backend.dependencies.SHARED_HTTP_CLIENT)
-
-@alru_cache(maxsize=100)
-async def _cached_detect_waste(image_bytes: bytes):
-    return await detect_waste_clip(image_bytes, client=backend.dependencies.SHARED_HTTP_CLIENT)
-
-@alru_cache(maxsize=100)
-async def _cached_detect_civic_eye(image_bytes: bytes):
-    return await detect_civic_eye_clip(image_bytes, client=backend.dependencies.SHARED_HTTP_CLIENT)
-
-@alru_cache(maxsize=100)
-async def _cached_detect_graffiti(image_bytes: bytes):
-    return await detect_graffiti_art_clip(image_bytes, client=backend.dependencies.SHARED_HTTP_CLIENT)
+# Detection endpoints run expensive inference, so every route is rate limited per client
+router = APIRouter(dependencies=[Depends(limit_detection_requests)])
 
 # Endpoints
 
 @router.post("/api/detect-pothole", response_model=DetectionResponse)
 async def detect_pothole_endpoint(image: UploadFile = File(...)):
-    # Validate uploaded file
-    pil_image = await validate_uploaded_file(image)
+    # Validate uploaded file (decodes it once)
+    envelope = await validate_uploaded_file(image)
 
     # Validate image for processing
     try:
-        if pil_image is None:
-            pil_image = await run_in_threadpool(Image.open, image.file)
-
-        # Validate image for processing
-        await run_in_threadpool(validate_image_for_processing, pil_image)
+        await run_in_threadpool(validate_image_for_processing, envelope)
     except HTTPException:
         raise  # Re-raise HTTP exceptions from validation
     except Exception as e:
         logger.error(f"Invalid image file for pothole detection: {e}", exc_info=True)
         raise HTTPException(status_code=400, detail="Invalid image file")
 
-    # Run detection (blocking, so run in threadpool)
+    # Run detection (inference pool, or batched with concurrent requests in the threadpool)
     try:
-        detections = await run_in_threadpool(detect_potholes, pil_image)
+        detections = await detection_cache.get_or_compute("pothole", envelope, lambda: detect_potholes_batched(envelope))
         return DetectionResponse(detections=detections)
+    except InferencePoolBusyException:
+        raise  # 503 back-pressure from the inference pool
     except Exception as e:
         logger.error(f"Pothole detection error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Pothole detection service temporarily unavailable")
 
 @router.post("/api/detect-infrastructure", response_model=DetectionResponse)
 async def detect_infrastructure_endpoint(image: UploadFile = File(...)):
-    return await process_and_detect(image, detect_infrastructure_unified)
+    return await process_and_detect(image, detect_infrastructure_unified, detector="infrastructure")
 
 @router.post("/api/detect-flooding", response_model=DetectionResponse)
 async def detect_flooding_endpoint(image: UploadFile = File(...)):
-    return await process_and_detect(image, detect_flooding_unified)
+    return await process_and_detect(image, detect_flooding_unified, detector="flooding")
 
 @router.post("/api/detect-vandalism", response_model=DetectionResponse)
 async def detect_vandalism_endpoint(image: UploadFile = File(...)):
-    return await process_and_detect(image, detect_vandalism_unified)
+    return await process_and_detect(image, detect_vandalism_unified, detector="vandalism")
 
 @router.post("/api/detect-garbage", response_model=DetectionResponse)
 async def detect_garbage_endpoint(image: UploadFile = File(...)):
-    return await process_and_detect(image, detect_garbage_unified)
+    return await process_and_detect(image, detect_garbage_unified, detector="garbage")
+
+@router.post("/api/detect-multi", response_model=MultiDetectionResponse)
+async def detect_multi_endpoint(
+    image: UploadFile = File(...),
+    categories: Optional[str] = Query(None, description="Comma-separated subset of: " + ", ".join(DETECTION_CATEGORIES))
+):
+    """
+    Vandalism, infrastructure and flooding detection from one model inference.
+    Cheaper than calling the three single-category endpoints for the same image.
+    """
+    requested = DETECTION_CATEGORIES
+    if categories:
+        requested = tuple(dict.fromkeys(c.strip().lower() for c in categories.split(",") if c.strip()))
+        unknown = [c for c in requested if c not in DETECTION_CATEGORIES]
+        if unknown or not requested:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown categories: {', '.join(unknown)}. Allowed: {', '.join(DETECTION_CATEGORIES)}"
+            )
+
+    envelope = await validate_uploaded_file(image)
+
+    try:
+        detections = await detection_cache.get_or_compute(
+            "multi:" + ",".join(sorted(requested)), envelope, lambda: detect_multi_unified(envelope, requested)
+        )
+        return MultiDetectionResponse(detections=detections)
+    except InferencePoolBusyException:
+        raise  # 503 back-pressure from the inference pool
+    except Exception as e:
+        logger.error(f"Multi detection error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Detection service temporarily unavailable")
+
+@router.post("/api/detect-scan-all", response_model=MultiDetectionResponse)
+async def detect_scan_all_endpoint(
+    request: Request,
+    image: UploadFile = File(...),
+    detectors: Optional[str] = Query(None, description="Comma-separated subset of: " + ", ".join(CLIP_DETECTORS))
+):
+    """
+    Runs all zero-shot CLIP detectors (illegal parking, fire, pest, ...) with
+    a single Hugging Face request instead of one request per detector.
+    """
+    requested = tuple(CLIP_DETECTORS)
+    if detectors:
+        requested = tuple(dict.fromkeys(d.strip().lower() for d in detectors.split(",") if d.strip()))
+        unknown = [d for d in requested if d not in CLIP_DETECTORS]
+        if unknown or not requested:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown detectors: {', '.join(unknown)}. Allowed: {', '.join(CLIP_DETECTORS)}"
+            )
+
+    envelope = await process_uploaded_image(image)
+
+    try:
+        client = get_http_client(request)
+        detections = await detection_cache.get_or_compute(
+            "scan-all:" + ",".join(sorted(requested)), envelope, lambda: scan_all_clip(envelope, client=client, detectors=requested)
+        )
+        return MultiDetectionResponse(detections=detections)
+    except Exception as e:
+        logger.error(f"Scan-all detection error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.post("/api/detect-illegal-parking")
 async def detect_illegal_parking_endpoint(request: Request, image: UploadFile = File(...)):
     # Optimized Image Processing: Validation + Optimization
-    _, image_bytes = await process_uploaded_image(image)
+    envelope = await process_uploaded_image(image)
 
     try:
         client = get_http_client(request)
-        detections = await detect_illegal_parking_clip(image_bytes, client=client)
+        detections = await detection_cache.get_or_compute(
+            "illegal-parking", envelope, lambda: detect_illegal_parking_clip(envelope, client=client)
+        )
         return {"detections": detections}
     except Exception as e:
         logger.error(f"Illegal parking detection error: {e}", exc_info=True)
@@ -130,11 +175,13 @@ async def detect_illegal_parking_endpoint(request: Request, image: UploadFile =
 @router.post("/api/detect-street-light")
 async def detect_street_light_endpoint(request: Request, image: UploadFile = File(...)):
     # Optimized Image Processing: Validation + Optimization
-    _, image_bytes = await process_uploaded_image(image)
+    envelope = await process_uploaded_image(image)
 
     try:
         client = get_http_client(request)
-        detections = await detect_street_light_clip(image_bytes, client=client)
+        detections = await detection_cache.get_or_compute(
+            "street-light", envelope, lambda: detect_street_light_clip(envelope, client=client)
+        )
         return {"detections": detections}
     except Exception as e:
         logger.error(f"Street light detection error: {e}", exc_info=True)
@@ -143,11 +190,13 @@ async def detect_street_light_endpoint(request: Request, image: UploadFile = Fil
 @router.post("/api/detect-fire")
 async def detect_fire_endpoint(request: Request, image: UploadFile = File(...)):
     # Optimized Image Processing: Validation + Optimization
-    _, image_bytes = await process_uploaded_image(image)
+    envelope = await process_uploaded_image(image)
 
     try:
         client = get_http_client(request)
-        detections = await detect_fire_clip(image_bytes, client=client)
+        detections = await detection_cache.get_or_compute(
+            "fire", envelope, lambda: detect_fire_clip(envelope, client=client)
+        )
         return {"detections": detections}
     except Exception as e:
         logger.error(f"Fire detection error: {e}", exc_info=True)
@@ -156,11 +205,13 @@ async def detect_fire_endpoint(request: Request, image: UploadFile = File(...)):
 @router.post("/api/detect-stray-animal")
 async def detect_stray_animal_endpoint(request: Request, image: UploadFile = File(...)):
     # Optimized Image Processing: Validation + Optimization
-    _, image_bytes = await process_uploaded_image(image)
+    envelope = await process_uploaded_image(image)
 
     try:
         client = get_http_client(request)
-        detections = await detect_stray_animal_clip(image_bytes, client=client)
+        detections = await detection_cache.get_or_compute(
+            "stray-animal", envelope, lambda: detect_stray_animal_clip(envelope, client=client)
+        )
         return {"detections": detections}
     except Exception as e:
         logger.error(f"Stray animal detection error: {e}", exc_info=True)
@@ -169,11 +220,13 @@ async def detect_stray_animal_endpoint(request: Request, image: UploadFile = Fil
 @router.post("/api/detect-blocked-road")
 async def detect_blocked_road_endpoint(request: Request, image: UploadFile = File(...)):
     # Optimized Image Processing: Validation + Optimization
-    _, image_bytes = await process_uploaded_image(image)
+    envelope = await process_uploaded_image(image)
 
     try:
         client = get_http_client(request)
-        detections = await detect_blocked_road_clip(image_bytes, client=client)
+        detections = await detection_cache.get_or_compute(
+            "blocked-road", envelope, lambda: detect_blocked_road_clip(envelope, client=client)
+        )
         return {"detections": detections}
     except Exception as e:
         logger.error(f"Blocked road detection error: {e}", exc_info=True)
@@ -183,11 +236,13 @@ async def detect_blocked_road_endpoint(request: Request, image: UploadFile = Fil
 @router.post("/api/detect-tree-hazard")
 async def detect_tree_hazard_endpoint(request: Request, image: UploadFile = File(...)):
     # Optimized Image Processing: Validation + Optimization
-    _, image_bytes = await process_uploaded_image(image)
+    envelope = await process_uploaded_image(image)
 
     try:
         client = get_http_client(request)
-        detections = await detect_tree_hazard_clip(image_bytes, client=client)
+        detections = await detection_cache.get_or_compute(
+            "tree-hazard", envelope, lambda: detect_tree_hazard_clip(envelope, client=client)
+        )
         return {"detections": detections}
     except Exception as e:
         logger.error(f"Tree hazard detection error: {e}", exc_info=True)
@@ -197,11 +252,13 @@ async def detect_tree_hazard_endpoint(request: Request, image: UploadFile = File
 @router.post("/api/detect-pest")
 async def detect_pest_endpoint(request: Request, image: UploadFile = File(...)):
     # Optimized Image Processing: Validation + Optimization
-    _, image_bytes = await process_uploaded_image(image)
+    envelope = await process_uploaded_image(image)
 
     try:
         client = get_http_client(request)
-        detections = await detect_pest_clip(image_bytes, client=client)
+        detections = await detection_cache.get_or_compute(
+            "pest", envelope, lambda: detect_pest_clip(envelope, client=client)
+        )
         return {"detections": detections}
     except Exception as e:
         logger.error(f"Pest detection error: {e}", exc_info=True)
@@ -211,11 +268,13 @@ async def detect_pest_endpoint(request: Request, image: UploadFile = File(...)):
 @router.post("/api/detect-water-leak")
 async def detect_water_leak_endpoint(request: Request, image: UploadFile = File(...)):
     # Optimized Image Processing: Validation + Optimization
-    _, image_bytes = await process_uploaded_image(image)
+    envelope = await process_uploaded_image(image)
 
     try:
         client = get_http_client(request)
-        detections = await detect_water_leak_clip(image_bytes, client=client)
+        detections = await detection_cache.get_or_compute(
+            "water-leak", envelope, lambda: detect_water_leak_clip(envelope, client=client)
+        )
         return {"detections": detections}
     except Exception as e:
         logger.error(f"Water leak detection error: {e}", exc_info=True)
@@ -225,11 +284,13 @@ async def detect_water_leak_endpoint(request: Request, image: UploadFile = File(
 @router.post("/api/detect-accessibility")
 async def detect_accessibility_endpoint(request: Request, image: UploadFile = File(...)):
     # Optimized Image Processing: Validation + Optimization
-    _, image_bytes = await process_uploaded_image(image)
+    envelope = await process_uploaded_image(image)
 
     try:
         client = get_http_client(request)
-        detections = await detect_accessibility_issue_clip(image_bytes, client=client)
+        detections = await detection_cache.get_or_compute(
+            "accessibility", envelope, lambda: detect_accessibility_issue_clip(envelope, client=client)
+        )
         return {"detections": detections}
     except Exception as e:
         logger.error(f"Accessibility detection error: {e}", exc_info=True)
@@ -239,11 +300,13 @@ async def detect_accessibility_endpoint(request: Request, image: UploadFile = Fi
 @router.post("/api/detect-crowd")
 async def detect_crowd_endpoint(request: Request, image: UploadFile = File(...)):
     # Optimized Image Processing: Validation + Optimization
-    _, image_bytes = await process_uploaded_image(image)
+    envelope = await process_uploaded_image(image)
 
     try:
         client = get_http_client(request)
-        detections = await detect_crowd_density_clip(image_bytes, client=client)
+        detections = await detection_cache.get_or_compute(
+            "crowd", envelope, lambda: detect_crowd_density_clip(envelope, client=client)
+        )
         return {"detections": detections}
     except Exception as e:
         logger.error(f"Crowd detection error: {e}", exc_info=True)
@@ -285,9 +348,11 @@ async def detect_audio_endpoint(request: Request, file: UploadFile = File(...)):
 @router.post("/api/detect-severity")
 async def detect_severity_endpoint(image: UploadFile = File(...)):
     # Optimized Image Processing: Validation + Optimization
-    _, image_bytes = await process_uploaded_image(image)
+    envelope = await process_uploaded_image(image)
     try:
-        return await _cached_detect_severity(image_bytes)
+        return await detection_cache.get_or_compute(
+            "severity", envelope, lambda: detect_severity_clip(envelope, client=backend.dependencies.SHARED_HTTP_CLIENT)
+        )
     except Exception as e:
         logger.error(f"Severity detection error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -296,9 +361,11 @@ async def detect_severity_endpoint(image: UploadFile = File(...)):
 @router.post("/api/detect-smart-scan")
 async def detect_smart_scan_endpoint(image: UploadFile = File(...)):
     # Optimized Image Processing: Validation + Optimization
-    _, image_bytes = await process_uploaded_image(image)
+    envelope = await process_uploaded_image(image)
     try:
-        return await _cached_detect_smart_scan(image_bytes)
+        return await detection_cache.get_or_compute(
+            "smart-scan", envelope, lambda: detect_smart_scan_clip(envelope, client=backend.dependencies.SHARED_HTTP_CLIENT)
+        )
     except Exception as e:
         logger.error(f"Smart scan detection error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -307,9 +374,11 @@ async def detect_smart_scan_endpoint(image: UploadFile = File(...)):
 @router.post("/api/generate-description")
 async def generate_description_endpoint(image: UploadFile = File(...)):
     # Optimized Image Processing: Validation + Optimization
-    _, image_bytes = await process_uploaded_image(image)
+    envelope = await process_uploaded_image(image)
     try:
-        description = await _cached_generate_caption(image_bytes)
+        description = await detection_cache.get_or_compute(
+            "caption", envelope, lambda: generate_image_caption(envelope, client=backend.dependencies.SHARED_HTTP_CLIENT)
+        )
         if not description:
             return {"description": "", "error": "Could not generate description"}
         return {"description": description}
@@ -321,11 +390,11 @@ async def generate_description_endpoint(image: UploadFile = File(...)):
 @router.post("/api/analyze-depth")
 async def analyze_depth_endpoint(request: Request, image: UploadFile = File(...)):
     # Optimized Image Processing: Validation + Optimization
-    _, image_bytes = await process_uploaded_image(image)
+    envelope = await process_uploaded_image(image)
 
     try:
         client = get_http_client(request)
-        result = await detect_depth_map(image_bytes, client=client)
+        result = await detect_depth_map(envelope, client=client)
         if "error" in result:
              raise HTTPException(status_code=500, detail=result["error"])
         return result
@@ -373,10 +442,12 @@ async def transcribe_audio_endpoint(request: Request, file: UploadFile = File(..
 @router.post("/api/detect-waste")
 async def detect_waste_endpoint(image: UploadFile = File(...)):
     # Optimized Image Processing: Validation + Optimization
-    _, image_bytes = await process_uploaded_image(image)
+    envelope = await process_uploaded_image(image)
 
     try:
-        return await _cached_detect_waste(image_bytes)
+        return await detection_cache.get_or_compute(
+            "waste", envelope, lambda: detect_waste_clip(envelope, client=backend.dependencies.SHARED_HTTP_CLIENT)
+        )
     except Exception as e:
         logger.error(f"Waste detection error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -384,10 +455,12 @@ async def detect_waste_endpoint(image: UploadFile = File(...)):
 @router.post("/api/detect-civic-eye")
 async def detect_civic_eye_endpoint(image: UploadFile = File(...)):
     # Optimized Image Processing: Validation + Optimization
-    _, image_bytes = await process_uploaded_image(image)
+    envelope = await process_uploaded_image(image)
 
     try:
-        return await _cached_detect_civic_eye(image_bytes)
+        return await detection_cache.get_or_compute(
+            "civic-eye", envelope, lambda: detect_civic_eye_clip(envelope, client=backend.dependencies.SHARED_HTTP_CLIENT)
+        )
     except Exception as e:
         logger.error(f"Civic Eye detection error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -395,10 +468,13 @@ async def detect_civic_eye_endpoint(image: UploadFile = File(...)):
 @router.post("/api/detect-graffiti")
 async def detect_graffiti_endpoint(image: UploadFile = File(...)):
     # Optimized Image Processing: Validation + Optimization
-    _, image_bytes = await process_uploaded_image(image)
+    envelope = await process_uploaded_image(image)
 
     try:
-        return {"detections": await _cached_detect_graffiti(image_bytes)}
+        detections = await detection_cache.get_or_compute(
+            "graffiti", envelope, lambda: detect_graffiti_art_clip(envelope, client=backend.dependencies.SHARED_HTTP_CLIENT)
+        )
+        return {"detections": detections}
     except Exception as e:
         logger.error(f"Graffiti detection error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -406,15 +482,14 @@ async def detect_graffiti_endpoint(image: UploadFile = File(...)):
 
 @router.post("/api/detect-traffic-sign")
 async def detect_traffic_sign_endpoint(request: Request, image: UploadFile = File(...)):
-    try:
-        image_bytes = await image.read()
-    except Exception as e:
-        logger.error(f"Invalid image file: {e}", exc_info=True)
-        raise HTTPException(status_code=400, detail="Invalid image file")
+    # Optimized Image Processing: Validation + Optimization
+    envelope = await process_uploaded_image(image)
 
     try:
         client = get_http_client(request)
-        detections = await detect_traffic_sign_clip(image_bytes, client=client)
+        detections = await detection_cache.get_or_compute(
+            "traffic-sign", envelope, lambda: detect_traffic_sign_clip(envelope, client=client)
+        )
         return {"detections": detections}
     except Exception as e:
         logger.error(f"Traffic sign detection error: {e}", exc_info=True)
@@ -423,15 +498,14 @@ async def detect_traffic_sign_endpoint(request: Request, image: UploadFile = Fil
 
 @router.post("/api/detect-abandoned-vehicle")
 async def detect_abandoned_vehicle_endpoint(request: Request, image: UploadFile = File(...)):
-    try:
-        image_bytes = await image.read()
-    except Exception as e:
-        logger.error(f"Invalid image file: {e}", exc_info=True)
-        raise HTTPException(status_code=400, detail="Invalid image file")
+    # Optimized Image Processing: Validation + Optimization
+    envelope = await process_uploaded_image(image)
 
     try:
         client = get_http_client(request)
-        detections = await detect_abandoned_vehicle_clip(image_bytes, client=client)
+        detections = await detection_cache.get_or_compute(
+            "abandoned-vehicle", envelope, lambda: detect_abandoned_vehicle_clip(envelope, client=client)
+        )
         return {"detections": detections}
     except Exception as e:
         logger.error(f"Abandoned vehicle detection error: {e}", exc_info=True)
@@ -3,32 +3,44 @@ from fastapi.responses import JSONResponse
 from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session, defer
 from sqlalchemy import func
-from typing import List, Union, Dict, Any
+from typing import List, Sequence, Union, Dict, Any
 import uuid
 import os
 import logging
-import hashlib
 from datetime import datetime, timezone
 
 from backend.database import get_db
 from backend.models import Issue, PushSubscription
 from backend.schemas import (
     IssueCreateWithDeduplicationResponse, IssueCategory, NearbyIssueResponse,
-    DeduplicationCheckResponse, IssueSummaryResponse, VoteResponse,
+    DeduplicationCheckResponse, SimilarImageResponse, IssueSummaryResponse, VoteResponse,
     IssueStatusUpdateRequest, IssueStatusUpdateResponse, PushSubscriptionRequest,
-    PushSubscriptionResponse
+    PushSubscriptionResponse, IssueClusterResponse, IntegrityProofResponse
 )
 from backend.utils import (
     check_upload_limits, validate_uploaded_file, save_file_blocking, save_issue_db,
-    process_uploaded_image, save_processed_image,
-    UPLOAD_LIMIT_PER_USER, UPLOAD_LIMIT_PER_IP
+    process_uploaded_image, save_processed_image, thumbnail_path_for,
+    UPLOAD_LIMIT_PER_USER, UPLOAD_LIMIT_PER_IP, UPLOAD_DIR
 )
 from backend.tasks import (
-    process_action_plan_background, create_grievance_from_issue_background,
-    send_status_notification
+    ACTION_PLAN_JOB, create_grievance_from_issue_background,
+    send_status_notification, assign_issue_cluster_background
 )
-from backend.spatial_utils import get_bounding_box, find_nearby_issues
-from backend.cache import recent_issues_cache
+from backend.job_queue import job_queue
+from backend.spatial_utils import (
+    get_bounding_box, find_nearby_issues, get_cluster_representative, calculate_cluster_centroid
+)
+from backend.spatial_index import spatial_index, SPATIAL_INDEX_ENABLED
+from backend.image_envelope import ImageEnvelope
+from backend.image_dedup_index import (
+    image_dedup_index, compute_phash, hash_to_hex, similarity,
+    IMAGE_DEDUP_ENABLED, IMAGE_DEDUP_RADIUS_METERS, IMAGE_DEDUP_STATUSES, IMAGE_DEDUP_MAX_MATCHES
+)
+from backend.clustering_service import load_clusters
+from backend.issue_indexes import index_new_issue, sync_issue_status
+from backend.integrity_chain import compute_issue_hash, get_inclusion_proof
+from backend.vote_accumulator import vote_accumulator
+from backend.cache import recent_issues_cache, issue_tag, RECENT_ISSUES_TAG, LEADERBOARD_TAG
 from backend.hf_api_service import verify_resolution_vqa
 from backend.dependencies import get_http_client
 
@@ -36,6 +48,104 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+def _use_spatial_index() -> bool:
+    """Radius queries are served from memory once the spatial index has been warmed."""
+    return SPATIAL_INDEX_ENABLED and spatial_index.is_warm
+
+def _invalidate_caches_for_new_issue(issue: Issue) -> None:
+    """
+    Every recent-issues page shifts by one, so those are dropped. Stats are
+    patched in place and the leaderboard only changes for signed-in reporters.
+    """
+    recent_issues_cache.invalidate_tags(RECENT_ISSUES_TAG)
+
+    def add_to_stats(stats: dict) -> dict:
+        by_category = dict(stats["issues_by_category"])
+        by_category[issue.category] = by_category.get(issue.category, 0) + 1
+        return {
+            **stats,
+            "total_issues": stats["total_issues"] + 1,
+            "pending_issues": stats["pending_issues"] + 1,
+            "issues_by_category": by_category
+        }
+
+    recent_issues_cache.update("stats", add_to_stats)
+
+    if issue.user_email:
+        recent_issues_cache.invalidate_tags(LEADERBOARD_TAG)
+
+def _find_nearby_open_issues_sql(db: Session, latitude: float, longitude: float, radius: float, limit: int = None,
+                                 statuses: Sequence[str] = ("open",)):
+    """
+    Fallback path used while the spatial index is cold.
+    Filters candidates with a bounding box in SQL, then refines with haversine.
+    """
+    # Optimization: Use bounding box to filter candidates in SQL
+    min_lat, max_lat, min_lon, max_lon = get_bounding_box(latitude, longitude, radius)
+
+    # Performance Boost: Use column projection to avoid loading full model instances
+    open_issues = db.query(
+        Issue.id,
+        Issue.description,
+        Issue.category,
+        Issue.latitude,
+        Issue.longitude,
+        Issue.upvotes,
+        Issue.created_at,
+        Issue.status
+    ).filter(
+        Issue.status.in_(statuses),
+        Issue.latitude >= min_lat,
+        Issue.latitude <= max_lat,
+        Issue.longitude >= min_lon,
+        Issue.longitude <= max_lon
+    ).all()
+
+    return find_nearby_issues(open_issues, latitude, longitude, radius_meters=radius, limit=limit)
+
+async def _find_similar_images(db: Session, phash: int, latitude: float = None, longitude: float = None) -> List[SimilarImageResponse]:
+    """
+    Unresolved issues whose photo is a near-duplicate of the new report's: among
+    issues near the report, or among all issues when it has no location.
+    """
+    distances = None
+    if latitude is not None and longitude is not None:
+        if _use_spatial_index():
+            nearby = [
+                match
+                for status in IMAGE_DEDUP_STATUSES
+                for match in spatial_index.query_radius(latitude, longitude, IMAGE_DEDUP_RADIUS_METERS, status=status)
+            ]
+        else:
+            nearby = await run_in_threadpool(
+                _find_nearby_open_issues_sql, db, latitude, longitude, IMAGE_DEDUP_RADIUS_METERS,
+                statuses=IMAGE_DEDUP_STATUSES
+            )
+        distances = {issue.id: distance for issue, distance in nearby}
+        matches = image_dedup_index.query(phash, candidate_ids=distances.keys())
+    else:
+        # The global index also holds resolved issues, so filter before keeping the closest
+        matches = image_dedup_index.query(phash, limit=None)
+        if matches:
+            match_ids = [issue_id for issue_id, _ in matches]
+            active_ids = await run_in_threadpool(
+                lambda: {
+                    row.id for row in db.query(Issue.id).filter(
+                        Issue.id.in_(match_ids), Issue.status.in_(IMAGE_DEDUP_STATUSES)
+                    )
+                }
+            )
+            matches = [match for match in matches if match[0] in active_ids][:IMAGE_DEDUP_MAX_MATCHES]
+
+    return [
+        SimilarImageResponse(
+            issue_id=issue_id,
+            similarity=similarity(distance),
+            distance_meters=distances.get(issue_id) if distances else None
+        )
+        for issue_id, distance in matches
+    ]
+
 @router.post("/api/issues", response_model=IssueCreateWithDeduplicationResponse, status_code=201)
 async def create_issue(
     request: Request,
@@ -51,6 +161,8 @@ async def create_issue(
     db: Session = Depends(get_db)
 ):
     image_path = None
+    thumbnail_path = None
+    image_phash = None
 
     # Check upload limits if image is being uploaded
     if image:
@@ -64,16 +176,23 @@ async def create_issue(
     try:
         # Save image if provided (optimized single pass)
         if image:
-            upload_dir = "data/uploads"
-            os.makedirs(upload_dir, exist_ok=True)
-            filename = f"{uuid.uuid4()}_{image.filename}"
-            image_path = os.path.join(upload_dir, filename)
+            os.makedirs(UPLOAD_DIR, exist_ok=True)
+            # The processed photo is always re-encoded as JPEG, whatever the upload was
+            stem = os.path.splitext(os.path.basename(image.filename or "photo"))[0]
+            filename = f"{uuid.uuid4()}_{stem}.jpg"
+            image_path = os.path.join(UPLOAD_DIR, filename)
 
             # Process image (validate, resize, strip EXIF)
             processed_image = await process_uploaded_image(image)
 
-            # Save processed image to disk
-            await run_in_threadpool(save_processed_image, processed_image, image_path)
+            # Save processed image and its list-view thumbnail to disk
+            thumbnail_path = await run_in_threadpool(
+                save_processed_image, processed_image, image_path, thumbnail_path_for(image_path)
+            )
+
+            # Perceptual hash for near-duplicate photo detection
+            if IMAGE_DEDUP_ENABLED and isinstance(processed_image, ImageEnvelope):
+                image_phash = await run_in_threadpool(compute_phash, processed_image)
     except HTTPException:
         # Re-raise HTTP exceptions (from validation)
         raise
@@ -91,32 +210,14 @@ async def create_issue(
     if latitude is not None and longitude is not None:
         try:
             # Find existing open issues within 50 meters
-            # Optimization: Use bounding box to filter candidates in SQL
-            min_lat, max_lat, min_lon, max_lon = get_bounding_box(latitude, longitude, 50.0)
-
-            # Performance Boost: Use column projection to avoid loading full model instances
-            open_issues = await run_in_threadpool(
-                lambda: db.query(
-                    Issue.id,
-                    Issue.description,
-                    Issue.category,
-                    Issue.latitude,
-                    Issue.longitude,
-                    Issue.upvotes,
-                    Issue.created_at,
-                    Issue.status
-                ).filter(
-                    Issue.status == "open",
-                    Issue.latitude >= min_lat,
-                    Issue.latitude <= max_lat,
-                    Issue.longitude >= min_lon,
-                    Issue.longitude <= max_lon
-                ).all()
-            )
-
-            nearby_issues_with_distance = find_nearby_issues(
-                open_issues, latitude, longitude, radius_meters=50.0
-            )
+            # Only the 3 closest are reported, so let the distance kernel do a top-k selection
+            if _use_spatial_index():
+                # Served from the in-memory grid, no database round-trip
+                nearby_issues_with_distance = spatial_index.query_radius(latitude, longitude, 50.0, limit=3)
+            else:
+                nearby_issues_with_distance = await run_in_threadpool(
+                    _find_nearby_open_issues_sql, db, latitude, longitude, 50.0, 3
+                )
 
             if nearby_issues_with_distance:
                 # Found nearby issues - prepare deduplication response
@@ -155,6 +256,7 @@ async def create_issue(
 
                 # Commit the upvote
                 await run_in_threadpool(db.commit)
+                spatial_index.increment_upvotes(linked_issue_id)
 
                 logger.info(f"Spatial deduplication: Linked new report to existing issue {linked_issue_id}")
 
@@ -162,69 +264,100 @@ async def create_issue(
             logger.error(f"Error during spatial deduplication check: {e}", exc_info=True)
             # Continue with issue creation if deduplication fails
 
+    # Photo deduplication: flag reports whose photo matches an open issue's
+    similar_images = []
+    if image_phash is not None and deduplication_info is None:
+        try:
+            similar_images = await _find_similar_images(db, image_phash, latitude, longitude)
+            if similar_images:
+                logger.info(f"Image deduplication: Report photo matches issue {similar_images[0].issue_id}")
+        except Exception as e:
+            logger.error(f"Error during image deduplication check: {e}", exc_info=True)
+
     try:
         # Save to DB only if no nearby issues found or deduplication failed
         if deduplication_info is None or not deduplication_info.has_nearby_issues:
-            # Blockchain feature: calculate integrity hash for the report
-            # Optimization: Fetch only the last hash to maintain the chain with minimal overhead
-            prev_issue = await run_in_threadpool(
-                lambda: db.query(Issue.integrity_hash).order_by(Issue.id.desc()).first()
-            )
-            prev_hash = prev_issue[0] if prev_issue and prev_issue[0] else ""
-
-            # Simple but effective SHA-256 chaining
-            hash_content = f"{description}|{category}|{prev_hash}"
-            integrity_hash = hashlib.sha256(hash_content.encode()).hexdigest()
+            # Blockchain feature: hash the report's own content. Chaining happens when the
+            # integrity sealer batches issues into Merkle blocks, so ingest never waits
+            # on the previous issue's hash.
+            reference_id = str(uuid.uuid4())
+            integrity_hash = compute_issue_hash(description, category, reference_id)
 
             new_issue = Issue(
-                reference_id=str(uuid.uuid4()),
+                reference_id=reference_id,
                 description=description,
                 category=category,
                 image_path=image_path,
+                thumbnail_path=thumbnail_path,
                 source="web",
                 user_email=user_email,
                 latitude=latitude,
                 longitude=longitude,
                 location=location,
                 action_plan=None,
-                integrity_hash=integrity_hash
+                integrity_hash=integrity_hash,
+                image_phash=hash_to_hex(image_phash) if image_phash is not None else None
             )
 
             # Offload blocking DB operations to threadpool
             await run_in_threadpool(save_issue_db, db, new_issue)
+            index_new_issue(new_issue)
+            if image_phash is not None:
+                image_dedup_index.add(new_issue.id, image_phash)
         else:
             # Don't create new issue, just return deduplication info
             new_issue = None
     except Exception as e:
         # Clean up uploaded file if DB save failed
-        if image_path and os.path.exists(image_path):
-            try:
-                os.remove(image_path)
-            except OSError:
-                pass  # Ignore cleanup errors
+        for path in (image_path, thumbnail_path):
+            if path and os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass  # Ignore cleanup errors
 
         logger.error(f"Database error while creating issue: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to save issue to database")
 
-    # Add background task for AI generation only if new issue was created
+    # Queue AI generation only if new issue was created
+    action_plan_job_id = None
     if new_issue:
-        background_tasks.add_task(process_action_plan_background, new_issue.id, description, category, language, image_path)
+        try:
+            action_plan_job_id = await run_in_threadpool(job_queue.enqueue, ACTION_PLAN_JOB, {
+                "issue_id": new_issue.id,
+                "description": description,
+                "category": category,
+                "language": language,
+                "image_path": image_path
+            })
+        except Exception as e:
+            logger.error(f"Error queueing action plan for issue {new_issue.id}: {e}", exc_info=True)
 
         # Create grievance for escalation management
         background_tasks.add_task(create_grievance_from_issue_background, new_issue.id)
 
-        # Invalidate cache so new issue appears
+        # Periodically snapshot the image hash index to disk
+        if image_phash is not None:
+            background_tasks.add_task(image_dedup_index.maybe_save)
+
+        # Place the issue into a spatial cluster (incremental, no full recluster)
+        if latitude is not None and longitude is not None:
+            background_tasks.add_task(assign_issue_cluster_background, new_issue.id)
+
+        # Invalidate only the cached responses the new issue changes
         try:
-            recent_issues_cache.clear()
+            _invalidate_caches_for_new_issue(new_issue)
         except Exception as e:
-            logger.error(f"Error clearing cache: {e}")
+            logger.error(f"Error invalidating cache: {e}")
 
     # Prepare deduplication info if not already set
     if deduplication_info is None:
         deduplication_info = DeduplicationCheckResponse(
             has_nearby_issues=False,
             nearby_issues=[],
-            recommended_action="create_new"
+            recommended_action="verify_existing" if similar_images else "create_new",
+            similar_images=similar_images,
+            similarity_score=similar_images[0].similarity if similar_images else None
         )
 
     # Return response with deduplication information
@@ -234,7 +367,8 @@ async def create_issue(
             message="Issue reported successfully. Action plan will be generated shortly.",
             action_plan=None,
             deduplication_info=deduplication_info,
-            linked_issue_id=linked_issue_id
+            linked_issue_id=linked_issue_id,
+            action_plan_job_id=action_plan_job_id
         )
     else:
         return IssueCreateWithDeduplicationResponse(
@@ -247,23 +381,18 @@ async def create_issue(
 
 @router.post("/api/issues/{issue_id}/vote", response_model=VoteResponse)
 def upvote_issue(issue_id: int, db: Session = Depends(get_db)):
-    issue = db.query(Issue).filter(Issue.id == issue_id).first()
+    issue = db.query(Issue.id, Issue.upvotes).filter(Issue.id == issue_id).first()
     if not issue:
         raise HTTPException(status_code=404, detail="Issue not found")
 
-    # Increment upvotes atomically
-    if issue.upvotes is None:
-        issue.upvotes = 0
-
-    # Use SQLAlchemy expression for atomic update
-    issue.upvotes = Issue.upvotes + 1
-
-    db.commit()
-    db.refresh(issue)
+    # Write-behind: the vote is batched into the next periodic UPDATE. This is a
+    # sync endpoint, so add() (which may flush inline) already runs on a worker thread
+    pending = vote_accumulator.add(issue.id, 1)
+    spatial_index.increment_upvotes(issue.id)
 
     return VoteResponse(
         id=issue.id,
-        upvotes=issue.upvotes,
+        upvotes=(issue.upvotes or 0) + pending,
         message="Issue upvoted successfully"
     )
 
@@ -281,30 +410,10 @@ def get_nearby_issues(
     """
     try:
         # Query open issues with coordinates
-        # Optimization: Use bounding box to filter candidates in SQL
-        min_lat, max_lat, min_lon, max_lon = get_bounding_box(latitude, longitude, radius)
-
-        # Performance Boost: Use column projection to avoid loading full model instances
-        open_issues = db.query(
-            Issue.id,
-            Issue.description,
-            Issue.category,
-            Issue.latitude,
-            Issue.longitude,
-            Issue.upvotes,
-            Issue.created_at,
-            Issue.status
-        ).filter(
-            Issue.status == "open",
-            Issue.latitude >= min_lat,
-            Issue.latitude <= max_lat,
-            Issue.longitude >= min_lon,
-            Issue.longitude <= max_lon
-        ).all()
-
-        nearby_issues_with_distance = find_nearby_issues(
-            open_issues, latitude, longitude, radius_meters=radius
-        )
+        if _use_spatial_index():
+            nearby_issues_with_distance = spatial_index.query_radius(latitude, longitude, radius, limit=limit)
+        else:
+            nearby_issues_with_distance = _find_nearby_open_issues_sql(db, latitude, longitude, radius, limit)
 
         # Convert to response format and limit results
         nearby_responses = [
@@ -328,6 +437,64 @@ def get_nearby_issues(
         logger.error(f"Error getting nearby issues: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to retrieve nearby issues")
 
+@router.get("/api/clusters", response_model=List[IssueClusterResponse])
+def get_issue_clusters(
+    min_size: int = Query(2, ge=1, le=100, description="Minimum number of issues in a cluster"),
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of clusters to return"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get spatial clusters of active issues with their centroid and representative issue.
+    Uses the persisted cluster assignments, so nothing is reclustered per request.
+    """
+    try:
+        clusters = load_clusters(db, min_size=min_size, limit=limit)
+
+        response = []
+        for members in clusters:
+            representative = get_cluster_representative(members)
+            centroid_lat, centroid_lon = calculate_cluster_centroid(members)
+            desc = representative.description or ""
+            response.append(IssueClusterResponse(
+                cluster_id=representative.cluster_id,
+                size=len(members),
+                centroid_latitude=centroid_lat,
+                centroid_longitude=centroid_lon,
+                representative=IssueSummaryResponse(
+                    id=representative.id,
+                    category=representative.category,
+                    description=desc[:100] + "..." if len(desc) > 100 else desc,
+                    created_at=representative.created_at,
+                    status=representative.status,
+                    upvotes=representative.upvotes or 0,
+                    latitude=representative.latitude,
+                    longitude=representative.longitude
+                ),
+                issue_ids=[member.id for member in members]
+            ))
+
+        return response
+
+    except Exception as e:
+        logger.error(f"Error getting issue clusters: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to retrieve issue clusters")
+
+@router.get("/api/issues/{issue_id}/integrity-proof", response_model=IntegrityProofResponse)
+def get_issue_integrity_proof(issue_id: int, db: Session = Depends(get_db)):
+    """
+    Prove that an issue is included in the sealed integrity chain.
+    Returns the O(log n) Merkle path from the issue's hash to its block root.
+    """
+    try:
+        proof = get_inclusion_proof(db, issue_id)
+    except Exception as e:
+        logger.error(f"Error building integrity proof for issue {issue_id}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to build integrity proof")
+
+    if proof is None:
+        raise HTTPException(status_code=404, detail="Issue not found")
+    return proof
+
 @router.post("/api/issues/{issue_id}/verify", response_model=Union[VoteResponse, Dict[str, Any]])
 async def verify_issue_endpoint(
     issue_id: int,
@@ -341,12 +508,11 @@ async def verify_issue_endpoint(
 
     if image:
         # AI Verification Logic
-        # Validate uploaded file
-        await validate_uploaded_file(image)
-        # We can ignore the returned PIL image here as we need bytes for the external API
+        # Validate uploaded file; the envelope carries the normalized bytes for the external API
+        envelope = await validate_uploaded_file(image)
 
         try:
-            image_bytes = await image.read()
+            image_bytes = await run_in_threadpool(lambda: envelope.jpeg_bytes)
         except Exception as e:
             logger.error(f"Invalid image file: {e}", exc_info=True)
             raise HTTPException(status_code=400, detail="Invalid image file")
@@ -385,6 +551,7 @@ async def verify_issue_endpoint(
                     issue.status = "verified" # Mark as verified (resolved usually implies closed)
                     issue.verified_at = datetime.now(timezone.utc)
                     await run_in_threadpool(db.commit)
+                    sync_issue_status(issue.id, "verified")
 
             return {
                 "is_resolved": is_resolved,
@@ -397,28 +564,39 @@ async def verify_issue_endpoint(
             raise HTTPException(status_code=500, detail="Verification service temporarily unavailable")
     else:
         # Manual Verification Logic (Vote)
-        # Increment upvotes (verification counts as strong support)
-        if issue.upvotes is None:
-            issue.upvotes = 0
-
-        # Atomic increment
-        issue.upvotes = Issue.upvotes + 2
-
-        # If issue has enough verifications, consider upgrading status
-        # Use flush to apply increment within transaction, then refresh to check value
-        await run_in_threadpool(db.flush)
-        await run_in_threadpool(db.refresh, issue)
-
-        if issue.upvotes >= 5 and issue.status == "open":
+        # Verification counts as strong support (+2 upvotes)
+        upvotes = vote_accumulator.effective_upvotes(issue.id, issue.upvotes) + 2
+
+        if upvotes >= 5 and issue.status == "open":
+            # Write through: persist the pending votes in the same transaction as the
+            # status change so the verified issue never shows fewer than 5 upvotes
+            pending = vote_accumulator.take(issue.id)
+            issue.upvotes = func.coalesce(Issue.upvotes, 0) + pending + 2
             issue.status = "verified"
-            logger.info(f"Issue {issue_id} automatically verified due to {issue.upvotes} upvotes")
 
-        # Commit all changes (upvote and potential status change)
-        await run_in_threadpool(db.commit)
+            try:
+                await run_in_threadpool(db.flush)
+                await run_in_threadpool(db.refresh, issue)
+                await run_in_threadpool(db.commit)
+            except Exception as e:
+                await run_in_threadpool(db.rollback)
+                # Like a failed flush: keep the pending votes for the next one
+                vote_accumulator.put_back(issue.id, pending)
+                logger.error(f"Failed to verify issue {issue_id}: {e}", exc_info=True)
+                raise HTTPException(status_code=500, detail="Failed to verify issue")
+            upvotes = vote_accumulator.effective_upvotes(issue.id, issue.upvotes)
+            logger.info(f"Issue {issue_id} automatically verified due to {upvotes} upvotes")
+            sync_issue_status(issue.id, issue.status)
+        else:
+            # add() may flush inline, so it always runs on a worker thread
+            pending = await run_in_threadpool(vote_accumulator.add, issue.id, 2)
+            upvotes = (issue.upvotes or 0) + pending
+
+        spatial_index.increment_upvotes(issue.id, 2)
 
         return VoteResponse(
             id=issue.id,
-            upvotes=issue.upvotes,
+            upvotes=upvotes,
             message="Issue verified successfully"
         )
 
@@ -465,6 +643,7 @@ def update_issue_status(
 
     db.commit()
     db.refresh(issue)
+    sync_issue_status(issue.id, issue.status)
 
     # Send notification to citizen
     background_tasks.add_task(send_status_notification, issue.id, old_status, request.status.value, request.notes)
@@ -534,6 +713,7 @@ def get_user_issues(
         Issue.description,
         Issue.created_at,
         Issue.image_path,
+        Issue.thumbnail_path,
         Issue.status,
         Issue.upvotes,
         Issue.location,
@@ -555,6 +735,7 @@ def get_user_issues(
             "description": short_desc,
             "created_at": row.created_at,
             "image_path": row.image_path,
+            "thumbnail_path": row.thumbnail_path,
             "status": row.status,
             "upvotes": row.upvotes if row.upvotes is not None else 0,
             "location": row.location,
@@ -583,6 +764,7 @@ def get_recent_issues(
         Issue.description,
         Issue.created_at,
         Issue.image_path,
+        Issue.thumbnail_path,
         Issue.status,
         Issue.upvotes,
         Issue.location,
@@ -603,6 +785,7 @@ def get_recent_issues(
             "description": short_desc,
             "created_at": row.created_at.isoformat() if row.created_at else None,
             "image_path": row.image_path,
+            "thumbnail_path": row.thumbnail_path,
             "status": row.status,
             "upvotes": row.upvotes if row.upvotes is not None else 0,
             "location": row.location,
@@ -610,6 +793,7 @@ def get_recent_issues(
             "longitude": row.longitude
         })
 
-    # Thread-safe cache update
-    recent_issues_cache.set(data, cache_key)
+    # Thread-safe cache update, tagged so new or changed issues invalidate only affected pages
+    tags = [RECENT_ISSUES_TAG] + [issue_tag(item["id"]) for item in data]
+    recent_issues_cache.set(data, cache_key, tags=tags)
     return data
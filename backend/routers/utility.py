@@ -1,20 +1,33 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from datetime import datetime, timezone
+from typing import Optional
+import json
 import logging
 
 from backend.database import get_db
 from backend.models import Issue
 from backend.schemas import (
-    SuccessResponse, HealthResponse, StatsResponse, MLStatusResponse,
-    ChatRequest, ChatResponse, LeaderboardResponse, LeaderboardEntry
+    SuccessResponse, HealthResponse, StatsResponse, MLStatusResponse, ReadinessResponse,
+    ChatRequest, ChatResponse, LeaderboardResponse, LeaderboardEntry, JobStatusResponse
 )
-from backend.cache import recent_issues_cache
+from backend.cache import recent_issues_cache, STATS_TAG, LEADERBOARD_TAG
+from backend.vote_accumulator import vote_accumulator
+from backend.inference_scheduler import get_inference_stats
+from backend.inference_pool import inference_pool
+from backend.detection_cache import detection_cache
+from backend.image_dedup_index import image_dedup_index
+from backend.hf_client import hf_client
+from backend.job_queue import job_queue
+from backend.mla_summary_store import mla_summary_store
+from backend.model_registry import model_registry, ModelState, process_rss_mb
 from backend.unified_detection_service import get_detection_status
-from backend.ai_service import chat_with_civic_assistant
-from backend.gemini_services import get_ai_services
+from backend.ai_service import (
+    chat_with_civic_assistant, stream_chat_with_civic_assistant, get_action_plan_stats, get_semantic_cache_stats
+)
+from backend import ai_interfaces
 from backend.maharashtra_locator import (
     find_constituency_by_pincode,
     find_mla_by_constituency,
@@ -70,7 +83,7 @@ def get_stats(db: Session = Depends(get_db)):
     )
 
     data = response.model_dump(mode='json')
-    recent_issues_cache.set(data, "stats")
+    recent_issues_cache.set(data, "stats", tags=(STATS_TAG,))
 
     return response
 
@@ -81,21 +94,157 @@ async def ml_status():
     Returns information about which backend is being used (local or HF API).
     """
     status = await get_detection_status()
+    models = model_registry.get_status()
+    ready = model_registry.is_ready()
     return MLStatusResponse(
-        status="ok",
-        models_loaded=status.get("models_loaded", []),
-        memory_usage=status.get("memory_usage")
+        status="degraded" if model_registry.failed() else ("ok" if ready else "loading"),
+        models_loaded=[name for name, model in models.items() if model["state"] == ModelState.READY.value],
+        memory_usage={"rss_mb": process_rss_mb()},
+        ready=ready,
+        models=models,
+        detection=status,
+        hf_api=hf_client.get_status()
+    )
+
+@router.get("/ready", response_model=ReadinessResponse)
+def ready():
+    """
+    Readiness probe: 503 until every preloaded model is warmed up or has failed
+    to load, so load balancers only route to instances that finished starting.
+    """
+    response = ReadinessResponse(
+        ready=model_registry.is_ready(),
+        models={name: model["state"] for name, model in model_registry.get_status().items() if model["preload"]}
     )
+    if not response.ready:
+        return JSONResponse(status_code=503, content=response.model_dump())
+    return response
+
+@router.get("/api/metrics/votes")
+def vote_metrics():
+    """
+    Get write-behind upvote accumulator metrics (pending deltas, flush counts and latency).
+    """
+    return vote_accumulator.get_stats()
+
+@router.get("/api/metrics/inference")
+def inference_metrics():
+    """
+    Get micro-batching scheduler metrics per local model (batch size and queue depth histograms).
+    """
+    return get_inference_stats()
+
+@router.get("/api/metrics/inference-pool")
+async def inference_pool_metrics(check: bool = False):
+    """
+    Get inference process pool metrics (queue occupancy, rejections, restarts).
+    Pass check=true to ping a worker first.
+    """
+    if check and inference_pool.enabled:
+        await inference_pool.health_check()
+    return inference_pool.get_stats()
+
+@router.get("/api/metrics/detection-cache")
+def detection_cache_metrics():
+    """
+    Get detection result cache metrics (hit rate per tier, coalesced requests, memory use).
+    """
+    return detection_cache.get_stats()
+
+@router.get("/api/metrics/image-dedup")
+def image_dedup_metrics():
+    """
+    Get near-duplicate photo index metrics (indexed photos, query latency, matches).
+    """
+    return image_dedup_index.get_stats()
+
+@router.get("/api/metrics/jobs")
+def job_metrics():
+    """
+    Get background job queue metrics (jobs per status, busy workers, retries, dead letters)
+    and action plan batching counters.
+    """
+    return {**job_queue.get_stats(), "action_plans": get_action_plan_stats()}
+
+@router.get("/api/metrics/semantic-cache")
+def semantic_cache_metrics():
+    """
+    Get Gemini response cache metrics for chat and action plans (exact and near hits, evictions).
+    """
+    return get_semantic_cache_stats()
+
+@router.get("/api/metrics/mla-summaries")
+def mla_summary_metrics():
+    """
+    Get MLA summary precomputation metrics (stored, missing, failures, data version).
+    """
+    return mla_summary_store.get_stats()
+
+@router.get("/api/jobs/{job_id}", response_model=JobStatusResponse)
+def job_status(job_id: int):
+    """
+    Get the status of a background job, e.g. the action plan job of a new issue.
+    """
+    job = job_queue.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/api/jobs/{job_id}/retry", response_model=JobStatusResponse)
+def retry_job(job_id: int):
+    """
+    Requeue a dead-lettered job with a fresh set of attempts.
+    """
+    if not job_queue.requeue(job_id):
+        if job_queue.get_job(job_id) is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        raise HTTPException(status_code=409, detail="Only dead-lettered jobs can be retried")
+    return job_queue.get_job(job_id)
 
 @router.post("/api/chat", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest):
     try:
-        response = await chat_with_civic_assistant(request.query)
+        response = await chat_with_civic_assistant(request.query, request.language)
         return ChatResponse(response=response)
     except Exception as e:
         logger.error(f"Chat service error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Chat service temporarily unavailable")
 
+def _sse(data: dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@router.post("/api/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    Stream the chat answer as server-sent events: one `data: {"delta": ...}` message per
+    chunk, then `event: done` (or `event: error`). Uses the configured chat service, so
+    AI_SERVICE_TYPE=mock streams the mock. A client disconnect cancels the generation.
+    """
+    try:
+        chat_stream = ai_interfaces.get_ai_services().chat_service.chat_stream
+    except RuntimeError:
+        # AI services are initialized in the background after startup
+        chat_stream = stream_chat_with_civic_assistant
+    chunks = chat_stream(request.query, request.language)
+
+    async def events():
+        try:
+            async for chunk in chunks:
+                yield _sse({"delta": chunk})
+            yield _sse({}, event="done")
+        except Exception as e:
+            logger.error(f"Chat stream error: {e}", exc_info=True)
+            yield _sse({"detail": "Chat service temporarily unavailable"}, event="error")
+        finally:
+            # Runs on disconnect too (Starlette cancels this generator), stopping upstream generation
+            await chunks.aclose()
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/api/leaderboard", response_model=LeaderboardResponse)
 def get_leaderboard(db: Session = Depends(get_db)):
     """Get top reporters leaderboard (cached)"""
@@ -136,7 +285,7 @@ def get_leaderboard(db: Session = Depends(get_db)):
 
     response_data = {"leaderboard": leaderboard_data}
     # Cache for 5 minutes to reduce DB load on frequent hits
-    recent_issues_cache.set(response_data, cache_key)
+    recent_issues_cache.set(response_data, cache_key, tags=(LEADERBOARD_TAG,))
 
     return response_data
 
@@ -189,20 +338,12 @@ async def get_maharashtra_rep_contacts(pincode: str = Query(..., min_length=6, m
         if not assembly_constituency:
              constituency_info["assembly_constituency"] = "Unknown (District Found)"
 
-    # Generate AI summary (optional)
+    # AI summary, precomputed in the background (static fallback until it exists)
     description = None
-    try:
-        # Only generate summary if we have a valid constituency and MLA
-        if assembly_constituency and mla_info["mla_name"] != "MLA Info Unavailable":
-            ai_services = get_ai_services()
-            description = await ai_services.mla_summary_service.generate_mla_summary(
-                district=constituency_info["district"],
-                assembly_constituency=assembly_constituency,
-                mla_name=mla_info["mla_name"]
-            )
-    except Exception as e:
-        logger.error(f"Error generating MLA summary: {e}")
-        # Continue without description
+    if assembly_constituency and mla_info["mla_name"] != "MLA Info Unavailable":
+        description = mla_summary_store.get_summary(
+            constituency_info["district"], assembly_constituency, mla_info["mla_name"]
+        )
 
     # Build response
     response = {
@@ -26,6 +26,7 @@ class ActionPlan(BaseModel):
 
 class ChatRequest(BaseModel):
     query: str = Field(..., min_length=1, max_length=1000, description="Chat query text")
+    language: str = Field("en", max_length=10, description="Language code of the query, used to partition cached answers")
 
 class ChatResponse(BaseModel):
     response: str
@@ -39,6 +40,7 @@ class IssueSummaryResponse(BaseModel):
     description: str
     created_at: datetime
     image_path: Optional[str] = None
+    thumbnail_path: Optional[str] = None
     status: str
     upvotes: int
     location: Optional[str] = None
@@ -104,6 +106,9 @@ class PushSubscriptionResponse(BaseModel):
 class DetectionResponse(BaseModel):
     detections: List[Dict[str, Any]] = Field(..., description="List of detected objects/items")
 
+class MultiDetectionResponse(BaseModel):
+    detections: Dict[str, List[Dict[str, Any]]] = Field(..., description="Detections per category, from a single inference")
+
 class UrgencyAnalysisRequest(BaseModel):
     description: str = Field(..., min_length=10, max_length=1000, description="Issue description")
     category: IssueCategory = Field(..., description="Issue category")
@@ -123,6 +128,14 @@ class MLStatusResponse(BaseModel):
     status: str = Field(..., description="ML service status")
     models_loaded: List[str] = Field(..., description="List of loaded models")
     memory_usage: Optional[Dict[str, Any]] = Field(None, description="Memory usage statistics")
+    ready: Optional[bool] = Field(None, description="Whether all preloaded models are warm")
+    models: Optional[Dict[str, Dict[str, Any]]] = Field(None, description="Per-model state, load time and memory")
+    detection: Optional[Dict[str, Any]] = Field(None, description="Detection backend status")
+    hf_api: Optional[Dict[str, Any]] = Field(None, description="Per-endpoint HF API limits, latency and circuit breaker state")
+
+class ReadinessResponse(BaseModel):
+    ready: bool = Field(..., description="Whether the instance should receive traffic")
+    models: Dict[str, str] = Field(..., description="State of each preloaded model")
 
 class ResponsibilityMapResponse(BaseModel):
     data: Dict[str, Any] = Field(..., description="Responsibility mapping data")
@@ -158,10 +171,18 @@ class NearbyIssueResponse(BaseModel):
     status: str = Field(..., description="Issue status")
 
 
+class SimilarImageResponse(BaseModel):
+    issue_id: int = Field(..., description="Issue whose photo matches")
+    similarity: float = Field(..., description="Perceptual-hash similarity (0-1)")
+    distance_meters: Optional[float] = Field(None, description="Distance from new issue location, if both are known")
+
+
 class DeduplicationCheckResponse(BaseModel):
     has_nearby_issues: bool = Field(..., description="Whether nearby issues were found")
     nearby_issues: List[NearbyIssueResponse] = Field(default_factory=list, description="List of nearby issues")
     recommended_action: str = Field(..., description="Recommended action: 'create_new', 'upvote_existing', 'verify_existing'")
+    similar_images: List[SimilarImageResponse] = Field(default_factory=list, description="Existing issues with a near-duplicate photo")
+    similarity_score: Optional[float] = Field(None, description="Similarity of the closest matching photo (0-1)")
 
 
 class IssueCreateWithDeduplicationResponse(BaseModel):
@@ -170,6 +191,47 @@ class IssueCreateWithDeduplicationResponse(BaseModel):
     action_plan: Optional[ActionPlan] = Field(None, description="Generated action plan")
     deduplication_info: DeduplicationCheckResponse = Field(..., description="Deduplication check results")
     linked_issue_id: Optional[int] = Field(None, description="ID of existing issue that was upvoted (if applicable)")
+    action_plan_job_id: Optional[int] = Field(None, description="Job generating the action plan (see /api/jobs/{job_id})")
+
+
+class JobStatusResponse(BaseModel):
+    id: int = Field(..., description="Job ID")
+    kind: str = Field(..., description="Job type, e.g. 'action_plan'")
+    status: str = Field(..., description="'queued', 'running', 'succeeded' or 'dead'")
+    attempts: int = Field(..., description="Attempts made so far")
+    max_attempts: int = Field(..., description="Attempts before the job is dead-lettered")
+    last_error: Optional[str] = Field(None, description="Error of the last failed attempt")
+    run_after: Optional[datetime] = Field(None, description="Earliest time of the next attempt")
+    created_at: Optional[datetime] = Field(None, description="Job creation timestamp")
+    finished_at: Optional[datetime] = Field(None, description="Completion or dead-letter timestamp")
+
+
+class IssueClusterResponse(BaseModel):
+    cluster_id: int = Field(..., description="Persistent cluster ID")
+    size: int = Field(..., description="Number of active issues in the cluster")
+    centroid_latitude: float = Field(..., description="Cluster centroid latitude")
+    centroid_longitude: float = Field(..., description="Cluster centroid longitude")
+    representative: IssueSummaryResponse = Field(..., description="Most upvoted (then oldest) issue in the cluster")
+    issue_ids: List[int] = Field(default_factory=list, description="IDs of active issues in the cluster")
+
+
+class IntegrityProofStep(BaseModel):
+    hash: str = Field(..., description="Sibling hash (hex)")
+    position: str = Field(..., description="Side of the sibling: 'left' or 'right'")
+
+
+class IntegrityProofResponse(BaseModel):
+    issue_id: int = Field(..., description="Issue ID")
+    leaf_hash: Optional[str] = Field(None, description="Issue integrity hash used as the Merkle leaf")
+    content_verified: bool = Field(..., description="Whether the leaf hash matches the issue's current content")
+    sealed: bool = Field(..., description="Whether the issue has been sealed into a block yet")
+    block_id: Optional[int] = Field(None, description="ID of the block containing the issue")
+    leaf_index: Optional[int] = Field(None, description="Position of the issue within its block")
+    merkle_root: Optional[str] = Field(None, description="Merkle root of the block")
+    block_hash: Optional[str] = Field(None, description="Hash of the block header")
+    prev_block_hash: Optional[str] = Field(None, description="Hash of the previous block header")
+    proof: List[IntegrityProofStep] = Field(default_factory=list, description="Sibling hashes from leaf to root")
+    proof_verified: bool = Field(..., description="Whether the proof recomputes the block's Merkle root")
 
 
 class LeaderboardEntry(BaseModel):
@@ -0,0 +1,200 @@
+"""
+Similarity-keyed cache for Gemini responses.
+
+Exact-string caches miss on trivial rewordings ("how to report pothole?" vs
+"How do I report a pothole"), and every miss is a paid, multi-second Gemini
+call. Here texts are normalized (case, punctuation, filler words) and hashed
+into word unigram+bigram TF vectors with scikit-learn's HashingVectorizer -
+the same vectorizer family as the grievance classifier, but stateless, so
+nothing has to be fitted or persisted. A lookup returns the cached value of
+the most similar text if its cosine similarity reaches the cache threshold.
+A cache without a threshold only serves exact matches of the normalized text:
+action plans quote the description (place names included), and a one-word
+locality change in a long report barely moves the cosine.
+
+Entries are partitioned (per language, plus category for action plans) so a
+Hindi query is never answered with an English reply. Each partition keeps an
+inverted index from feature to entries, so a lookup only scores entries that
+share at least one term with the query. Entries expire after
+SEMANTIC_CACHE_TTL and the least recently used one is evicted once a cache
+holds SEMANTIC_CACHE_MAX_ENTRIES.
+"""
+import os
+import time
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from sklearn.feature_extraction.text import HashingVectorizer
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+SEMANTIC_CACHE_ENABLED = os.environ.get("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_TTL = int(os.environ.get("SEMANTIC_CACHE_TTL", "3600"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.environ.get("SEMANTIC_CACHE_MAX_ENTRIES", "512"))
+SEMANTIC_CACHE_CHAT_THRESHOLD = float(os.environ.get("SEMANTIC_CACHE_CHAT_THRESHOLD", "0.85"))
+
+# Words that change the phrasing but not the question
+_FILLER_WORDS = frozenset({
+    "a", "an", "the", "to", "do", "does", "did", "i", "me", "can", "could", "would",
+    "should", "please", "pls", "kindly", "is", "are", "am", "of", "in", "on", "for"
+})
+
+_vectorizer = HashingVectorizer(
+    analyzer="word", tokenizer=str.split, token_pattern=None, lowercase=False,
+    ngram_range=(1, 2), n_features=2 ** 20, alternate_sign=False, norm="l2"
+)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, replace punctuation and symbols with spaces, and drop filler words."""
+    text = unicodedata.normalize("NFKC", text).lower()
+    # Category-based rather than \w so Devanagari vowel signs survive
+    text = "".join(" " if unicodedata.category(ch)[0] in "PS" else ch for ch in text)
+    return " ".join(word for word in text.split() if word not in _FILLER_WORDS)
+
+
+def embed(normalized: str) -> Dict[int, float]:
+    """Sparse L2-normalized TF vector of a normalized text, as {feature: weight}."""
+    row = _vectorizer.transform([normalized])
+    return dict(zip(row.indices.tolist(), row.data.tolist()))
+
+
+class _Entry:
+    __slots__ = ("partition", "text", "vector", "value", "created")
+
+    def __init__(self, partition: Hashable, text: str, vector: Dict[int, float], value: Any):
+        self.partition = partition
+        self.text = text
+        self.vector = vector
+        self.value = value
+        self.created = time.time()
+
+
+class SemanticCache:
+    """
+    Thread-safe cache keyed by text similarity, with TTL, LRU size bound and partitions.
+    """
+
+    def __init__(self, name: str, threshold: Optional[float], ttl: int = SEMANTIC_CACHE_TTL,
+                 max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES, enabled: bool = SEMANTIC_CACHE_ENABLED):
+        self.name = name
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._lock = threading.RLock()
+        self._entries: OrderedDict = OrderedDict()  # (partition, text) -> _Entry, least recently used first
+        # partition -> feature -> keys of the entries containing it
+        self._postings: Dict[Hashable, Dict[int, set]] = {}
+        self._hits = 0
+        self._near_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, text: str, partition: Hashable = "en") -> Optional[Any]:
+        """
+        Cached value of the most similar text in the partition, or None below the threshold.
+        Without a threshold only an identical normalized text is a hit.
+        """
+        if not self.enabled:
+            return None
+        normalized = normalize_text(text)
+        if not normalized:
+            return None
+
+        with self._lock:
+            key = (partition, normalized)
+            entry = self._entries.get(key)
+            similarity = 1.0
+            if entry is None and self.threshold is not None:
+                entry, similarity = self._nearest(partition, embed(normalized))
+            if entry is not None and time.time() - entry.created >= self.ttl:
+                self._remove((entry.partition, entry.text))
+                self._expirations += 1
+                entry = None
+
+            if entry is None or (self.threshold is not None and similarity < self.threshold):
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end((entry.partition, entry.text))
+            self._hits += 1
+            if entry.text != normalized:
+                self._near_hits += 1
+                logger.debug(f"{self.name} cache near hit ({similarity:.2f}): '{normalized}' ~ '{entry.text}'")
+            return entry.value
+
+    def set(self, text: str, value: Any, partition: Hashable = "en") -> None:
+        if not self.enabled:
+            return
+        normalized = normalize_text(text)
+        if not normalized:
+            return
+        vector = embed(normalized)
+
+        with self._lock:
+            key = (partition, normalized)
+            if key in self._entries:
+                self._remove(key)
+            while self._entries and len(self._entries) >= self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+            self._entries[key] = _Entry(partition, normalized, vector, value)
+            postings = self._postings.setdefault(partition, {})
+            for feature in vector:
+                postings.setdefault(feature, set()).add(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._postings.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "partitions": len(self._postings),
+                "threshold": self.threshold,
+                "hits": self._hits,
+                "near_hits": self._near_hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+    def _nearest(self, partition: Hashable, vector: Dict[int, float]) -> Tuple[Optional[_Entry], float]:
+        """Highest cosine similarity entry; only entries sharing a feature are scored."""
+        postings = self._postings.get(partition)
+        if not postings:
+            return None, 0.0
+        scores: Dict[Tuple, float] = defaultdict(float)
+        for feature, weight in vector.items():
+            for key in postings.get(feature, ()):
+                scores[key] += weight * self._entries[key].vector[feature]
+        if not scores:
+            return None, 0.0
+        key = max(scores, key=scores.get)
+        return self._entries[key], scores[key]
+
+    def _remove(self, key: Tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        postings = self._postings.get(entry.partition, {})
+        for feature in entry.vector:
+            keys = postings.get(feature)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del postings[feature]
+        if not postings:
+            self._postings.pop(entry.partition, None)
@@ -0,0 +1,255 @@
+"""
+In-memory spatial index for active issues.
+
+Keeps a fixed-cell lat/lon grid of issues, keyed by status, so that radius
+queries (spatial deduplication and /api/issues/nearby) can be answered from
+process memory instead of running a bounding-box query against the database
+on every report.
+
+The index is warmed from the issues table on startup and updated incrementally
+whenever an issue is created, upvoted or changes status. Until it is warm,
+callers should fall back to the SQL + haversine path.
+
+Note: the index is process-local. With several workers, each worker keeps its
+own copy and only sees the writes it performed after its last warm-up.
+"""
+import os
+import math
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+from backend.spatial_utils import get_bounding_box, nearest_within_radius
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+SPATIAL_INDEX_ENABLED = os.environ.get("SPATIAL_INDEX_ENABLED", "true").lower() == "true"
+# ~0.005 degrees is roughly 550m of latitude, large enough that a 50-500m radius
+# query touches only a handful of cells.
+SPATIAL_INDEX_CELL_DEGREES = float(os.environ.get("SPATIAL_INDEX_CELL_DEGREES", "0.005"))
+
+# Statuses kept in memory. Resolved issues are never queried spatially, so they
+# are dropped from the index to keep memory bounded.
+INDEXED_STATUSES = ("open", "verified", "assigned", "in_progress")
+
+# Responses only ever show the first 100 characters (plus "..."), so we keep one
+# extra character to preserve the truncation check without storing full text.
+_DESCRIPTION_PREFIX_LENGTH = 101
+
+
+class IndexedIssue(NamedTuple):
+    """Lightweight snapshot of the issue columns needed for nearby-issue responses."""
+    id: int
+    description: str
+    category: str
+    latitude: float
+    longitude: float
+    upvotes: int
+    created_at: Optional[datetime]
+    status: str
+
+
+class SpatialIndex:
+    """
+    Thread-safe fixed-cell grid index of issues, partitioned by status.
+    """
+
+    def __init__(self, cell_degrees: float = SPATIAL_INDEX_CELL_DEGREES):
+        self._cell_degrees = cell_degrees
+        self._entries: Dict[int, IndexedIssue] = {}
+        self._cells: Dict[str, Dict[Tuple[int, int], Set[int]]] = {}
+        self._lock = threading.RLock()
+        self._warm = False
+
+    @property
+    def is_warm(self) -> bool:
+        """True once the index has been loaded from the database."""
+        return self._warm
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _cell_for(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (
+            int(math.floor(lat / self._cell_degrees)),
+            int(math.floor(lon / self._cell_degrees))
+        )
+
+    def _make_entry(self, row) -> Optional[IndexedIssue]:
+        if row.latitude is None or row.longitude is None:
+            return None
+        if row.status not in INDEXED_STATUSES:
+            return None
+        description = row.description or ""
+        return IndexedIssue(
+            id=row.id,
+            description=description[:_DESCRIPTION_PREFIX_LENGTH],
+            category=row.category,
+            latitude=row.latitude,
+            longitude=row.longitude,
+            upvotes=row.upvotes or 0,
+            created_at=row.created_at,
+            status=row.status
+        )
+
+    def _insert(self, entry: IndexedIssue) -> None:
+        """Must be called within lock context."""
+        self._entries[entry.id] = entry
+        cell = self._cell_for(entry.latitude, entry.longitude)
+        self._cells.setdefault(entry.status, {}).setdefault(cell, set()).add(entry.id)
+
+    def _discard(self, issue_id: int) -> Optional[IndexedIssue]:
+        """Must be called within lock context."""
+        entry = self._entries.pop(issue_id, None)
+        if entry is None:
+            return None
+        status_cells = self._cells.get(entry.status, {})
+        cell = self._cell_for(entry.latitude, entry.longitude)
+        ids = status_cells.get(cell)
+        if ids is not None:
+            ids.discard(issue_id)
+            if not ids:
+                del status_cells[cell]
+        return entry
+
+    def load(self, rows) -> None:
+        """
+        Replace the index contents with the given rows and mark it warm.
+
+        Args:
+            rows: Iterable of objects exposing the IndexedIssue attributes
+                  (ORM instances or projected query rows)
+        """
+        entries = [entry for entry in (self._make_entry(row) for row in rows) if entry is not None]
+        with self._lock:
+            self._entries = {}
+            self._cells = {}
+            for entry in entries:
+                self._insert(entry)
+            self._warm = True
+        logger.info(f"Spatial index warmed with {len(entries)} issues")
+
+    def reset(self) -> None:
+        """Drop all entries and mark the index cold."""
+        with self._lock:
+            self._entries = {}
+            self._cells = {}
+            self._warm = False
+
+    def upsert(self, row) -> None:
+        """Add or replace a single issue. Issues without coordinates or with an unindexed status are removed."""
+        entry = self._make_entry(row)
+        with self._lock:
+            self._discard(row.id)
+            if entry is not None:
+                self._insert(entry)
+
+    def remove(self, issue_id: int) -> None:
+        """Remove an issue from the index if present."""
+        with self._lock:
+            self._discard(issue_id)
+
+    def update_status(self, issue_id: int, status: str) -> None:
+        """Move an issue to a different status partition (or drop it if the status is not indexed)."""
+        with self._lock:
+            entry = self._discard(issue_id)
+            if entry is not None and status in INDEXED_STATUSES:
+                self._insert(entry._replace(status=status))
+
+    def increment_upvotes(self, issue_id: int, amount: int = 1) -> None:
+        """Apply an upvote delta to an indexed issue."""
+        with self._lock:
+            entry = self._entries.get(issue_id)
+            if entry is not None:
+                self._entries[issue_id] = entry._replace(upvotes=entry.upvotes + amount)
+
+    def get(self, issue_id: int) -> Optional[IndexedIssue]:
+        with self._lock:
+            return self._entries.get(issue_id)
+
+    def query_radius(
+        self,
+        lat: float,
+        lon: float,
+        radius_meters: float,
+        status: str = "open",
+        limit: Optional[int] = None
+    ) -> List[Tuple[IndexedIssue, float]]:
+        """
+        Find indexed issues with the given status within a radius.
+
+        Args:
+            lat: Target latitude
+            lon: Target longitude
+            radius_meters: Search radius in meters
+            status: Status partition to search (default "open")
+            limit: Optional maximum number of results
+
+        Returns:
+            List of tuples (issue, distance_meters), closest first
+        """
+        min_lat, max_lat, min_lon, max_lon = get_bounding_box(lat, lon, radius_meters)
+        min_cell_lat, min_cell_lon = self._cell_for(min_lat, min_lon)
+        max_cell_lat, max_cell_lon = self._cell_for(max_lat, max_lon)
+
+        with self._lock:
+            status_cells = self._cells.get(status)
+            if not status_cells:
+                return []
+            candidates = []
+            for cell_lat in range(min_cell_lat, max_cell_lat + 1):
+                for cell_lon in range(min_cell_lon, max_cell_lon + 1):
+                    ids = status_cells.get((cell_lat, cell_lon))
+                    if ids:
+                        candidates.extend(self._entries[issue_id] for issue_id in ids)
+
+        if not candidates:
+            return []
+
+        count = len(candidates)
+        lats = np.fromiter((entry.latitude for entry in candidates), dtype=np.float64, count=count)
+        lons = np.fromiter((entry.longitude for entry in candidates), dtype=np.float64, count=count)
+        indices, distances = nearest_within_radius(lat, lon, lats, lons, radius_meters, limit=limit)
+
+        return [
+            (candidates[i], distance)
+            for i, distance in zip(indices.tolist(), distances.tolist())
+        ]
+
+
+def warm_spatial_index(index: Optional[SpatialIndex] = None) -> None:
+    """
+    Load all indexed issues from the database into the spatial index.
+    Blocking; run in a threadpool from async code.
+    """
+    from backend.database import SessionLocal
+    from backend.models import Issue
+
+    index = index or spatial_index
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            Issue.id,
+            Issue.description,
+            Issue.category,
+            Issue.latitude,
+            Issue.longitude,
+            Issue.upvotes,
+            Issue.created_at,
+            Issue.status
+        ).filter(
+            Issue.status.in_(INDEXED_STATUSES),
+            Issue.latitude.isnot(None),
+            Issue.longitude.isnot(None)
+        ).yield_per(5000)
+        index.load(rows)
+    finally:
+        db.close()
+
+
+# Global process-wide index
+spatial_index = SpatialIndex()
@@ -56,11 +56,76 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     return R * c
 
 
+def haversine_distances(lat: float, lon: float, lats, lons) -> np.ndarray:
+    """
+    Vectorized Haversine distance from one point to many points.
+
+    Args:
+        lat: Origin latitude in decimal degrees
+        lon: Origin longitude in decimal degrees
+        lats: Array-like of candidate latitudes
+        lons: Array-like of candidate longitudes
+
+    Returns:
+        NumPy array of distances in meters, aligned with the inputs
+    """
+    R = 6371000.0  # Earth's radius in meters
+
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+
+    phi1 = math.radians(lat)
+    phi2 = np.radians(lats)
+    dphi = np.radians(lats - lat)
+    dlambda = np.radians(lons - lon)
+
+    a = np.sin(dphi / 2)**2 + math.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    return R * c
+
+
+def nearest_within_radius(
+    lat: float,
+    lon: float,
+    lats,
+    lons,
+    radius_meters: float,
+    limit: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Select candidates within a radius and sort them by distance in a single NumPy pass.
+
+    Args:
+        lat: Target latitude
+        lon: Target longitude
+        lats: Array-like of candidate latitudes
+        lons: Array-like of candidate longitudes
+        radius_meters: Search radius in meters
+        limit: Optional top-k; only the k closest candidates are returned
+
+    Returns:
+        Tuple (indices, distances) of the matching candidates, closest first
+    """
+    distances = haversine_distances(lat, lon, lats, lons)
+    indices = np.flatnonzero(distances <= radius_meters)
+    matched = distances[indices]
+
+    # Partial selection keeps the cost O(n) when only the closest few are needed
+    if limit is not None and 0 < limit < len(indices):
+        top_k = np.argpartition(matched, limit - 1)[:limit]
+        indices, matched = indices[top_k], matched[top_k]
+
+    order = np.argsort(matched, kind="stable")
+    return indices[order], matched[order]
+
+
 def find_nearby_issues(
     issues: List[Issue],
     target_lat: float,
     target_lon: float,
-    radius_meters: float = 50.0
+    radius_meters: float = 50.0,
+    limit: Optional[int] = None
 ) -> List[Tuple[Issue, float]]:
     """
     Find issues within a specified radius of a target location.
@@ -70,28 +135,32 @@ def find_nearby_issues(
         target_lat: Target latitude
         target_lon: Target longitude
         radius_meters: Search radius in meters (default 50m)
+        limit: Optional maximum number of results (closest first)
 
     Returns:
         List of tuples (issue, distance_meters) for issues within radius
     """
-    nearby_issues = []
-
-    for issue in issues:
-        if issue.latitude is None or issue.longitude is None:
-            continue
+    valid_issues = [
+        issue for issue in issues
+        if issue.latitude is not None and issue.longitude is not None
+    ]
 
-        distance = haversine_distance(
-            target_lat, target_lon,
-            issue.latitude, issue.longitude
-        )
+    if not valid_issues:
+        return []
 
-        if distance <= radius_meters:
-            nearby_issues.append((issue, distance))
+    count = len(valid_issues)
+    lats = np.fromiter((issue.latitude for issue in valid_issues), dtype=np.float64, count=count)
+    lons = np.fromiter((issue.longitude for issue in valid_issues), dtype=np.float64, count=count)
 
-    # Sort by distance (closest first)
-    nearby_issues.sort(key=lambda x: x[1])
+    indices, distances = nearest_within_radius(
+        target_lat, target_lon, lats, lons, radius_meters, limit=limit
+    )
 
-    return nearby_issues
+    # Sorted by distance (closest first)
+    return [
+        (valid_issues[i], distance)
+        for i, distance in zip(indices.tolist(), distances.tolist())
+    ]
 
 
 def cluster_issues_dbscan(issues: List[Issue], eps_meters: float = 30.0) -> List[List[Issue]]:
@@ -120,13 +189,11 @@ def cluster_issues_dbscan(issues: List[Issue], eps_meters: float = 30.0) -> List
         [issue.latitude, issue.longitude] for issue in valid_issues
     ])
 
-    # Convert eps from meters to degrees (approximate)
-    # 1 degree latitude ≈ 111,000 meters
-    # 1 degree longitude ≈ 111,000 * cos(latitude) meters
-    eps_degrees = eps_meters / 111000  # Rough approximation
+    # The haversine metric works on radians, so eps must be an angular distance
+    eps_radians = eps_meters / 6371000.0  # Earth's radius in meters
 
     # Perform DBSCAN clustering
-    db = DBSCAN(eps=eps_degrees, min_samples=1, metric='haversine').fit(
+    db = DBSCAN(eps=eps_radians, min_samples=1, metric='haversine').fit(
         np.radians(coordinates)
     )
 
@@ -182,7 +249,10 @@ def calculate_cluster_centroid(cluster: List[Issue]) -> Tuple[float, float]:
     if not valid_issues:
         raise ValueError("No valid coordinates in cluster")
 
-    avg_lat = sum(issue.latitude for issue in valid_issues) / len(valid_issues)
-    avg_lon = sum(issue.longitude for issue in valid_issues) / len(valid_issues)
+    coordinates = np.array(
+        [(issue.latitude, issue.longitude) for issue in valid_issues],
+        dtype=np.float64
+    )
+    avg_lat, avg_lon = coordinates.mean(axis=0)
 
-    return avg_lat, avg_lon
+    return float(avg_lat), float(avg_lon)
@@ -1,32 +1,86 @@
 import logging
 import json
 import os
+from typing import List, Optional
 from pywebpush import webpush, WebPushException
 from backend.database import SessionLocal
 from backend.models import Issue, PushSubscription
-from backend.cache import recent_issues_cache
-from backend.ai_service import generate_action_plan, build_x_post
+from backend.cache import recent_issues_cache, issue_tag
+from backend.ai_service import generate_action_plan, generate_action_plans_batch, build_x_post
 from backend.grievance_service import GrievanceService
 from backend.schemas import IssueSummaryResponse
+from backend.clustering_service import cluster_service
 
 logger = logging.getLogger(__name__)
 
-async def process_action_plan_background(issue_id: int, description: str, category: str, language: str, image_path: str):
+ACTION_PLAN_JOB = "action_plan"
+
+async def generate_action_plans_job(payloads: List[dict]) -> List[Optional[Exception]]:
+    """
+    Batch job handler: generate action plans for up to ACTION_PLAN_BATCH_SIZE
+    issues and store them. Several pending issues share one Gemini prompt; a
+    single issue keeps the per-issue prompt. Returns one outcome per payload
+    (None or the exception); the job queue owns retries and dead-lettering.
+    """
+    issue_ids = [payload["issue_id"] for payload in payloads]
     db = SessionLocal()
     try:
-        # Generate Action Plan (AI)
-        action_plan = await generate_action_plan(description, category, language, image_path)
+        existing = {row.id for row in db.query(Issue.id).filter(Issue.id.in_(issue_ids)).all()}
+    finally:
+        db.close()
+
+    pending = [payload for payload in payloads if payload["issue_id"] in existing]
+    for issue_id in set(issue_ids) - existing:
+        logger.warning(f"Issue {issue_id} no longer exists, skipping action plan")
+
+    # One Gemini attempt per job attempt; the queue retries with backoff without holding a worker
+    if len(pending) == 1:
+        payload = pending[0]
+        try:
+            plans = [await generate_action_plan(
+                payload["description"], payload["category"], payload.get("language", "en"),
+                payload.get("image_path"), max_retries=0
+            )]
+        except Exception as e:
+            plans = [e]
+    elif pending:
+        try:
+            plans = await generate_action_plans_batch(pending, max_retries=0)
+        except Exception as e:
+            plans = [e] * len(pending)
+    else:
+        plans = []
+
+    outcomes = {payload["issue_id"]: plan for payload, plan in zip(pending, plans)}
+    db = SessionLocal()
+    try:
+        for issue in db.query(Issue).filter(Issue.id.in_([
+            issue_id for issue_id, plan in outcomes.items() if not isinstance(plan, Exception)
+        ])).all():
+            issue.action_plan = outcomes[issue.id]
+        db.commit()
+    finally:
+        db.close()
+
+    for issue_id, plan in outcomes.items():
+        if not isinstance(plan, Exception):
+            # Invalidate only cached responses that include this issue
+            recent_issues_cache.invalidate_tags(issue_tag(issue_id))
+
+    return [
+        outcomes[issue_id] if isinstance(outcomes.get(issue_id), Exception) else None
+        for issue_id in issue_ids
+    ]
 
-        # Update issue in DB
+def assign_issue_cluster_background(issue_id: int):
+    """Background task to place a new issue into a spatial cluster"""
+    db = SessionLocal()
+    try:
         issue = db.query(Issue).filter(Issue.id == issue_id).first()
         if issue:
-            issue.action_plan = action_plan
-            db.commit()
-
-            # Invalidate cache to ensure users get the updated action plan
-            recent_issues_cache.clear()
+            cluster_service.assign_issue(db, issue)
     except Exception as e:
-        logger.error(f"Background action plan generation failed for issue {issue_id}: {e}", exc_info=True)
+        logger.error(f"Cluster assignment failed for issue {issue_id}: {e}", exc_info=True)
     finally:
         db.close()
 
@@ -39,9 +39,13 @@ with patch("backend.main.create_all_ai_services") as mock_create_ai:
     mock_create_ai.return_value = (mock_action, mock_chat, mock_summary)
     from backend.main import app
 
+from backend.detection_cache import detection_cache
+
 @pytest.fixture
 def client():
     mock_client = AsyncMock()
+    # Tests reuse the same image with different mocked responses
+    detection_cache.clear()
     # Patch get_http_client in detection router to return our mock
     with patch("backend.routers.detection.get_http_client", return_value=mock_client):
          with TestClient(app) as c:
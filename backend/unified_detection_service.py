@@ -10,11 +10,16 @@ Issue #76: Create a Local Machine Learning model
 
 import os
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence, Union
 from PIL import Image
 from enum import Enum
 
 from backend.exceptions import DetectionException, ServiceUnavailableException
+from backend.hf_client import hf_client
+from backend.hf_service import API_URL as HF_DETECTION_API_URL
+from backend.image_envelope import ImageEnvelope
+from backend.local_ml_service import DETECTION_CATEGORIES
+from backend.local_clip_service import USE_LOCAL_CLIP
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -27,8 +32,9 @@ ENABLE_HF_FALLBACK = os.environ.get("ENABLE_HF_FALLBACK", "true").lower() == "tr
 class DetectionBackend(Enum):
     """Available detection backends."""
     LOCAL = "local"
+    LOCAL_CLIP = "local_clip"  # In-process CLIP zero-shot (USE_LOCAL_CLIP)
     HUGGINGFACE = "huggingface"
-    AUTO = "auto"  # Try local first, fallback to HF
+    AUTO = "auto"  # Try local first, then local CLIP, fallback to HF
 
 
 class UnifiedDetectionService:
@@ -45,6 +51,7 @@ class UnifiedDetectionService:
     def __init__(self, backend: DetectionBackend = DetectionBackend.AUTO):
         self.backend = backend
         self._local_available = None
+        self._local_clip_available = None
         self._hf_available = None
     
     async def _check_local_available(self) -> bool:
@@ -53,7 +60,20 @@ class UnifiedDetectionService:
             return self._local_available
         
         try:
-            from local_ml_service import get_general_model
+            # Already loaded and warmed up by the startup preload
+            from backend.model_registry import model_registry, ModelState
+            if model_registry.get_state("general") == ModelState.READY:
+                self._local_available = True
+                return True
+
+            from backend.inference_pool import inference_pool
+            if inference_pool.enabled:
+                # The model lives in the worker processes; ask one of them
+                health = await inference_pool.health_check(timeout=inference_pool.task_timeout)
+                self._local_available = health["healthy"] and "general" in health["worker"]["models"]
+                return self._local_available
+
+            from backend.local_ml_service import get_general_model
             model = get_general_model()
             
             # Check if model is loaded
@@ -75,43 +95,82 @@ class UnifiedDetectionService:
             self._local_available = False
             return False
     
+    async def _check_local_clip_available(self) -> bool:
+        """Check if the local CLIP engine is loaded (or can be)."""
+        if self._local_clip_available is not None:
+            return self._local_clip_available
+
+        from backend.local_clip_service import local_clip_engine
+        if local_clip_engine.is_loaded:
+            self._local_clip_available = True
+            return True
+
+        try:
+            from fastapi.concurrency import run_in_threadpool
+            await run_in_threadpool(local_clip_engine.load)
+            self._local_clip_available = True
+        except Exception as e:
+            logger.warning(f"Local CLIP engine unavailable: {e}")
+            self._local_clip_available = False
+        return self._local_clip_available
+
     async def _check_hf_available(self) -> bool:
         """Check if Hugging Face API is available."""
         if self._hf_available is not None:
-            return self._hf_available
+            return self._hf_available and not hf_client.is_open(HF_DETECTION_API_URL)
         
         try:
             # HF token present indicates API might be available
             token = os.environ.get("HF_TOKEN")
             self._hf_available = True  # Assume available, actual call will verify
-            return self._hf_available
         except Exception:
             self._hf_available = False
             return False
+
+        # Fail fast while the circuit breaker has the API marked as down
+        return self._hf_available and not hf_client.is_open(HF_DETECTION_API_URL)
+
+    async def _local_fallback_backend(self) -> Optional[str]:
+        """Local backend to use while the HF circuit breaker is open, if any."""
+        if await self._check_local_available():
+            return "local"
+        from backend.local_clip_service import local_clip_engine
+        if local_clip_engine.is_loaded:
+            return "local_clip"
+        return None
     
     async def _get_detection_backend(self) -> str:
         """Determine which backend to use based on configuration and availability."""
         if self.backend == DetectionBackend.LOCAL:
             return "local" if await self._check_local_available() else None
         
+        elif self.backend == DetectionBackend.LOCAL_CLIP:
+            return "local_clip" if await self._check_local_clip_available() else None
+
         elif self.backend == DetectionBackend.HUGGINGFACE:
-            return "huggingface" if await self._check_hf_available() else None
+            if await self._check_hf_available():
+                return "huggingface"
+            return await self._local_fallback_backend() if hf_client.is_open(HF_DETECTION_API_URL) else None
         
         else:  # AUTO
             if USE_LOCAL_MODEL and await self._check_local_available():
                 return "local"
+            elif USE_LOCAL_CLIP and await self._check_local_clip_available():
+                return "local_clip"
             elif ENABLE_HF_FALLBACK and await self._check_hf_available():
                 logger.info("Falling back to Hugging Face API")
                 return "huggingface"
+            elif ENABLE_HF_FALLBACK and hf_client.is_open(HF_DETECTION_API_URL):
+                return await self._local_fallback_backend()
             else:
                 return None
     
-    async def detect_vandalism(self, image: Image.Image) -> List[Dict]:
+    async def detect_vandalism(self, image: Union[Image.Image, ImageEnvelope]) -> List[Dict]:
         """
         Detect vandalism in an image.
         
         Args:
-            image: PIL Image to analyze
+            image: PIL Image or ImageEnvelope to analyze
             
         Returns:
             List of detections with 'label', 'confidence', and 'box' keys
@@ -123,23 +182,27 @@ class UnifiedDetectionService:
         backend = await self._get_detection_backend()
         
         if backend == "local":
-            from local_ml_service import detect_vandalism_local
+            from backend.local_ml_service import detect_vandalism_local
             return await detect_vandalism_local(image)
+
+        elif backend == "local_clip":
+            from backend.local_clip_service import detect_category_local_clip
+            return await detect_category_local_clip(image, "vandalism")
         
         elif backend == "huggingface":
-            from hf_service import detect_vandalism_clip
+            from backend.hf_service import detect_vandalism_clip
             return await detect_vandalism_clip(image)
         
         else:
             logger.error("No detection backend available")
             raise ServiceUnavailableException("Detection service", details={"detection_type": "vandalism"})
     
-    async def detect_infrastructure(self, image: Image.Image) -> List[Dict]:
+    async def detect_infrastructure(self, image: Union[Image.Image, ImageEnvelope]) -> List[Dict]:
         """
         Detect infrastructure damage in an image.
         
         Args:
-            image: PIL Image to analyze
+            image: PIL Image or ImageEnvelope to analyze
             
         Returns:
             List of detections with 'label', 'confidence', and 'box' keys
@@ -151,23 +214,27 @@ class UnifiedDetectionService:
         backend = await self._get_detection_backend()
         
         if backend == "local":
-            from local_ml_service import detect_infrastructure_local
+            from backend.local_ml_service import detect_infrastructure_local
             return await detect_infrastructure_local(image)
+
+        elif backend == "local_clip":
+            from backend.local_clip_service import detect_category_local_clip
+            return await detect_category_local_clip(image, "infrastructure")
         
         elif backend == "huggingface":
-            from hf_service import detect_infrastructure_clip
+            from backend.hf_service import detect_infrastructure_clip
             return await detect_infrastructure_clip(image)
         
         else:
             logger.error("No detection backend available")
             raise ServiceUnavailableException("Detection service", details={"detection_type": "infrastructure"})
     
-    async def detect_flooding(self, image: Image.Image) -> List[Dict]:
+    async def detect_flooding(self, image: Union[Image.Image, ImageEnvelope]) -> List[Dict]:
         """
         Detect flooding/waterlogging in an image.
         
         Args:
-            image: PIL Image to analyze
+            image: PIL Image or ImageEnvelope to analyze
             
         Returns:
             List of detections with 'label', 'confidence', and 'box' keys
@@ -179,23 +246,27 @@ class UnifiedDetectionService:
         backend = await self._get_detection_backend()
         
         if backend == "local":
-            from local_ml_service import detect_flooding_local
+            from backend.local_ml_service import detect_flooding_local
             return await detect_flooding_local(image)
+
+        elif backend == "local_clip":
+            from backend.local_clip_service import detect_category_local_clip
+            return await detect_category_local_clip(image, "flooding")
         
         elif backend == "huggingface":
-            from hf_service import detect_flooding_clip
+            from backend.hf_service import detect_flooding_clip
             return await detect_flooding_clip(image)
         
         else:
             logger.error("No detection backend available")
             raise ServiceUnavailableException("Detection service", details={"detection_type": "flooding"})
 
-    async def detect_garbage(self, image: Image.Image) -> List[Dict]:
+    async def detect_garbage(self, image: Union[Image.Image, ImageEnvelope]) -> List[Dict]:
         """
         Detect garbage/waste in an image.
 
         Args:
-            image: PIL Image to analyze
+            image: PIL Image or ImageEnvelope to analyze
 
         Returns:
             List of detections with 'label', 'confidence', and 'box' keys.
@@ -211,7 +282,8 @@ class UnifiedDetectionService:
             from fastapi.concurrency import run_in_threadpool
             return await run_in_threadpool(detect_garbage, image)
 
-        elif backend == "huggingface":
+        elif backend in ("local_clip", "huggingface"):
+            # detect_waste_clip classifies with the local CLIP engine when it is loaded
             from backend.hf_api_service import detect_waste_clip
             result = await detect_waste_clip(image)
 
@@ -228,31 +300,71 @@ class UnifiedDetectionService:
             logger.error("No detection backend available")
             raise ServiceUnavailableException("Detection service", details={"detection_type": "garbage"})
     
-    async def detect_all(self, image: Image.Image) -> Dict[str, List[Dict]]:
+    async def detect_all(self, image: Union[Image.Image, ImageEnvelope]) -> Dict[str, List[Dict]]:
         """
         Run all detection types on an image.
         
         Args:
-            image: PIL Image to analyze
+            image: PIL Image or ImageEnvelope to analyze
             
         Returns:
             Dictionary mapping detection type to list of results
         """
         import asyncio
 
-        results = await asyncio.gather(
-            self.detect_vandalism(image),
-            self.detect_infrastructure(image),
-            self.detect_flooding(image),
+        # Vandalism, infrastructure and flooding share one forward pass
+        multi, garbage = await asyncio.gather(
+            self.detect_multi(image),
             self.detect_garbage(image)
         )
 
-        return {
-            "vandalism": results[0],
-            "infrastructure": results[1],
-            "flooding": results[2],
-            "garbage": results[3]
-        }
+        return {**multi, "garbage": garbage}
+
+    async def detect_multi(self, image: Union[Image.Image, ImageEnvelope],
+                           categories: Sequence[str] = DETECTION_CATEGORIES) -> Dict[str, List[Dict]]:
+        """
+        Detect several categories from a single inference.
+
+        With the local backend the general model runs once and each category is
+        derived from its boxes; the local CLIP backend computes one image
+        embedding; with the HF backend each category is still one CLIP call,
+        run concurrently.
+
+        Args:
+            image: PIL Image or ImageEnvelope to analyze
+            categories: Subset of "vandalism", "infrastructure", "flooding"
+
+        Returns:
+            Dictionary mapping category to list of detections
+
+        Raises:
+            ServiceUnavailableException: If no detection backend is available
+            DetectionException: If detection fails
+        """
+        backend = await self._get_detection_backend()
+
+        if backend == "local":
+            from backend.local_ml_service import detect_multi_local
+            return await detect_multi_local(image, categories)
+
+        elif backend == "local_clip":
+            # All categories are scored against one image embedding
+            from backend.local_clip_service import detect_multi_local_clip
+            return await detect_multi_local_clip(image, categories)
+
+        elif backend == "huggingface":
+            import asyncio
+            detectors = {
+                "vandalism": self.detect_vandalism,
+                "infrastructure": self.detect_infrastructure,
+                "flooding": self.detect_flooding
+            }
+            results = await asyncio.gather(*(detectors[category](image) for category in categories))
+            return dict(zip(categories, results))
+
+        else:
+            logger.error("No detection backend available")
+            raise ServiceUnavailableException("Detection service", details={"detection_type": "multi"})
     
     async def get_status(self) -> Dict:
         """
@@ -263,6 +375,9 @@ class UnifiedDetectionService:
         """
         local_available = await self._check_local_available()
         hf_available = await self._check_hf_available()
+
+        from backend.local_clip_service import local_clip_engine
+        local_clip_available = local_clip_engine.is_loaded or (USE_LOCAL_CLIP and await self._check_local_clip_available())
         
         status = {
             "use_local_model": USE_LOCAL_MODEL,
@@ -271,9 +386,17 @@ class UnifiedDetectionService:
                 "available": local_available,
                 "status": "ready" if local_available else "unavailable"
             },
+            "local_clip_backend": {
+                "enabled": USE_LOCAL_CLIP,
+                "available": local_clip_available,
+                "status": "ready" if local_clip_available else "unavailable",
+                "details": local_clip_engine.get_stats()
+            },
             "huggingface_backend": {
                 "available": hf_available,
-                "status": "ready" if hf_available else "unavailable"
+                "status": "ready" if hf_available else (
+                    "circuit_open" if hf_client.is_open(HF_DETECTION_API_URL) else "unavailable"
+                )
             },
             "active_backend": await self._get_detection_backend()
         }
@@ -281,7 +404,7 @@ class UnifiedDetectionService:
         # Add local model details if available
         if local_available:
             try:
-                from local_ml_service import get_detection_status
+                from backend.local_ml_service import get_detection_status
                 status["local_backend"]["details"] = await get_detection_status()
             except Exception:
                 pass
@@ -302,27 +425,33 @@ def get_detection_service() -> UnifiedDetectionService:
 
 
 # Convenience functions that use the default service
-async def detect_vandalism(image: Image.Image) -> List[Dict]:
+async def detect_vandalism(image: Union[Image.Image, ImageEnvelope]) -> List[Dict]:
     """Detect vandalism using the default service."""
     return await get_detection_service().detect_vandalism(image)
 
 
-async def detect_infrastructure(image: Image.Image) -> List[Dict]:
+async def detect_infrastructure(image: Union[Image.Image, ImageEnvelope]) -> List[Dict]:
     """Detect infrastructure damage using the default service."""
     return await get_detection_service().detect_infrastructure(image)
 
 
-async def detect_flooding(image: Image.Image) -> List[Dict]:
+async def detect_flooding(image: Union[Image.Image, ImageEnvelope]) -> List[Dict]:
     """Detect flooding using the default service."""
     return await get_detection_service().detect_flooding(image)
 
 
-async def detect_garbage(image: Image.Image) -> List[Dict]:
+async def detect_garbage(image: Union[Image.Image, ImageEnvelope]) -> List[Dict]:
     """Detect garbage using the default service."""
     return await get_detection_service().detect_garbage(image)
 
 
-async def detect_all(image: Image.Image) -> Dict[str, List[Dict]]:
+async def detect_multi(image: Union[Image.Image, ImageEnvelope],
+                       categories: Sequence[str] = DETECTION_CATEGORIES) -> Dict[str, List[Dict]]:
+    """Detect several categories from one inference using the default service."""
+    return await get_detection_service().detect_multi(image, categories)
+
+
+async def detect_all(image: Union[Image.Image, ImageEnvelope]) -> Dict[str, List[Dict]]:
     """Run all detections using the default service."""
     return await get_detection_service().detect_all(image)
 
@@ -1,18 +1,20 @@
 from fastapi import UploadFile, HTTPException
 from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
 from PIL import Image
 import os
 import shutil
 import logging
 import io
 import magic
-from typing import Optional
+from typing import Optional, Union
 
-from backend.cache import user_upload_cache
+from backend.rate_limiter import upload_rate_limiter
+from backend.image_envelope import ImageEnvelope, decode_image_envelope
+from backend.detection_cache import detection_cache
 from backend.models import Issue
 from backend.schemas import DetectionResponse
+from backend.exceptions import InferencePoolBusyException
 from backend.pothole_detection import validate_image_for_processing
 
 logger = logging.getLogger(__name__)
@@ -32,31 +34,25 @@ ALLOWED_MIME_TYPES = {
 UPLOAD_LIMIT_PER_USER = 5
 UPLOAD_LIMIT_PER_IP = 10
 
+# Where report photos and their thumbnails are stored
+UPLOAD_DIR = "data/uploads"
+
 def check_upload_limits(identifier: str, limit: int) -> None:
     """
-    Check if the user/IP has exceeded upload limits using thread-safe cache.
+    Check if the user/IP has exceeded upload limits (sliding one-hour window).
+    The check and the increment are atomic in the rate limiter backend.
     """
-    current_uploads = user_upload_cache.get(identifier) or []
-    now = datetime.now()
-    one_hour_ago = now - timedelta(hours=1)
-
-    # Filter out old timestamps (older than 1 hour)
-    recent_uploads = [ts for ts in current_uploads if ts > one_hour_ago]
+    upload_rate_limiter.check(
+        identifier,
+        limit=limit,
+        detail=f"Upload limit exceeded. Maximum {limit} uploads per hour allowed."
+    )
 
-    if len(recent_uploads) >= limit:
-        raise HTTPException(
-            status_code=429,
-            detail=f"Upload limit exceeded. Maximum {limit} uploads per hour allowed."
-        )
-
-    # Add current timestamp and update cache atomically
-    recent_uploads.append(now)
-    user_upload_cache.set(recent_uploads, identifier)
-
-def _validate_uploaded_file_sync(file: UploadFile) -> Optional[Image.Image]:
+def _validate_uploaded_file_sync(file: UploadFile) -> ImageEnvelope:
     """
     Synchronous validation logic to be run in a threadpool.
-    Returns the PIL Image if it was opened/processed, or None.
+    Reads and decodes the upload exactly once and returns it as an ImageEnvelope
+    (resized, EXIF stripped). The uploaded file itself is left unchanged.
     """
     # Check file size
     file.file.seek(0, 2)  # Seek to end
@@ -83,38 +79,10 @@ def _validate_uploaded_file_sync(file: UploadFile) -> Optional[Image.Image]:
                 detail=f"Invalid file type. Only image files are allowed. Detected: {detected_mime}"
             )
 
-        # Additional content validation: Try to open with PIL to ensure it's a valid image
+        # Content validation: the single decode doubles as the integrity check.
+        # Decoded straight from the (spooled) upload file, so large files are never read into memory whole
         try:
-            img = Image.open(file.file)
-            # Optimization: Skip img.verify() to avoid full file read.
-            # Corrupt files will fail during resize or subsequent processing.
-
-            # Resize large images for better performance
-            if img.width > 1024 or img.height > 1024:
-                # Calculate new size maintaining aspect ratio
-                ratio = min(1024 / img.width, 1024 / img.height)
-                new_width = int(img.width * ratio)
-                new_height = int(img.height * ratio)
-
-                # Use BILINEAR for faster resizing (LANCZOS is too slow for upload path)
-                img = img.resize((new_width, new_height), Image.Resampling.BILINEAR)
-
-                # Save resized image back to file
-                output = io.BytesIO()
-                img.save(output, format=img.format or 'JPEG', quality=85)
-                output.seek(0)
-
-                # Replace file content
-                file.file = output
-                file.size = output.tell()
-                output.seek(0)
-
-            # Return the image object (resized or original)
-            # Ensure file pointer is at start for any subsequent reads from file.file
-            file.file.seek(0)
-
-            return img
-
+            return decode_image_envelope(file.file)
         except Exception as pil_error:
             logger.error(f"PIL validation failed for {file.filename}: {pil_error}")
             raise HTTPException(
@@ -131,100 +99,59 @@ def _validate_uploaded_file_sync(file: UploadFile) -> Optional[Image.Image]:
             detail="Unable to validate file content. Please ensure it's a valid image file."
         )
 
-async def validate_uploaded_file(file: UploadFile) -> Optional[Image.Image]:
+async def validate_uploaded_file(file: UploadFile) -> ImageEnvelope:
     """
     Validate uploaded file for security and safety (async wrapper).
-    Returns the PIL Image if it was opened/processed, or None.
+    Returns the decoded ImageEnvelope; its JPEG bytes are encoded lazily.
     """
     return await run_in_threadpool(_validate_uploaded_file_sync, file)
 
-def process_uploaded_image_sync(file: UploadFile) -> io.BytesIO:
+def process_uploaded_image_sync(file: UploadFile) -> ImageEnvelope:
     """
     Synchronously validate, resize, and strip EXIF from uploaded image.
-    Returns the processed image data as BytesIO.
+    Returns the ImageEnvelope with its normalized JPEG bytes already encoded,
+    so callers that need bytes (storage, HF API) never encode on the event loop.
     """
-    # Check file size
-    file.file.seek(0, 2)
-    file_size = file.file.tell()
-    file.file.seek(0)
-
-    if file_size > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=413,
-            detail=f"File too large. Maximum size allowed is {MAX_FILE_SIZE // (1024*1024)}MB"
-        )
-
-    # Check MIME type
-    try:
-        file_content = file.file.read(1024)
-        file.file.seek(0)
-        detected_mime = magic.from_buffer(file_content, mime=True)
-
-        if detected_mime not in ALLOWED_MIME_TYPES:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid file type. Only image files are allowed. Detected: {detected_mime}"
-            )
-
-        try:
-            img = Image.open(file.file)
-
-            # Resize if needed
-            if img.width > 1024 or img.height > 1024:
-                ratio = min(1024 / img.width, 1024 / img.height)
-                new_width = int(img.width * ratio)
-                new_height = int(img.height * ratio)
-                img = img.resize((new_width, new_height), Image.Resampling.BILINEAR)
+    envelope = _validate_uploaded_file_sync(file)
+    envelope.jpeg_bytes  # Encode once, here in the threadpool
+    return envelope
 
-            # Strip EXIF
-            img_no_exif = Image.new(img.mode, img.size)
-            img_no_exif.paste(img)
-
-            # Save to BytesIO
-            output = io.BytesIO()
-            # Preserve format or default to JPEG
-            fmt = img.format or 'JPEG'
-            img_no_exif.save(output, format=fmt, quality=85)
-            output.seek(0)
-
-            return output
-
-        except Exception as pil_error:
-            logger.error(f"PIL processing failed: {pil_error}")
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid image file."
-            )
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error processing file: {e}")
-        raise HTTPException(status_code=400, detail="Unable to process file.")
-
-async def process_uploaded_image(file: UploadFile) -> io.BytesIO:
+async def process_uploaded_image(file: UploadFile) -> ImageEnvelope:
     return await run_in_threadpool(process_uploaded_image_sync, file)
 
-def save_processed_image(file_obj: io.BytesIO, path: str):
-    """Save processed BytesIO to disk."""
+def thumbnail_path_for(image_path: str) -> str:
+    """Path of the list-view thumbnail stored next to an uploaded image."""
+    return f"{os.path.splitext(image_path)[0]}_thumb.jpg"
+
+def save_processed_image(file_obj: Union[ImageEnvelope, io.BytesIO], path: str, thumbnail_path: Optional[str] = None):
+    """
+    Save a processed image (envelope or BytesIO) to disk, plus its thumbnail if requested.
+    Returns the thumbnail path if one was written, otherwise None.
+    """
+    if isinstance(file_obj, ImageEnvelope):
+        with open(path, "wb") as buffer:
+            buffer.write(file_obj.jpeg_bytes)
+        if thumbnail_path:
+            with open(thumbnail_path, "wb") as buffer:
+                buffer.write(file_obj.thumbnail_bytes)
+            return thumbnail_path
+        return None
     with open(path, "wb") as buffer:
         shutil.copyfileobj(file_obj, buffer)
+    return None
 
-async def process_and_detect(image: UploadFile, detection_func) -> DetectionResponse:
+async def process_and_detect(image: UploadFile, detection_func, detector: Optional[str] = None) -> DetectionResponse:
     """
     Helper to process uploaded image and run detection.
-    Uses the optimized image processing pipeline.
+    Uses the optimized image processing pipeline. With a `detector` name the
+    result goes through the shared detection result cache.
     """
-    # Validate uploaded file
-    pil_image = await validate_uploaded_file(image)
+    # Validate uploaded file (decodes it once)
+    envelope = await validate_uploaded_file(image)
 
     # Validate image for processing (check integrity)
     try:
-        if pil_image is None:
-            pil_image = await run_in_threadpool(Image.open, image.file)
-
-        # Validate image for processing
-        await run_in_threadpool(validate_image_for_processing, pil_image)
+        await run_in_threadpool(validate_image_for_processing, envelope)
     except HTTPException:
         raise  # Re-raise HTTP exceptions from validation
     except Exception as e:
@@ -233,16 +160,27 @@ async def process_and_detect(image: UploadFile, detection_func) -> DetectionResp
 
     # Run detection
     try:
-        detections = await detection_func(pil_image)
+        if detector is not None and isinstance(envelope, ImageEnvelope):
+            detections = await detection_cache.get_or_compute(detector, envelope, lambda: detection_func(envelope))
+        else:
+            detections = await detection_func(envelope)
         return DetectionResponse(detections=detections)
+    except InferencePoolBusyException:
+        raise  # 503 back-pressure from the inference pool
     except Exception as e:
         logger.error(f"Detection error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Detection service temporarily unavailable")
 
-def save_file_blocking(file_obj, path, image: Optional[Image.Image] = None):
+def save_file_blocking(file_obj, path, image: Optional[Union[Image.Image, ImageEnvelope]] = None):
     """
     Save uploaded file with security measures.
     """
+    if isinstance(image, ImageEnvelope):
+        # Already decoded and stripped; write its normalized JPEG as-is
+        save_processed_image(image, path)
+        logger.info(f"Saved image {path} with EXIF metadata stripped")
+        return
+
     try:
         # Try to open as image with PIL
         if image:
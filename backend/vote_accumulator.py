@@ -0,0 +1,230 @@
+"""
+Write-behind vote accumulator.
+
+Upvotes and manual verifications are counted in memory and written to the
+issues table as one batched UPDATE every VOTE_FLUSH_INTERVAL_MS, instead of
+one read/update/commit transaction per vote. Reads combine the database value
+with the pending delta, so responses stay accurate between flushes.
+
+Deltas are process-local. With several workers each one accumulates and
+flushes its own votes; since flushes are relative increments, no votes are
+lost, but a worker only sees other workers' votes after they are flushed.
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import case, func, update
+
+from backend.models import Issue
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+VOTE_FLUSH_INTERVAL_MS = int(os.environ.get("VOTE_FLUSH_INTERVAL_MS", "500"))
+# Total pending votes that force an immediate flush (set to 1 to write through)
+VOTE_MAX_PENDING = int(os.environ.get("VOTE_MAX_PENDING", "1000"))
+
+
+class VoteAccumulator:
+    """
+    Thread-safe in-memory upvote deltas with batched flushing.
+    """
+
+    def __init__(self, max_pending: int = VOTE_MAX_PENDING, session_factory=None):
+        self.max_pending = max_pending
+        # Defaults to backend.database.SessionLocal, resolved lazily at flush time
+        self._session_factory = session_factory
+        self._pending: Dict[int, int] = {}
+        self._pending_total = 0
+        self._lock = threading.Lock()
+        # Serializes flushes so a forced flush and the periodic one never overlap
+        self._flush_lock = threading.Lock()
+        self._stats = {
+            "votes_accepted": 0,
+            "votes_flushed": 0,
+            "rows_flushed": 0,
+            "flushes": 0,
+            "forced_flushes": 0,
+            "flush_failures": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0
+        }
+
+    def add(self, issue_id: int, amount: int = 1) -> int:
+        """
+        Record votes for an issue. Flushes synchronously once max_pending is
+        reached, so call from a worker thread.
+
+        Returns:
+            The issue's votes since the caller last read its row: the pending
+            delta after this vote, plus what a forced flush just wrote
+        """
+        with self._lock:
+            pending = self._pending.get(issue_id, 0) + amount
+            self._pending[issue_id] = pending
+            self._pending_total += amount
+            self._stats["votes_accepted"] += amount
+            over_limit = self._pending_total >= self.max_pending
+
+        if over_limit:
+            with self._lock:
+                self._stats["forced_flushes"] += 1
+            flushed = self._flush()
+            pending = flushed.get(issue_id, 0) + self.pending(issue_id)
+        return pending
+
+    def pending(self, issue_id: int) -> int:
+        with self._lock:
+            return self._pending.get(issue_id, 0)
+
+    def effective_upvotes(self, issue_id: int, db_upvotes: Optional[int]) -> int:
+        """Database value plus votes not yet flushed."""
+        return (db_upvotes or 0) + self.pending(issue_id)
+
+    def take(self, issue_id: int) -> int:
+        """
+        Remove and return an issue's pending delta, for callers that persist it
+        themselves in the same transaction as another change.
+        """
+        with self._lock:
+            delta = self._pending.pop(issue_id, 0)
+            self._pending_total -= delta
+            return delta
+
+    def put_back(self, issue_id: int, delta: int) -> None:
+        """Return a delta obtained with take() whose write failed, so the next flush retries it."""
+        if delta:
+            self._restore({issue_id: delta})
+
+    def _drain(self) -> Dict[int, int]:
+        with self._lock:
+            batch = self._pending
+            self._pending = {}
+            self._pending_total = 0
+            return batch
+
+    def _restore(self, batch: Dict[int, int]) -> None:
+        with self._lock:
+            for issue_id, delta in batch.items():
+                self._pending[issue_id] = self._pending.get(issue_id, 0) + delta
+                self._pending_total += delta
+
+    def flush(self) -> int:
+        """
+        Write all pending deltas in a single UPDATE. Blocking; run in a threadpool.
+
+        Returns:
+            Number of issue rows updated
+        """
+        return len(self._flush())
+
+    def _flush(self) -> Dict[int, int]:
+        """Flush and return the deltas written, by issue id ({} if nothing was written)."""
+        session_factory = self._session_factory
+        if session_factory is None:
+            from backend.database import SessionLocal
+            session_factory = SessionLocal
+
+        with self._flush_lock:
+            batch = self._drain()
+            if not batch:
+                return {}
+
+            start = time.perf_counter()
+            db = None
+            try:
+                db = session_factory()
+                db.execute(
+                    update(Issue)
+                    .where(Issue.id.in_(list(batch)))
+                    .values(upvotes=func.coalesce(Issue.upvotes, 0) + case(batch, value=Issue.id, else_=0))
+                    .execution_options(synchronize_session=False)
+                )
+                db.commit()
+            except Exception as e:
+                if db is not None:
+                    db.rollback()
+                # Keep the votes so the next flush retries them
+                self._restore(batch)
+                with self._lock:
+                    self._stats["flush_failures"] += 1
+                logger.error(f"Failed to flush {len(batch)} pending vote counts: {e}", exc_info=True)
+                return {}
+            finally:
+                if db is not None:
+                    db.close()
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._stats["flushes"] += 1
+                self._stats["rows_flushed"] += len(batch)
+                self._stats["votes_flushed"] += sum(batch.values())
+                self._stats["last_flush_ms"] = round(elapsed_ms, 3)
+                self._stats["max_flush_ms"] = round(max(self._stats["max_flush_ms"], elapsed_ms), 3)
+            return batch
+
+    def get_stats(self) -> dict:
+        """
+        Get accumulator statistics for monitoring.
+        """
+        with self._lock:
+            return {
+                **self._stats,
+                "pending_votes": self._pending_total,
+                "pending_issues": len(self._pending),
+                "max_pending": self.max_pending,
+                "flush_interval_ms": VOTE_FLUSH_INTERVAL_MS
+            }
+
+    def reset(self) -> None:
+        """Drop pending deltas without writing them."""
+        with self._lock:
+            self._pending = {}
+            self._pending_total = 0
+
+
+class VoteFlusher:
+    """
+    Background task that flushes the accumulator periodically and once more on shutdown.
+    """
+
+    def __init__(self, accumulator: VoteAccumulator, interval_ms: int = VOTE_FLUSH_INTERVAL_MS):
+        self.accumulator = accumulator
+        self.interval_ms = interval_ms
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Vote flusher started (interval {self.interval_ms}ms)")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Persist whatever is left before the process exits
+        await run_in_threadpool(self.accumulator.flush)
+        logger.info("Vote flusher stopped.")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.sleep(self.interval_ms / 1000)
+                await run_in_threadpool(self.accumulator.flush)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Vote flush failed: {e}", exc_info=True)
+
+
+vote_accumulator = VoteAccumulator()
+vote_flusher = VoteFlusher(vote_accumulator)
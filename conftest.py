@@ -0,0 +1,52 @@
+"""
+Shared pytest fixtures.
+"""
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import get_db
+from backend.models import Base
+
+
+@pytest.fixture(autouse=True)
+def isolated_mla_summary_store(tmp_path, monkeypatch):
+    """Keep app-level tests, which start the real lifespan, out of the repository's data/ directory."""
+    from backend.mla_summary_store import mla_summary_store
+
+    monkeypatch.setattr(mla_summary_store, "path", str(tmp_path / "mla_summaries.json"))
+
+
+@pytest.fixture
+def isolated_app(tmp_path):
+    """The app with its database, upload directory and hash index snapshot under tmp_path."""
+    from backend.main import app
+    from backend.image_dedup_index import image_dedup_index
+    from backend.routers import issues
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'issues.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    TestingSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = TestingSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    image_dedup_index.reset()
+    try:
+        with patch.object(issues, "UPLOAD_DIR", str(tmp_path / "uploads")), \
+                patch.object(issues, "create_grievance_from_issue_background"), \
+                patch.object(issues.job_queue, "enqueue", return_value=None), \
+                patch.object(image_dedup_index, "path", str(tmp_path / "index.npz")):
+            yield TestClient(app), TestingSession
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        image_dedup_index.reset()
+        engine.dispose()
@@ -53,6 +53,7 @@ export const detectorsApi = {
   severity: createDetectorApi('/api/detect-severity'),
   waste: createDetectorApi('/api/detect-waste'),
   civicEye: createDetectorApi('/api/detect-civic-eye'),
+  scanAll: createDetectorApi('/api/detect-scan-all'),
   transcribe: async (formData) => {
       return await apiClient.postForm('/api/transcribe-audio', formData);
   },
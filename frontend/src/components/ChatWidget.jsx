@@ -4,11 +4,15 @@ import { MessageSquare, X, Send, User, Bot } from 'lucide-react';
 const ChatWidget = () => {
   const [isOpen, setIsOpen] = useState(false);
   const [messages, setMessages] = useState([
-    { text: "Namaste! I am VishwaGuru. How can I help you with civic issues today?", sender: 'bot' }
+    { id: 0, text: "Namaste! I am VishwaGuru. How can I help you with civic issues today?", sender: 'bot' }
   ]);
   const [input, setInput] = useState('');
   const [isLoading, setIsLoading] = useState(false);
+  // True from send until the answer has fully streamed in; blocks a second send meanwhile
+  const [isStreaming, setIsStreaming] = useState(false);
   const messagesEndRef = useRef(null);
+  const streamRef = useRef(null);
+  const nextIdRef = useRef(1);
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
@@ -18,37 +22,80 @@ const ChatWidget = () => {
     scrollToBottom();
   }, [messages, isOpen]);
 
+  // Closing the widget or unmounting aborts the stream, which cancels generation on the server
+  useEffect(() => () => streamRef.current?.abort(), []);
+
   const toggleChat = () => {
+    if (isOpen) streamRef.current?.abort();
     setIsOpen(!isOpen);
   };
 
+  const addMessage = (text, sender) => {
+    const id = nextIdRef.current++;
+    setMessages(prev => [...prev, { id, text, sender }]);
+    return id;
+  };
+
+  const appendToMessage = (id, delta) => {
+    setMessages(prev => prev.map(msg => (msg.id === id ? { ...msg, text: msg.text + delta } : msg)));
+  };
+
   const handleSendMessage = async (e) => {
     e.preventDefault();
-    if (!input.trim()) return;
+    if (!input.trim() || isStreaming) return;
 
     const userMessage = input;
-    setMessages(prev => [...prev, { text: userMessage, sender: 'user' }]);
+    addMessage(userMessage, 'user');
     setInput('');
     setIsLoading(true);
+    setIsStreaming(true);
+
+    streamRef.current?.abort();
+    const controller = new AbortController();
+    streamRef.current = controller;
 
     try {
-      const response = await fetch(`${import.meta.env.VITE_API_URL || 'http://localhost:8000'}/api/chat`, {
+      const response = await fetch(`${import.meta.env.VITE_API_URL || 'http://localhost:8000'}/api/chat/stream`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
         },
         body: JSON.stringify({ query: userMessage }),
+        signal: controller.signal,
       });
 
-      if (!response.ok) throw new Error('Failed to get response');
+      if (!response.ok || !response.body) throw new Error('Failed to get response');
 
-      const data = await response.json();
-      setMessages(prev => [...prev, { text: data.response, sender: 'bot' }]);
+      // Server-sent events: grow this stream's own bot message as chunks arrive
+      const botMessageId = addMessage('', 'bot');
+      setIsLoading(false);
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+        for (const event of events) {
+          const lines = event.split('\n');
+          const name = lines.find(line => line.startsWith('event: '))?.slice(7);
+          const data = lines.find(line => line.startsWith('data: '))?.slice(6);
+          if (name === 'error') throw new Error('Chat stream failed');
+          if (!name && data) appendToMessage(botMessageId, JSON.parse(data).delta);
+        }
+      }
     } catch (error) {
+      if (error.name === 'AbortError') return;
       console.error('Chat Error:', error);
-      setMessages(prev => [...prev, { text: "Sorry, I'm having trouble connecting right now. Please try again later.", sender: 'bot' }]);
+      addMessage("Sorry, I'm having trouble connecting right now. Please try again later.", 'bot');
     } finally {
-      setIsLoading(false);
+      if (streamRef.current === controller) {
+        streamRef.current = null;
+        setIsLoading(false);
+        setIsStreaming(false);
+      }
     }
   };
 
@@ -70,9 +117,9 @@ const ChatWidget = () => {
 
           {/* Messages Area */}
           <div className="flex-1 overflow-y-auto p-4 space-y-4 bg-gray-50">
-            {messages.map((msg, index) => (
+            {messages.map((msg) => (
               <div
-                key={index}
+                key={msg.id}
                 className={`flex ${msg.sender === 'user' ? 'justify-end' : 'justify-start'}`}
               >
                 <div
@@ -111,7 +158,7 @@ const ChatWidget = () => {
             />
             <button
               type="submit"
-              disabled={isLoading || !input.trim()}
+              disabled={isStreaming || !input.trim()}
               className="bg-orange-600 text-white p-2 rounded-full hover:bg-orange-700 disabled:opacity-50 disabled:cursor-not-allowed transition-colors"
             >
               <Send size={18} />
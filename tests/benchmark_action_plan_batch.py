@@ -0,0 +1,108 @@
+import sys
+import os
+import re
+import json
+import time
+import asyncio
+import argparse
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Ensure backend modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import ai_service
+from backend.ai_service import generate_action_plan, generate_action_plans_batch
+
+
+def _tokens(text):
+    # Rough Gemini tokenizer estimate
+    return max(1, len(text) // 4)
+
+
+def _plan(number):
+    return {
+        "id": number,
+        "whatsapp": "Overflowing garbage near the bus stop for a week, please arrange pickup urgently.",
+        "email_subject": "Complaint regarding uncollected garbage near the bus stop",
+        "email_body": "Respected Commissioner, garbage has not been collected near the bus stop for a week. "
+                      "It blocks the footpath and attracts stray animals. Kindly arrange pickup. Sincerely, Citizen",
+        "x_post": "Garbage piling up near the bus stop for a week. Please act. #CivicIssue #VishwaGuru"
+    }
+
+
+class StubGeminiModel:
+    """Fixed request overhead plus per-output-token decode time; counts tokens both ways."""
+
+    def __init__(self, overhead_ms, ms_per_output_token):
+        self.overhead_ms = overhead_ms
+        self.ms_per_output_token = ms_per_output_token
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    async def generate_content_async(self, prompt):
+        issues = len(re.findall(r"Issue \d+:", prompt))
+        text = json.dumps([_plan(i) for i in range(1, issues + 1)]) if issues else json.dumps(_plan(1))
+        self.calls += 1
+        self.input_tokens += _tokens(prompt)
+        self.output_tokens += _tokens(text)
+        await asyncio.sleep((self.overhead_ms + _tokens(text) * self.ms_per_output_token) / 1000)
+        return SimpleNamespace(text=text)
+
+
+async def _run(mode, issues, args):
+    model = StubGeminiModel(args.overhead_ms, args.ms_per_token)
+    # Same number of concurrent Gemini calls as JOB_WORKERS
+    semaphore = asyncio.Semaphore(args.workers)
+
+    async def per_issue(issue):
+        async with semaphore:
+            return await generate_action_plan(issue["description"], issue["category"], max_retries=0)
+
+    async def batched(chunk):
+        async with semaphore:
+            return await generate_action_plans_batch(chunk)
+
+    # Repeated descriptions would otherwise be served from the semantic cache
+    ai_service.action_plan_cache.clear()
+    with patch.object(ai_service, "_get_gemini_model", return_value=model):
+        start = time.perf_counter()
+        if mode == "per-issue":
+            await asyncio.gather(*(per_issue(issue) for issue in issues))
+        else:
+            chunks = [issues[i:i + args.batch_size] for i in range(0, len(issues), args.batch_size)]
+            await asyncio.gather(*(batched(chunk) for chunk in chunks))
+        elapsed = time.perf_counter() - start
+
+    plans_per_minute = len(issues) / elapsed * 60
+    tokens_per_plan = (model.input_tokens + model.output_tokens) / len(issues)
+    print(f"  {mode:<10} {model.calls:4d} calls  {plans_per_minute:8.0f} plans/min  "
+          f"{model.input_tokens / len(issues):6.0f} in + {model.output_tokens / len(issues):4.0f} out "
+          f"= {tokens_per_plan:6.0f} tokens/plan")
+
+
+async def run(args):
+    issues = [
+        {"description": f"Garbage has not been collected near bus stop {i} for over a week", "category": "Garbage"}
+        for i in range(args.issues)
+    ]
+    print(f"{args.issues} action plans, {args.workers} concurrent calls, batch size {args.batch_size} "
+          f"(stub: {args.overhead_ms} ms/request + {args.ms_per_token} ms/output token)")
+    await _run("per-issue", issues, args)
+    await _run("batched", issues, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-issue vs batched Gemini action plan generation")
+    parser.add_argument("--issues", type=int, default=48)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--overhead-ms", type=float, default=600, help="Simulated per-request latency")
+    parser.add_argument("--ms-per-token", type=float, default=2.0, help="Simulated decode time per output token")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import time
+import random
+import sys
+import os
+import argparse
+import threading
+
+# Ensure backend modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.cache import ThreadSafeCache, EVICTION_POLICIES
+
+THREADS = 32
+OPS_PER_THREAD = 5000
+KEY_SPACE_FACTOR = 4  # Distinct keys relative to cache size, so evictions happen
+
+
+class LegacyCache:
+    """Previous ThreadSafeCache algorithm: O(n) expiry sweep and min() eviction on every set."""
+
+    def __init__(self, ttl=300, max_size=100):
+        self._data = {}
+        self._timestamps = {}
+        self._access_count = {}
+        self._ttl = ttl
+        self._max_size = max_size
+        self._lock = threading.RLock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data and time.time() - self._timestamps[key] < self._ttl:
+                self._access_count[key] = self._access_count.get(key, 0) + 1
+                return self._data[key]
+            return None
+
+    def set(self, data, key):
+        with self._lock:
+            now = time.time()
+            for k in [k for k, ts in self._timestamps.items() if now - ts >= self._ttl]:
+                self._remove(k)
+            if len(self._data) >= self._max_size and key not in self._data:
+                self._remove(min(self._access_count, key=lambda k: self._access_count[k]))
+            self._data[key] = data
+            self._timestamps[key] = now
+            self._access_count[key] = 1
+
+    def _remove(self, key):
+        self._data.pop(key, None)
+        self._timestamps.pop(key, None)
+        self._access_count.pop(key, None)
+
+
+def make_keys(max_size, seed):
+    """Zipf-like key stream: a few hot keys and a long tail."""
+    rng = random.Random(seed)
+    key_space = max_size * KEY_SPACE_FACTOR
+    weights = [1.0 / (rank + 1) for rank in range(key_space)]
+    return [f"key_{k}" for k in rng.choices(range(key_space), weights=weights, k=OPS_PER_THREAD)]
+
+
+def run(cache, streams):
+    """Read-through workload: get, and set on miss. Returns (ops/sec, hit ratio)."""
+    hits = [0] * len(streams)
+    barrier = threading.Barrier(len(streams) + 1)
+
+    def worker(idx):
+        barrier.wait()
+        local_hits = 0
+        for key in streams[idx]:
+            if cache.get(key) is not None:
+                local_hits += 1
+            else:
+                cache.set(key, key)
+        hits[idx] = local_hits
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(streams))]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(stream) for stream in streams)
+    return total / elapsed, sum(hits) / total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ThreadSafeCache contention benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--threads", type=int, default=THREADS)
+    args = parser.parse_args()
+
+    print(f"ThreadSafeCache benchmark: {args.threads} threads x {OPS_PER_THREAD:,} ops, read-through workload")
+    for max_size in args.sizes:
+        streams = [make_keys(max_size, seed) for seed in range(args.threads)]
+        print(f"\nmax_size={max_size:,}")
+        ops, ratio = run(LegacyCache(max_size=max_size), streams)
+        print(f"  {'legacy':8s} {ops:>12,.0f} ops/sec   hit ratio {ratio:.1%}")
+        for policy in EVICTION_POLICIES:
+            ops, ratio = run(ThreadSafeCache(max_size=max_size, eviction_policy=policy), streams)
+            print(f"  {policy:8s} {ops:>12,.0f} ops/sec   hit ratio {ratio:.1%}")
+
+
+if __name__ == "__main__":
+    main()
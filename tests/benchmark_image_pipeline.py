@@ -0,0 +1,140 @@
+import io
+import sys
+import os
+import time
+import argparse
+import resource
+import tempfile
+import multiprocessing
+
+# Ensure backend modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from backend.image_envelope import decode_image_envelope
+
+ITERATIONS = 20
+
+
+def make_upload(size, fmt):
+    img = Image.effect_mandelbrot(size, (-2.0, -1.5, 1.0, 1.5), 100).convert("RGB")
+    exif = Image.Exif()
+    exif[0x010F] = "BenchCam"
+    output = io.BytesIO()
+    img.save(output, format=fmt, exif=exif.tobytes(), quality=92)
+    return output.getvalue()
+
+
+def _resize(img):
+    if img.width > 1024 or img.height > 1024:
+        ratio = min(1024 / img.width, 1024 / img.height)
+        img = img.resize((int(img.width * ratio), int(img.height * ratio)), Image.Resampling.BILINEAR)
+    return img
+
+
+def _open(source):
+    return source if hasattr(source, "read") else io.BytesIO(source)
+
+
+def legacy_pipeline(source):
+    """Previous upload path: validation, EXIF strip and HF preparation each decode/encode."""
+    # _validate_uploaded_file_sync: decode, resize, re-encode into the upload
+    img = Image.open(_open(source))
+    data = None
+    resized = _resize(img)
+    if resized is not img:
+        buffer = io.BytesIO()
+        resized.save(buffer, format=img.format or "JPEG", quality=85)
+        data = buffer.getvalue()
+    elif hasattr(source, "seek"):
+        source.seek(0)
+
+    # process_uploaded_image_sync: decode again, copy pixels to strip EXIF, encode
+    img = _resize(Image.open(_open(data if data is not None else source)))
+    img_no_exif = Image.new(img.mode, img.size)
+    img_no_exif.paste(img)
+    buffer = io.BytesIO()
+    img_no_exif.save(buffer, format=img.format or "JPEG", quality=85)
+
+    # _prepare_image_bytes with the PIL image: encode once more
+    buffer = io.BytesIO()
+    img_no_exif.save(buffer, format="JPEG")
+    return img_no_exif, buffer.getvalue()
+
+
+def envelope_pipeline(source):
+    envelope = decode_image_envelope(source)
+    return envelope.image, envelope.jpeg_bytes, envelope.thumbnail_bytes
+
+
+PIPELINES = {"legacy": legacy_pipeline, "envelope": envelope_pipeline}
+
+
+def _peak_rss_kb():
+    # ru_maxrss is inherited from the parent across exec, so prefer the process's own high-water mark
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _peak_rss_child(name, path, queue):
+    before = _peak_rss_kb()
+    with open(path, "rb") as f:
+        PIPELINES[name](f)
+    queue.put(_peak_rss_kb() - before)
+
+
+def measure_peak_rss_mb(name, data):
+    """Peak RSS growth (MB) of one request in a fresh process, reading from a file like an upload."""
+    with tempfile.NamedTemporaryFile(suffix=".img", delete=False) as f:
+        f.write(data)
+    try:
+        ctx = multiprocessing.get_context("spawn")
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_peak_rss_child, args=(name, f.name, queue))
+        proc.start()
+        growth_kb = queue.get()
+        proc.join()
+        return growth_kb / 1024
+    finally:
+        os.unlink(f.name)
+
+
+def measure(fn, data, iterations):
+    fn(data)  # Warm up
+    start = time.process_time()
+    for _ in range(iterations):
+        fn(data)
+    return (time.process_time() - start) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload image pipeline CPU benchmark")
+    parser.add_argument("--iterations", type=int, default=ITERATIONS)
+    args = parser.parse_args()
+
+    cases = [
+        ("4032x3024 JPEG (phone photo)", (4032, 3024), "JPEG"),
+        ("1600x1200 JPEG", (1600, 1200), "JPEG"),
+        ("800x600 JPEG", (800, 600), "JPEG"),
+        ("1600x1200 PNG", (1600, 1200), "PNG"),
+    ]
+    print(f"Upload pipeline cost per request ({args.iterations} iterations, peak RSS growth in a fresh process)")
+    for name, size, fmt in cases:
+        data = make_upload(size, fmt)
+        legacy_ms = measure(legacy_pipeline, data, args.iterations)
+        envelope_ms = measure(envelope_pipeline, data, args.iterations)
+        legacy_mb = measure_peak_rss_mb("legacy", data)
+        envelope_mb = measure_peak_rss_mb("envelope", data)
+        print(f"  {name:30s} CPU legacy {legacy_ms:7.1f} ms  envelope {envelope_ms:7.1f} ms ({legacy_ms / envelope_ms:.1f}x)"
+              f"   peak RSS legacy {legacy_mb:6.1f} MB  envelope {envelope_mb:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
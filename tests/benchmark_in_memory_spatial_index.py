@@ -0,0 +1,136 @@
+import time
+import random
+import sys
+import os
+import argparse
+import datetime
+
+# Ensure backend modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.database import Base
+from backend.models import Issue
+from backend.spatial_utils import get_bounding_box, find_nearby_issues
+from backend.spatial_index import SpatialIndex
+
+# Mumbai-ish center point; +/- 0.2 degree is roughly +/- 22km
+CENTER_LAT = 19.0760
+CENTER_LON = 72.8777
+SPREAD = 0.2
+RADIUS_METERS = 50.0
+QUERIES = 200
+
+
+def sql_nearby(db, lat, lon, radius):
+    """Current path: bounding-box SQL query followed by the Python haversine loop."""
+    min_lat, max_lat, min_lon, max_lon = get_bounding_box(lat, lon, radius)
+    rows = db.query(
+        Issue.id,
+        Issue.description,
+        Issue.category,
+        Issue.latitude,
+        Issue.longitude,
+        Issue.upvotes,
+        Issue.created_at,
+        Issue.status
+    ).filter(
+        Issue.status == "open",
+        Issue.latitude >= min_lat,
+        Issue.latitude <= max_lat,
+        Issue.longitude >= min_lon,
+        Issue.longitude <= max_lon
+    ).all()
+    return find_nearby_issues(rows, lat, lon, radius_meters=radius)
+
+
+def run_size(n_issues):
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine, tables=[Issue.__table__])
+    db = SessionLocal()
+
+    print(f"\nGenerating {n_issues:,} issues...")
+    now = datetime.datetime.now(datetime.timezone.utc)
+    statuses = ["open", "open", "open", "verified", "resolved"]
+    batch = []
+    for i in range(n_issues):
+        batch.append({
+            "reference_id": f"bench-{i}",
+            "description": "Benchmark pothole report near the junction",
+            "category": "Road",
+            "status": random.choice(statuses),
+            "latitude": CENTER_LAT + random.uniform(-SPREAD, SPREAD),
+            "longitude": CENTER_LON + random.uniform(-SPREAD, SPREAD),
+            "upvotes": 0,
+            "created_at": now
+        })
+        if len(batch) == 50000:
+            db.execute(insert(Issue), batch)
+            batch = []
+    if batch:
+        db.execute(insert(Issue), batch)
+    db.commit()
+
+    targets = [
+        (CENTER_LAT + random.uniform(-SPREAD, SPREAD), CENTER_LON + random.uniform(-SPREAD, SPREAD))
+        for _ in range(QUERIES)
+    ]
+
+    # Warmup
+    sql_nearby(db, *targets[0], RADIUS_METERS)
+
+    start_time = time.perf_counter()
+    sql_results = [sql_nearby(db, lat, lon, RADIUS_METERS) for lat, lon in targets]
+    sql_avg = (time.perf_counter() - start_time) / QUERIES
+
+    index = SpatialIndex()
+    start_time = time.perf_counter()
+    index.load(
+        db.query(
+            Issue.id, Issue.description, Issue.category, Issue.latitude,
+            Issue.longitude, Issue.upvotes, Issue.created_at, Issue.status
+        ).yield_per(5000)
+    )
+    warm_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    index_results = [index.query_radius(lat, lon, RADIUS_METERS) for lat, lon in targets]
+    index_avg = (time.perf_counter() - start_time) / QUERIES
+
+    mismatches = sum(
+        1 for a, b in zip(sql_results, index_results)
+        if [row.id for row, _ in a] != [row.id for row, _ in b]
+    )
+
+    print(f"SQL + haversine loop : {sql_avg * 1e6:10.1f} us/query")
+    print(f"In-memory grid index : {index_avg * 1e6:10.1f} us/query (warm-up {warm_time:.2f}s)")
+    print(f"Speedup              : {sql_avg / index_avg:10.1f}x")
+    print(f"Result mismatches    : {mismatches}")
+
+    db.close()
+    engine.dispose()
+    return mismatches == 0
+
+
+def run_benchmark(sizes):
+    print("⚡ Bolt In-Memory Spatial Index Benchmark ⚡")
+    ok = all(run_size(n) for n in sizes)
+    if ok:
+        print("\n✅ SUCCESS: Index results match the SQL path.")
+    else:
+        print("\n❌ FAILURE: Index results differ from the SQL path.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the in-memory spatial index with the SQL + loop path")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+    run_benchmark(args.sizes)
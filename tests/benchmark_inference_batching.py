@@ -0,0 +1,74 @@
+import sys
+import os
+import time
+import asyncio
+import argparse
+
+import numpy as np
+
+# Ensure backend modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.inference_scheduler import BatchScheduler
+
+CONCURRENCY = 64
+REQUESTS = 512
+
+
+class StandInModel:
+    """
+    Weight-bound stand-in for a CNN forward pass (ultralytics is not needed to run this):
+    every call streams the full weight matrices through the CPU, like a real model does,
+    so batching amortizes that cost the same way.
+    """
+
+    def __init__(self, in_features=4096, hidden=2048, out_features=256):
+        rng = np.random.default_rng(0)
+        self.w1 = rng.standard_normal((in_features, hidden), dtype=np.float32)
+        self.w2 = rng.standard_normal((hidden, out_features), dtype=np.float32)
+        self.in_features = in_features
+
+    def predict_batch(self, images):
+        x = np.stack(images)
+        return list(np.maximum(x @ self.w1, 0) @ self.w2)
+
+
+async def run(scheduler, images, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(image):
+        async with semaphore:
+            return await scheduler.submit(image)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(image) for image in images))
+    return len(images) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-batching scheduler throughput benchmark")
+    parser.add_argument("--requests", type=int, default=REQUESTS)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--max-wait-ms", type=float, default=10)
+    args = parser.parse_args()
+
+    model = StandInModel()
+    rng = np.random.default_rng(1)
+    images = [rng.standard_normal(model.in_features, dtype=np.float32) for _ in range(args.requests)]
+
+    print(f"Burst of {args.requests} requests, {args.concurrency} in flight, max wait {args.max_wait_ms}ms")
+    baseline = None
+    for batch_size in args.batch_sizes:
+        scheduler = BatchScheduler("bench", model.predict_batch, max_batch_size=batch_size,
+                                   max_wait_ms=args.max_wait_ms, enabled=batch_size > 1)
+        rps = asyncio.run(run(scheduler, images, args.concurrency))
+        baseline = baseline or rps
+        stats = scheduler.get_stats()
+        print(f"  max_batch_size={batch_size:3d}  {rps:9.1f} req/s  ({rps / baseline:.1f}x)"
+              f"  mean batch {stats['batch_size_histogram']['mean']:.1f}"
+              f"  max queue depth {stats['queue_depth_histogram']['max']:.0f}")
+
+
+if __name__ == "__main__":
+    main()
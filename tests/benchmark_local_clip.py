@@ -0,0 +1,131 @@
+import sys
+import os
+import io
+import json
+import time
+import random
+import asyncio
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+# Ensure backend modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from PIL import Image
+
+from backend import hf_api_service
+from backend.hf_api_service import CLIP_DETECTORS, scan_all_clip, _detect_clip_generic
+
+ITERATIONS = 20
+
+
+def _stub_handler(latency_ms):
+    class StubClipHandler(BaseHTTPRequestHandler):
+        """Answers like the HF zero-shot endpoint after a fixed network + queueing delay."""
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            labels = payload["parameters"]["candidate_labels"]
+            weights = [random.random() for _ in labels]
+            total = sum(weights)
+            body = json.dumps(sorted(
+                ({"label": label, "score": weight / total} for label, weight in zip(labels, weights)),
+                key=lambda res: res["score"], reverse=True
+            )).encode()
+            time.sleep(latency_ms / 1000)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubClipHandler
+
+
+def _percentiles(latencies):
+    latencies = sorted(latencies)
+    return latencies[len(latencies) // 2], latencies[max(0, int(len(latencies) * 0.95) - 1)]
+
+
+async def _time(fn, iterations):
+    await fn()  # Warm up
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return _percentiles(latencies)
+
+
+async def run(args):
+    image = Image.new("RGB", (640, 480), color=(120, 110, 100))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG")
+    image_bytes = buffer.getvalue()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _stub_handler(args.hf_latency_ms))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stub_url = f"http://127.0.0.1:{server.server_address[1]}/clip"
+
+    print(f"All {len(CLIP_DETECTORS)} CLIP detectors on one image, {args.iterations} iterations "
+          f"(stub HF latency {args.hf_latency_ms} ms)")
+
+    async with httpx.AsyncClient() as client:
+        with patch.object(hf_api_service, "CLIP_API_URL", stub_url):
+            async def per_detector():
+                await asyncio.gather(*(
+                    _detect_clip_generic(image_bytes, labels, targets, client)
+                    for labels, targets in CLIP_DETECTORS.values()
+                ))
+
+            async def union_call():
+                await scan_all_clip(image_bytes, client=client)
+
+            p50, p95 = await _time(per_detector, args.iterations)
+            print(f"  HF API, one call per detector  p50 {p50:8.1f} ms  p95 {p95:8.1f} ms")
+            p50, p95 = await _time(union_call, args.iterations)
+            print(f"  HF API, label-union call       p50 {p50:8.1f} ms  p95 {p95:8.1f} ms")
+
+    server.shutdown()
+
+    try:
+        from backend.local_clip_service import LocalClipEngine
+        engine = LocalClipEngine().load()
+    except Exception as e:
+        print(f"  local CLIP unavailable: {type(e).__name__}: {e}")
+        return
+
+    with patch.object(hf_api_service, "local_clip_engine", engine):
+        async def local_scan():
+            await scan_all_clip(image)
+
+        p50, p95 = await _time(local_scan, args.iterations)
+        print(f"  local CLIP, precomputed index  p50 {p50:8.1f} ms  p95 {p95:8.1f} ms")
+
+    labels = list(dict.fromkeys(label for labels, _ in CLIP_DETECTORS.values() for label in labels))
+
+    async def local_no_index():
+        # What each request would cost if label prompts were encoded per request
+        engine._encode_text(labels)
+        engine._encode_image(image)
+
+    p50, p95 = await _time(local_no_index, args.iterations)
+    print(f"  local CLIP, text encoded/req   p50 {p50:8.1f} ms  p95 {p95:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HF API vs local CLIP zero-shot benchmark")
+    parser.add_argument("--iterations", type=int, default=ITERATIONS)
+    parser.add_argument("--hf-latency-ms", type=int, default=400, help="Simulated HF router latency per request")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
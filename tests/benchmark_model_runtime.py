@@ -0,0 +1,87 @@
+import sys
+import os
+import time
+import argparse
+import resource
+import multiprocessing
+
+# Ensure backend modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ITERATIONS = 30
+
+# name -> (runtime, int8)
+RUNTIMES = {
+    "torch": ("torch", False),
+    "onnx": ("onnx", False),
+    "onnx-int8": ("onnx", True),
+    "openvino": ("openvino", False),
+}
+
+
+def _peak_rss_kb():
+    # ru_maxrss is inherited from the parent across exec, so prefer the process's own high-water mark
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _run_child(name, iterations, queue):
+    try:
+        from PIL import Image
+        from ultralytics.utils import ASSETS
+
+        from backend.local_ml_service import GENERAL_MODEL_NAME, load_torch_general_model
+        from backend.model_export import load_yolo_model
+
+        runtime, int8 = RUNTIMES[name]
+        model = load_yolo_model(GENERAL_MODEL_NAME, load_torch_general_model, task="detect", runtime=runtime, int8=int8)
+        image = Image.open(ASSETS / "bus.jpg").convert("RGB")
+
+        model.predict(image, verbose=False)  # Warm up
+        latencies = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            model.predict(image, verbose=False)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        queue.put((latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95) - 1], _peak_rss_kb() / 1024, None))
+    except Exception as e:
+        queue.put((None, None, None, f"{type(e).__name__}: {e}"))
+
+
+def measure(name, iterations):
+    """p50/p95 latency (ms) and peak RSS (MB) of one runtime, each in a fresh process."""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run_child, args=(name, iterations, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PyTorch vs ONNX Runtime / OpenVINO CPU inference benchmark")
+    parser.add_argument("--iterations", type=int, default=ITERATIONS)
+    parser.add_argument("--runtimes", nargs="+", choices=list(RUNTIMES), default=["torch", "onnx", "onnx-int8"])
+    args = parser.parse_args()
+
+    print(f"General model (yolov8n), {args.iterations} single-image predictions on CPU")
+    baseline = None
+    for name in args.runtimes:
+        p50, p95, rss_mb, error = measure(name, args.iterations)
+        if error:
+            print(f"  {name:10s} unavailable: {error}")
+            continue
+        baseline = baseline or p50
+        print(f"  {name:10s} p50 {p50:7.1f} ms  p95 {p95:7.1f} ms  ({baseline / p50:.1f}x)  peak RSS {rss_mb:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Tests for batched action plan generation.
+"""
+import json
+import re
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend import ai_service
+from backend.ai_service import generate_action_plans_batch
+from backend.exceptions import AIServiceException
+from backend.job_queue import JobQueue, JOB_SUCCEEDED
+from backend.models import Base
+
+
+def _plan(number, **overrides):
+    plan = {
+        "id": number,
+        "whatsapp": f"WhatsApp {number}",
+        "email_subject": f"Subject {number}",
+        "email_body": f"Body {number}",
+        "x_post": f"Post {number}"
+    }
+    plan.update(overrides)
+    return plan
+
+
+class StubModel:
+    """Answers batch prompts with `batch_response(n)` and single-issue prompts with one plan."""
+
+    def __init__(self, batch_response=None):
+        self.batch_response = batch_response or (lambda n: json.dumps([_plan(i) for i in range(1, n + 1)]))
+        self.prompts = []
+
+    async def generate_content_async(self, prompt):
+        self.prompts.append(prompt)
+        issues = len(re.findall(r"Issue \d+:", prompt))
+        if issues:
+            return SimpleNamespace(text=self.batch_response(issues))
+        return SimpleNamespace(text=json.dumps(_plan(0, whatsapp="single")))
+
+
+@pytest.fixture(autouse=True)
+def clear_plan_cache():
+    ai_service.action_plan_cache.clear()
+    yield
+    ai_service.action_plan_cache.clear()
+
+
+def _issues(count):
+    return [{"description": f"Garbage pile number {i}", "category": "Garbage", "language": "en"} for i in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_batch_uses_one_call_for_all_issues():
+    model = StubModel()
+    with patch.object(ai_service, "_get_gemini_model", return_value=model):
+        plans = await generate_action_plans_batch(_issues(3))
+
+    assert len(model.prompts) == 1
+    assert [plan["whatsapp"] for plan in plans] == ["WhatsApp 1", "WhatsApp 2", "WhatsApp 3"]
+    assert all("id" not in plan for plan in plans)
+
+
+@pytest.mark.asyncio
+async def test_malformed_elements_fall_back_to_per_issue_calls():
+    def response(n):
+        # Out of order, one element missing its email body, and issue 4 missing entirely
+        return "```json\n" + json.dumps([_plan(2), _plan(1, email_body=""), _plan(3, x_post=None)]) + "\n```"
+
+    model = StubModel(response)
+    with patch.object(ai_service, "_get_gemini_model", return_value=model):
+        plans = await generate_action_plans_batch(_issues(4))
+
+    assert len(model.prompts) == 3  # one batch + issues 1 and 4 individually
+    assert plans[0]["whatsapp"] == "single"
+    assert plans[1]["whatsapp"] == "WhatsApp 2"
+    assert plans[2]["x_post"].startswith("Reporting a Garbage issue")  # filled in like single plans
+    assert plans[3]["whatsapp"] == "single"
+
+
+@pytest.mark.asyncio
+async def test_unparseable_response_falls_back_for_every_issue():
+    model = StubModel(lambda n: "Sorry, I cannot help with that.")
+    with patch.object(ai_service, "_get_gemini_model", return_value=model):
+        plans = await generate_action_plans_batch(_issues(2))
+
+    assert len(model.prompts) == 3
+    assert [plan["whatsapp"] for plan in plans] == ["single", "single"]
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_request_raises():
+    class DownModel:
+        async def generate_content_async(self, prompt):
+            raise ConnectionError("Gemini unavailable")
+
+    with patch.object(ai_service, "_get_gemini_model", return_value=DownModel()):
+        with pytest.raises(AIServiceException):
+            await generate_action_plans_batch(_issues(2))
+
+
+@pytest.mark.asyncio
+async def test_queue_hands_batch_handler_several_jobs(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    queue = JobQueue(workers=1, poll_interval=0.02, session_factory=sessionmaker(bind=engine))
+    batches = []
+
+    async def handler(payloads):
+        batches.append([payload["n"] for payload in payloads])
+        return [None] * len(payloads)
+
+    queue.register_batch("plan", handler, max_batch=4)
+    job_ids = [queue.enqueue("plan", {"n": n}) for n in range(6)]
+    await queue.start()
+    for _ in range(100):
+        if all(queue.get_job(job_id)["status"] == JOB_SUCCEEDED for job_id in job_ids):
+            break
+        await asyncio.sleep(0.02)
+    await queue.stop()
+    engine.dispose()
+
+    assert batches == [[0, 1, 2, 3], [4, 5]]
+    assert queue.get_stats()["batches"] == 2
+
+
+@pytest.mark.asyncio
+async def test_action_plan_job_stores_plans_and_reports_failures():
+    from backend.database import SessionLocal, engine
+    from backend.models import Issue
+    from backend.tasks import generate_action_plans_job
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    issues = [Issue(description=f"Overflowing bin {i}", category="Garbage", source="web") for i in range(3)]
+    db.add_all(issues)
+    db.commit()
+    ids = [issue.id for issue in issues]
+    db.close()
+
+    payloads = [{"issue_id": issue_id, "description": "Overflowing bin", "category": "Garbage"} for issue_id in ids]
+    payloads.append({"issue_id": 999999999, "description": "Deleted issue", "category": "Garbage"})
+    failure = AIServiceException("plan failed")
+
+    async def fake_batch(pending, max_retries=0):
+        assert [payload["issue_id"] for payload in pending] == ids
+        return [_plan(1), failure, _plan(3)]
+
+    with patch("backend.tasks.generate_action_plans_batch", fake_batch):
+        outcomes = await generate_action_plans_job(payloads)
+
+    assert outcomes == [None, failure, None, None]
+    db = SessionLocal()
+    stored = {issue.id: issue.action_plan for issue in db.query(Issue).filter(Issue.id.in_(ids))}
+    db.close()
+    assert stored[ids[0]]["whatsapp"] == "WhatsApp 1"
+    assert stored[ids[1]] is None
+    assert stored[ids[2]]["whatsapp"] == "WhatsApp 3"
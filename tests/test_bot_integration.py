@@ -188,5 +188,34 @@ class TestBotErrorHandling:
         assert True
 
 
+class TestBotIssueStorage:
+    """Test that bot-reported issues reach the in-memory issue structures"""
+
+    def test_saved_issue_is_indexed(self):
+        from unittest.mock import patch
+        from backend.models import Base
+        from backend.database import engine
+
+        Base.metadata.create_all(bind=engine)
+        with patch.object(bot, "index_new_issue") as index_new_issue:
+            issue_id = bot.save_issue_to_db("Broken streetlight on MG Road", "Streetlight", None)
+
+        index_new_issue.assert_called_once()
+        assert index_new_issue.call_args[0][0].id == issue_id
+
+    def test_reported_issue_is_assigned_to_a_cluster(self):
+        from types import SimpleNamespace
+        from unittest.mock import AsyncMock, patch
+
+        update = SimpleNamespace(message=SimpleNamespace(text="Garbage", reply_text=AsyncMock()))
+        context = SimpleNamespace(user_data={"description": "Garbage pile near the market", "photo_path": None})
+        with patch.object(bot, "save_issue_to_db", return_value=42), \
+             patch.object(bot, "assign_issue_cluster_background") as assign:
+            asyncio.run(bot.receive_category(update, context))
+
+        assign.assert_called_once_with(42)
+        assert "#42" in update.message.reply_text.call_args[0][0]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
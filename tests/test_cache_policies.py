@@ -0,0 +1,140 @@
+"""
+Tests for ThreadSafeCache eviction policies and lazy expiry.
+"""
+import threading
+import time
+
+import pytest
+
+from backend.cache import ThreadSafeCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ThreadSafeCache(ttl=60, max_size=3, eviction_policy="lru")
+    for key in ("a", "b", "c"):
+        cache.set(key.upper(), key)
+    cache.get("a")
+    cache.set("D", "d")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_lfu_keeps_frequently_used_entries():
+    cache = ThreadSafeCache(ttl=60, max_size=3, eviction_policy="lfu")
+    for key in ("a", "b", "c"):
+        cache.set(key.upper(), key)
+    for _ in range(3):
+        cache.get("a")
+        cache.get("c")
+    cache.set("D", "d")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+
+
+def test_lfu_decay_lets_stale_favourites_go():
+    cache = ThreadSafeCache(ttl=60, max_size=2, eviction_policy="lfu")
+    cache.set("old", "old")
+    for _ in range(6):
+        cache.get("old")
+    cache.set("new", "new")
+    # Enough accesses to trigger several halvings (decay interval is 10 * max_size)
+    for _ in range(60):
+        cache.get("new")
+    cache.set("newest", "newest")
+
+    assert cache.get("old") is None
+    assert cache.get("new") == "new"
+
+
+def test_tinylfu_rejects_one_hit_wonders():
+    cache = ThreadSafeCache(ttl=60, max_size=2, eviction_policy="tinylfu")
+    cache.set("hot1", "hot1")
+    cache.set("hot2", "hot2")
+    for _ in range(5):
+        cache.get("hot1")
+        cache.get("hot2")
+
+    cache.set("scan", "scan")
+    assert cache.get("scan") is None
+    assert cache.get_stats()["admission_rejections"] == 1
+
+    # A key that keeps being requested eventually earns admission
+    for _ in range(10):
+        cache.get("popular")
+    cache.set("popular", "popular")
+    assert cache.get("popular") == "popular"
+
+
+def test_expired_entries_are_dropped_lazily():
+    cache = ThreadSafeCache(ttl=0.05, max_size=10)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    time.sleep(0.06)
+
+    assert cache.get_stats()["expired_entries"] == 2
+    cache.set(3, "c")
+    stats = cache.get_stats()
+    assert stats["total_entries"] == 1
+    assert stats["expired_entries"] == 0
+    assert cache.get("a") is None
+    assert stats["expirations"] == 2
+
+
+def test_expiry_on_read_and_patch_is_counted_like_cleanup():
+    cache = ThreadSafeCache(ttl=0.05, max_size=10)
+    cache.set("a", 1, tags=("t",))
+    cache.set("b", 2, tags=("t",))
+    cache.set("c", 3, tags=("t",))
+    time.sleep(0.06)
+
+    assert cache.get(1) is None  # dropped on read
+    assert not cache.update(2, lambda value: value + "!")  # dropped on an in-place patch
+    cache.set("d", 4)  # drops the last one during cleanup
+
+    stats = cache.get_stats()
+    assert stats["expirations"] == 3
+    assert stats["evictions"] == 0  # capacity evictions only
+    assert stats["tags"]["t"]["evictions"] == 3
+
+
+def test_overwrite_refreshes_ttl_order():
+    cache = ThreadSafeCache(ttl=0.05, max_size=10)
+    cache.set(1, "a")
+    cache.set(1, "b")
+    time.sleep(0.03)
+    cache.set(2, "a")
+    time.sleep(0.03)
+    cache.set(1, "c")  # Expires "b" from the front of the write order
+
+    assert cache.get("a") == 2
+    assert cache.get("b") is None
+    assert cache.get_stats()["total_entries"] == 2
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        ThreadSafeCache(eviction_policy="fifo")
+
+
+@pytest.mark.parametrize("policy", ["lru", "lfu", "tinylfu"])
+def test_concurrent_access_keeps_size_bounded(policy):
+    cache = ThreadSafeCache(ttl=60, max_size=50, eviction_policy=policy)
+
+    def worker(offset):
+        for i in range(2000):
+            key = f"k{(i * 7 + offset) % 200}"
+            if cache.get(key) is None:
+                cache.set(i, key)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = cache.get_stats()
+    assert stats["total_entries"] <= 50
+    assert stats["hits"] + stats["misses"] == 16000
@@ -0,0 +1,88 @@
+"""
+Tests for tag-based invalidation and per-tag statistics in ThreadSafeCache.
+"""
+import datetime
+from unittest.mock import MagicMock
+
+from backend.cache import ThreadSafeCache, recent_issues_cache, issue_tag, RECENT_ISSUES_TAG, STATS_TAG
+from backend.routers.issues import _invalidate_caches_for_new_issue
+
+
+def test_invalidate_tags_only_drops_tagged_keys():
+    cache = ThreadSafeCache(ttl=60, max_size=10)
+    cache.set([1, 2], "recent_issues_10_0", tags=(RECENT_ISSUES_TAG, issue_tag(1), issue_tag(2)))
+    cache.set([3], "recent_issues_10_10", tags=(RECENT_ISSUES_TAG, issue_tag(3)))
+    cache.set({"total_issues": 3}, "stats", tags=(STATS_TAG,))
+
+    assert cache.invalidate_tags(issue_tag(2)) == 1
+    assert cache.get("recent_issues_10_0") is None
+    assert cache.get("recent_issues_10_10") == [3]
+
+    assert cache.invalidate_tags(RECENT_ISSUES_TAG) == 1
+    assert cache.get("stats") == {"total_issues": 3}
+
+
+def test_retagging_a_key_replaces_old_tags():
+    cache = ThreadSafeCache(ttl=60, max_size=10)
+    cache.set("old", "page", tags=(issue_tag(1),))
+    cache.set("new", "page", tags=(issue_tag(2),))
+
+    assert cache.invalidate_tags(issue_tag(1)) == 0
+    assert cache.get("page") == "new"
+
+
+def test_update_patches_in_place():
+    cache = ThreadSafeCache(ttl=60, max_size=10)
+    cache.set({"total_issues": 1}, "stats")
+
+    assert cache.update("stats", lambda s: {**s, "total_issues": s["total_issues"] + 1})
+    assert cache.get("stats") == {"total_issues": 2}
+    assert not cache.update("missing", lambda s: s)
+
+
+def test_per_tag_hit_miss_and_eviction_counts():
+    cache = ThreadSafeCache(ttl=60, max_size=2)
+    cache.set("a", "page_a", tags=(RECENT_ISSUES_TAG,))
+    cache.get("page_a")
+    cache.invalidate_tags(RECENT_ISSUES_TAG)
+    cache.get("page_a")
+
+    cache.set("s", "stats", tags=(STATS_TAG,))
+    cache.set("x", "other1")
+    cache.set("y", "other2")  # Full: evicts the least used entry
+
+    stats = cache.get_stats()
+    assert stats["tags"][RECENT_ISSUES_TAG]["hits"] == 1
+    assert stats["tags"][RECENT_ISSUES_TAG]["misses"] == 1
+    assert stats["tags"][RECENT_ISSUES_TAG]["invalidations"] == 1
+    assert stats["tags"][STATS_TAG]["evictions"] == 1
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_new_issue_keeps_stats_and_anonymous_leaderboard():
+    recent_issues_cache.clear()
+    recent_issues_cache.set([{"id": 1}], "recent_issues_10_0", tags=(RECENT_ISSUES_TAG, issue_tag(1)))
+    recent_issues_cache.set({
+        "total_issues": 4,
+        "resolved_issues": 1,
+        "pending_issues": 3,
+        "issues_by_category": {"Road": 4}
+    }, "stats", tags=(STATS_TAG,))
+    recent_issues_cache.set({"leaderboard": []}, "leaderboard", tags=("leaderboard",))
+
+    issue = MagicMock(category="Water", user_email=None, created_at=datetime.datetime(2024, 1, 1))
+    _invalidate_caches_for_new_issue(issue)
+
+    assert recent_issues_cache.get("recent_issues_10_0") is None
+    assert recent_issues_cache.get("leaderboard") == {"leaderboard": []}
+    assert recent_issues_cache.get("stats") == {
+        "total_issues": 5,
+        "resolved_issues": 1,
+        "pending_issues": 4,
+        "issues_by_category": {"Road": 4, "Water": 1}
+    }
+
+    issue.user_email = "citizen@example.com"
+    _invalidate_caches_for_new_issue(issue)
+    assert recent_issues_cache.get("leaderboard") is None
+    recent_issues_cache.clear()
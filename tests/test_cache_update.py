@@ -8,7 +8,7 @@ from fastapi.testclient import TestClient
 os.environ["AI_SERVICE_TYPE"] = "mock"
 
 from backend.main import app
-from backend.cache import recent_issues_cache
+from backend.cache import recent_issues_cache, RECENT_ISSUES_TAG
 
 client = TestClient(app)
 
@@ -19,6 +19,7 @@ def test_cache_invalidation_behavior():
     # Create a mock for the cache methods
     # We patch the object methods on the actual instance
     with patch.object(recent_issues_cache, 'clear') as mock_clear, \
+         patch.object(recent_issues_cache, 'invalidate_tags') as mock_invalidate_tags, \
          patch.object(recent_issues_cache, 'set') as mock_set, \
          patch.object(recent_issues_cache, 'get') as mock_get:
 
@@ -77,13 +78,14 @@ def test_cache_invalidation_behavior():
 
         assert response.status_code == 201
 
-        # NEW BEHAVIOR CHECK (After Pagination Update):
-        # We now clear cache instead of optimistic update
+        # NEW BEHAVIOR CHECK (After Tag-based Invalidation):
+        # Only the paginated recent-issues entries are dropped; stats are patched in place
 
-        assert mock_clear.called, "Cache should be cleared"
+        assert not mock_clear.called, "Cache should not be cleared wholesale"
+        mock_invalidate_tags.assert_any_call(RECENT_ISSUES_TAG)
         assert not mock_set.called, "Cache.set should NOT be called (optimistic update removed)"
 
-        print("\n[Success] Cache behavior verified: Cleared cache for pagination consistency.")
+        print("\n[Success] Cache behavior verified: Invalidated recent-issues pages for pagination consistency.")
 
 if __name__ == "__main__":
     # verification via running with pytest
@@ -0,0 +1,166 @@
+"""
+Tests for the streaming civic chat (server-sent events).
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import ai_interfaces, ai_service
+from backend.exceptions import AIServiceException
+from backend.mock_services import (
+    create_mock_action_plan_service,
+    create_mock_chat_service,
+    create_mock_mla_summary_service
+)
+from backend.schemas import ChatRequest
+
+
+class StubStream:
+    """Stand-in for AsyncGenerateContentResponse, recording whether it was cut short."""
+
+    def __init__(self, texts, delay=0.0):
+        self.texts = texts
+        self.delay = delay
+        self.closed_early = False
+        self._iterator = SimpleNamespace(cancelled=False)
+        self._iterator.cancel = lambda: setattr(self._iterator, "cancelled", True)
+
+    async def __aiter__(self):
+        finished = False
+        try:
+            for text in self.texts:
+                await asyncio.sleep(self.delay)
+                yield SimpleNamespace(text=text)
+            finished = True
+        finally:
+            self.closed_early = not finished
+
+
+class StreamingModel:
+    def __init__(self, stream):
+        self.stream = stream
+        self.calls = 0
+
+    async def generate_content_async(self, prompt, stream=False):
+        assert stream
+        self.calls += 1
+        return self.stream
+
+
+@pytest.fixture(autouse=True)
+def clear_chat_cache():
+    ai_service.chat_cache.clear()
+    yield
+    ai_service.chat_cache.clear()
+
+
+@pytest.fixture
+def mock_chat_service():
+    previous = ai_interfaces._ai_services
+    chat_service = create_mock_chat_service()
+    ai_interfaces.initialize_ai_services(
+        create_mock_action_plan_service(), chat_service, create_mock_mla_summary_service()
+    )
+    yield chat_service
+    ai_interfaces._ai_services = previous
+
+
+def _events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines.get("event", "message"), json.loads(lines["data"])))
+    return events
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_chunks_and_fills_cache():
+    model = StreamingModel(StubStream(["Use the ", "Report Issue ", "button."]))
+    with patch.object(ai_service, "_get_gemini_model", return_value=model):
+        chunks = [chunk async for chunk in ai_service.stream_chat_with_civic_assistant("How do I report a pothole?")]
+        cached = [chunk async for chunk in ai_service.stream_chat_with_civic_assistant("how to report pothole")]
+
+    assert chunks == ["Use the ", "Report Issue ", "button."]
+    assert cached == ["Use the Report Issue button."]
+    assert model.calls == 1
+    assert await ai_service.chat_with_civic_assistant("how to report a pothole") == "Use the Report Issue button."
+
+
+@pytest.mark.asyncio
+async def test_closing_stream_cancels_upstream_and_skips_cache():
+    stream = StubStream(["first ", "second ", "third"])
+    with patch.object(ai_service, "_get_gemini_model", return_value=StreamingModel(stream)):
+        chunks = ai_service.stream_chat_with_civic_assistant("garbage pickup timings")
+        assert await chunks.__anext__() == "first "
+        await chunks.aclose()
+
+    assert stream.closed_early
+    assert stream._iterator.cancelled
+    assert ai_service.chat_cache.get("garbage pickup timings") is None
+
+
+@pytest.mark.asyncio
+async def test_cancelled_consumer_cancels_upstream():
+    stream = StubStream(["a", "b", "c"], delay=5)
+    with patch.object(ai_service, "_get_gemini_model", return_value=StreamingModel(stream)):
+        async def consume():
+            return [chunk async for chunk in ai_service.stream_chat_with_civic_assistant("water supply")]
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    assert stream.closed_early
+    assert stream._iterator.cancelled
+
+
+def test_stream_endpoint_sends_server_sent_events(mock_chat_service):
+    from backend.main import app
+
+    response = TestClient(app).post("/api/chat/stream", json={"query": "Where do I pay water bills?"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response.text)
+    assert events[-1] == ("done", {})
+    text = "".join(data["delta"] for event, data in events[:-1])
+    assert text.startswith("Mock response to: Where do I pay water bills?")
+    assert len(events) > 3
+    assert mock_chat_service.streams_cancelled == 0
+
+
+@pytest.mark.asyncio
+async def test_disconnect_stops_service_stream(mock_chat_service):
+    from backend.routers.utility import chat_stream_endpoint
+
+    response = await chat_stream_endpoint(ChatRequest(query="Streetlight not working"))
+    body = response.body_iterator
+    first = await body.__anext__()
+    # Starlette cancels the body iterator when the client disconnects; closing it is equivalent
+    await body.aclose()
+
+    assert first.startswith("data: ")
+    assert mock_chat_service.streams_started == 1
+    assert mock_chat_service.streams_cancelled == 1
+
+
+def test_stream_failure_is_reported_as_error_event(mock_chat_service):
+    from backend.main import app
+
+    async def failing_stream(query, language="en"):
+        yield "partial"
+        raise AIServiceException("Chat stream interrupted", service="Gemini")
+
+    with patch.object(mock_chat_service, "chat_stream", failing_stream):
+        response = TestClient(app).post("/api/chat/stream", json={"query": "hello"})
+
+    assert _events(response.text) == [
+        ("message", {"delta": "partial"}),
+        ("error", {"detail": "Chat service temporarily unavailable"})
+    ]
@@ -0,0 +1,142 @@
+"""
+Tests for the single-request CLIP scan across all zero-shot detectors.
+"""
+import io
+import math
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from backend.hf_api_service import (
+    CLIP_DETECTORS,
+    detect_civic_eye_clip,
+    detect_fire_clip,
+    detect_smart_scan_clip,
+    query_clip_label_groups,
+    scan_all_clip,
+)
+
+
+def _image_bytes():
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), color="orange").save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def _fake_clip_client(logits):
+    """HTTP client mock answering like the HF zero-shot API: softmax over the requested labels."""
+    client = AsyncMock()
+
+    async def post(url, headers=None, json=None, timeout=None):
+        labels = json["parameters"]["candidate_labels"]
+        weights = [math.exp(logits.get(label, 0.0)) for label in labels]
+        total = sum(weights)
+        ranked = sorted(
+            ({"label": label, "score": weight / total} for label, weight in zip(labels, weights)),
+            key=lambda res: res["score"], reverse=True
+        )
+        response = MagicMock()
+        response.status_code = 200
+        response.json.return_value = ranked
+        return response
+
+    client.post.side_effect = post
+    return client
+
+
+LOGITS = {"fire": 6.0, "smoke": 4.0, "rat": 5.0, "normal scene": 1.0, "fire accident": 7.0, "unsafe area": 3.0}
+
+
+@pytest.mark.asyncio
+async def test_union_request_matches_separate_requests():
+    client = _fake_clip_client(LOGITS)
+    groups = {name: labels for name, (labels, _) in CLIP_DETECTORS.items()}
+
+    split = await query_clip_label_groups(_image_bytes(), groups, client=client)
+
+    assert client.post.await_count == 1
+    requested = client.post.await_args.kwargs["json"]["parameters"]["candidate_labels"]
+    assert len(requested) == len(set(requested))
+
+    single_client = _fake_clip_client(LOGITS)
+    for name, labels in groups.items():
+        single = await query_clip_label_groups(_image_bytes(), {name: labels}, client=single_client)
+        assert [res["label"] for res in split[name]] == [res["label"] for res in single[name]]
+        for combined, alone in zip(split[name], single[name]):
+            assert combined["score"] == pytest.approx(alone["score"])
+        assert sum(res["score"] for res in split[name]) == pytest.approx(1.0)
+
+
+@pytest.mark.asyncio
+async def test_scan_all_matches_individual_detectors():
+    client = _fake_clip_client(LOGITS)
+
+    results = await scan_all_clip(_image_bytes(), client=client)
+
+    assert client.post.await_count == 1
+    assert set(results) == set(CLIP_DETECTORS)
+    assert results["fire"] == await detect_fire_clip(_image_bytes(), client=_fake_clip_client(LOGITS))
+    assert [d["label"] for d in results["pest"]] == ["rat"]
+    assert results["traffic-sign"] == []
+
+
+@pytest.mark.asyncio
+async def test_scan_all_subset_and_unknown_detector():
+    client = _fake_clip_client(LOGITS)
+
+    results = await scan_all_clip(_image_bytes(), client=client, detectors=["fire"])
+
+    assert list(results) == ["fire"]
+    requested = client.post.await_args.kwargs["json"]["parameters"]["candidate_labels"]
+    assert requested == CLIP_DETECTORS["fire"][0]
+    with pytest.raises(ValueError):
+        await scan_all_clip(_image_bytes(), client=client, detectors=["teleporter"])
+
+
+@pytest.mark.asyncio
+async def test_scan_all_api_error_returns_no_detections():
+    client = AsyncMock()
+    client.post.return_value = MagicMock(status_code=503, text="loading")
+
+    results = await scan_all_clip(_image_bytes(), client=client)
+
+    assert all(detections == [] for detections in results.values())
+
+
+@pytest.mark.asyncio
+async def test_smart_scan_and_civic_eye_use_one_request():
+    client = _fake_clip_client(LOGITS)
+    smart = await detect_smart_scan_clip(_image_bytes(), client=client)
+    assert client.post.await_count == 1
+    assert smart["category"] == "fire accident"
+    assert [d["label"] for d in smart["detections"]["fire"]] == ["fire"]
+
+    client = _fake_clip_client(LOGITS)
+    civic = await detect_civic_eye_clip(_image_bytes(), client=client)
+    assert client.post.await_count == 1
+    assert civic["safety"]["status"] == "unsafe area"
+    assert "pest" in civic["issues"]
+
+
+def test_scan_all_endpoint():
+    from backend.main import app
+    from backend.routers import detection
+    from backend.detection_cache import detection_cache
+
+    detection_cache.clear()
+    client = TestClient(app)
+    mock_http = _fake_clip_client(LOGITS)
+    files = {"image": ("scene.jpg", _image_bytes(), "image/jpeg")}
+
+    with patch.object(detection, "get_http_client", return_value=mock_http):
+        response = client.post("/api/detect-scan-all?detectors=fire,pest", files=files)
+        assert response.status_code == 200
+        assert set(response.json()["detections"]) == {"fire", "pest"}
+        assert mock_http.post.await_count == 1
+
+        response = client.post("/api/detect-scan-all?detectors=fire,teleporter", files=files)
+        assert response.status_code == 400
+
+    detection_cache.clear()
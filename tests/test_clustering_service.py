@@ -0,0 +1,147 @@
+"""
+Tests for the incremental clustering service and the /api/clusters endpoint.
+"""
+import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.database import Base, get_db
+from backend.main import app
+from backend.models import Issue
+from backend.clustering_service import IncrementalClusterService, load_clusters
+from backend.spatial_utils import cluster_issues_dbscan
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine, tables=[Issue.__table__])
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def add_issue(db, lat, lon, status="open", upvotes=0):
+    issue = Issue(
+        description="Pothole near the market",
+        category="Road",
+        latitude=lat,
+        longitude=lon,
+        status=status,
+        upvotes=upvotes,
+        created_at=datetime.datetime(2024, 1, 1)
+    )
+    db.add(issue)
+    db.commit()
+    db.refresh(issue)
+    return issue
+
+
+def test_warm_assigns_existing_issues(db):
+    a = add_issue(db, 19.07600, 72.87770)
+    b = add_issue(db, 19.07610, 72.87770)   # ~11m from a
+    c = add_issue(db, 19.08600, 72.88770)   # far away
+
+    service = IncrementalClusterService(eps_meters=30)
+    service.warm(db)
+
+    db.expire_all()
+    assert service.is_warm
+    assert a.cluster_id == b.cluster_id
+    assert c.cluster_id != a.cluster_id
+
+
+def test_new_issue_joins_or_starts_cluster(db):
+    service = IncrementalClusterService(eps_meters=30)
+    a = add_issue(db, 19.07600, 72.87770)
+    service.warm(db)
+
+    near = add_issue(db, 19.07615, 72.87770)
+    far = add_issue(db, 19.09000, 72.89000)
+
+    assert service.assign_issue(db, near) == service.cluster_of(a.id)
+    assert service.assign_issue(db, far) != service.cluster_of(a.id)
+
+
+def test_bridging_issue_merges_clusters(db):
+    service = IncrementalClusterService(eps_meters=30)
+    service.warm(db)
+
+    left = add_issue(db, 19.07600, 72.87770)
+    right = add_issue(db, 19.07650, 72.87770)  # ~55m from left
+    left_cluster = service.assign_issue(db, left)
+    right_cluster = service.assign_issue(db, right)
+    assert left_cluster != right_cluster
+
+    bridge = add_issue(db, 19.07625, 72.87770)  # ~28m from both
+    merged = service.assign_issue(db, bridge)
+
+    db.expire_all()
+    assert merged == min(left_cluster, right_cluster)
+    assert left.cluster_id == right.cluster_id == bridge.cluster_id == merged
+
+
+def test_assignment_matches_dbscan(db):
+    points = [
+        (19.07600, 72.87770), (19.07620, 72.87770), (19.07640, 72.87770),
+        (19.08000, 72.88000), (19.08010, 72.88010), (19.09000, 72.89000)
+    ]
+    service = IncrementalClusterService(eps_meters=30)
+    service.warm(db)
+    issues = [add_issue(db, lat, lon) for lat, lon in points]
+    for issue in issues:
+        service.assign_issue(db, issue)
+
+    incremental = sorted(
+        sorted(i.id for i in issues if service.cluster_of(i.id) == cid)
+        for cid in {service.cluster_of(i.id) for i in issues}
+    )
+    batch = sorted(sorted(i.id for i in cluster) for cluster in cluster_issues_dbscan(issues, eps_meters=30))
+
+    assert incremental == batch
+
+
+def test_resolved_issue_stops_attracting_members(db):
+    service = IncrementalClusterService(eps_meters=30)
+    service.warm(db)
+    a = add_issue(db, 19.07600, 72.87770)
+    cluster = service.assign_issue(db, a)
+
+    service.update_status(a.id, "resolved")
+    b = add_issue(db, 19.07605, 72.87770)
+
+    assert service.assign_issue(db, b) != cluster
+
+
+def test_clusters_endpoint(db):
+    service = IncrementalClusterService(eps_meters=30)
+    add_issue(db, 19.07600, 72.87770, upvotes=1)
+    top = add_issue(db, 19.07610, 72.87770, upvotes=4)
+    add_issue(db, 19.09000, 72.89000)
+    service.warm(db)
+
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        client = TestClient(app)
+        response = client.get("/api/clusters", params={"min_size": 2})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 1
+    assert data[0]["size"] == 2
+    assert data[0]["representative"]["id"] == top.id
+    assert abs(data[0]["centroid_latitude"] - 19.07605) < 1e-6
+    assert len(load_clusters(db, min_size=1)) == 2
@@ -0,0 +1,121 @@
+"""
+Tests for multi-category detection from a single general-model inference.
+"""
+import io
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from backend import inference_scheduler, local_ml_service
+from backend.image_envelope import decode_image_envelope
+
+
+def _box(cls_id, conf, xyxy):
+    box = MagicMock()
+    box.cls = [MagicMock(cpu=lambda: MagicMock(numpy=lambda: np.array(cls_id)))]
+    box.conf = [MagicMock(cpu=lambda: MagicMock(numpy=lambda: np.array(conf)))]
+    box.xyxy = [MagicMock(cpu=lambda: MagicMock(numpy=lambda: np.array(xyxy)))]
+    return box
+
+
+def _model():
+    result = MagicMock()
+    result.names = {0: "person", 1: "stop sign", 2: "car"}
+    result.boxes = [
+        _box(0, 0.9, [0, 0, 10, 10]),
+        _box(1, 0.8, [10, 10, 20, 20]),
+        _box(2, 0.7, [0, 50, 60, 90]),
+    ]
+    model = MagicMock()
+    model.predict.side_effect = lambda images, stream=False: [result for _ in images] if isinstance(images, list) else [result]
+    return model
+
+
+def _envelope(color="red"):
+    buffer = io.BytesIO()
+    Image.new("RGB", (100, 100), color=color).save(buffer, format="JPEG")
+    return decode_image_envelope(buffer.getvalue())
+
+
+@pytest.fixture(autouse=True)
+def clear_raw_box_cache():
+    local_ml_service._raw_box_cache.clear()
+    # Other tests import local_ml_service under a second module name; start from a fresh scheduler
+    inference_scheduler._schedulers.pop("general", None)
+    yield
+    local_ml_service._raw_box_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_multi_detection_runs_model_once():
+    model = _model()
+    with patch.object(local_ml_service, "get_general_model", return_value=model):
+        results = await local_ml_service.detect_multi_local(_envelope())
+
+    assert model.predict.call_count == 1
+    assert set(results) == {"vandalism", "infrastructure", "flooding"}
+    assert [d["label"] for d in results["vandalism"]] == ["vandalism activity", "potential vandalism", "potential vandalism"]
+    assert [d["label"] for d in results["infrastructure"]] == ["damaged sign", "infrastructure object"]
+    # Only the car's box reaches below 60% of the 100px image
+    assert [d["box"] for d in results["flooding"]] == [[0, 50, 60, 90]]
+
+
+@pytest.mark.asyncio
+async def test_single_category_detectors_reuse_cached_boxes():
+    model = _model()
+    envelope = _envelope()
+    with patch.object(local_ml_service, "get_general_model", return_value=model):
+        await local_ml_service.detect_vandalism_local(envelope)
+        await local_ml_service.detect_infrastructure_local(envelope)
+        await local_ml_service.detect_flooding_local(envelope)
+        # A re-upload of the same bytes hashes to the same key
+        await local_ml_service.detect_multi_local(_envelope(), categories=("flooding",))
+
+    assert model.predict.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_different_images_are_inferred_separately():
+    model = _model()
+    with patch.object(local_ml_service, "get_general_model", return_value=model):
+        await local_ml_service.detect_multi_local(_envelope("red"))
+        await local_ml_service.detect_multi_local(_envelope("blue"))
+
+    assert model.predict.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_multi_detection_without_model_returns_empty_categories():
+    with patch.object(local_ml_service, "get_general_model", return_value=None):
+        results = await local_ml_service.detect_multi_local(_envelope(), categories=("vandalism",))
+
+    assert results == {"vandalism": []}
+
+
+def _upload():
+    buffer = io.BytesIO()
+    Image.new("RGB", (100, 100), color="red").save(buffer, format="JPEG")
+    return {"image": ("test.jpg", buffer.getvalue(), "image/jpeg")}
+
+
+def test_detect_multi_endpoint():
+    from backend.main import app
+
+    detections = {"vandalism": [], "flooding": [{"label": "potential flooding", "confidence": 0.3, "box": [0, 0, 1, 1]}]}
+    with patch("backend.routers.detection.detect_multi_unified", return_value=detections) as mock_detect:
+        response = TestClient(app).post("/api/detect-multi?categories=vandalism,flooding", files=_upload())
+
+    assert response.status_code == 200
+    assert response.json() == {"detections": detections}
+    assert mock_detect.call_args.args[1] == ("vandalism", "flooding")
+
+
+def test_detect_multi_endpoint_rejects_unknown_category():
+    from backend.main import app
+
+    response = TestClient(app).post("/api/detect-multi?categories=vandalism,potholes", files=_upload())
+
+    assert response.status_code == 400
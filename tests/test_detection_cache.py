@@ -0,0 +1,311 @@
+"""
+Tests for the content-addressed detection result cache.
+"""
+import io
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from backend.detection_cache import DetectionResultCache, detection_cache, is_empty_result
+from backend.image_envelope import decode_image_envelope
+
+
+def _envelope(color="red", exif=None):
+    buffer = io.BytesIO()
+    kwargs = {"exif": exif} if exif is not None else {}
+    Image.new("RGB", (64, 64), color=color).save(buffer, format="PNG", **kwargs)
+    return decode_image_envelope(buffer.getvalue())
+
+
+def _counting(result):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return result
+
+    return compute, calls
+
+
+@pytest.fixture(autouse=True)
+def clear_global_cache():
+    detection_cache.clear()
+    yield
+    detection_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_repeated_image_hits_memory():
+    cache = DetectionResultCache()
+    compute, calls = _counting([{"label": "pothole", "confidence": 0.9}])
+
+    first = await cache.get_or_compute("pothole", _envelope(), compute)
+    second = await cache.get_or_compute("pothole", _envelope(), compute)
+
+    assert first == second == [{"label": "pothole", "confidence": 0.9}]
+    assert len(calls) == 1
+    stats = cache.get_stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_key_includes_detector_and_model_version():
+    cache = DetectionResultCache()
+    compute, calls = _counting([{"label": "x"}])
+    envelope = _envelope()
+
+    await cache.get_or_compute("pothole", envelope, compute)
+    await cache.get_or_compute("garbage", envelope, compute)
+    await cache.get_or_compute("pothole", envelope, compute, model_version="2")
+
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_metadata_only_difference_shares_key():
+    cache = DetectionResultCache()
+    compute, calls = _counting([{"label": "graffiti"}])
+    exif = Image.Exif()
+    exif[0x010F] = "Camera Maker"
+
+    await cache.get_or_compute("graffiti", _envelope(), compute)
+    await cache.get_or_compute("graffiti", _envelope(exif=exif), compute)
+    await cache.get_or_compute("graffiti", _envelope(color="blue"), compute)
+
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_cached_value_is_not_shared_with_callers():
+    cache = DetectionResultCache()
+    compute, _ = _counting([{"label": "flood"}])
+
+    result = await cache.get_or_compute("flooding", b"image", compute)
+    result.append({"label": "mutated"})
+
+    assert await cache.get_or_compute("flooding", b"image", compute) == [{"label": "flood"}]
+
+
+@pytest.mark.asyncio
+async def test_byte_budget_evicts_least_recently_used():
+    cache = DetectionResultCache(max_bytes=800)
+    payload = [{"label": "a" * 80}]
+
+    for key in (b"one", b"two", b"three"):
+        await cache.get_or_compute("vandalism", key, _counting(payload)[0])
+    # Touch "one" so "two" is the eviction victim
+    await cache.get_or_compute("vandalism", b"one", _counting(payload)[0])
+    for key in (b"four", b"five", b"six", b"seven", b"eight", b"nine", b"ten", b"eleven"):
+        await cache.get_or_compute("vandalism", key, _counting(payload)[0])
+
+    stats = cache.get_stats()
+    assert stats["bytes"] <= 800
+    assert stats["evictions"] > 0
+    compute, calls = _counting(payload)
+    await cache.get_or_compute("vandalism", b"two", compute)
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_oversized_results_are_not_kept():
+    cache = DetectionResultCache(max_bytes=800)
+    compute, calls = _counting([{"label": "a" * 200}])
+
+    await cache.get_or_compute("smart-scan", b"big", compute)
+    await cache.get_or_compute("smart-scan", b"big", compute)
+
+    assert len(calls) == 2
+    assert cache.get_stats()["oversized"] == 2
+
+
+@pytest.mark.asyncio
+async def test_ttl_and_shorter_empty_ttl():
+    cache = DetectionResultCache(ttl=100, empty_ttl=10)
+    found, found_calls = _counting([{"label": "pothole"}])
+    empty, empty_calls = _counting([])
+
+    with patch("backend.detection_cache.time.time", return_value=1000.0):
+        await cache.get_or_compute("pothole", b"found", found)
+        await cache.get_or_compute("pothole", b"empty", empty)
+
+    with patch("backend.detection_cache.time.time", return_value=1050.0):
+        await cache.get_or_compute("pothole", b"found", found)
+        await cache.get_or_compute("pothole", b"empty", empty)
+
+    with patch("backend.detection_cache.time.time", return_value=1200.0):
+        await cache.get_or_compute("pothole", b"found", found)
+
+    assert len(found_calls) == 2
+    assert len(empty_calls) == 2
+
+
+def test_failure_payloads_count_as_empty():
+    # What the CLIP detectors return on an API error or an open circuit
+    assert is_empty_result({"pothole": [], "fire": []})
+    assert is_empty_result({"error": "Analysis failed"})
+    assert is_empty_result({"category": "unknown", "confidence": 0})
+    assert is_empty_result({"level": "Unknown", "confidence": 0, "raw_label": "unknown"})
+
+    assert not is_empty_result({"pothole": [], "fire": [{"label": "fire", "confidence": 0.9}]})
+    assert not is_empty_result({"category": "pothole", "confidence": 0.8})
+    assert not is_empty_result({"safety": {"status": "safe", "score": 0.7}, "issues": {}})
+
+
+@pytest.mark.asyncio
+async def test_failure_payload_gets_empty_ttl_and_skips_disk(tmp_path):
+    cache = DetectionResultCache(ttl=100, empty_ttl=10, disk_path=str(tmp_path / "detections.db"))
+    outage, outage_calls = _counting({"pothole": [], "fire": []})
+
+    with patch("backend.detection_cache.time.time", return_value=1000.0):
+        await cache.get_or_compute("scan-all", b"img", outage)
+        await cache.get_or_compute("scan-all", b"img", outage)
+    with patch("backend.detection_cache.time.time", return_value=1050.0):
+        await cache.get_or_compute("scan-all", b"img", outage)
+
+    assert len(outage_calls) == 2
+    assert cache.get_stats()["disk"]["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_inference():
+    cache = DetectionResultCache()
+    calls = []
+
+    async def slow_compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return [{"label": "garbage"}]
+
+    results = await asyncio.gather(*(cache.get_or_compute("garbage", b"same", slow_compute) for _ in range(5)))
+
+    assert len(calls) == 1
+    assert all(result == [{"label": "garbage"}] for result in results)
+    assert cache.get_stats()["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_waiters_and_are_not_cached():
+    cache = DetectionResultCache()
+
+    async def failing():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("model crashed")
+
+    results = await asyncio.gather(
+        cache.get_or_compute("pothole", b"img", failing),
+        cache.get_or_compute("pothole", b"img", failing),
+        return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    compute, calls = _counting([{"label": "pothole"}])
+    assert await cache.get_or_compute("pothole", b"img", compute) == [{"label": "pothole"}]
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_waiter_takes_over_when_leader_is_cancelled():
+    cache = DetectionResultCache()
+    started = asyncio.Event()
+
+    async def hanging():
+        started.set()
+        await asyncio.sleep(10)
+
+    leader = asyncio.create_task(cache.get_or_compute("civic-eye", b"img", hanging))
+    await started.wait()
+    compute, calls = _counting({"safety": "ok"})
+    waiter = asyncio.create_task(cache.get_or_compute("civic-eye", b"img", compute))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await waiter == {"safety": "ok"}
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "detections.db")
+    compute, calls = _counting([{"label": "flood"}])
+    empty, empty_calls = _counting([])
+
+    first = DetectionResultCache(disk_path=path)
+    await first.get_or_compute("flooding", b"img", compute)
+    await first.get_or_compute("flooding", b"nothing", empty)
+
+    second = DetectionResultCache(disk_path=path)
+    assert await second.get_or_compute("flooding", b"img", compute) == [{"label": "flood"}]
+    # Empty results are only kept in memory
+    await second.get_or_compute("flooding", b"nothing", empty)
+
+    assert len(calls) == 1
+    assert len(empty_calls) == 2
+    stats = second.get_stats()
+    assert stats["disk_hits"] == 1
+    assert stats["disk"]["entries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_disabled_cache_always_computes():
+    cache = DetectionResultCache(enabled=False)
+    compute, calls = _counting([{"label": "x"}])
+
+    await cache.get_or_compute("pothole", b"img", compute)
+    await cache.get_or_compute("pothole", b"img", compute)
+
+    assert len(calls) == 2
+
+
+def test_repeated_upload_runs_detector_once():
+    from backend.main import app
+    from backend.routers import detection
+
+    client = TestClient(app)
+    buffer = io.BytesIO()
+    Image.new("RGB", (100, 100), color="gray").save(buffer, format="JPEG")
+    mock_detect = AsyncMock(return_value=[{"label": "graffiti", "confidence": 0.8, "box": []}])
+
+    with patch.object(detection, "detect_graffiti_art_clip", mock_detect):
+        for _ in range(3):
+            response = client.post(
+                "/api/detect-graffiti",
+                files={"image": ("test.jpg", buffer.getvalue(), "image/jpeg")}
+            )
+            assert response.status_code == 200
+            assert response.json()["detections"][0]["label"] == "graffiti"
+
+    mock_detect.assert_awaited_once()
+    assert client.get("/api/metrics/detection-cache").json()["memory_hits"] == 2
+
+
+def test_traffic_sign_cache_is_keyed_on_normalized_image():
+    from backend.main import app
+    from backend.routers import detection
+
+    client = TestClient(app)
+    exif = Image.Exif()
+    exif[0x010F] = "Camera Maker"
+    uploads = []
+    for kwargs in ({}, {"exif": exif}):
+        buffer = io.BytesIO()
+        Image.new("RGB", (100, 100), color="gray").save(buffer, format="PNG", **kwargs)
+        uploads.append(buffer.getvalue())
+    assert uploads[0] != uploads[1]
+    mock_detect = AsyncMock(return_value=[{"label": "damaged traffic sign", "confidence": 0.9, "box": []}])
+
+    # No lifespan, so no shared HTTP client; the detector is mocked anyway
+    with patch.object(detection, "detect_traffic_sign_clip", mock_detect), \
+            patch.object(detection, "get_http_client", return_value=None):
+        for upload in uploads:
+            response = client.post("/api/detect-traffic-sign", files={"image": ("sign.png", upload, "image/png")})
+            assert response.status_code == 200
+        # Not an image at all: rejected before any detection
+        invalid = client.post("/api/detect-traffic-sign", files={"image": ("sign.png", b"not an image", "image/png")})
+
+    mock_detect.assert_awaited_once()
+    assert invalid.status_code == 400
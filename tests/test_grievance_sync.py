@@ -6,9 +6,11 @@ from unittest.mock import patch, MagicMock
 # Set path
 sys.path.append(os.getcwd())
 
-from backend.models import Issue, Grievance, GrievanceStatus, Base, Jurisdiction, JurisdictionLevel
+from backend.models import Issue, Grievance, GrievanceStatus, Base, Jurisdiction, JurisdictionLevel, SeverityLevel
 from backend.database import SessionLocal, engine
 from backend.grievance_service import GrievanceService
+from backend.spatial_index import spatial_index
+from backend.clustering_service import cluster_service
 from datetime import datetime, timezone
 
 class TestGrievanceSync(unittest.TestCase):
@@ -92,5 +94,47 @@ class TestGrievanceSync(unittest.TestCase):
             self.db.refresh(issue)
             self.assertEqual(issue.status, "in_progress")
 
+    def test_status_change_updates_spatial_index(self):
+        issue = Issue(
+            description="Streetlight out near the station",
+            category="streetlight",
+            status="open",
+            latitude=19.0760,
+            longitude=72.8777
+        )
+        self.db.add(issue)
+        self.db.commit()
+        self.db.refresh(issue)
+        grievance = Grievance(
+            issue_id=issue.id,
+            unique_id="GRV-SYNC-INDEX",
+            category="streetlight",
+            severity=SeverityLevel.MEDIUM,
+            current_jurisdiction_id=self.jurisdiction.id,
+            assigned_authority="Ward Officer",
+            sla_deadline=datetime.now(timezone.utc),
+            status=GrievanceStatus.OPEN
+        )
+        self.db.add(grievance)
+        self.db.commit()
+
+        spatial_index.upsert(issue)
+        try:
+            with patch.object(cluster_service, "update_status") as update_cluster_status:
+                service = GrievanceService()
+                service.update_grievance_status(grievance.id, GrievanceStatus.IN_PROGRESS, self.db)
+                self.assertEqual(spatial_index._entries[issue.id].status, "in_progress")
+
+                # Resolved issues are no longer offered as duplicates
+                service.update_grievance_status(grievance.id, GrievanceStatus.RESOLVED, self.db)
+                self.assertNotIn(issue.id, spatial_index._entries)
+
+            self.assertEqual(
+                [c.args for c in update_cluster_status.call_args_list],
+                [(issue.id, "in_progress"), (issue.id, "resolved")]
+            )
+        finally:
+            spatial_index.remove(issue.id)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,177 @@
+"""
+Tests for the resilient HF client: concurrency limits, adaptive timeouts,
+circuit breaker and hedging.
+"""
+import time
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+
+from backend.exceptions import CircuitOpenException, ServiceUnavailableException
+from backend.hf_client import BreakerState, ResilientClient
+
+URL = "https://router.huggingface.co/models/openai/clip-vit-base-patch32"
+
+
+def _client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_fails_fast_and_recovers():
+    calls = []
+    status = {"code": 503}
+
+    async def handler(request):
+        calls.append(request)
+        return httpx.Response(status["code"], json=[])
+
+    resilient = ResilientClient(failure_threshold=3, cooldown=0.1)
+    async with _client(handler) as client:
+        for _ in range(3):
+            assert (await resilient.post(client, URL, json={})).status_code == 503
+
+        assert resilient.is_open(URL)
+        with pytest.raises(CircuitOpenException):
+            await resilient.post(client, URL, json={})
+        assert len(calls) == 3
+
+        # After the cooldown one probe goes out; success closes the breaker
+        await asyncio.sleep(0.15)
+        status["code"] = 200
+        assert (await resilient.post(client, URL, json={})).status_code == 200
+
+    endpoint = resilient.get_status()["endpoints"]["openai/clip-vit-base-patch32"]
+    assert endpoint["breaker"]["state"] == BreakerState.CLOSED.value
+    assert endpoint["breaker"]["times_opened"] == 1
+    assert endpoint["short_circuited"] == 1
+    assert endpoint["failures"] == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_probe_reopens_breaker():
+    async def handler(request):
+        raise httpx.ConnectError("connection refused")
+
+    resilient = ResilientClient(failure_threshold=2, cooldown=0.05)
+    async with _client(handler) as client:
+        for _ in range(2):
+            with pytest.raises(httpx.ConnectError):
+                await resilient.post(client, URL, json={})
+        await asyncio.sleep(0.06)
+        with pytest.raises(httpx.ConnectError):
+            await resilient.post(client, URL, json={})
+
+    assert resilient.is_open(URL)
+
+
+@pytest.mark.asyncio
+async def test_client_errors_do_not_trip_breaker():
+    async def handler(request):
+        return httpx.Response(400, json={"error": "bad input"})
+
+    resilient = ResilientClient(failure_threshold=2)
+    async with _client(handler) as client:
+        for _ in range(5):
+            await resilient.post(client, URL, json={})
+
+    assert not resilient.is_open(URL)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_rejects_after_queue_timeout():
+    async def handler(request):
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json=[])
+
+    resilient = ResilientClient(max_concurrency=2, queue_timeout=0.05)
+    async with _client(handler) as client:
+        results = await asyncio.gather(
+            *(resilient.post(client, URL, json={}) for _ in range(3)), return_exceptions=True
+        )
+
+    assert sum(isinstance(res, httpx.Response) for res in results) == 2
+    assert sum(isinstance(res, ServiceUnavailableException) for res in results) == 1
+    assert not resilient.is_open(URL)
+
+
+def test_timeout_adapts_to_observed_p95():
+    resilient = ResilientClient()
+    endpoint = resilient._endpoint(URL)
+
+    # Too few samples: the call site's limit applies
+    assert endpoint.timeout(20.0) == 20.0
+
+    endpoint.latencies.extend([0.5] * 95 + [1.5] * 5)
+    assert endpoint.timeout(20.0) == pytest.approx(1.5 * 3.0)
+    assert endpoint.timeout(3.0) == 3.0
+
+    endpoint.latencies.extend([0.01] * 200)
+    assert endpoint.timeout(20.0) == 2.0  # HF_TIMEOUT_MIN
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_wins_over_slow_primary():
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            await asyncio.sleep(1.0)
+        return httpx.Response(200, json=[{"call": len(calls)}])
+
+    resilient = ResilientClient(hedge=True)
+    resilient._endpoint(URL).latencies.extend([0.02] * 50)
+
+    async with _client(handler) as client:
+        start = time.perf_counter()
+        response = await resilient.post(client, URL, json={})
+        elapsed = time.perf_counter() - start
+
+    assert response.json() == [{"call": 2}]
+    assert elapsed < 0.5
+    stats = resilient.get_status()["endpoints"]["openai/clip-vit-base-patch32"]
+    assert stats["hedged"] == 1
+    assert stats["hedge_wins"] == 1
+    assert stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_hf_api_service_returns_empty_when_circuit_open():
+    from backend import hf_api_service
+    from backend.hf_api_service import query_hf_api
+
+    async def handler(request):
+        return httpx.Response(500, text="overloaded")
+
+    resilient = ResilientClient(failure_threshold=1, cooldown=60)
+    async with _client(handler) as client:
+        with patch.object(hf_api_service, "hf_client", resilient):
+            assert await query_hf_api(b"img", ["fire"], client=client) == []
+            client.post = AsyncMock()
+            assert await query_hf_api(b"img", ["fire"], client=client) == []
+
+    client.post.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_unified_service_falls_back_to_local_when_circuit_open():
+    from backend import unified_detection_service
+    from backend.unified_detection_service import DetectionBackend, UnifiedDetectionService, HF_DETECTION_API_URL
+
+    resilient = ResilientClient(failure_threshold=1, cooldown=60)
+    resilient._endpoint(HF_DETECTION_API_URL).breaker.record_failure()
+    service = UnifiedDetectionService(backend=DetectionBackend.HUGGINGFACE)
+
+    with patch.object(unified_detection_service, "hf_client", resilient), \
+            patch.object(service, "_check_local_available", AsyncMock(return_value=True)):
+        assert await service._get_detection_backend() == "local"
+
+    with patch.object(unified_detection_service, "hf_client", resilient), \
+            patch.object(service, "_check_local_available", AsyncMock(return_value=False)):
+        assert await service._get_detection_backend() is None
+        status = await service.get_status()
+
+    assert status["huggingface_backend"]["status"] == "circuit_open"
@@ -0,0 +1,152 @@
+"""
+Tests for perceptual-hash near-duplicate photo detection.
+"""
+import io
+import os
+import time
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+from backend.models import Issue
+from backend.image_dedup_index import ImageHashIndex, compute_phash, hash_to_hex, hex_to_hash, similarity
+
+
+def _scene(seed: int, size=(800, 600)) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    noise = Image.fromarray((rng.random((60, 80, 3)) * 255).astype("uint8"))
+    return noise.resize(size).filter(ImageFilter.GaussianBlur(8))
+
+
+def _jpeg(image: Image.Image, quality=85) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def _distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def test_phash_is_robust_to_resizing_recompression_and_crops():
+    original = compute_phash(_scene(1))
+
+    assert _distance(original, compute_phash(Image.open(io.BytesIO(_jpeg(_scene(1).resize((400, 300)), 40))))) <= 4
+    assert _distance(original, compute_phash(_scene(1).crop((8, 6, 792, 594)))) <= 10
+    assert _distance(original, compute_phash(_scene(2))) > 20
+
+
+def test_hex_round_trip_and_similarity():
+    phash = compute_phash(_scene(3))
+    assert hex_to_hash(hash_to_hex(phash)) == phash
+    assert len(hash_to_hex(phash)) == 16
+    assert similarity(0) == 1.0
+    assert similarity(16) == 0.75
+
+
+def test_query_global_and_within_candidates(tmp_path):
+    index = ImageHashIndex(path=str(tmp_path / "index.npz"), max_distance=10)
+    index.add(1, compute_phash(_scene(1)))
+    index.add(2, compute_phash(_scene(2)))
+    index.add(3, compute_phash(_scene(1).resize((640, 480))))
+
+    probe = compute_phash(_scene(1))
+    assert [issue_id for issue_id, _ in index.query(probe)] in ([1, 3], [3, 1])
+    assert [issue_id for issue_id, _ in index.query(probe, candidate_ids=[2, 3])] == [3]
+    assert index.query(probe, candidate_ids=[]) == []
+    assert index.query(probe, exclude_id=1, limit=1)[0][0] == 3
+
+
+def test_remove_and_update():
+    index = ImageHashIndex(path="unused.npz")
+    for issue_id in range(1, 6):
+        index.add(issue_id, issue_id)
+
+    index.remove(2)
+    index.remove(99)
+    index.add(5, 0xFFFF)
+
+    assert len(index) == 4
+    assert index.query(2, max_distance=0) == []
+    assert index.query(0xFFFF, max_distance=0) == [(5, 0)]
+    assert index.query(4, max_distance=0) == [(4, 0)]
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "snapshots" / "index.npz")
+    index = ImageHashIndex(path=path, snapshot_every=2)
+    index.add(10, 2 ** 63 + 5)
+    index.maybe_save()
+    assert not os.path.exists(path)
+    index.add(11, 7)
+    index.maybe_save()
+
+    restored = ImageHashIndex(path=path)
+    assert restored.load_snapshot() == 11
+    assert restored.query(2 ** 63 + 5, max_distance=0) == [(10, 0)]
+    assert restored.query(7, max_distance=0) == [(11, 0)]
+
+
+def test_global_lookup_at_one_million_photos():
+    index = ImageHashIndex(path="unused.npz")
+    rng = np.random.default_rng(0)
+    hashes = rng.integers(0, 2 ** 63, size=1_000_000, dtype=np.uint64)
+    index.add_many(zip(range(len(hashes)), hashes.tolist()))
+    probe = int(hashes[123456])
+
+    index.query(probe)  # Warm up
+    start = time.perf_counter()
+    results = index.query(probe)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    assert results[0] == (123456, 0)
+    # Budget is 10 ms; leave headroom for slow CI machines
+    assert elapsed_ms < 50
+
+
+def _report(client, description, photo, name="photo.jpg"):
+    return client.post(
+        "/api/issues",
+        data={"description": description, "category": "Road"},
+        files={"image": (name, photo, "image/jpeg")}
+    )
+
+
+def test_report_without_location_is_flagged_as_duplicate(isolated_app, tmp_path):
+    client, _ = isolated_app
+    first = _report(client, "Large pothole near the market", _jpeg(_scene(42)), "first.jpg")
+    second = _report(client, "Pothole in front of the market", _jpeg(_scene(42).resize((700, 525)), quality=60), "second.jpg")
+
+    assert first.status_code == 201
+    assert first.json()["deduplication_info"]["recommended_action"] == "create_new"
+
+    assert second.status_code == 201
+    info = second.json()["deduplication_info"]
+    assert info["recommended_action"] == "verify_existing"
+    assert info["similar_images"][0]["issue_id"] == first.json()["id"]
+    assert info["similar_images"][0]["distance_meters"] is None
+    assert info["similarity_score"] >= 0.9
+    assert len(os.listdir(tmp_path / "uploads")) == 4  # two photos and their thumbnails
+
+
+def test_resolved_matches_do_not_hide_an_unresolved_one(isolated_app):
+    from backend.image_dedup_index import image_dedup_index
+
+    client, TestingSession = isolated_app
+    db = TestingSession()
+    photo = _scene(7)
+    # Four exact matches that are already resolved, one slightly worse match still in progress
+    resolved = [Issue(description="Fixed pothole", category="Road", status="resolved") for _ in range(4)]
+    in_progress = Issue(description="Pothole being repaired", category="Road", status="in_progress")
+    db.add_all(resolved + [in_progress])
+    db.commit()
+    for issue in resolved:
+        image_dedup_index.add(issue.id, compute_phash(photo))
+    image_dedup_index.add(in_progress.id, compute_phash(photo.resize((640, 480))))
+    in_progress_id = in_progress.id
+    db.close()
+
+    info = _report(client, "Pothole on the main road again", _jpeg(photo)).json()["deduplication_info"]
+
+    assert [match["issue_id"] for match in info["similar_images"]] == [in_progress_id]
+
@@ -0,0 +1,180 @@
+"""
+Tests for the single-decode image pipeline (ImageEnvelope).
+"""
+import io
+import hashlib
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+
+from backend.image_envelope import ImageEnvelope, decode_image_envelope, as_image_bytes, as_pil_image
+from backend.hf_api_service import _prepare_image_bytes
+from backend.utils import (
+    _validate_uploaded_file_sync, process_uploaded_image_sync, save_processed_image, thumbnail_path_for
+)
+
+CAMERA_MAKE_TAG = 0x010F
+
+
+def make_image_bytes(size, fmt="JPEG", mode="RGB", with_exif=False):
+    img = Image.new(mode, size, "red")
+    kwargs = {}
+    if with_exif:
+        exif = Image.Exif()
+        exif[CAMERA_MAKE_TAG] = "TestCam"
+        kwargs["exif"] = exif.tobytes()
+    output = io.BytesIO()
+    img.save(output, format=fmt, **kwargs)
+    return output.getvalue()
+
+
+def make_upload(data, filename="test.jpg"):
+    return UploadFile(file=io.BytesIO(data), filename=filename)
+
+
+def test_large_image_is_resized_and_stripped():
+    data = make_image_bytes((2048, 1024), with_exif=True)
+    envelope = decode_image_envelope(data)
+
+    assert envelope.size == (1024, 512)
+    assert envelope.sha256 == hashlib.sha256(data).hexdigest()
+    assert envelope.source_format == "JPEG"
+    assert not envelope.is_encoded
+
+    reopened = Image.open(io.BytesIO(envelope.jpeg_bytes))
+    assert reopened.format == "JPEG"
+    assert reopened.size == (1024, 512)
+    assert CAMERA_MAKE_TAG not in reopened.getexif()
+
+
+def test_large_jpeg_is_decoded_in_draft_mode():
+    data = make_image_bytes((4000, 3000))
+
+    with patch("PIL.JpegImagePlugin.JpegImageFile.draft", autospec=True,
+               side_effect=Image.Image.draft) as draft:
+        envelope = decode_image_envelope(data)
+
+    draft.assert_called_once()
+    assert draft.call_args.args[2] == (1024, 768)
+    assert envelope.source_size == (4000, 3000)
+    assert envelope.size == (1024, 768)
+
+
+def test_decodes_from_file_without_reading_it_whole():
+    data = make_image_bytes((1800, 1200), fmt="PNG")
+    source = io.BytesIO(data)
+
+    envelope = decode_image_envelope(source)
+
+    assert envelope.sha256 == hashlib.sha256(data).hexdigest()
+    assert envelope.size == (1024, 682)
+    assert source.tell() == 0
+
+
+def test_thumbnail_is_small_jpeg():
+    envelope = decode_image_envelope(make_image_bytes((2000, 1000)))
+
+    thumb = Image.open(io.BytesIO(envelope.thumbnail_bytes))
+    assert thumb.format == "JPEG"
+    assert thumb.size == (256, 128)
+    assert envelope.thumbnail_bytes is envelope.thumbnail_bytes
+
+
+def test_exif_is_stripped_without_resize():
+    envelope = decode_image_envelope(make_image_bytes((400, 300), with_exif=True))
+
+    assert "exif" not in envelope.image.info
+    assert CAMERA_MAKE_TAG not in Image.open(io.BytesIO(envelope.jpeg_bytes)).getexif()
+
+
+def test_clean_small_jpeg_is_passed_through():
+    data = make_image_bytes((400, 300))
+    envelope = decode_image_envelope(data)
+
+    assert envelope.is_encoded
+    assert envelope.jpeg_bytes is data
+
+
+def test_png_with_alpha_is_normalized_to_jpeg():
+    envelope = decode_image_envelope(make_image_bytes((64, 64), fmt="PNG", mode="RGBA"))
+
+    assert envelope.source_format == "PNG"
+    assert envelope.image.mode == "RGB"
+    assert Image.open(io.BytesIO(envelope.jpeg_bytes)).format == "JPEG"
+
+
+def test_jpeg_bytes_are_encoded_once():
+    envelope = decode_image_envelope(make_image_bytes((64, 64), fmt="PNG"))
+
+    with patch("backend.image_envelope.encode_jpeg", return_value=b"jpeg") as encode:
+        assert envelope.jpeg_bytes == b"jpeg"
+        assert envelope.jpeg_bytes == b"jpeg"
+        assert _prepare_image_bytes(envelope) == b"jpeg"
+    encode.assert_called_once()
+
+
+def test_helpers_accept_plain_images_and_bytes():
+    img = Image.new("RGB", (8, 8))
+    envelope = ImageEnvelope(img, "0" * 64, jpeg_bytes=b"encoded")
+
+    assert as_pil_image(envelope) is img
+    assert as_pil_image(img) is img
+    assert as_image_bytes(b"raw") == b"raw"
+    assert as_image_bytes(envelope) == b"encoded"
+    assert Image.open(io.BytesIO(as_image_bytes(img))).size == (8, 8)
+
+
+def test_validate_uploaded_file_decodes_once():
+    data = make_image_bytes((1500, 1500), with_exif=True)
+    upload = make_upload(data)
+
+    with patch("backend.image_envelope.Image.open", wraps=Image.open) as image_open:
+        envelope = _validate_uploaded_file_sync(upload)
+
+    assert image_open.call_count == 1
+    assert envelope.size == (1024, 1024)
+    # The upload itself is left untouched for callers that still read it
+    assert upload.file.read() == data
+
+
+def test_process_uploaded_image_encodes_eagerly():
+    envelope = process_uploaded_image_sync(make_upload(make_image_bytes((1500, 800))))
+
+    assert envelope.is_encoded
+    assert envelope.size == (1024, 546)
+
+
+def test_invalid_image_is_rejected():
+    with patch("backend.utils.magic.from_buffer", return_value="image/jpeg"):
+        with pytest.raises(HTTPException) as exc_info:
+            _validate_uploaded_file_sync(make_upload(b"not really an image"))
+    assert exc_info.value.status_code == 400
+
+
+def test_save_processed_image_writes_envelope_and_thumbnail(tmp_path):
+    envelope = ImageEnvelope(Image.new("RGB", (800, 600)), "0" * 64, jpeg_bytes=b"stored bytes")
+    path = tmp_path / "abc_photo.png"
+    thumb_path = thumbnail_path_for(str(path))
+
+    assert save_processed_image(envelope, str(path)) is None
+    assert save_processed_image(envelope, str(path), thumb_path) == thumb_path
+
+    assert thumb_path == str(tmp_path / "abc_photo_thumb.jpg")
+    assert path.read_bytes() == b"stored bytes"
+    assert Image.open(thumb_path).size == (256, 192)
+
+
+@pytest.mark.asyncio
+async def test_local_detector_uses_decoded_pixels():
+    from backend import local_ml_service
+
+    model = MagicMock()
+    model.predict.return_value = [MagicMock(boxes=[])]
+    envelope = decode_image_envelope(make_image_bytes((64, 64)))
+
+    with patch.object(local_ml_service, "get_general_model", return_value=model):
+        assert await local_ml_service.detect_vandalism_local(envelope) == []
+
+    assert model.predict.call_args.args[0] is envelope.image
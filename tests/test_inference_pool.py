@@ -0,0 +1,156 @@
+"""
+Tests for the inference process pool.
+"""
+import io
+import os
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from backend.exceptions import InferencePoolBusyException
+from backend.inference_pool import InferencePool, inference_pool
+
+# Task functions run in the spawned workers, which import this module by name
+DESCRIBE = f"{__name__}:_describe"
+SLEEP = f"{__name__}:_sleep"
+PIDS = f"{__name__}:_pids"
+FAIL = f"{__name__}:_fail"
+
+
+def _describe(images):
+    return [(image.mode, image.size, image.getpixel((0, 0))) for image in images]
+
+
+def _sleep(images):
+    time.sleep(1.0)
+    return [None for _ in images]
+
+
+def _pids(images):
+    return [os.getpid() for _ in images]
+
+
+def _fail(images):
+    raise ValueError("bad input")
+
+
+@pytest.mark.asyncio
+async def test_images_round_trip_through_shared_memory():
+    pool = InferencePool(workers=1, preload=())
+    try:
+        results = await pool.run(DESCRIBE, [
+            Image.new("RGB", (40, 30), color=(10, 20, 30)),
+            Image.new("RGBA", (8, 8), color=(1, 2, 3, 4)),
+            Image.new("L", (5, 5), color=7)
+        ])
+    finally:
+        await pool.stop()
+
+    assert [tuple(r) for r in results] == [
+        ("RGB", (40, 30), (10, 20, 30)),
+        ("RGB", (8, 8), (1, 2, 3)),
+        ("L", (5, 5), 7)
+    ]
+    assert pool.get_stats()["completed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected():
+    import asyncio
+
+    pool = InferencePool(workers=1, max_queue=0, preload=())
+    try:
+        image = Image.new("RGB", (4, 4))
+        slow = asyncio.create_task(pool.run(SLEEP, [image]))
+        await asyncio.sleep(0)
+
+        with pytest.raises(InferencePoolBusyException):
+            await pool.run(SLEEP, [image])
+
+        await slow
+    finally:
+        await pool.stop()
+
+    stats = pool.get_stats()
+    assert stats["rejected"] == 1
+    assert stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_worker_errors_are_raised_and_pool_keeps_serving():
+    pool = InferencePool(workers=1, preload=())
+    image = Image.new("RGB", (4, 4))
+    try:
+        with pytest.raises(RuntimeError, match="ValueError: bad input"):
+            await pool.run(FAIL, [image])
+        assert await pool.run(PIDS, [image])
+    finally:
+        await pool.stop()
+
+    assert pool.get_stats()["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_workers_are_recycled_after_max_tasks():
+    pool = InferencePool(workers=1, max_tasks_per_worker=2, preload=())
+    image = Image.new("RGB", (4, 4))
+    try:
+        pids = [(await pool.run(PIDS, [image]))[0] for _ in range(3)]
+    finally:
+        await pool.stop()
+
+    assert pids[0] == pids[1]
+    assert pids[2] != pids[0]
+
+
+@pytest.mark.asyncio
+async def test_health_check_reports_worker():
+    pool = InferencePool(workers=1, preload=())
+    try:
+        health = await pool.health_check()
+    finally:
+        await pool.stop()
+
+    assert health["healthy"] is True
+    assert health["worker"]["pid"] != os.getpid()
+    assert pool.get_stats()["last_health_check"] == health
+
+
+@pytest.mark.asyncio
+async def test_local_detection_dispatches_to_pool():
+    from backend import local_ml_service
+
+    box = {"label": "stop sign", "confidence": 0.9, "box": [0, 0, 10, 10]}
+    with patch.object(inference_pool, "workers", 2), \
+            patch.object(inference_pool, "run", AsyncMock(return_value=[[box]])) as mock_run, \
+            patch.object(local_ml_service, "get_general_model") as mock_model:
+        detections = await local_ml_service.detect_infrastructure_local(Image.new("RGB", (32, 32)))
+
+    assert [d["label"] for d in detections] == ["damaged sign"]
+    assert mock_run.call_args.args[0] == "general"
+    # The model is only loaded in the workers
+    mock_model.assert_not_called()
+
+
+def _upload():
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), color="red").save(buffer, format="JPEG")
+    return {"image": ("test.jpg", buffer.getvalue(), "image/jpeg")}
+
+
+def test_busy_pool_returns_503():
+    from backend.main import app
+
+    client = TestClient(app)
+    busy = AsyncMock(side_effect=InferencePoolBusyException())
+    with patch("backend.routers.detection.detect_potholes_batched", busy):
+        response = client.post("/api/detect-pothole", files=_upload())
+    assert response.status_code == 503
+    assert response.json()["error_code"] == "INFERENCE_POOL_BUSY"
+
+    with patch("backend.routers.detection.detect_vandalism_unified", busy):
+        response = client.post("/api/detect-vandalism", files=_upload())
+    assert response.status_code == 503
@@ -0,0 +1,134 @@
+"""
+Tests for the micro-batching inference scheduler.
+"""
+import asyncio
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from backend.inference_scheduler import BatchScheduler, Histogram, get_scheduler, get_inference_stats
+
+
+class RecordingModel:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def predict_batch(self, items):
+        with self._lock:
+            self.batches.append(list(items))
+        if self.fail:
+            raise RuntimeError("model exploded")
+        return [item * 10 for item in items]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_a_batch():
+    model = RecordingModel()
+    scheduler = BatchScheduler("test", model.predict_batch, max_batch_size=8, max_wait_ms=50)
+
+    results = await asyncio.gather(*(scheduler.submit(i) for i in range(5)))
+
+    assert results == [0, 10, 20, 30, 40]
+    assert model.batches == [[0, 1, 2, 3, 4]]
+
+
+@pytest.mark.asyncio
+async def test_batches_are_bounded_by_max_size():
+    model = RecordingModel()
+    scheduler = BatchScheduler("test", model.predict_batch, max_batch_size=4, max_wait_ms=50)
+
+    results = await asyncio.gather(*(scheduler.submit(i) for i in range(10)))
+
+    assert results == [i * 10 for i in range(10)]
+    assert [len(batch) for batch in model.batches] == [4, 4, 2]
+
+
+@pytest.mark.asyncio
+async def test_lone_request_is_dispatched_after_max_wait():
+    model = RecordingModel()
+    scheduler = BatchScheduler("test", model.predict_batch, max_batch_size=8, max_wait_ms=5)
+
+    assert await asyncio.wait_for(scheduler.submit(7), timeout=2) == 70
+    assert model.batches == [[7]]
+
+
+@pytest.mark.asyncio
+async def test_failure_is_raised_to_every_waiter():
+    scheduler = BatchScheduler("test", RecordingModel(fail=True).predict_batch, max_batch_size=8, max_wait_ms=20)
+
+    results = await asyncio.gather(*(scheduler.submit(i) for i in range(3)), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert scheduler.get_stats()["failed_batches"] == 1
+    # The worker survives and keeps serving
+    scheduler.predict_batch = RecordingModel().predict_batch
+    assert await scheduler.submit(1) == 10
+
+
+@pytest.mark.asyncio
+async def test_disabled_scheduler_runs_each_request_alone():
+    model = RecordingModel()
+    scheduler = BatchScheduler("test", model.predict_batch, enabled=False)
+
+    await asyncio.gather(*(scheduler.submit(i) for i in range(3)))
+
+    assert sorted(model.batches) == [[0], [1], [2]]
+
+
+@pytest.mark.asyncio
+async def test_stats_expose_histograms():
+    scheduler = BatchScheduler("test", RecordingModel().predict_batch, max_batch_size=8, max_wait_ms=50)
+    await asyncio.gather(*(scheduler.submit(i) for i in range(3)))
+
+    stats = scheduler.get_stats()
+    assert stats["requests"] == 3
+    assert stats["batches"] == 1
+    assert stats["batch_size_histogram"]["buckets"]["<=4"] == 1
+    assert stats["queue_depth_histogram"]["count"] == 3
+    assert stats["queue_depth_histogram"]["max"] == 2
+
+
+def test_histogram_buckets():
+    histogram = Histogram((1, 2, 4))
+    for value in (1, 2, 3, 9):
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"<=1": 1, "<=2": 1, "<=4": 1, "+Inf": 1}
+    assert snapshot["mean"] == 3.75
+
+
+@pytest.mark.asyncio
+async def test_local_detectors_share_the_general_model_batch():
+    from backend import local_ml_service
+
+    model = MagicMock()
+    model.predict.side_effect = lambda images, stream=False: [MagicMock(boxes=[]) for _ in images]
+    images = [Image.new("RGB", (32, 32)) for _ in range(3)]
+
+    with patch.object(local_ml_service, "get_general_model", return_value=model):
+        results = await asyncio.gather(
+            local_ml_service.detect_vandalism_local(images[0]),
+            local_ml_service.detect_infrastructure_local(images[1]),
+            local_ml_service.detect_flooding_local(images[2])
+        )
+
+    assert results == [[], [], []]
+    model.predict.assert_called_once()
+    assert model.predict.call_args.args[0] == images
+
+
+def test_inference_metrics_endpoint():
+    from backend.main import app
+
+    get_scheduler("general", lambda items: items)
+    response = TestClient(app).get("/api/metrics/inference")
+
+    assert response.status_code == 200
+    assert "general" in response.json()
+    assert response.json() == get_inference_stats()
@@ -0,0 +1,171 @@
+"""
+Tests for Merkle block sealing and integrity inclusion proofs.
+"""
+import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.database import Base, get_db
+from backend.main import app
+from backend.models import Issue, IntegrityBlock
+from backend.integrity_chain import (
+    GENESIS_HASH,
+    build_inclusion_proof,
+    build_merkle_levels,
+    compute_issue_hash,
+    compute_legacy_issue_hash,
+    get_inclusion_proof,
+    merkle_root,
+    seal_pending_block,
+    verify_inclusion_proof
+)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine, tables=[Issue.__table__, IntegrityBlock.__table__])
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def add_issue(db, n, integrity_hash=None):
+    reference_id = f"ref-{n}"
+    description = f"Broken streetlight #{n}"
+    issue = Issue(
+        reference_id=reference_id,
+        description=description,
+        category="Streetlight",
+        status="open",
+        created_at=datetime.datetime(2024, 1, 1),
+        integrity_hash=integrity_hash or compute_issue_hash(description, "Streetlight", reference_id)
+    )
+    db.add(issue)
+    db.commit()
+    db.refresh(issue)
+    return issue
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 8, 13])
+def test_every_leaf_proves_against_root(size):
+    leaves = [compute_issue_hash(f"d{i}", "c", f"r{i}") for i in range(size)]
+    levels = build_merkle_levels(leaves)
+    root = levels[-1][0].hex()
+
+    for index, leaf in enumerate(leaves):
+        proof = build_inclusion_proof(levels, index)
+        assert len(proof) <= max(1, (size - 1).bit_length())
+        assert verify_inclusion_proof(leaf, proof, root)
+
+
+def test_tampered_leaf_fails_proof():
+    leaves = [compute_issue_hash(f"d{i}", "c", f"r{i}") for i in range(4)]
+    levels = build_merkle_levels(leaves)
+    proof = build_inclusion_proof(levels, 2)
+
+    forged = compute_issue_hash("forged", "c", "r2")
+    assert not verify_inclusion_proof(forged, proof, merkle_root(leaves))
+
+
+def test_blocks_are_chained(db):
+    for n in range(3):
+        add_issue(db, n)
+    first = seal_pending_block(db, max_leaves=2)
+    second = seal_pending_block(db, max_leaves=2)
+
+    assert first.prev_block_hash == GENESIS_HASH
+    assert (first.first_issue_id, first.last_issue_id, first.leaf_count) == (1, 2, 2)
+    assert second.prev_block_hash == first.block_hash
+    assert second.leaf_count == 1
+    assert seal_pending_block(db) is None
+
+
+def test_recent_issues_wait_for_next_block(db):
+    issue = add_issue(db, 0)
+    issue.created_at = datetime.datetime.now(datetime.timezone.utc)
+    db.commit()
+
+    assert seal_pending_block(db) is None
+
+
+def test_block_stops_before_an_issue_in_grace_period(db):
+    issues = [add_issue(db, n) for n in range(4)]
+    # Committed out of order: issue 2 got its id first but is still recent
+    issues[1].created_at = datetime.datetime.now(datetime.timezone.utc)
+    db.commit()
+
+    block = seal_pending_block(db)
+    assert (block.first_issue_id, block.last_issue_id, block.leaf_count) == (issues[0].id, issues[0].id, 1)
+    assert seal_pending_block(db) is None
+
+    # Once it is old enough, the next block picks up from it without a gap
+    issues[1].created_at = datetime.datetime(2024, 1, 1)
+    db.commit()
+    block = seal_pending_block(db)
+    assert (block.first_issue_id, block.last_issue_id, block.leaf_count) == (issues[1].id, issues[3].id, 3)
+    assert get_inclusion_proof(db, issues[1].id)["proof_verified"] is True
+
+
+def test_inclusion_proof_for_sealed_issue(db):
+    issues = [add_issue(db, n) for n in range(5)]
+
+    pending = get_inclusion_proof(db, issues[3].id)
+    assert pending["sealed"] is False
+    assert pending["content_verified"] is True
+
+    seal_pending_block(db)
+    proof = get_inclusion_proof(db, issues[3].id)
+
+    assert proof["sealed"] is True
+    assert proof["leaf_index"] == 3
+    assert proof["proof_verified"] is True
+    assert verify_inclusion_proof(proof["leaf_hash"], proof["proof"], proof["merkle_root"])
+    assert get_inclusion_proof(db, 999) is None
+
+
+def test_content_check_detects_edits_and_accepts_legacy_hashes(db):
+    legacy_first = add_issue(db, 0, integrity_hash=compute_legacy_issue_hash("Broken streetlight #0", "Streetlight", ""))
+    legacy_second = add_issue(
+        db, 1, integrity_hash=compute_legacy_issue_hash("Broken streetlight #1", "Streetlight", legacy_first.integrity_hash)
+    )
+    current = add_issue(db, 2)
+
+    assert get_inclusion_proof(db, legacy_first.id)["content_verified"] is True
+    assert get_inclusion_proof(db, legacy_second.id)["content_verified"] is True
+
+    current.description = "Edited after the fact"
+    db.commit()
+    assert get_inclusion_proof(db, current.id)["content_verified"] is False
+
+
+def test_integrity_proof_endpoint(db):
+    issue = add_issue(db, 0)
+    add_issue(db, 1)
+    seal_pending_block(db)
+
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        client = TestClient(app)
+        response = client.get(f"/api/issues/{issue.id}/integrity-proof")
+        missing = client.get("/api/issues/999/integrity-proof")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["sealed"] is True
+    assert data["proof_verified"] is True
+    assert data["proof"][0]["position"] == "right"
+    assert missing.status_code == 404
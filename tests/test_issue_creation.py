@@ -81,5 +81,30 @@ def test_create_issue():
     finally:
         os.remove(tmp_path)
 
+
+def test_png_upload_is_stored_with_jpeg_extension(isolated_app, tmp_path):
+    from io import BytesIO
+    from PIL import Image
+
+    client, TestingSession = isolated_app
+    buffer = BytesIO()
+    Image.new("RGB", (800, 600), "orange").save(buffer, format="PNG")
+
+    response = client.post(
+        "/api/issues",
+        data={"description": "Streetlight pole bent over the road", "category": "Streetlight"},
+        files={"image": ("../night shot.png", buffer.getvalue(), "image/png")}
+    )
+
+    assert response.status_code == 201
+    db = TestingSession()
+    image_path = db.query(Issue.image_path).filter(Issue.id == response.json()["id"]).scalar()
+    db.close()
+    assert os.path.dirname(image_path) == str(tmp_path / "uploads")
+    assert image_path.endswith("_night shot.jpg")
+    with open(image_path, "rb") as f:
+        assert f.read(3) == b"\xff\xd8\xff"
+
+
 if __name__ == "__main__":
     test_create_issue()
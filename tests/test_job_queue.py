@@ -0,0 +1,236 @@
+"""
+Tests for the durable background job queue.
+"""
+import asyncio
+import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import engine
+from backend.models import Base, Job
+from backend.job_queue import JobQueue, JOB_DEAD, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED
+
+Base.metadata.create_all(bind=engine)
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    test_engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=test_engine)
+    yield sessionmaker(bind=test_engine)
+    test_engine.dispose()
+
+
+def _queue(session_factory, **kwargs):
+    options = {"workers": 2, "retry_base": 0.01, "poll_interval": 0.02}
+    options.update(kwargs)
+    return JobQueue(session_factory=session_factory, **options)
+
+
+async def _wait_for(queue, job_id, status, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        job = queue.get_job(job_id)
+        if job["status"] == status:
+            return job
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"job {job_id} is {queue.get_job(job_id)['status']}, expected {status}")
+
+
+@pytest.mark.asyncio
+async def test_jobs_are_processed_by_workers(session_factory):
+    queue = _queue(session_factory)
+    seen = []
+
+    async def handler(payload):
+        seen.append(payload["n"])
+
+    queue.register("test", handler)
+    await queue.start()
+    job_ids = [queue.enqueue("test", {"n": n}) for n in range(5)]
+    for job_id in job_ids:
+        job = await _wait_for(queue, job_id, JOB_SUCCEEDED)
+        assert job["attempts"] == 1
+    await queue.stop()
+
+    assert sorted(seen) == list(range(5))
+    assert queue.get_stats()["completed"] == 5
+
+
+@pytest.mark.asyncio
+async def test_failed_attempt_is_retried(session_factory):
+    queue = _queue(session_factory)
+    calls = []
+
+    async def flaky(payload):
+        calls.append(payload)
+        if len(calls) == 1:
+            raise RuntimeError("Gemini unavailable")
+
+    queue.register("flaky", flaky)
+    await queue.start()
+    job = await _wait_for(queue, queue.enqueue("flaky", {}), JOB_SUCCEEDED)
+    await queue.stop()
+
+    assert job["attempts"] == 2
+    assert len(calls) == 2
+    assert queue.get_stats()["retried"] == 1
+
+
+@pytest.mark.asyncio
+async def test_job_is_dead_lettered_and_can_be_requeued(session_factory):
+    queue = _queue(session_factory)
+    fail = {"value": True}
+
+    async def handler(payload):
+        if fail["value"]:
+            raise ValueError("bad plan")
+
+    queue.register("plan", handler)
+    await queue.start()
+    job_id = queue.enqueue("plan", {}, max_attempts=3)
+    job = await _wait_for(queue, job_id, JOB_DEAD)
+    assert job["attempts"] == 3
+    assert job["last_error"] == "ValueError: bad plan"
+
+    fail["value"] = False
+    assert queue.requeue(job_id)
+    assert not queue.requeue(job_id)  # no longer dead
+    job = await _wait_for(queue, job_id, JOB_SUCCEEDED)
+    await queue.stop()
+
+    assert job["attempts"] == 1
+    assert queue.get_stats()["dead_lettered"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unknown_kind_is_dead_lettered(session_factory):
+    queue = _queue(session_factory)
+    await queue.start()
+    job = await _wait_for(queue, queue.enqueue("missing", {}), JOB_DEAD)
+    await queue.stop()
+
+    assert "No handler" in job["last_error"]
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_bounds_concurrency(session_factory):
+    queue = _queue(session_factory, workers=3)
+    active = {"now": 0, "max": 0}
+
+    async def handler(payload):
+        active["now"] += 1
+        active["max"] = max(active["max"], active["now"])
+        await asyncio.sleep(0.02)
+        active["now"] -= 1
+
+    queue.register("burst", handler)
+    job_ids = [queue.enqueue("burst", {}) for _ in range(15)]
+    await queue.start()
+    for job_id in job_ids:
+        await _wait_for(queue, job_id, JOB_SUCCEEDED)
+    await queue.stop()
+
+    assert active["max"] == 3
+
+
+@pytest.mark.asyncio
+async def test_jobs_survive_restart(session_factory):
+    # Queued before a restart, and one left running by a crash
+    before = _queue(session_factory)
+    queued_id = before.enqueue("plan", {"n": 1})
+    crashed_id = before.enqueue("plan", {"n": 2})
+    db = session_factory()
+    db.execute(update(Job).where(Job.id == crashed_id).values(
+        status=JOB_RUNNING, attempts=1, updated_at=datetime.datetime(2024, 1, 1)
+    ))
+    db.commit()
+    db.close()
+
+    seen = []
+
+    async def handler(payload):
+        seen.append(payload["n"])
+
+    after = _queue(session_factory)
+    after.register("plan", handler)
+    await after.start()
+    await _wait_for(after, queued_id, JOB_SUCCEEDED)
+    await _wait_for(after, crashed_id, JOB_SUCCEEDED)
+    await after.stop()
+
+    assert sorted(seen) == [1, 2]
+    assert after.get_stats()["recovered"] == 1
+
+
+@pytest.mark.asyncio
+async def test_recovery_skips_jobs_other_processes_are_running(session_factory):
+    other_process = _queue(session_factory)
+    job_id = other_process.enqueue("plan", {})
+    assert other_process.claim()[0]["id"] == job_id
+
+    seen = []
+
+    async def handler(payload):
+        seen.append(payload)
+
+    queue = _queue(session_factory, stale_after=0.3)
+    queue.register("plan", handler)
+    await queue.start()
+    await asyncio.sleep(0.1)
+    # Claimed moments ago: still running elsewhere, not requeued by this start
+    assert queue.get_job(job_id)["status"] == JOB_RUNNING
+    assert queue.get_stats()["recovered"] == 0
+
+    # The other process never finishes it; once stale, the periodic recovery takes over
+    await _wait_for(queue, job_id, JOB_SUCCEEDED)
+    await queue.stop()
+
+    assert seen == [{}]
+    assert queue.get_stats()["recovered"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stop_drains_due_jobs_and_releases_interrupted_ones(session_factory):
+    queue = _queue(session_factory, workers=1)
+    started = asyncio.Event()
+
+    async def slow(payload):
+        started.set()
+        await asyncio.sleep(10)
+
+    queue.register("slow", slow)
+    await queue.start()
+    job_id = queue.enqueue("slow", {})
+    await started.wait()
+    await queue.stop(grace=0.1)
+
+    job = queue.get_job(job_id)
+    assert job["status"] == JOB_QUEUED
+    assert job["attempts"] == 0
+
+
+def test_job_status_endpoints():
+    from backend.main import app
+    from backend.job_queue import job_queue
+
+    client = TestClient(app)
+    job_id = job_queue.enqueue("status-test", {})
+
+    response = client.get(f"/api/jobs/{job_id}")
+    assert response.status_code == 200
+    assert response.json()["status"] == JOB_QUEUED
+    assert response.json()["kind"] == "status-test"
+
+    assert client.post(f"/api/jobs/{job_id}/retry").status_code == 409
+    assert client.get("/api/jobs/999999999").status_code == 404
+    assert client.get("/api/metrics/jobs").json()["queued"] >= 1
+
+    # Leave nothing behind for other tests' workers
+    db = job_queue._session()
+    db.query(Job).filter(Job.id == job_id).delete()
+    db.commit()
+    db.close()
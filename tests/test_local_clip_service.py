@@ -0,0 +1,142 @@
+"""
+Tests for the local CLIP zero-shot engine and its text-embedding index.
+"""
+import io
+import hashlib
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from backend import hf_api_service
+from backend.hf_api_service import CLIP_DETECTORS, detect_fire_clip, scan_all_clip
+from backend.local_clip_service import CLIP_CATEGORY_LABELS, LocalClipEngine
+
+DIM = 16
+
+
+def _vector(seed: str) -> np.ndarray:
+    rng = np.random.default_rng(int(hashlib.sha256(seed.encode()).hexdigest()[:8], 16))
+    vector = rng.normal(size=DIM).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class FakeClipEngine(LocalClipEngine):
+    """Deterministic encoders in place of the CLIP checkpoint; the index logic is real."""
+
+    def __init__(self, image_label="fire"):
+        super().__init__(model_name="fake-clip")
+        self.image_label = image_label
+        self.text_batches = []
+
+    def _load_model(self):
+        self._logit_scale = 100.0
+
+    def _encode_text(self, labels):
+        self.text_batches.append(list(labels))
+        return np.stack([_vector(label) for label in labels])
+
+    def _encode_image(self, image):
+        # The "image" looks most like its label, plus a little noise
+        vector = _vector(self.image_label) + 0.3 * _vector("noise")
+        return vector / np.linalg.norm(vector)
+
+
+def _image():
+    return Image.new("RGB", (32, 32), color="red")
+
+
+def test_load_precomputes_all_detector_labels():
+    engine = FakeClipEngine().load()
+
+    assert len(engine.text_batches) == 1
+    indexed = set(engine.text_batches[0])
+    for labels, _ in CLIP_DETECTORS.values():
+        assert set(labels) <= indexed
+    for labels, _ in CLIP_CATEGORY_LABELS.values():
+        assert set(labels) <= indexed
+    assert len(engine.text_batches[0]) == len(indexed)
+
+
+def test_classify_uses_index_and_returns_hf_format():
+    engine = FakeClipEngine(image_label="smoke").load()
+    labels = CLIP_DETECTORS["fire"][0]
+
+    results = engine.classify(_image(), labels)
+
+    assert len(engine.text_batches) == 1  # no text encoding per request
+    assert [res["label"] for res in results][0] == "smoke"
+    assert sum(res["score"] for res in results) == pytest.approx(1.0)
+    assert results == sorted(results, key=lambda res: res["score"], reverse=True)
+
+
+def test_unknown_labels_are_encoded_once_and_indexed():
+    engine = FakeClipEngine().load()
+
+    engine.classify(_image(), ["fire", "sinkhole"])
+    engine.classify(_image(), ["sinkhole", "fire"])
+
+    assert engine.text_batches[1:] == [["sinkhole"]]
+    assert engine.get_stats()["labels_encoded_on_demand"] == 1
+
+
+def test_group_scores_match_single_queries():
+    engine = FakeClipEngine(image_label="rat").load()
+    groups = {name: labels for name, (labels, _) in CLIP_DETECTORS.items()}
+
+    grouped = engine.classify_groups(_image(), groups)
+
+    for name, labels in groups.items():
+        single = engine.classify(_image(), labels)
+        assert [res["label"] for res in grouped[name]] == [res["label"] for res in single]
+        assert [res["score"] for res in grouped[name]] == pytest.approx([res["score"] for res in single])
+
+
+def test_accepts_envelopes_and_bytes():
+    from backend.image_envelope import decode_image_envelope
+
+    engine = FakeClipEngine().load()
+    buffer = io.BytesIO()
+    Image.new("RGBA", (32, 32)).save(buffer, format="PNG")
+
+    assert engine.classify(buffer.getvalue(), ["fire", "safe"])
+    assert engine.classify(decode_image_envelope(buffer.getvalue()), ["fire", "safe"])
+
+
+def test_classify_before_load_raises():
+    with pytest.raises(RuntimeError):
+        FakeClipEngine().classify(_image(), ["fire"])
+
+
+@pytest.mark.asyncio
+async def test_hf_detectors_use_loaded_engine_without_http():
+    engine = FakeClipEngine(image_label="fire").load()
+    client = AsyncMock()
+
+    with patch.object(hf_api_service, "local_clip_engine", engine):
+        detections = await detect_fire_clip(_image(), client=client)
+        scan = await scan_all_clip(_image(), client=client)
+
+    client.post.assert_not_called()
+    assert detections and detections[0]["label"] == "fire"
+    assert scan["fire"] == detections
+
+
+@pytest.mark.asyncio
+async def test_unified_service_local_clip_backend():
+    from backend import local_clip_service
+    from backend.unified_detection_service import DetectionBackend, UnifiedDetectionService
+
+    engine = FakeClipEngine(image_label="waterlogging").load()
+    service = UnifiedDetectionService(backend=DetectionBackend.LOCAL_CLIP)
+
+    with patch.object(local_clip_service, "local_clip_engine", engine):
+        assert await service._get_detection_backend() == "local_clip"
+        multi = await service.detect_multi(_image())
+        flooding = await service.detect_flooding(_image())
+
+    assert engine.get_stats()["requests"] == 2
+    assert [d["label"] for d in multi["flooding"]] == ["waterlogging"]
+    assert multi["vandalism"] == []
+    assert flooding == multi["flooding"]
@@ -0,0 +1,146 @@
+"""
+Tests for the precomputed MLA summary store.
+"""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.gemini_summary import _get_fallback_summary
+from backend.mla_summary_store import MLASummaryStore, mla_summary_store
+
+MLAS = [
+    {"assembly_constituency": "Kasba Peth", "mla_name": "Ravindra Dhangekar"},
+    {"assembly_constituency": "Colaba", "mla_name": "Rahul Narwekar"},
+    {"assembly_constituency": "Nagpur Central", "mla_name": "Vikas Tukaram Kumbhare"},
+]
+PINCODES = [
+    {"pincode": "411001", "district": "Pune", "assembly_constituency": "Kasba Peth"},
+    {"pincode": "411002", "district": "Pune", "assembly_constituency": "Kasba Peth"},
+    {"pincode": "400001", "district": "Mumbai City", "assembly_constituency": "Colaba"},
+    {"pincode": "440001", "district": "Nagpur", "assembly_constituency": "Nagpur Central"},
+]
+
+
+class RecordingGenerator:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.calls = []
+
+    async def __call__(self, district, assembly_constituency, mla_name):
+        self.calls.append(assembly_constituency)
+        if assembly_constituency in self.fail:
+            # What gemini_summary returns when Gemini fails
+            return _get_fallback_summary(mla_name, assembly_constituency, district)
+        return f"Summary of {mla_name} ({assembly_constituency}, {district})"
+
+
+def _write(path, rows):
+    path.write_text(json.dumps(rows))
+
+
+@pytest.fixture
+def data_files(tmp_path):
+    mla_path, pincode_path = tmp_path / "mla.json", tmp_path / "pincode.json"
+    _write(mla_path, MLAS)
+    _write(pincode_path, PINCODES)
+    return mla_path, pincode_path
+
+
+def _store(tmp_path, data_files, generator, **kwargs):
+    mla_path, pincode_path = data_files
+    store = MLASummaryStore(path=str(tmp_path / "store" / "summaries.json"), mla_path=str(mla_path),
+                            pincode_path=str(pincode_path), **kwargs)
+    store._generate, store.source = generator, "test"
+    return store
+
+
+@pytest.mark.asyncio
+async def test_every_constituency_is_precomputed_and_persisted(tmp_path, data_files):
+    generator = RecordingGenerator()
+    store = _store(tmp_path, data_files, generator)
+
+    assert store.get_summary("Pune", "Kasba Peth", "Ravindra Dhangekar") == _get_fallback_summary(
+        "Ravindra Dhangekar", "Kasba Peth", "Pune"
+    )
+    assert await store.refresh() == 3
+    assert sorted(generator.calls) == ["Colaba", "Kasba Peth", "Nagpur Central"]
+    assert store.get("Mumbai City", "Colaba", "Rahul Narwekar") == "Summary of Rahul Narwekar (Colaba, Mumbai City)"
+
+    # A restarted process serves from disk without generating again
+    restarted_generator = RecordingGenerator()
+    restarted = _store(tmp_path, data_files, restarted_generator)
+    assert await restarted.refresh() == 0
+    assert restarted_generator.calls == []
+    assert restarted.get("Pune", "Kasba Peth", "Ravindra Dhangekar").startswith("Summary of")
+
+    # Entries of another summary source are not served
+    restarted.source = "other"
+    assert restarted.get("Pune", "Kasba Peth", "Ravindra Dhangekar") is None
+
+
+@pytest.mark.asyncio
+async def test_only_changed_inputs_are_regenerated(tmp_path, data_files):
+    store = _store(tmp_path, data_files, RecordingGenerator())
+    await store.refresh()
+    assert await store.refresh() == 0  # unchanged files
+
+    mla_path, _ = data_files
+    _write(mla_path, [dict(MLAS[0], mla_name="New MLA")] + MLAS[1:])
+    generator = RecordingGenerator()
+    store._generate = generator
+
+    assert await store.refresh() == 1
+    assert generator.calls == ["Kasba Peth"]
+    assert store.get("Pune", "Kasba Peth", "Ravindra Dhangekar") is None
+    assert store.get("Pune", "Kasba Peth", "New MLA") == "Summary of New MLA (Kasba Peth, Pune)"
+    assert store.get_stats()["data_changes"] == 1
+    assert store.get_stats()["stored"] == 3
+
+
+@pytest.mark.asyncio
+async def test_fallback_summaries_are_not_stored(tmp_path, data_files):
+    generator = RecordingGenerator(fail={"Colaba"})
+    store = _store(tmp_path, data_files, generator, concurrency=1)
+
+    assert await store.refresh() == 1  # Kasba Peth; the failed Colaba round stops the pass
+    assert store.get("Mumbai City", "Colaba", "Rahul Narwekar") is None
+    assert store.get_stats()["missing"] == 2
+
+    generator.fail.clear()
+    assert await store.refresh() == 2
+    assert store.get_stats()["missing"] == 0
+
+
+def test_endpoint_serves_precomputed_summary():
+    from backend.main import app
+
+    client = TestClient(app)
+    summaries, source = mla_summary_store._summaries, mla_summary_store.source
+    try:
+        mla_summary_store.source = None
+        fallback = client.get("/api/mh/rep-contacts?pincode=411001").json()
+        assert fallback["description"] == _get_fallback_summary(
+            fallback["mla"]["name"], fallback["assembly_constituency"], fallback["district"]
+        )
+
+        from backend.mla_summary_store import summary_key
+        mla_summary_store.source = "test"
+        key = summary_key("test", fallback["district"], fallback["assembly_constituency"], fallback["mla"]["name"])
+        mla_summary_store._summaries = {key: {"summary": "Precomputed summary"}}
+        assert client.get("/api/mh/rep-contacts?pincode=411001").json()["description"] == "Precomputed summary"
+    finally:
+        mla_summary_store._summaries, mla_summary_store.source = summaries, source
+
+
+def test_failed_save_leaves_no_temp_file(tmp_path, data_files, monkeypatch):
+    store = _store(tmp_path, data_files, RecordingGenerator())
+    store._summaries = {"key": {"summary": "Summary"}}
+
+    def broken_dump(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("backend.mla_summary_store.json.dump", broken_dump)
+    with pytest.raises(OSError):
+        store.save()
+    assert list((tmp_path / "store").iterdir()) == []
@@ -0,0 +1,182 @@
+"""
+Tests for the ONNX Runtime / OpenVINO export-and-serve path.
+"""
+import os
+import sys
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from backend import model_export
+from backend.model_export import exported_model_path, export_model, load_yolo_model
+
+
+@pytest.fixture
+def export_dir(tmp_path):
+    with patch.object(model_export, "MODEL_EXPORT_DIR", str(tmp_path / "models")):
+        yield tmp_path / "models"
+
+
+@pytest.fixture
+def mock_ultralytics():
+    # ultralytics is an optional heavy dependency; only its YOLO constructor is used here
+    module = MagicMock()
+    with patch.dict(sys.modules, {"ultralytics": module}):
+        yield module
+
+
+def _torch_model(tmp_path):
+    model = MagicMock(name="torch_model")
+
+    def export(format, imgsz, dynamic):
+        path = tmp_path / f"weights.{format}"
+        path.write_bytes(b"onnx-graph")
+        return path
+
+    model.export.side_effect = export
+    return model
+
+
+def test_export_paths(export_dir):
+    assert exported_model_path("yolov8n", "onnx", False) == str(export_dir / "yolov8n.dynamic.onnx")
+    assert exported_model_path("yolov8n", "onnx", True) == str(export_dir / "yolov8n.dynamic.int8.onnx")
+    assert exported_model_path("yolov8n", "openvino", False) == str(export_dir / "yolov8n_dynamic_openvino_model")
+    with pytest.raises(ValueError):
+        exported_model_path("yolov8n", "tensorrt", False)
+
+
+def test_torch_runtime_uses_torch_model():
+    torch_model = MagicMock()
+    assert load_yolo_model("yolov8n", lambda: torch_model, task="detect", runtime="torch") is torch_model
+
+
+def test_first_load_exports_and_caches(export_dir, tmp_path, mock_ultralytics):
+    torch_model = _torch_model(tmp_path)
+    loader = MagicMock(return_value=torch_model)
+
+    model = load_yolo_model("yolov8n", loader, task="detect", runtime="onnx", int8=False)
+
+    target = str(export_dir / "yolov8n.dynamic.onnx")
+    assert os.path.exists(target)
+    mock_ultralytics.YOLO.assert_called_once_with(target, task="detect")
+    assert model is mock_ultralytics.YOLO.return_value
+    assert torch_model.export.call_count == 1
+    # Batch size stays dynamic for the inference scheduler's micro-batches
+    assert torch_model.export.call_args.kwargs["dynamic"] is True
+
+    # Later loads serve the cached export without touching the PyTorch weights
+    loader.reset_mock()
+    load_yolo_model("yolov8n", loader, task="detect", runtime="onnx", int8=False)
+    loader.assert_not_called()
+
+
+def test_export_reuses_existing_file(export_dir, tmp_path):
+    export_dir.mkdir()
+    (export_dir / "yolov8n.dynamic.onnx").write_bytes(b"cached")
+    torch_model = _torch_model(tmp_path)
+
+    assert export_model(torch_model, "yolov8n", "onnx", False) == str(export_dir / "yolov8n.dynamic.onnx")
+    torch_model.export.assert_not_called()
+
+
+def test_waiting_worker_reuses_concurrent_export(export_dir, tmp_path):
+    fcntl = pytest.importorskip("fcntl")
+    export_dir.mkdir()
+    target = export_dir / "yolov8n.dynamic.onnx"
+    torch_model = _torch_model(tmp_path)
+    results = []
+
+    # Another worker is mid-export
+    with open(f"{target}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        worker = threading.Thread(target=lambda: results.append(export_model(torch_model, "yolov8n", "onnx", False)))
+        worker.start()
+        worker.join(timeout=0.2)
+        assert worker.is_alive()
+        target.write_bytes(b"exported by the other worker")
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    worker.join(timeout=5)
+
+    assert results == [str(target)]
+    torch_model.export.assert_not_called()
+    assert target.read_bytes() == b"exported by the other worker"
+
+
+def test_failed_export_falls_back_to_torch(export_dir, mock_ultralytics):
+    torch_model = MagicMock()
+    torch_model.export.side_effect = RuntimeError("onnx not installed")
+    loader = MagicMock(return_value=torch_model)
+
+    assert load_yolo_model("yolov8n", loader, task="detect", runtime="onnx", int8=False) is torch_model
+    # The PyTorch model loaded for the export is reused, not loaded twice
+    loader.assert_called_once()
+    mock_ultralytics.YOLO.assert_not_called()
+
+
+def _detections(model, image, min_conf):
+    result = model.predict(image, verbose=False)[0]
+    return [
+        (result.names[int(box.cls[0])], float(box.conf[0]), box.xyxy[0].tolist())
+        for box in result.boxes
+        if float(box.conf[0]) >= min_conf
+    ]
+
+
+def _iou(a, b):
+    ix = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union else 0.0
+
+
+@pytest.mark.parametrize("int8, min_iou, max_conf_delta", [(False, 0.95, 0.02), (True, 0.8, 0.1)])
+def test_onnx_parity_with_torch(export_dir, int8, min_iou, max_conf_delta):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("ultralytics")
+    from PIL import Image
+    from ultralytics.utils import ASSETS
+
+    from backend.local_ml_service import GENERAL_MODEL_NAME, load_torch_general_model
+
+    torch_model = load_torch_general_model()
+    onnx_model = load_yolo_model(GENERAL_MODEL_NAME, load_torch_general_model, task="detect", runtime="onnx", int8=int8)
+
+    for fixture in ("bus.jpg", "zidane.jpg"):
+        image = Image.open(ASSETS / fixture).convert("RGB")
+        expected = _detections(torch_model, image, 0.5)
+        # Detections just above the threshold may land just below it after export
+        actual = _detections(onnx_model, image, 0.5 - max_conf_delta)
+
+        assert expected, f"no confident detections in {fixture}"
+        for label, conf, box in expected:
+            match = max(
+                (candidate for candidate in actual if candidate[0] == label),
+                key=lambda candidate: _iou(candidate[2], box),
+                default=None
+            )
+            assert match is not None, f"{fixture}: missing {label}"
+            assert _iou(match[2], box) >= min_iou
+            assert abs(match[1] - conf) <= max_conf_delta
+
+
+def test_onnx_export_predicts_micro_batches(export_dir):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("ultralytics")
+    from PIL import Image
+    from ultralytics.utils import ASSETS
+
+    from backend.inference_scheduler import INFERENCE_MAX_BATCH_SIZE
+    from backend.local_ml_service import GENERAL_MODEL_NAME, load_torch_general_model
+
+    onnx_model = load_yolo_model(GENERAL_MODEL_NAME, load_torch_general_model, task="detect", runtime="onnx", int8=False)
+    images = [Image.open(ASSETS / fixture).convert("RGB") for fixture in ("bus.jpg", "zidane.jpg")]
+    batch = (images * INFERENCE_MAX_BATCH_SIZE)[:INFERENCE_MAX_BATCH_SIZE]
+
+    results = onnx_model.predict(batch, verbose=False)
+
+    assert len(results) == len(batch)
+    for image, result in zip(batch, results):
+        single = onnx_model.predict(image, verbose=False)[0]
+        assert sorted(result.boxes.cls.tolist()) == sorted(single.boxes.cls.tolist())
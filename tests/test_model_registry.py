@@ -0,0 +1,152 @@
+"""
+Tests for the model preloading registry and the readiness endpoint.
+"""
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.model_registry import ModelRegistry, ModelSpec, ModelState
+
+
+def _registry(*specs, preload=None, warm_up=True):
+    registry = ModelRegistry(preload=preload if preload is not None else [spec.name for spec in specs], warm_up=warm_up)
+    for spec in specs:
+        registry.register(spec)
+    return registry
+
+
+def test_load_records_state_and_timings():
+    model = MagicMock()
+    warm_up = MagicMock()
+    registry = _registry(ModelSpec("general", lambda: model, warm_up))
+
+    assert registry.get_state("general") == ModelState.NOT_LOADED
+    assert registry.load("general") is True
+
+    warm_up.assert_called_once_with(model)
+    status = registry.get_status()["general"]
+    assert status["state"] == "ready"
+    assert status["load_ms"] >= 0
+    assert status["warm_up_ms"] >= 0
+    assert "rss_delta_mb" in status
+    assert registry.is_ready()
+
+
+def test_unavailable_or_failing_models_are_marked_failed():
+    def broken():
+        raise RuntimeError("weights missing")
+
+    registry = _registry(ModelSpec("garbage", lambda: None), ModelSpec("pothole", broken))
+
+    assert registry.load("garbage") is False
+    assert registry.load("pothole") is False
+    assert registry.get_state("garbage") == ModelState.FAILED
+    assert registry.get_status()["pothole"]["error"] == "weights missing"
+    # Failed models don't hold readiness back; they are reported instead
+    assert registry.is_ready()
+    assert registry.failed() == ["garbage", "pothole"]
+
+
+def test_warm_up_can_be_disabled():
+    warm_up = MagicMock()
+    registry = _registry(ModelSpec("general", MagicMock, warm_up), warm_up=False)
+
+    registry.load("general")
+
+    warm_up.assert_not_called()
+    assert registry.get_state("general") == ModelState.READY
+
+
+@pytest.mark.asyncio
+async def test_preload_loads_models_in_parallel():
+    def slow_load():
+        time.sleep(0.3)
+        return object()
+
+    registry = _registry(ModelSpec("a", slow_load), ModelSpec("b", slow_load), ModelSpec("c", slow_load))
+
+    start = time.perf_counter()
+    results = await registry.preload()
+
+    assert results == {"a": True, "b": True, "c": True}
+    assert time.perf_counter() - start < 0.8
+    assert registry.is_ready()
+
+
+@pytest.mark.asyncio
+async def test_readiness_only_considers_preloaded_models():
+    registry = _registry(ModelSpec("general", MagicMock), ModelSpec("garbage", lambda: None), preload=["general"])
+
+    assert not registry.is_ready()
+    await registry.preload()
+
+    assert registry.is_ready()
+    assert registry.get_state("garbage") == ModelState.NOT_LOADED
+    assert registry.get_status()["garbage"]["preload"] is False
+
+
+def test_ready_endpoint_and_ml_status():
+    from backend.main import app
+    from backend.routers import utility
+
+    registry = _registry(ModelSpec("general", MagicMock), ModelSpec("grievance", MagicMock), preload=["general"])
+    # No lifespan: the app's own startup preload is not run
+    client = TestClient(app)
+    with patch.object(utility, "model_registry", registry), \
+            patch.object(utility, "get_detection_status", AsyncMock(return_value={"active_backend": "local"})):
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json() == {"ready": False, "models": {"general": "not_loaded"}}
+
+        registry.load("general")
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["ready"] is True
+
+        status = client.get("/api/ml-status").json()
+
+    assert status["status"] == "ok"
+    assert status["models_loaded"] == ["general"]
+    assert status["models"]["general"]["state"] == "ready"
+    assert status["models"]["grievance"]["state"] == "not_loaded"
+    assert status["detection"] == {"active_backend": "local"}
+
+
+def test_failed_preload_is_ready_but_degraded():
+    from backend.main import app
+    from backend.routers import utility
+
+    # As on a build without torch/ultralytics: the YOLO models can never load
+    registry = _registry(ModelSpec("grievance", MagicMock), ModelSpec("pothole", lambda: None))
+    registry.load("grievance")
+    registry.load("pothole")
+
+    client = TestClient(app)
+    with patch.object(utility, "model_registry", registry), \
+            patch.object(utility, "get_detection_status", AsyncMock(return_value={"active_backend": "hf_api"})):
+        response = client.get("/ready")
+        status = client.get("/api/ml-status").json()
+
+    assert response.status_code == 200
+    assert response.json()["models"] == {"grievance": "ready", "pothole": "failed"}
+    assert status["status"] == "degraded"
+    assert status["ready"] is True
+    assert status["models_loaded"] == ["grievance"]
+
+
+@pytest.mark.asyncio
+async def test_unified_service_trusts_preloaded_general_model():
+    from backend import model_registry as registry_module
+    from backend.unified_detection_service import UnifiedDetectionService
+
+    registry = _registry(ModelSpec("general", MagicMock))
+    registry.load("general")
+
+    with patch.object(registry_module, "model_registry", registry), \
+            patch("backend.local_ml_service.get_general_model") as mock_get_model:
+        assert await UnifiedDetectionService()._check_local_available() is True
+
+    # No lazy load or dummy prediction on the request path
+    mock_get_model.assert_not_called()
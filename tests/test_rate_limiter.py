@@ -0,0 +1,88 @@
+"""
+Tests for the sliding-window rate limiter and its use on uploads and detection endpoints.
+"""
+import threading
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.rate_limiter import InMemoryRateLimitBackend, RateLimiter, detection_rate_limiter, upload_rate_limiter
+from backend.utils import check_upload_limits
+
+
+def test_sliding_window_blocks_and_recovers():
+    backend = InMemoryRateLimitBackend()
+    for i in range(5):
+        assert backend.hit("k", limit=5, window_seconds=60, now=60.0 + i).allowed
+
+    blocked = backend.hit("k", limit=5, window_seconds=60, now=70.0)
+    assert not blocked.allowed
+    assert blocked.retry_after > 0
+
+    # Halfway through the next window, half of the previous window's 5 hits still count
+    assert backend.hit("k", limit=5, window_seconds=60, now=150.0).allowed
+    # Two windows later the old hits no longer count at all
+    assert backend.hit("k", limit=5, window_seconds=60, now=250.0).remaining == 4
+
+
+def test_retry_after_is_when_request_would_pass():
+    backend = InMemoryRateLimitBackend()
+    for _ in range(4):
+        backend.hit("k", limit=4, window_seconds=60, now=60.0)
+
+    blocked = backend.hit("k", limit=4, window_seconds=60, now=130.0)
+    assert not blocked.allowed
+    assert backend.hit("k", limit=4, window_seconds=60, now=130.0 + blocked.retry_after + 0.01).allowed
+
+
+def test_memory_is_bounded_per_key():
+    backend = InMemoryRateLimitBackend(max_keys=3)
+    for n in range(10):
+        backend.hit(f"client-{n}", limit=1, window_seconds=60, now=0.0)
+    assert len(backend._windows) == 3
+
+
+def test_concurrent_hits_never_exceed_limit():
+    limiter = RateLimiter("test", limit=100, window_seconds=3600, backend=InMemoryRateLimitBackend())
+    allowed = []
+
+    def worker():
+        allowed.append(sum(limiter.hit("same-client").allowed for _ in range(50)))
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sum(allowed) == 100
+
+
+def test_upload_limits_raise_429(monkeypatch):
+    monkeypatch.setattr(upload_rate_limiter, "backend", InMemoryRateLimitBackend())
+    for _ in range(2):
+        check_upload_limits("citizen@example.com", 2)
+
+    with pytest.raises(HTTPException) as exc_info:
+        check_upload_limits("citizen@example.com", 2)
+    assert exc_info.value.status_code == 429
+    assert "Maximum 2 uploads per hour" in exc_info.value.detail
+    assert int(exc_info.value.headers["Retry-After"]) >= 1
+
+    # Other identifiers are unaffected
+    check_upload_limits("203.0.113.7", 2)
+
+
+def test_detection_endpoints_are_rate_limited(monkeypatch):
+    monkeypatch.setattr(detection_rate_limiter, "backend", InMemoryRateLimitBackend())
+    monkeypatch.setattr(detection_rate_limiter, "limit", 2)
+
+    # Invalid bodies keep the test offline; the limit is enforced before validation
+    client = TestClient(app)
+    statuses = [client.post("/api/analyze-urgency", json={}).status_code for _ in range(3)]
+
+    assert statuses == [422, 422, 429]
+    response = client.post("/api/analyze-urgency", json={})
+    assert "Retry-After" in response.headers
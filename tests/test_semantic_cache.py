@@ -0,0 +1,144 @@
+"""
+Tests for the similarity-keyed Gemini response cache.
+"""
+import json
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from backend import ai_service
+from backend.semantic_cache import SemanticCache, normalize_text
+
+
+class CountingModel:
+    def __init__(self, text):
+        self.text = text
+        self.prompts = []
+
+    async def generate_content_async(self, prompt):
+        self.prompts.append(prompt)
+        return SimpleNamespace(text=self.text)
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    ai_service.chat_cache.clear()
+    ai_service.action_plan_cache.clear()
+    yield
+    ai_service.chat_cache.clear()
+    ai_service.action_plan_cache.clear()
+
+
+def test_normalization_drops_case_punctuation_and_fillers():
+    assert normalize_text("How do I report a pothole??") == normalize_text("how to report pothole")
+    assert normalize_text("गड्ढे की शिकायत कैसे करें?") == "गड्ढे की शिकायत कैसे करें"
+
+
+def test_reworded_query_hits_and_different_query_misses():
+    cache = SemanticCache("test", threshold=0.85)
+    cache.set("how to report pothole?", "Use the pothole detector.")
+
+    assert cache.get("How do I report a pothole") == "Use the pothole detector."
+    assert cache.get("how to pay property tax") is None
+    assert cache.get("how to report garbage") is None
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["near_hits"] == 0  # identical after normalization
+    assert stats["misses"] == 2
+
+
+def test_partitions_are_isolated():
+    cache = SemanticCache("test", threshold=0.85)
+    cache.set("who is my MLA", "English answer", partition="en")
+
+    assert cache.get("who is my MLA", partition="hi") is None
+    assert cache.get("who is my MLA", partition="en") == "English answer"
+
+
+def test_entries_expire_and_size_is_bounded():
+    cache = SemanticCache("test", threshold=0.85, ttl=60, max_entries=2)
+    cache.set("streetlight broken", 1)
+    cache.set("water supply timings", 2)
+    cache.get("streetlight broken")  # most recently used now
+    cache.set("garbage collection schedule", 3)
+
+    assert cache.get("water supply timings") is None
+    assert cache.get("streetlight broken") == 1
+    assert cache.get_stats()["evictions"] == 1
+
+    with patch("backend.semantic_cache.time.time", return_value=time.time() + 61):
+        assert cache.get("streetlight broken") is None
+    assert cache.get_stats()["expirations"] == 1
+    assert cache.get_stats()["entries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_chat_reuses_answer_for_reworded_query():
+    model = CountingModel("Use the Report Issue button.")
+    with patch.object(ai_service, "_get_gemini_model", return_value=model):
+        first = await ai_service.chat_with_civic_assistant("How do I report a pothole?")
+        second = await ai_service.chat_with_civic_assistant("how to report pothole")
+        await ai_service.chat_with_civic_assistant("how to report pothole", language="hi")
+
+    assert first == second == "Use the Report Issue button."
+    assert len(model.prompts) == 2
+
+
+@pytest.mark.asyncio
+async def test_action_plan_served_for_repeated_report():
+    plan = {"whatsapp": "w", "email_subject": "s", "email_body": "b", "x_post": "x"}
+    model = CountingModel(json.dumps(plan))
+    description = "Large pothole in front of the municipal school on Station Road causing accidents"
+    with patch.object(ai_service, "_get_gemini_model", return_value=model):
+        await ai_service.generate_action_plan(description, "Pothole")
+        cached = await ai_service.generate_action_plan(description.upper() + "!", "pothole")
+        await ai_service.generate_action_plan(description, "Streetlight")
+        await ai_service.generate_action_plan("Pothole near the bus depot on Ring Road", "Pothole")
+
+    assert cached == plan
+    assert len(model.prompts) == 3
+
+
+@pytest.mark.asyncio
+async def test_action_plan_not_reused_for_another_locality():
+    plan = {"whatsapp": "w", "email_subject": "s", "email_body": "b", "x_post": "x"}
+    model = CountingModel(json.dumps(plan))
+    template = ("Garbage has been dumped on the footpath near {} bus stop for two weeks. The pile blocks "
+                "pedestrians, smells terrible, attracts stray dogs and nobody from the ward office has come")
+    hits = ai_service.action_plan_cache.get_stats()["hits"]
+    with patch.object(ai_service, "_get_gemini_model", return_value=model):
+        await ai_service.generate_action_plan(template.format("Shivaji Nagar"), "Garbage")
+        await ai_service.generate_action_plan(template.format("Kothrud"), "Garbage")
+        plans = await ai_service.generate_action_plans_batch([
+            {"description": template.format("Aundh"), "category": "Garbage"}
+        ])
+
+    # Batch answer is not an array here, so Aundh also gets a per-issue prompt
+    assert len(model.prompts) == 4
+    assert "Kothrud" in model.prompts[1]
+    assert "Aundh" in model.prompts[2]
+    assert plans == [plan]
+    assert ai_service.action_plan_cache.get_stats()["hits"] == hits
+
+
+@pytest.mark.asyncio
+async def test_batch_only_prompts_for_uncached_issues():
+    cached_plan = {"whatsapp": "cached", "email_subject": "s", "email_body": "b", "x_post": "x"}
+    ai_service.action_plan_cache.set("Overflowing garbage bin at the market", cached_plan, ("en", "garbage"))
+    fresh = [{"id": n, "whatsapp": f"fresh {n}", "email_subject": "s", "email_body": "b", "x_post": "x"} for n in (1, 2)]
+    model = CountingModel(json.dumps(fresh))
+
+    issues = [
+        {"description": "Broken streetlight on Lake Road", "category": "Streetlight"},
+        {"description": "Overflowing garbage bin at the market", "category": "Garbage"},
+        {"description": "Sewage overflowing near the temple", "category": "Sewage"},
+    ]
+    with patch.object(ai_service, "_get_gemini_model", return_value=model):
+        plans = await ai_service.generate_action_plans_batch(issues)
+
+    assert [plan["whatsapp"] for plan in plans] == ["fresh 1", "cached", "fresh 2"]
+    assert len(model.prompts) == 1
+    assert "Overflowing garbage bin" not in model.prompts[0]
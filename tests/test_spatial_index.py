@@ -0,0 +1,88 @@
+"""
+Tests for the in-memory spatial index used for nearby-issue queries.
+"""
+import datetime
+
+from backend.models import Issue
+from backend.spatial_index import SpatialIndex
+from backend.spatial_utils import find_nearby_issues
+
+
+def make_issue(issue_id, lat, lon, status="open", upvotes=0, description="Pothole on Main Street"):
+    return Issue(
+        id=issue_id,
+        description=description,
+        category="Road",
+        latitude=lat,
+        longitude=lon,
+        upvotes=upvotes,
+        status=status,
+        created_at=datetime.datetime(2024, 1, 1)
+    )
+
+
+def test_query_matches_haversine_loop():
+    issues = [
+        make_issue(1, 19.0760, 72.8777),
+        make_issue(2, 19.0761, 72.8778),   # ~15m away
+        make_issue(3, 19.0860, 72.8877),   # ~1.5km away
+        make_issue(4, 19.0760, 72.8777, status="resolved"),
+        make_issue(5, None, None),
+    ]
+    index = SpatialIndex()
+    index.load(issues)
+
+    expected = find_nearby_issues(
+        [i for i in issues if i.status == "open"], 19.0760, 72.8777, radius_meters=50
+    )
+    result = index.query_radius(19.0760, 72.8777, 50)
+
+    assert index.is_warm
+    assert [row.id for row, _ in result] == [issue.id for issue, _ in expected] == [1, 2]
+    # Resolved and coordinate-less issues are not kept in memory
+    assert index.get(4) is None and index.get(5) is None
+
+
+def test_query_across_cell_boundaries():
+    index = SpatialIndex(cell_degrees=0.0001)
+    index.load([make_issue(1, 19.07600, 72.87770), make_issue(2, 19.07630, 72.87790)])
+
+    result = index.query_radius(19.07615, 72.87780, 50)
+    assert sorted(row.id for row, _ in result) == [1, 2]
+
+
+def test_incremental_updates():
+    index = SpatialIndex()
+    index.load([])
+
+    index.upsert(make_issue(1, 19.0760, 72.8777, upvotes=1))
+    assert [row.id for row, _ in index.query_radius(19.0760, 72.8777, 50)] == [1]
+
+    index.increment_upvotes(1, 2)
+    assert index.get(1).upvotes == 3
+
+    index.update_status(1, "verified")
+    assert index.query_radius(19.0760, 72.8777, 50) == []
+    assert [row.id for row, _ in index.query_radius(19.0760, 72.8777, 50, status="verified")] == [1]
+
+    index.update_status(1, "resolved")
+    assert index.get(1) is None
+    assert len(index) == 0
+
+
+def test_long_descriptions_keep_truncation_marker():
+    index = SpatialIndex()
+    index.load([make_issue(1, 19.0760, 72.8777, description="x" * 500)])
+
+    entry = index.get(1)
+    assert len(entry.description) > 100
+    assert entry.description[:100] == "x" * 100
+
+
+def test_reset_marks_index_cold():
+    index = SpatialIndex()
+    index.load([make_issue(1, 19.0760, 72.8777)])
+    index.reset()
+
+    assert not index.is_warm
+    assert len(index) == 0
@@ -0,0 +1,71 @@
+"""
+Tests for the vectorized NumPy distance kernel in spatial_utils.
+"""
+import random
+
+import numpy as np
+
+from backend.models import Issue
+from backend.spatial_utils import (
+    haversine_distance,
+    haversine_distances,
+    nearest_within_radius,
+    find_nearby_issues,
+    calculate_cluster_centroid
+)
+
+
+def test_vectorized_matches_scalar():
+    random.seed(42)
+    lats = [19.0760 + random.uniform(-0.05, 0.05) for _ in range(500)]
+    lons = [72.8777 + random.uniform(-0.05, 0.05) for _ in range(500)]
+
+    vectorized = haversine_distances(19.0760, 72.8777, lats, lons)
+    scalar = [haversine_distance(19.0760, 72.8777, lat, lon) for lat, lon in zip(lats, lons)]
+
+    assert np.allclose(vectorized, scalar, rtol=1e-9, atol=1e-6)
+
+
+def test_nearest_within_radius_top_k():
+    lats = np.array([19.0760, 19.0770, 19.0761, 19.0900, 19.0762])
+    lons = np.array([72.8777, 72.8777, 72.8777, 72.8777, 72.8777])
+
+    indices, distances = nearest_within_radius(19.0760, 72.8777, lats, lons, 200.0)
+    assert indices.tolist() == [0, 2, 4, 1]
+    assert np.all(np.diff(distances) >= 0)
+
+    indices, distances = nearest_within_radius(19.0760, 72.8777, lats, lons, 200.0, limit=2)
+    assert indices.tolist() == [0, 2]
+    assert len(distances) == 2
+
+
+def test_nearest_within_radius_empty():
+    indices, distances = nearest_within_radius(19.0760, 72.8777, [], [], 50.0)
+    assert len(indices) == 0 and len(distances) == 0
+
+
+def test_find_nearby_issues_limit_and_missing_coordinates():
+    issues = [
+        Issue(id=1, latitude=19.0760, longitude=72.8777),
+        Issue(id=2, latitude=None, longitude=None),
+        Issue(id=3, latitude=19.0761, longitude=72.8778),
+        Issue(id=4, latitude=19.07605, longitude=72.87775),
+    ]
+
+    nearby = find_nearby_issues(issues, 19.0760, 72.8777, radius_meters=50, limit=2)
+
+    assert [issue.id for issue, _ in nearby] == [1, 4]
+    assert all(isinstance(distance, float) for _, distance in nearby)
+
+
+def test_cluster_centroid():
+    cluster = [
+        Issue(id=1, latitude=19.0, longitude=72.0),
+        Issue(id=2, latitude=19.2, longitude=72.4),
+        Issue(id=3, latitude=None, longitude=None),
+    ]
+
+    lat, lon = calculate_cluster_centroid(cluster)
+
+    assert abs(lat - 19.1) < 1e-9
+    assert abs(lon - 72.2) < 1e-9
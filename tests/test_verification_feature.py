@@ -16,7 +16,7 @@ def test_manual_verification_upvote(client):
     mock_issue = MagicMock()
     mock_issue.id = 1
     mock_issue.status = "open"
-    mock_issue.upvotes = 2 # Initial upvotes
+    mock_issue.upvotes = 3 # Initial upvotes; +2 reaches the auto-verify threshold
 
     # We need to mock the query chain: db.query().filter().first()
     mock_db.query.return_value.filter.return_value.first.return_value = mock_issue
@@ -89,7 +89,7 @@ def test_manual_verification_upvote(client):
 @patch("backend.routers.issues.verify_resolution_vqa", new_callable=AsyncMock)
 def test_ai_verification_resolved(mock_vqa, mock_validate, client):
     # Setup mocks
-    mock_validate.return_value = None
+    mock_validate.return_value = MagicMock(jpeg_bytes=b"normalized-jpeg")
     mock_vqa.return_value = {
         "answer": "no",
         "confidence": 0.95
@@ -119,6 +119,8 @@ def test_ai_verification_resolved(mock_vqa, mock_validate, client):
         data = response.json()
         assert data["is_resolved"] == True
         assert data["ai_answer"] == "no"
+        # The VQA model gets the normalized JPEG, not the raw upload
+        assert mock_vqa.call_args.args[0] == b"normalized-jpeg"
 
     finally:
         app.dependency_overrides = {}
@@ -0,0 +1,197 @@
+"""
+Tests for the write-behind vote accumulator.
+"""
+import datetime
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.database import Base, get_db
+from backend.main import app
+from backend.models import Issue
+from backend.vote_accumulator import VoteAccumulator, vote_accumulator
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine, tables=[Issue.__table__])
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    yield factory
+    engine.dispose()
+
+
+def add_issue(db, upvotes=0, status="open"):
+    issue = Issue(
+        description="Overflowing drain",
+        category="Water",
+        status=status,
+        upvotes=upvotes,
+        created_at=datetime.datetime(2024, 1, 1)
+    )
+    db.add(issue)
+    db.commit()
+    db.refresh(issue)
+    return issue
+
+
+def test_flush_applies_all_deltas_in_one_batch(session_factory):
+    db = session_factory()
+    a = add_issue(db, upvotes=None)
+    b = add_issue(db, upvotes=10)
+    accumulator = VoteAccumulator(max_pending=1000, session_factory=session_factory)
+
+    for _ in range(3):
+        accumulator.add(a.id)
+    accumulator.add(b.id, 2)
+    assert accumulator.effective_upvotes(a.id, None) == 3
+
+    assert accumulator.flush() == 2
+
+    db.expire_all()
+    assert (a.upvotes, b.upvotes) == (3, 12)
+    stats = accumulator.get_stats()
+    assert stats["flushes"] == 1
+    assert stats["votes_flushed"] == 5
+    assert stats["pending_votes"] == 0
+    db.close()
+
+
+def test_concurrent_votes_are_not_lost(session_factory):
+    db = session_factory()
+    issue = add_issue(db)
+    accumulator = VoteAccumulator(max_pending=50, session_factory=session_factory)
+
+    def vote():
+        for _ in range(100):
+            accumulator.add(issue.id)
+
+    threads = [threading.Thread(target=vote) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    accumulator.flush()
+
+    db.expire_all()
+    assert issue.upvotes == 800
+    assert accumulator.get_stats()["forced_flushes"] > 0
+    db.close()
+
+
+def test_failed_flush_keeps_votes():
+    def broken_session():
+        raise RuntimeError("database unavailable")
+
+    accumulator = VoteAccumulator(session_factory=broken_session)
+    accumulator.add(7, 3)
+
+    assert accumulator.flush() == 0
+    assert accumulator.pending(7) == 3
+    assert accumulator.get_stats()["flush_failures"] == 1
+
+
+def test_take_removes_pending_delta():
+    accumulator = VoteAccumulator()
+    accumulator.add(1, 2)
+    accumulator.add(1)
+
+    assert accumulator.take(1) == 3
+    assert accumulator.pending(1) == 0
+    assert accumulator.get_stats()["pending_votes"] == 0
+
+
+def test_endpoints_count_pending_votes_and_auto_verify(session_factory):
+    db = session_factory()
+    issue = add_issue(db, upvotes=1)
+    vote_accumulator.reset()
+
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        client = TestClient(app)
+        first = client.post(f"/api/issues/{issue.id}/vote")
+        second = client.post(f"/api/issues/{issue.id}/vote")
+        verify = client.post(f"/api/issues/{issue.id}/verify")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert first.json()["upvotes"] == 2
+    assert second.json()["upvotes"] == 3
+    # 3 + 2 reaches the threshold, so the pending votes are written with the status change
+    assert verify.json()["upvotes"] == 5
+
+    db.expire_all()
+    assert issue.status == "verified"
+    assert issue.upvotes == 5
+    assert vote_accumulator.pending(issue.id) == 0
+    db.close()
+
+
+def test_failed_verification_commit_keeps_pending_votes(session_factory):
+    db = session_factory()
+    issue = add_issue(db, upvotes=3)
+    vote_accumulator.reset()
+    vote_accumulator.add(issue.id, 1)
+
+    def failing_commit():
+        raise RuntimeError("database is locked")
+
+    db.commit = failing_commit
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        response = TestClient(app).post(f"/api/issues/{issue.id}/verify")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 500
+    # The drained delta is back for the flusher, and nothing was half-written
+    assert vote_accumulator.pending(issue.id) == 1
+    db.expire_all()
+    assert issue.status == "open"
+    assert issue.upvotes == 3
+    vote_accumulator.reset()
+    db.close()
+
+
+def test_forced_flush_still_reports_the_full_count(session_factory):
+    db = session_factory()
+    issue = add_issue(db, upvotes=4)
+    accumulator = VoteAccumulator(max_pending=1, session_factory=session_factory)
+
+    # Every vote is written through; the caller's row read (4) plus the result is the new total
+    assert accumulator.add(issue.id) == 1
+    assert accumulator.pending(issue.id) == 0
+    db.expire_all()
+    assert issue.upvotes == 5
+    assert accumulator.add(issue.id, 2) == 2
+    db.close()
+
+
+def test_vote_endpoint_count_with_write_through(session_factory, monkeypatch):
+    db = session_factory()
+    issue = add_issue(db, upvotes=4)
+    vote_accumulator.reset()
+    monkeypatch.setattr(vote_accumulator, "max_pending", 1)
+    monkeypatch.setattr(vote_accumulator, "_session_factory", session_factory)
+
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        client = TestClient(app)
+        first = client.post(f"/api/issues/{issue.id}/vote")
+        second = client.post(f"/api/issues/{issue.id}/vote")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert first.json()["upvotes"] == 5
+    assert second.json()["upvotes"] == 6
+    db.expire_all()
+    assert issue.upvotes == 6
+    db.close()